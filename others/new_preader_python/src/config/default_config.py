@@ -43,6 +43,11 @@ DEFAULT_CONFIG = {
     # 高级设置
     "advanced": {
         "cache_size": 100,  # 缓存大小(MB)
+        "cache_budgets_mb": {  # 各内存缓存命名空间的容量预算(MB)
+            "parse": 128,
+            "paginate": 256,
+            "parsing_result": 64,
+        },
         "language": "zh_CN",  # 界面语言
         "book_directories": [],  # 书籍目录列表
         "statistics_enabled": True,  # 是否启用阅读统计
@@ -53,6 +58,24 @@ DEFAULT_CONFIG = {
         "password_enabled": False,  # 是否启用启动密码
         "password": "",  # 启动密码（明文存储）
         "auto_vacuum_enabled": True,  # 是否启用数据库自动清理
+        "parse_cache_disk_mb": 512,  # 持久化解析缓存磁盘预算(MB)
+        "parse_cache_hash_content": False,  # 解析缓存是否记录内容哈希（文件被touch/复制后仍可命中）
+        "kindle_cache_disk_mb": 512,  # MOBI/AZW解包缓存磁盘预算(MB)
+        "crawler_max_concurrent_novels": 3,  # 同时爬取的小说数量
+        "crawler_host_concurrency": 4,  # 每个站点（主机）的并发请求数
+        "crawler_host_rate": 2.0,  # 每个站点的请求速率（次/秒），遇到429/5xx时自动降速退避
+        "crawler_host_burst": 4,  # 每个站点允许的突发请求数
+        "crawler_host_limits": {},  # 按主机覆盖限流配置，如 {"www.example.com": {"concurrency": 2, "rate": 0.5, "burst": 1}}
+        "fingerprint_workers": 0,  # 重复检测指纹计算的进程数（0表示按CPU核数）
+        "fingerprint_chunk_size": 32,  # 每个进程每批计算的书籍数
+        "fingerprint_process_min_books": 200,  # 待计算书籍少于该数量时在当前进程内计算
+        "index_workers": 0,  # 全文索引解析书籍的进程数（0表示CPU核数减一）
+        "index_process_min_books": 50,  # 待索引书籍少于该数量时在当前进程内解析
+        "index_batch_blocks": 4000,  # 每个写入事务的索引块数（每块约2000字符）
+        "pdf_workers": 0,  # PDF按页区间提取文本的进程数（0表示CPU核数）
+        "pdf_process_min_pages": 64,  # 页数少于该值的PDF在当前线程内提取
+        "duplicate_warning_on_import": True,  # 导入书籍后提示可能与书库中书籍重复的新书
+        "chapter_patterns": [],  # 自定义章节标题正则（匹配行首，作为一级标题），与内置模式合并使用
     },
     
     # 翻译设置
@@ -146,6 +169,7 @@ DEFAULT_CONFIG = {
         "port_range_min": 10000,  # 随机端口范围最小值
         "port_range_max": 60000,  # 随机端口范围最大值
         "max_retry_attempts": 10,  # 端口冲突时最大重试次数
+        "progress_flush_interval": 2.0,  # 阅读进度写入数据库的合并间隔(秒，0表示每次保存都立即写入)
     }
 }
 def get_available_themes():
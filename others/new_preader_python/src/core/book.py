@@ -10,6 +10,8 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional, Set, Tuple
 
 from src.utils.cache_manager import parse_cache, make_key
+from src.utils.parse_result_store import get_parse_result_store, get_file_identity
+from src.utils.text_source import MmapTextSource
 from src.utils import file_utils as _fu
 
 from src.config.default_config import SUPPORTED_FORMATS
@@ -17,6 +19,9 @@ from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 文本文件一次性解码的上限，超过时只加载开头部分（阅读界面仍使用全文字符串）
+MAX_TEXT_FILE_BYTES = 100 * 1024 * 1024
+
 class Book:
     """书籍类，表示一本书籍及其元数据"""
     
@@ -357,30 +362,16 @@ class Book:
         if self._content_loaded and self._content is not None:
             return self._content
 
-        # 优先命中解析缓存（避免重复解析）
-        try:
-            # 以文件哈希 + 格式 + 密码（若有）作为键
-            file_hash = ""
-            if self.path and os.path.exists(self.path):
-                try:
-                    file_hash = _fu.calculate_file_sha256(self.path)
-                except Exception:
-                    # 回退为修改时间+大小
-                    stat = os.stat(self.path)
-                    file_hash = f"{stat.st_mtime}-{stat.st_size}"
-            cache_key = make_key("parse", self.path, self.format, bool(self.password), file_hash)
-            cached = parse_cache.get(cache_key)
-            if isinstance(cached, dict) and "content" in cached:
-                result = cached
-                self._content = str(result.get("content", "") or "")
-                # 章节（若有）
-                if isinstance(result.get("chapters"), list):
-                    self.chapters = result["chapters"]
-                self._content_loaded = True
-                self.word_count = len(self._content or "")
-                return self._content
-        except Exception:
-            pass
+        # 优先命中解析缓存（内存 -> 磁盘），避免重复解析
+        cached = self._load_cached_parse()
+        if cached is not None:
+            self._content = str(cached.get("content", "") or "")
+            # 章节（若有）
+            if isinstance(cached.get("chapters"), list):
+                self.chapters = cached["chapters"]
+            self._content_loaded = True
+            self.word_count = len(self._content or "")
+            return self._content
         
         # 如果是空路径的默认书籍，返回空内容
         if not self.path:
@@ -394,18 +385,8 @@ class Book:
             # 文本文件直接读取（加入缓存）
             text = self._read_text_file()
             self._content = text
-            try:
-                file_hash = ""
-                if self.path and os.path.exists(self.path):
-                    try:
-                        file_hash = _fu.calculate_file_sha256(self.path)
-                    except Exception:
-                        stat = os.stat(self.path)
-                        file_hash = f"{stat.st_mtime}-{stat.st_size}"
-                cache_key = make_key("parse", self.path, self.format, bool(self.password), file_hash)
-                parse_cache.set(cache_key, {"content": text, "chapters": []}, ttl_seconds=1800)
-            except Exception:
-                pass
+            # 文本文件读取成本低，只放内存缓存，不落盘
+            self._save_parse_result(text, [], persist=False)
         else:
             # 其他格式使用解析器
             self._content = self._parse_with_parser()
@@ -418,8 +399,68 @@ class Book:
         
         return self._content
     
+    def _parse_cache_key(self, with_password: Optional[bool] = None) -> Optional[Tuple[Any, ...]]:
+        """
+        构建解析缓存键：以文件身份（大小 + mtime_ns + inode）识别文件变化，
+        只需一次 stat，无需对整个文件计算哈希
+        """
+        identity = get_file_identity(self.path) if self.path else None
+        if identity is None:
+            return None
+        if with_password is None:
+            with_password = bool(self.password)
+        return make_key("parse", self.path, self.format, with_password, *identity)
+    
+    def _load_cached_parse(self) -> Optional[Dict[str, Any]]:
+        """依次从内存缓存和持久化缓存读取解析结果"""
+        try:
+            cache_key = self._parse_cache_key()
+            if cache_key is None:
+                return None
+            cached = parse_cache.get(cache_key)
+            if isinstance(cached, dict) and "content" in cached:
+                return cached
+            if self.format in ['.txt', '.md']:
+                return None
+            store = get_parse_result_store()
+            cached = store.get(self.path, self.format, "password" if self.password else "") if store else None
+            if isinstance(cached, dict) and "content" in cached:
+                # 回填内存缓存
+                parse_cache.set(cache_key, cached, ttl_seconds=1800)
+                return cached
+        except Exception as e:
+            logger.debug(f"读取解析缓存失败: {e}")
+        return None
+    
+    def _save_parse_result(self, content: str, chapters: List[Dict[str, Any]],
+                           with_password: Optional[bool] = None, persist: bool = True) -> None:
+        """将解析结果写入内存缓存，并（可选）写入持久化缓存"""
+        try:
+            cache_key = self._parse_cache_key(with_password)
+            if cache_key is None:
+                return
+            result = {"content": content, "chapters": chapters}
+            parse_cache.set(cache_key, result, ttl_seconds=1800)
+            if persist:
+                store = get_parse_result_store()
+                if store:
+                    use_password = bool(self.password) if with_password is None else with_password
+                    store.put(self.path, self.format, result, "password" if use_password else "")
+        except Exception as e:
+            logger.debug(f"写入解析缓存失败: {e}")
+    
+    def release_content(self) -> None:
+        """释放已加载的内容（文件被改写后调用，下次读取时重新加载）"""
+        self._content = None
+        self._content_loaded = False
+    
     def _read_text_file(self) -> str:
-        """读取文本文件，支持多种编码自动检测"""
+        """
+        读取文本文件：根据文件开头的样本检测一次编码，再整体解码一次，解码后立即关闭映射和文件句柄
+
+        阅读界面、分页器和书内搜索都通过 get_content 使用全文字符串，因此这里仍会解码整个文件；
+        超过 MAX_TEXT_FILE_BYTES 的文件只解码开头部分，避免一次性占用过多内存
+        """
         # 显示加载动画
         self._show_loading_animation("正在读取文件...")
 
@@ -427,206 +468,27 @@ class Book:
             # 首先检查文件是否存在
             if not os.path.exists(self.path):
                 # logger.error(f"书籍文件不存在: {self.path}")
-                self._hide_loading_animation()
-                return f"书籍文件不存在: {self.path}"
-
-            # 检查文件大小，如果超过阈值（如100MB）则使用流式处理
-            file_size = os.path.getsize(self.path)
-            large_file_threshold = 100 * 1024 * 1024  # 100MB
-
-            if file_size > large_file_threshold:
-                logger.info(f"检测到大文件 ({file_size} bytes)，使用流式处理: {self.path}")
-                return self._read_large_text_file()
-
-            # 尝试多种编码读取文件
-            encodings = ['utf-8', 'gbk', 'gb2312', 'big5', 'utf-16', 'ascii']
-
-            for encoding in encodings:
-                try:
-                    with open(self.path, 'r', encoding=encoding) as f:
-                        content = f.read()
-                    logger.debug(f"成功使用 {encoding} 编码读取文件: {self.path}")
-
-                    # 隐藏加载动画
-                    self._hide_loading_animation()
-                    return content
-
-                except (UnicodeDecodeError, UnicodeError):
-                    logger.debug(f"使用 {encoding} 编码读取文件失败，尝试下一种编码")
-                    continue
-                except FileNotFoundError:
-                    # logger.error(f"书籍文件不存在: {self.path}")
-                    self._hide_loading_animation()
-                    return f"书籍文件不存在: {self.path}"
-                except Exception as e:
-                    logger.error(f"读取书籍内容时出错 (编码: {encoding}): {e}")
-                    continue
-
-            # 如果所有编码都失败，尝试二进制读取并使用chardet检测编码
-            try:
-                import chardet
-                with open(self.path, 'rb') as f:
-                    raw_data = f.read()
-
-                # 检测编码
-                detected = chardet.detect(raw_data)
-                detected_encoding = detected.get('encoding')
-                if detected_encoding:
-                    content = raw_data.decode(detected_encoding, errors='ignore')
-                    logger.debug(f"使用检测编码 {detected_encoding} 成功读取文件")
-
-                    # 隐藏加载动画
-                    self._hide_loading_animation()
-                    return content
-
-            except FileNotFoundError:
-                # logger.error(f"书籍文件不存在: {self.path}")
-                self._hide_loading_animation()
                 return f"书籍文件不存在: {self.path}"
-            except ImportError:
-                logger.warning("chardet 库未安装，无法进行编码检测")
-            except Exception as e:
-                logger.error(f"使用编码检测读取文件失败: {e}")
 
-            # 最后的备用方案：使用utf-8并忽略错误
             try:
-                with open(self.path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                logger.warning(f"使用 UTF-8 编码并忽略错误读取文件，可能存在字符丢失")
-
-                # 隐藏加载动画
-                self._hide_loading_animation()
+                with MmapTextSource(self.path) as source:
+                    if source.byte_size > MAX_TEXT_FILE_BYTES:
+                        logger.warning(f"文件过大 ({source.byte_size} bytes)，只加载开头约 "
+                                       f"{MAX_TEXT_FILE_BYTES // (1024 * 1024)}MB: {self.path}")
+                        content = source.read_all(MAX_TEXT_FILE_BYTES)
+                    else:
+                        content = source.read_all()
+                    logger.debug(f"成功使用 {source.encoding} 编码读取文件: {self.path}")
                 return content
-
             except FileNotFoundError:
-                # logger.error(f"书籍文件不存在: {self.path}")
-                self._hide_loading_animation()
                 return f"书籍文件不存在: {self.path}"
             except Exception as e:
-                logger.error(f"所有编码尝试都失败: {e}")
+                logger.error(f"读取书籍内容时出错: {e}")
                 return f"无法读取文件 {self.path}，请检查文件是否损坏或编码不支持"
 
         finally:
             # 确保在任何情况下都隐藏加载动画
             self._hide_loading_animation()
-
-    def _read_large_text_file(self) -> str:
-        """流式读取大文件，避免一次性加载到内存"""
-        # 显示加载动画
-        self._show_loading_animation("正在流式读取大文件...")
-
-        try:
-            # 首先检查文件是否存在
-            if not os.path.exists(self.path):
-                self._hide_loading_animation()
-                return f"书籍文件不存在: {self.path}"
-
-            # 尝试多种编码流式读取文件
-            encodings = ['utf-8', 'gbk', 'gb2312', 'big5', 'utf-16', 'ascii']
-            chunk_size = 8192  # 8KB 每次读取块大小
-            max_content_size = 10 * 1024 * 1024  # 限制内容大小为10MB，避免内存溢出
-
-            for encoding in encodings:
-                try:
-                    content_parts = []
-                    total_size = 0
-
-                    with open(self.path, 'r', encoding=encoding, errors='ignore') as f:
-                        while total_size < max_content_size:
-                            chunk = f.read(chunk_size)
-                            if not chunk:
-                                break  # 文件读取完毕
-
-                            content_parts.append(chunk)
-                            total_size += len(chunk.encode('utf-8', errors='ignore'))
-
-                    content = ''.join(content_parts)
-                    logger.debug(f"成功使用 {encoding} 编码流式读取大文件: {self.path}")
-
-                    # 隐藏加载动画
-                    self._hide_loading_animation()
-                    return content
-
-                except (UnicodeDecodeError, UnicodeError):
-                    logger.debug(f"使用 {encoding} 编码流式读取大文件失败，尝试下一种编码")
-                    continue
-                except FileNotFoundError:
-                    self._hide_loading_animation()
-                    return f"书籍文件不存在: {self.path}"
-                except Exception as e:
-                    logger.error(f"流式读取大文件时出错 (编码: {encoding}): {e}")
-                    continue
-
-            # 如果所有编码都失败，尝试二进制读取并使用chardet检测编码
-            try:
-                import chardet
-                with open(self.path, 'rb') as f:
-                    # 只读取文件开头部分来检测编码
-                    sample_data = f.read(1024 * 1024)  # 读取1MB样本
-
-                # 检测编码
-                detected = chardet.detect(sample_data)
-                detected_encoding = detected.get('encoding')
-                if detected_encoding:
-                    # 使用检测到的编码重新打开文件进行流式读取
-                    with open(self.path, 'r', encoding=detected_encoding, errors='ignore') as f:
-                        content_parts = []
-                        total_size = 0
-
-                        while total_size < max_content_size:
-                            chunk = f.read(chunk_size)
-                            if not chunk:
-                                break  # 文件读取完毕
-
-                            content_parts.append(chunk)
-                            total_size += len(chunk.encode('utf-8', errors='ignore'))
-
-                    content = ''.join(content_parts)
-                    logger.debug(f"使用检测编码 {detected_encoding} 成功流式读取大文件")
-
-                    # 隐藏加载动画
-                    self._hide_loading_animation()
-                    return content
-
-            except FileNotFoundError:
-                self._hide_loading_animation()
-                return f"书籍文件不存在: {self.path}"
-            except ImportError:
-                logger.warning("chardet 库未安装，无法进行编码检测")
-            except Exception as e:
-                logger.error(f"使用编码检测流式读取大文件失败: {e}")
-
-            # 最后的备用方案：使用utf-8并忽略错误
-            try:
-                content_parts = []
-                total_size = 0
-
-                with open(self.path, 'r', encoding='utf-8', errors='ignore') as f:
-                    while total_size < max_content_size:
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break  # 文件读取完毕
-
-                        content_parts.append(chunk)
-                        total_size += len(chunk.encode('utf-8', errors='ignore'))
-
-                content = ''.join(content_parts)
-                logger.warning(f"使用 UTF-8 编码并忽略错误流式读取大文件，可能存在字符丢失")
-
-                # 隐藏加载动画
-                self._hide_loading_animation()
-                return content
-
-            except FileNotFoundError:
-                self._hide_loading_animation()
-                return f"书籍文件不存在: {self.path}"
-            except Exception as e:
-                logger.error(f"所有流式读取编码尝试都失败: {e}")
-                return f"无法流式读取文件 {self.path}，请检查文件是否损坏或编码不支持"
-
-        finally:
-            # 确保在任何情况下都隐藏加载动画
-            self._hide_loading_animation()
     
     def _parse_with_parser(self) -> str:
         """使用相应的解析器解析文件内容"""
@@ -946,17 +808,7 @@ class Book:
             self.chapters = validated_chapters
 
             # 写入解析缓存
-            try:
-                stat = os.stat(self.path)
-                file_hash = ""
-                try:
-                    file_hash = _fu.calculate_file_sha256(self.path)
-                except Exception:
-                    file_hash = f"{stat.st_mtime}-{stat.st_size}"
-                cache_key = make_key("parse", self.path, self.format, bool(self.password), file_hash)
-                parse_cache.set(cache_key, {"content": content, "chapters": validated_chapters}, ttl_seconds=1800)
-            except Exception:
-                pass
+            self._save_parse_result(content, validated_chapters)
 
             logger.debug(f"成功解析非加密PDF文件: {self.path}")
             return content
@@ -1019,18 +871,8 @@ class Book:
                         validated_chapters.append(chapter)
             self.chapters = validated_chapters
 
-            # 写入解析缓存（含密码特征）
-            try:
-                stat = os.stat(self.path)
-                file_hash = ""
-                try:
-                    file_hash = _fu.calculate_file_sha256(self.path)
-                except Exception:
-                    file_hash = f"{stat.st_mtime}-{stat.st_size}"
-                cache_key = make_key("parse", self.path, self.format, True, file_hash)
-                parse_cache.set(cache_key, {"content": content, "chapters": validated_chapters}, ttl_seconds=1800)
-            except Exception:
-                pass
+            # 写入解析缓存（含密码特征；解密后的内容不落盘）
+            self._save_parse_result(content, validated_chapters, with_password=True, persist=False)
             
             logger.debug(f"成功解析加密PDF文件: {self.path}")
             
@@ -1158,17 +1000,7 @@ class Book:
             self.chapters = validated_chapters
 
             # 写入解析缓存
-            try:
-                stat = os.stat(self.path)
-                file_hash = ""
-                try:
-                    file_hash = _fu.calculate_file_sha256(self.path)
-                except Exception:
-                    file_hash = f"{stat.st_mtime}-{stat.st_size}"
-                cache_key = make_key("parse", self.path, self.format, bool(self.password), file_hash)
-                parse_cache.set(cache_key, {"content": content, "chapters": validated_chapters}, ttl_seconds=1800)
-            except Exception:
-                pass
+            self._save_parse_result(content, validated_chapters)
 
             logger.debug(f"成功使用解析器解析文件: {self.path}")
             return content
@@ -1179,25 +1011,28 @@ class Book:
 
     def get_content_chunk(self, start_pos: int, length: int) -> str:
         """
-        获取内容的指定块，用于大文件的按需加载
-        :param start_pos: 开始位置
-        :param length: 获取长度
+        获取内容的指定块，用于大文件的按需加载（阅读界面目前仍使用 get_content 加载全文）
+        :param start_pos: 开始字符位置
+        :param length: 获取字符长度
         :return: 指定块的内容
         """
         if not self.path or not os.path.exists(self.path):
             return ""
         
-        # 对于大文件，直接从文件读取指定块
-        if os.path.getsize(self.path) > 100 * 1024 * 1024:  # 100MB
+        # 已加载全文时直接切片
+        if self._content_loaded and self._content is not None:
+            return self._content[start_pos:start_pos + length]
+        
+        # 文本文件通过临时打开的流式文本源按字符区间读取，不加载全文
+        if self.format in ['.txt', '.md']:
             try:
-                with open(self.path, "r", encoding="utf-8", errors="ignore") as f:
-                    f.seek(start_pos)
-                    return f.read(length)
+                with MmapTextSource(self.path) as source:
+                    return source.read(start_pos, length)
             except Exception as e:
                 logger.error(f"读取文件块失败: {e}")
                 return ""
-        else:
-            # 对于小文件，使用完整内容
-            full_content = self.get_content()
-            end_pos = min(start_pos + length, len(full_content))
-            return full_content[start_pos:end_pos]
+        
+        # 其他格式需要先解析出全文
+        full_content = self.get_content()
+        end_pos = min(start_pos + length, len(full_content))
+        return full_content[start_pos:end_pos]
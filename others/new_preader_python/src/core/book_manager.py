@@ -12,7 +12,8 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from src.core.book import Book
 from src.core.bookshelf import Bookshelf
-from src.core.search import SearchEngine
+from src.core.search import SearchEngine, INDEX_STATUS_FAILED
+from src.core.index_pipeline import run_index_pipeline
 from src.config.config_manager import ConfigManager
 from src.config.default_config import SUPPORTED_FORMATS
 from src.utils.file_utils import FileUtils
@@ -39,6 +40,8 @@ class BookManager:
         self._scan_callbacks: List[Callable[[Dict[str, Any]], None]] = []
         # 后台补索引任务运行标志（保证全局只有一个补索引任务在跑）
         self._indexing = False
+        # 请求停止后台补索引（已写入的书籍下次启动不再处理）
+        self._index_stop = threading.Event()
         
         # 初始化搜索引擎
         config = ConfigManager.get_instance().get_config()
@@ -98,12 +101,18 @@ class BookManager:
         """
         success_count = 0
         failed_files = []
+        added_books = []
         
         for file_path in file_paths:
-            if self.add_book(file_path):
+            book = self.add_book(file_path)
+            if book:
                 success_count += 1
+                added_books.append(book)
             else:
                 failed_files.append(file_path)
+        
+        # 后台增量更新重复检测用的持久化指纹
+        self.bookshelf.refresh_fingerprints(added_books)
                 
         return success_count, failed_files
         
@@ -115,7 +124,8 @@ class BookManager:
         后台为所有尚未建立全文搜索索引的书籍补建索引（幂等、可重入）。
         
         批量导入时 add_book 传入 index_content=False 跳过即时索引，由本方法在
-        后台统一补建，避免目录书籍过多时导入卡顿。可通过回调反馈进度。
+        后台统一补建，避免目录书籍过多时导入卡顿。书籍在进程池中解析、分批写入，
+        每本书的索引状态持久化，中途退出后下次只处理剩余的书籍。可通过回调反馈进度。
         """
         if self._indexing:
             return
@@ -134,20 +144,13 @@ class BookManager:
                 start_callback()
             except Exception:
                 pass
-        total = len(todo)
+        self._index_stop.clear()
+        tasks = [(book.path, book.title, book.password) for book in todo]
         
         def task() -> None:
             try:
-                for i, book in enumerate(todo):
-                    try:
-                        self._index_book_content(book)
-                    except Exception as e:
-                        logger.error(f"后台索引书籍失败 {book.path}: {e}")
-                    if progress_callback:
-                        try:
-                            progress_callback(i + 1, total)
-                        except Exception:
-                            pass
+                run_index_pipeline(self.search_engine, tasks, progress_callback,
+                                   is_cancelled=self._index_stop.is_set)
             except Exception as e:
                 logger.error(f"后台索引任务出错: {e}")
             finally:
@@ -161,10 +164,28 @@ class BookManager:
         threading.Thread(target=task, daemon=True).start()
     
     def _get_unindexed_books(self) -> List[Book]:
-        """返回书架中尚未建立全文搜索索引的书籍列表（基于一次查询，避免逐本查询）"""
-        indexed = self.search_engine.get_indexed_book_ids()
-        return [b for b in self.bookshelf.get_all_books()
-                if b.path and b.path not in indexed]
+        """
+        返回书架中尚未建立全文搜索索引的书籍列表（基于一次查询，避免逐本查询）
+        
+        解析失败的书籍只在文件变化（大小或修改时间不同）后重试。
+        """
+        states = self.search_engine.get_index_states()
+        todo = []
+        for book in self.bookshelf.get_all_books():
+            if not book.path:
+                continue
+            state = states.get(book.path)
+            if state is not None and state[0] == INDEX_STATUS_FAILED:
+                try:
+                    stat = os.stat(book.path)
+                    if (stat.st_size, stat.st_mtime_ns) == (state[1], state[2]):
+                        continue
+                except OSError:
+                    continue
+            elif state is not None:
+                continue
+            todo.append(book)
+        return todo
     
     def get_unindexed_count(self) -> int:
         """返回尚未建立全文搜索索引的书籍数量"""
@@ -334,13 +355,17 @@ class BookManager:
             # 读取书籍内容进行索引
             content = book.get_content()
             if content:
-                # 索引书籍内容，按章节或页面分割
-                # 这里简化处理，将整个内容作为一个索引项
-                self.search_engine.index_book(book.path, content, "full_content")
+                # 按章节 + 位置块建立索引，命中结果可定位到章节和字符偏移
+                self.search_engine.index_book(book.path, content, book.chapters)
                 logger.info(f"已索引书籍: {book.title}")
         except Exception as e:
             logger.error(f"索引书籍内容时出错: {e}")
                 
+    def stop_indexing(self) -> None:
+        """请求停止后台补索引任务（当前批次写入后停止）"""
+        self._index_stop.set()
+                
     def cleanup(self) -> None:
         """清理资源"""
+        self.stop_indexing()
         self.executor.shutdown(wait=False)
\ No newline at end of file
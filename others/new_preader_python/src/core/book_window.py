@@ -0,0 +1,199 @@
+"""
+书架窗口：按排序和筛选条件分页读取书籍
+
+书架界面只需要当前页的几十行，BookWindow 表现为一个只读序列（支持 len、下标和切片），
+下标访问时才按块从数据库读取（ORDER BY ... LIMIT/OFFSET），只有读到的行会创建 Book 对象。
+总数和各格式数量按筛选条件统计一次，切换排序时复用，不重新统计。
+"""
+
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core.book import Book
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 每次从数据库读取的行数
+WINDOW_BLOCK_SIZE = 64
+# 每个窗口保留的块数
+WINDOW_MAX_BLOCKS = 16
+# 默认排序：最后阅读时间倒序
+DEFAULT_SORT_KEY = "last_read_date"
+
+
+@dataclass(frozen=True)
+class BookFilter:
+    """书架筛选条件"""
+    # None 表示全部书籍（单用户模式或超级管理员），否则只包含该用户的书籍
+    user_id: Optional[int] = None
+    # 关键词（已转为小写），匹配标题、作者、拼音或标签
+    keywords: Tuple[str, ...] = ()
+    # True 时所有关键词都要匹配，否则匹配任意一个
+    match_all: bool = False
+    # 文件格式（不带点，小写）
+    book_format: Optional[str] = None
+    # 作者（小写，完全匹配）
+    author: Optional[str] = None
+
+    @classmethod
+    def from_search(cls, user_id: Optional[int], keyword: str = "", book_format: Any = "all",
+                    author: Any = "all") -> "BookFilter":
+        """
+        根据书架搜索框的输入创建筛选条件
+
+        关键词用 "+" 分隔时为 AND 逻辑，用 "," 分隔时为 OR 逻辑；
+        格式和作者为 "all"、空值或下拉框的空选项时不筛选。
+
+        Args:
+            user_id: 用户ID，None 表示全部书籍
+            keyword: 搜索关键词
+            book_format: 文件格式
+            author: 作者
+
+        Returns:
+            BookFilter: 筛选条件
+        """
+        keyword = keyword or ""
+        match_all = "+" in keyword
+        keywords = tuple(k.strip().lower() for k in keyword.split("+" if match_all else ",") if k.strip())
+        return cls(
+            user_id=user_id,
+            keywords=keywords,
+            match_all=match_all,
+            book_format=_selection_value(book_format).lower().lstrip('.') or None,
+            author=_selection_value(author).lower() or None,
+        )
+
+
+def _selection_value(value: Any) -> str:
+    """下拉框的值：None、"all" 和空选项（NoSelection）都视为不筛选"""
+    if value is None or value == "all" or (hasattr(value, 'value') and getattr(value, 'value', '') == ""):
+        return ""
+    return str(value)
+
+
+class BookWindow(Sequence):
+    """按需分页读取的书籍序列"""
+
+    def __init__(self, db_manager, book_filter: BookFilter, sort_key: Optional[str] = None,
+                 reverse: bool = True, reading_info_fallback: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 _counts: Optional[Dict[str, Tuple[int, int, int]]] = None):
+        """
+        Args:
+            db_manager: 数据库管理器
+            book_filter: 筛选条件
+            sort_key: 排序键（见 DatabaseManager.BOOK_SORT_COLUMNS），None 时按最后阅读时间倒序
+            reverse: 是否倒序
+            reading_info_fallback: 没有阅读进度记录的书籍获取阅读信息的函数（如回退到阅读历史）
+        """
+        self.db_manager = db_manager
+        self.book_filter = book_filter
+        self.sort_key = sort_key or DEFAULT_SORT_KEY
+        self.reverse = reverse if sort_key else True
+        self._reading_info_fallback = reading_info_fallback
+        self._counts = _counts
+        self._blocks: "OrderedDict[int, List[Tuple[Book, Optional[Dict[str, Any]]]]]" = OrderedDict()
+        self._reading_info: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def counts(self) -> Dict[str, Tuple[int, int, int]]:
+        """各格式的 (书籍数, 已读完数, 没有阅读进度的书籍数)"""
+        if self._counts is None:
+            self._counts = self.db_manager.count_books_by_filter(self.book_filter)
+        return self._counts
+
+    def format_counts(self) -> Dict[str, int]:
+        """
+        各格式的书籍数量
+
+        Returns:
+            Dict[str, int]: 格式（大写）到数量的映射
+        """
+        result: Dict[str, int] = {}
+        for book_format, (total, _, _) in self.counts.items():
+            name = (book_format or "").upper()
+            result[name] = result.get(name, 0) + total
+        return result
+
+    def with_sort(self, sort_key: Optional[str], reverse: bool) -> "BookWindow":
+        """
+        相同筛选条件、不同排序的窗口（复用已统计的数量）
+
+        Args:
+            sort_key: 排序键
+            reverse: 是否倒序
+
+        Returns:
+            BookWindow: 新窗口
+        """
+        return BookWindow(self.db_manager, self.book_filter, sort_key, reverse,
+                          self._reading_info_fallback, _counts=self._counts)
+
+    def __len__(self) -> int:
+        return sum(total for total, _, _ in self.counts.values())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            books = []
+            block_start = start - start % WINDOW_BLOCK_SIZE
+            for block_offset in range(block_start, stop, WINDOW_BLOCK_SIZE):
+                rows = self._block(block_offset)
+                books.extend(book for book, _ in rows[max(start - block_offset, 0):stop - block_offset])
+            return books
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("book window index out of range")
+        offset = index % WINDOW_BLOCK_SIZE
+        rows = self._block(index - offset)
+        if offset >= len(rows):
+            # 统计之后书籍被删除
+            raise IndexError("book window index out of range")
+        return rows[offset][0]
+
+    def _block(self, block_offset: int) -> List[Tuple[Book, Optional[Dict[str, Any]]]]:
+        rows = self._blocks.get(block_offset)
+        if rows is not None:
+            self._blocks.move_to_end(block_offset)
+            return rows
+        completed = sum(done for _, done, _ in self.counts.values())
+        no_progress = sum(unread for _, _, unread in self.counts.values())
+        rows = self.db_manager.get_books_page(
+            self.book_filter, self.sort_key, self.reverse, block_offset, WINDOW_BLOCK_SIZE,
+            total=len(self), completed=completed, no_progress=no_progress)
+        for book, reading_info in rows:
+            if reading_info is not None:
+                self._reading_info[book.path] = reading_info
+        self._blocks[block_offset] = rows
+        while len(self._blocks) > WINDOW_MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        return rows
+
+    def reading_info(self, book_path: str) -> Dict[str, Any]:
+        """
+        已读取书籍的阅读信息
+
+        Args:
+            book_path: 书籍路径
+
+        Returns:
+            Dict[str, Any]: 包含 last_read_date 和 reading_progress
+        """
+        info = self._reading_info.get(book_path)
+        if info is not None:
+            return info
+        if self._reading_info_fallback is not None:
+            try:
+                info = self._reading_info_fallback(book_path)
+            except Exception as e:
+                logger.debug(f"获取书籍阅读信息失败: {book_path}, 错误: {e}")
+        info = info or {"last_read_date": None, "reading_progress": 0}
+        self._reading_info[book_path] = info
+        return info
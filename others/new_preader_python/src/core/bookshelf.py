@@ -11,6 +11,7 @@ from datetime import datetime
 from pathlib import Path
 
 from src.core.book import Book
+from src.core.book_window import BookFilter, BookWindow
 from src.core.database_manager import DatabaseManager
 from src.config.default_config import SUPPORTED_FORMATS
 from src.utils.logger import LoggerSetup
@@ -53,60 +54,106 @@ class Bookshelf:
         # 应用实例，用于获取配置
         self.app = app
 
-        self.books: Dict[str, Book] = {}  # 书籍字典，键为书籍路径
+        self._books: Dict[str, Book] = {}  # 书籍字典，键为书籍路径
+        self._books_loaded = False
+        # 书籍字典加载前通过 get_book 单独获取的书籍，加载时沿用这些对象
+        self._detached_books: Dict[str, Book] = {}
         self.reading_history: List[Dict[str, Any]] = []  # 阅读历史记录
         self._reading_info_cache: Dict[str, Dict[str, Any]] = {}  # 阅读信息缓存
 
-        # 加载书籍数据
-        self._load_books()
+        # 书籍数据在首次访问 books 时加载，书架界面按页查询，不需要全部书籍
         self._load_reading_history()
     
-    def _load_books(self) -> None:
-        """从数据库加载书籍数据（按当前用户过滤）- 性能优化版本"""
-        try:
-            self.books.clear()
-            self._reading_info_cache.clear()
-
-            # 获取配置管理器以检查多用户模式
-            config_manager = getattr(self.app, 'config_manager', None) if hasattr(self, 'app') else None
-            multi_user_enabled = False
+    @property
+    def books(self) -> Dict[str, Book]:
+        """当前用户的全部书籍（键为书籍路径），首次访问时从数据库加载"""
+        if not self._books_loaded:
+            self._load_books()
+        return self._books
+    
+    def invalidate_books(self) -> None:
+        """丢弃已加载的书籍数据，下次访问 books 时重新加载"""
+        self._books_loaded = False
+        self._books.clear()
+        self._detached_books.clear()
+        self._reading_info_cache.clear()
+    
+    def _query_user_id(self) -> Optional[int]:
+        """
+        按多用户设置确定查询书籍时使用的用户ID
+        
+        Returns:
+            Optional[int]: None 表示全部书籍，0 表示无效用户（不返回任何书籍）
+        """
+        # 获取配置管理器以检查多用户模式
+        config_manager = getattr(self.app, 'config_manager', None) if hasattr(self, 'app') else None
+        multi_user_enabled = False
 
-            if config_manager:
-                config = config_manager.get_config()
-                multi_user_enabled = config.get('advanced', {}).get('multi_user_enabled', False)
+        if config_manager:
+            config = config_manager.get_config()
+            multi_user_enabled = config.get('advanced', {}).get('multi_user_enabled', False)
 
-            logger.info(f"当前用户类型为:{self.current_user_role}, 用户ID为:{self.current_user_id}, 多用户模式: {multi_user_enabled}")
+        logger.info(f"当前用户类型为:{self.current_user_role}, 用户ID为:{self.current_user_id}, 多用户模式: {multi_user_enabled}")
 
-            # 确定用户ID用于查询
+        # 确定用户ID用于查询
+        user_id = None
+        if not multi_user_enabled:
+            # 非多用户模式：user_id传None
             user_id = None
-            if not multi_user_enabled:
-                # 非多用户模式：user_id传None
-                user_id = None
-            elif self.current_user_role in ["superadmin", "super_admin"]:
-                # 多用户模式下超级管理员：获取全部书籍
-                user_id = None
-            elif self.current_user_id is not None:
-                # 多用户模式下普通用户：只获取自己的书籍
-                user_id = self.current_user_id
-            else:
-                # 多用户模式下但用户ID为空：返回空列表（安全默认）
-                user_id = 0  # 使用0表示无效用户
+        elif self.current_user_role in ["superadmin", "super_admin"]:
+            # 多用户模式下超级管理员：获取全部书籍
+            user_id = None
+        elif self.current_user_id is not None:
+            # 多用户模式下普通用户：只获取自己的书籍
+            user_id = self.current_user_id
+        else:
+            # 多用户模式下但用户ID为空：返回空列表（安全默认）
+            user_id = 0  # 使用0表示无效用户
+        return user_id
+    
+    def _load_books(self) -> None:
+        """从数据库加载书籍数据（按当前用户过滤）- 性能优化版本"""
+        try:
+            self._books_loaded = True
+            detached = self._detached_books
+            self._detached_books = {}
+            self._books.clear()
+            self._reading_info_cache.clear()
 
             # 使用批量查询方法获取书籍和阅读信息
-            book_info_list = self.db_manager.get_all_books_with_reading_info(user_id)
+            book_info_list = self.db_manager.get_all_books_with_reading_info(self._query_user_id())
 
             # 性能优化：Book.__init__ 已在创建时通过 os.path.exists 设置了 file_not_found 标记，
             # 这里无需再次调用 os.path.exists（避免 N 次冗余 stat 系统调用）。
             for book, reading_info in book_info_list:
                 if book.path:
-                    self.books[book.path] = book
+                    self._books[book.path] = detached.get(book.path, book)
                     # 缓存阅读信息
                     self._reading_info_cache[book.path] = reading_info
 
-            logger.info(f"已加载 {len(self.books)} 本书籍（用户过滤：{self.current_user_id is not None}）")
+            logger.info(f"已加载 {len(self._books)} 本书籍（用户过滤：{self.current_user_id is not None}）")
         except Exception as e:
             logger.error(f"从数据库加载书籍数据时出错: {e}")
     
+    def open_book_window(self, keyword: str = "", book_format: Any = "all", author: Any = "all",
+                         sort_key: Optional[str] = None, reverse: bool = True) -> BookWindow:
+        """
+        按当前用户、筛选条件和排序创建分页读取的书籍窗口（不加载全部书籍）
+        
+        Args:
+            keyword: 搜索关键词（"+" 分隔为 AND，"," 分隔为 OR）
+            book_format: 文件格式筛选
+            author: 作者筛选
+            sort_key: 排序键，None 时按最后阅读时间倒序
+            reverse: 是否倒序
+            
+        Returns:
+            BookWindow: 书籍窗口
+        """
+        book_filter = BookFilter.from_search(self._query_user_id(), keyword, book_format, author)
+        return BookWindow(self.db_manager, book_filter, sort_key, reverse,
+                          reading_info_fallback=self.get_book_reading_info)
+    
     def _load_reading_history(self) -> None:
         """从数据库加载阅读历史记录"""
         try:
@@ -204,8 +251,9 @@ class Bookshelf:
             
             # 将书籍保存到数据库，并记录用户归属关系
             self.db_manager.add_book(book, self.current_user_id)
-            # 更新内存中的书籍字典（用于向后兼容）
-            self.books[abs_path] = book
+            # 更新内存中的书籍字典（用于向后兼容；尚未加载时下次加载会从数据库读到）
+            if self._books_loaded:
+                self._books[abs_path] = book
             
             logger.info(f"已添加书籍到数据库: {book.title}")
             return book
@@ -231,6 +279,13 @@ class Bookshelf:
             # 从数据库中删除书籍
             self.db_manager.delete_book(abs_path)
             
+            # 删除重复检测用的持久化指纹
+            try:
+                from src.utils.fingerprint_store import invalidate_fingerprints
+                invalidate_fingerprints([abs_path])
+            except Exception as e:
+                logger.debug(f"删除书籍指纹失败: {e}")
+            
             # 从阅读历史中移除相关记录
             self.reading_history = [record for record in self.reading_history if record.get("path") != abs_path and record.get("book_path") != abs_path]
             
@@ -251,6 +306,17 @@ class Bookshelf:
         Returns:
             Optional[Book]: 书籍对象，如果不存在则返回None
         """
+        if not self._books_loaded:
+            # 书籍字典尚未加载：直接按路径查询数据库，避免为一本书加载全部书籍
+            abs_path = os.path.abspath(path)
+            book = self._detached_books.get(path) or self._detached_books.get(abs_path)
+            if book is None and self.db_manager:
+                book = self.db_manager.get_book(path) or self.db_manager.get_book(abs_path)
+                if book is not None:
+                    self._detached_books[book.path or path] = book
+            if book is not None:
+                return book
+        
         # 首先尝试直接查找
         if path in self.books:
             return self.books[path]
@@ -296,52 +362,27 @@ class Bookshelf:
         """
         return list(self.books.values())
     
-    def search_books(self, keyword: str, format: Optional[str] = None) -> List[Book]:
+    def search_books(self, keyword: str, format: Optional[str] = None,
+                     limit: Optional[int] = None) -> List[Book]:
         """
-        搜索书籍（按当前用户权限过滤）
+        搜索书籍（按当前用户权限过滤，结果按相关度排序）
         
         Args:
             keyword: 搜索关键词
             format: 可选，文件格式筛选
+            limit: 可选，最多返回的书籍数
             
         Returns:
             List[Book]: 匹配的书籍列表
         """
-        # 先获取按用户权限过滤后的所有书籍
-        all_books = []
         if self.current_user_role == "superadmin" or self.current_user_role == "super_admin":
-            all_books = self.db_manager.get_all_books()
+            user_id = None
         elif self.current_user_id is not None:
-            all_books = self.db_manager.get_books_for_user(self.current_user_id)
+            user_id = self.current_user_id
         else:
-            all_books = []
-        
-        # 如果没有搜索关键词，直接返回所有书籍
-        # if not keyword.strip():
-        #     return all_books
-        
-        # 在已过滤的书籍中进行搜索
-        keyword_lower = keyword.lower()
-        filtered_books = []
-        
-        for book in all_books:
-            # 检查标题、作者、标签、拼音是否包含关键词
-            matches = (
-                (book.title and keyword_lower in book.title.lower()) or
-                (book.author and keyword_lower in book.author.lower()) or
-                (book.tags and keyword_lower in book.tags.lower()) or
-                (hasattr(book, 'pinyin') and book.pinyin and keyword_lower in book.pinyin.lower())
-            )
-            
-            # 检查文件格式
-            format_matches = True
-            if format:
-                format_matches = book.format and book.format.lower() == format.lower()
-            
-            if matches and format_matches:
-                filtered_books.append(book)
+            return []
         
-        return filtered_books
+        return self.db_manager.search_books(keyword, format=format, user_id=user_id, limit=limit)
     
     def filter_books_by_format(self, format_: str) -> List[Book]:
         """
@@ -723,32 +764,83 @@ class Bookshelf:
         
         added_count = 0
         failed_files: List[str] = []
+        added_books: List[Book] = []
         import concurrent.futures
         
-        def worker(fp: str) -> bool:
+        def worker(fp: str) -> Optional[Book]:
             try:
                 acquire_token()
-                return bool(self.add_book(fp))
+                return self.add_book(fp)
             except Exception as e:
                 logger.error(f"添加书籍时出错: {e}")
-                return False
+                return None
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = {executor.submit(worker, fp): fp for fp in to_process}
             for fut in concurrent.futures.as_completed(futures):
                 fp = futures[fut]
                 try:
-                    ok = fut.result()
-                    if ok:
+                    book = fut.result()
+                    if book:
                         added_count += 1
+                        added_books.append(book)
                     else:
                         failed_files.append(fp)
                 except Exception:
                     failed_files.append(fp)
         
         logger.info(f"已从目录 {directory} 添加 {added_count} 本书籍")
+        # 新增或变化的书籍在后台更新持久化指纹，重复检测时无需再读取文件
+        self.refresh_fingerprints(added_books)
         return added_count, failed_files
     
+    def refresh_fingerprints(self, books: List[Book], background: bool = True) -> None:
+        """
+        增量更新书籍的持久化指纹（文件哈希、SimHash、MinHash等），未变化的书籍直接跳过
+        
+        Args:
+            books: 书籍列表
+            background: 是否在后台线程中执行
+        """
+        if not books:
+            return
+        
+        def task() -> None:
+            try:
+                from src.utils.book_duplicate_detector_v2 import SmartDuplicateDetectorV3
+                SmartDuplicateDetectorV3.update_fingerprints(books)
+            except Exception as e:
+                logger.warning(f"更新书籍指纹失败: {e}")
+        
+        if background:
+            import threading
+            threading.Thread(target=task, name="fingerprint-refresh", daemon=True).start()
+        else:
+            task()
+    
+    def find_possible_duplicates(self, books: List[Book]) -> Dict[str, List[str]]:
+        """
+        导入后检查新书是否与书库中的书近似重复（SimHash/MinHash 近似重复索引）
+        
+        Args:
+            books: 新导入的书籍列表
+            
+        Returns:
+            Dict[str, List[str]]: 新书路径 -> 可能重复的书籍路径列表
+        """
+        if not books:
+            return {}
+        try:
+            from src.utils.book_duplicate_detector_v2 import SmartDuplicateDetectorV3
+            matches = SmartDuplicateDetectorV3.find_near_duplicates(books)
+        except Exception as e:
+            logger.warning(f"检查可能重复的书籍失败: {e}")
+            return {}
+        result = {path: [match.key for match in found] for path, found in matches.items()}
+        if result:
+            logger.info(f"导入的书籍中有 {len(result)} 本可能与书库中的书籍重复")
+        return result
+    
     def batch_set_author(self, book_paths: List[str], author: str) -> int:
         """
         批量设置作者
@@ -865,50 +957,39 @@ class Bookshelf:
     def _try_extract_author(self, abs_path: str, ext: str) -> Optional[str]:
         """
         尝试通过对应解析器解析文件元数据以获取作者：
-        - pdf：优先用 PyPDF2 检测是否加密；加密则用 PdfEncryptParser 触发解密流程
-        - epub/mobi/azw/azw3：用相应解析器
+        - pdf：只读取文档信息字典，加密文件跳过
+        - epub/mobi/azw/azw3：只读取元数据，不解码正文
         - 任何异常/失败均返回 None
         """
         try:
-            parser = None
             # PDF 分支：先检测加密
             if ext == '.pdf':
+                # 作者在文档信息字典中，不提取正文；加密PDF不在后台读取，避免触发密码弹窗
                 try:
                     import PyPDF2
                     with open(abs_path, 'rb') as f:
                         reader = PyPDF2.PdfReader(f)
-                        is_encrypted = bool(getattr(reader, "is_encrypted", False))
+                        if getattr(reader, "is_encrypted", False):
+                            result = None
+                        else:
+                            from src.parsers.pdf_parser import PdfParser
+                            result = {"metadata": PdfParser()._extract_pdf_metadata(reader)}
                 except Exception:
-                    is_encrypted = False
-                if is_encrypted:
-                    # 加密PDF不在后台解析作者，避免触发密码弹窗
                     result = None
-                else:
-                    try:
-                        from src.parsers.pdf_parser import PdfParser
-                        parser = PdfParser()
-                        result = self._safe_async_parse(parser.parse, abs_path)
-                    except Exception:
-                        result = None
             elif ext == '.epub':
                 try:
-                    from src.parsers.epub_parser import EpubParser
-                    parser = EpubParser()
-                    result = self._safe_async_parse(parser.parse, abs_path)
+                    # 作者在 OPF 元数据中，只读取章节表，不解码正文
+                    from src.parsers.epub_document import EpubDocument
+                    with EpubDocument(abs_path) as document:
+                        result = {"metadata": dict(document.metadata)}
                 except Exception:
                     result = None
-            elif ext == '.mobi':
+            elif ext in ('.mobi', '.azw', '.azw3'):
                 try:
-                    from src.parsers.mobi_parser import MobiParser
-                    parser = MobiParser()
-                    result = self._safe_async_parse(parser.parse, abs_path)
-                except Exception:
-                    result = None
-            elif ext in ('.azw', '.azw3'):
-                try:
-                    from src.parsers.azw_parser import AzwParser
-                    parser = AzwParser()
-                    result = self._safe_async_parse(parser.parse, abs_path)
+                    # 作者在解包缓存的元数据中（首次解包后，本书再次打开和正文解析都不再解包）
+                    from src.parsers.kindle_container import open_kindle_document
+                    with open_kindle_document(abs_path) as document:
+                        result = {"metadata": dict(document.metadata)}
                 except Exception:
                     result = None
             else:
@@ -1157,8 +1238,7 @@ class Bookshelf:
         success_count = 0
         
         # 导入繁体转简体工具
-        from src.utils.traditional_simplified import convert_traditional_to_simplified
-        from src.utils.file_utils import FileUtils
+        from src.utils.traditional_simplified import convert_file_traditional_to_simplified
         
         for path in book_paths:
             # 尝试多种路径格式进行匹配
@@ -1186,33 +1266,26 @@ class Bookshelf:
                 book = self.books[matched_path]
                 
                 try:
-                    # 获取书籍内容
-                    content = book.get_content()
-                    if not content:
-                        logger.warning(f"无法获取书籍内容: {book.title}")
+                    # 只有纯文本书籍可以写回；其他格式（EPUB/PDF等）无法保存转换后的纯文本
+                    if book.format not in ['.txt', '.md']:
+                        logger.warning(f"不支持转换该格式的书籍: {book.title} ({book.format})")
                         continue
                     
-                    # 繁体转简体
-                    simplified_content = convert_traditional_to_simplified(content)
-                    
-                    # 如果内容没有变化，跳过
-                    if simplified_content == content:
+                    # 繁体转简体：按块流式转换写入临时文件后替换原文件，内存占用与文件大小无关
+                    book.release_content()
+                    if not convert_file_traditional_to_simplified(book.path):
                         logger.info(f"书籍内容无需转换: {book.title}")
                         continue
                     
-                    # 保存转换后的内容到文件
-                    if FileUtils.save_content(book.path, simplified_content):
-                        # 更新书籍的修改时间
-                        book.modified_time = datetime.now()
-                        
-                        # 更新数据库
-                        if self.db_manager.update_book(book):
-                            success_count += 1
-                            logger.info(f"成功转换书籍: {book.title}")
-                        else:
-                            logger.error(f"更新数据库失败: {book.title}")
+                    # 更新书籍的修改时间
+                    book.modified_time = datetime.now()
+                    
+                    # 更新数据库
+                    if self.db_manager.update_book(book):
+                        success_count += 1
+                        logger.info(f"成功转换书籍: {book.title}")
                     else:
-                        logger.error(f"保存文件失败: {book.title}")
+                        logger.error(f"更新数据库失败: {book.title}")
                         
                 except Exception as e:
                     logger.error(f"繁体转简体失败: {book.title}, 错误: {e}")
@@ -1411,11 +1484,8 @@ class Bookshelf:
     def set_current_user(self, user_id: Optional[int], role: str = "user") -> None:
         self.current_user_id = user_id
         self.current_user_role = role or "user"
-        # 切换用户后，刷新书籍加载
-        try:
-            self._load_books()
-        except Exception:
-            pass
+        # 切换用户后，书籍数据在下次访问时按新用户重新加载
+        self.invalidate_books()
 
     def rename_book(self, book_path: str, new_title: str) -> bool:
         """
@@ -4,6 +4,7 @@
 """
 
 import asyncio
+from functools import partial
 from typing import Dict, Any, List, Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
@@ -15,6 +16,9 @@ from src.locales.i18n_manager import get_global_i18n
 
 logger = get_logger(__name__)
 
+# 默认同时爬取的小说数量
+DEFAULT_MAX_CONCURRENT_NOVELS = 3
+
 class CrawlStatus(Enum):
     """爬取状态枚举"""
     PENDING = "pending"
@@ -186,140 +190,30 @@ class CrawlerManager:
                 self._notify_status_change(task_id)
                 return
             
-            # 创建解析器
-            parser = create_parser(parser_name, task.proxy_config, novel_site.get('name'), novel_site.get('url'))
-            if not parser:
+            # 创建解析器（每本书使用独立的解析器实例，避免并发时共享章节计数等状态）
+            def make_parser():
+                return create_parser(parser_name, task.proxy_config, novel_site.get('name'), novel_site.get('url'))
+            
+            # 首个实例用于检查解析器是否存在，并留给第一本小说使用
+            spare_parsers = [make_parser()]
+            if not spare_parsers[0]:
                 task.status = CrawlStatus.FAILED
                 task.error_message = f"{get_global_i18n().t('crawler.parser_not_found')}: {parser_name}"
                 self._notify_status_change(task_id)
                 return
             
-            # 爬取每个小说
-            for i, novel_id in enumerate(task.novel_ids):
-                # 检查是否应该停止
-                if task.status == CrawlStatus.STOPPED:
-                    break
-                
-                # 检查连续失败次数，如果超过3次则跳过
-                consecutive_failures = db_manager.get_consecutive_failure_count(task.site_id, novel_id)
-                if consecutive_failures >= 3:
-                    logger.info(f"跳过小说 {novel_id}，连续失败次数已达 {consecutive_failures} 次")
-                    task.failed_count += 1
-                    
-                    # 保存跳过记录，但不增加连续失败计数（使用特殊标记）
-                    db_manager.add_crawl_history(
-                        site_id=task.site_id,
-                        novel_id=novel_id,
-                        novel_title=novel_id,
-                        status="failed",
-                        file_path="",
-                        error_message=f"连续失败 {consecutive_failures} 次，已跳过"
-                    )
-                    # 跳过这个小说，继续下一个
-                    continue
-                
-                # 更新当前爬取状态
-                task.current_novel_id = novel_id
-                task.progress = i + 1
-                self._notify_status_change(task_id)
-                
-                try:
-                    # 重置解析器的章节计数器，防止跨书籍计数延续
-                    if hasattr(parser, 'chapter_count'):
-                        parser.chapter_count = 0
-                    
-                    # 获取存储文件夹
-                    storage_folder = novel_site.get('storage_folder', 'novels')
-                    
-                    # 直接使用增量爬取方法，不预先解析
-                    # 让 _incremental_crawl 内部判断是否需要增量爬取
-                    result = await self._incremental_crawl(
-                        parser=parser,
-                        novel_id=novel_id,
-                        site_id=task.site_id,
-                        novel_title=f"书籍ID: {novel_id}",  # 使用占位标题，会在增量爬取中获取真实标题
-                        storage_folder=storage_folder,
-                        parse_result=None  # 传入None，让增量爬取逻辑生效
-                    )
-                    
-                    # 假设解析器成功执行时返回的结果就是成功的
-                    # 如果解析器抛出异常，_incremental_crawl 会返回 {'success': False, ...}
-                    if 'success' in result and not result['success']:
-                        # 解析器明确返回失败
-                        task.failed_count += 1
-                        
-                        # 检查是否已有成功的记录，避免覆盖原有记录
-                        existing_record = db_manager.get_last_successful_crawl(task.site_id, novel_id)
-                        if not existing_record:
-                            # 只有在没有成功记录时才创建失败记录
-                            # 避免覆盖原有的连载模式记录为错误的短篇记录
-                            db_manager.add_crawl_history(
-                                site_id=task.site_id,
-                                novel_id=novel_id,
-                                novel_title=novel_id,
-                                status="failed",
-                                file_path="",
-                                error_message=result.get('error_message', get_global_i18n().t('crawler.unknown_error'))
-                            )
-                    else:
-                        # 解析器成功返回小说内容
-                        task.success_count += 1
-                        
-                        # 检查是否是新爬取或更新
-                        already_exists = result.get('already_exists', False)
-                        file_path = result.get('file_path', '')
-                        
-                        if file_path and not already_exists and result.get('new_chapters', 0) > 0:
-                            # 新爬取或有新章节更新，将书籍添加到书库
-                            try:
-                                from src.core.bookshelf import Bookshelf
-                                bookshelf = Bookshelf()
-                                
-                                # 合并网站标签和解析器返回的标签
-                                site_tags = novel_site.get('tags', '')
-                                result_tags = result.get('tags', '')
-                                
-                                # 合并标签逻辑：如果有网站标签，则添加到书籍标签中
-                                if site_tags:
-                                    if result_tags:
-                                        combined_tags = f"{result_tags},{site_tags}"
-                                    else:
-                                        combined_tags = site_tags
-                                else:
-                                    combined_tags = result_tags
-                                
-                                # 使用合并后的标签添加书籍
-                                book = bookshelf.add_book(file_path, result['title'], result.get('author', ''), combined_tags)
-                                
-                                logger.info(f"小说已添加到书库: {result['title']}, 作者: {result.get('author', '')}, 标签: {combined_tags}")
-                            except Exception as e:
-                                logger.error(f"添加到书库失败: {e}")
-                        
-                        # 发送成功通知
-                        new_chapters = result.get('new_chapters', 0)
-                        duplicate_count = result.get('duplicate_count', 0)
-                        message = result.get('message', '')
-                        
-                        if new_chapters > 0:
-                            logger.info(f"爬取成功: {result['title']}, 新增 {new_chapters} 章, 跳过 {duplicate_count} 章")
-                        elif duplicate_count > 0:
-                            logger.info(f"爬取成功: {result['title']}, 跳过 {duplicate_count} 个重复章节")
-                        
-                        self._notify_crawl_success(task_id, novel_id, result['title'], already_exists=already_exists, file_path=result.get('file_path', ''))
-                        
-                except Exception as e:
-                    task.failed_count += 1
-                    logger.error(f"爬取小说 {novel_id} 时发生异常: {e}")
-                    
-                    # 保存异常记录
-                    db_manager.add_crawl_history(
-                        site_id=task.site_id,
-                        novel_id=novel_id,
-                        novel_title=novel_id,
-                        status="failed",
-                        file_path="",
-                        error_message=str(e)
-                    )
+            # 并发爬取多本小说；各主机的并发与请求速率由抓取调度器统一限制
+            semaphore = asyncio.Semaphore(self._get_max_concurrent_novels())
+            
+            async def crawl_with_limit(novel_id: str) -> None:
+                async with semaphore:
+                    # 检查是否应该停止
+                    if task.status == CrawlStatus.STOPPED:
+                        return
+                    parser = spare_parsers.pop() if spare_parsers else make_parser()
+                    await self._crawl_novel(task, novel_site, parser, db_manager, novel_id)
+            
+            await asyncio.gather(*(crawl_with_limit(novel_id) for novel_id in task.novel_ids))
             
             # 更新任务状态
             if task.status != CrawlStatus.STOPPED:
@@ -340,6 +234,146 @@ class CrawlerManager:
             # 发送最终状态通知
             self._notify_status_change(task_id)
     
+    def _get_max_concurrent_novels(self) -> int:
+        """获取同时爬取的小说数量上限（advanced.crawler_max_concurrent_novels）"""
+        try:
+            from src.config.config_manager import ConfigManager
+            advanced = ConfigManager.get_instance().get_config().get("advanced", {})
+            return max(1, int(advanced.get("crawler_max_concurrent_novels", DEFAULT_MAX_CONCURRENT_NOVELS)))
+        except Exception:
+            return DEFAULT_MAX_CONCURRENT_NOVELS
+    
+    async def _crawl_novel(self, task: CrawlTask, novel_site: Dict[str, Any], parser, db_manager, novel_id: str) -> None:
+        """
+        爬取单本小说并更新任务统计
+        
+        Args:
+            task: 爬取任务
+            novel_site: 网站信息
+            parser: 该小说专用的解析器实例
+            db_manager: 数据库管理器
+            novel_id: 小说ID
+        """
+        task_id = task.task_id
+        
+        # 检查连续失败次数，如果超过3次则跳过
+        consecutive_failures = db_manager.get_consecutive_failure_count(task.site_id, novel_id)
+        if consecutive_failures >= 3:
+            logger.info(f"跳过小说 {novel_id}，连续失败次数已达 {consecutive_failures} 次")
+            task.failed_count += 1
+            task.progress += 1
+            
+            # 保存跳过记录，但不增加连续失败计数（使用特殊标记）
+            db_manager.add_crawl_history(
+                site_id=task.site_id,
+                novel_id=novel_id,
+                novel_title=novel_id,
+                status="failed",
+                file_path="",
+                error_message=f"连续失败 {consecutive_failures} 次，已跳过"
+            )
+            # 跳过这个小说，继续下一个
+            return
+        
+        # 更新当前爬取状态
+        task.current_novel_id = novel_id
+        task.progress += 1
+        self._notify_status_change(task_id)
+        
+        try:
+            # 获取存储文件夹
+            storage_folder = novel_site.get('storage_folder', 'novels')
+            
+            # 直接使用增量爬取方法，不预先解析
+            # 让 _incremental_crawl 内部判断是否需要增量爬取
+            result = await self._incremental_crawl(
+                parser=parser,
+                novel_id=novel_id,
+                site_id=task.site_id,
+                novel_title=f"书籍ID: {novel_id}",  # 使用占位标题，会在增量爬取中获取真实标题
+                storage_folder=storage_folder,
+                parse_result=None  # 传入None，让增量爬取逻辑生效
+            )
+            
+            # 假设解析器成功执行时返回的结果就是成功的
+            # 如果解析器抛出异常，_incremental_crawl 会返回 {'success': False, ...}
+            if 'success' in result and not result['success']:
+                # 解析器明确返回失败
+                task.failed_count += 1
+                
+                # 检查是否已有成功的记录，避免覆盖原有记录
+                existing_record = db_manager.get_last_successful_crawl(task.site_id, novel_id)
+                if not existing_record:
+                    # 只有在没有成功记录时才创建失败记录
+                    # 避免覆盖原有的连载模式记录为错误的短篇记录
+                    db_manager.add_crawl_history(
+                        site_id=task.site_id,
+                        novel_id=novel_id,
+                        novel_title=novel_id,
+                        status="failed",
+                        file_path="",
+                        error_message=result.get('error_message', get_global_i18n().t('crawler.unknown_error'))
+                    )
+            else:
+                # 解析器成功返回小说内容
+                task.success_count += 1
+                
+                # 检查是否是新爬取或更新
+                already_exists = result.get('already_exists', False)
+                file_path = result.get('file_path', '')
+                
+                if file_path and not already_exists and result.get('new_chapters', 0) > 0:
+                    # 新爬取或有新章节更新，将书籍添加到书库
+                    try:
+                        from src.core.bookshelf import Bookshelf
+                        bookshelf = Bookshelf()
+                        
+                        # 合并网站标签和解析器返回的标签
+                        site_tags = novel_site.get('tags', '')
+                        result_tags = result.get('tags', '')
+                        
+                        # 合并标签逻辑：如果有网站标签，则添加到书籍标签中
+                        if site_tags:
+                            if result_tags:
+                                combined_tags = f"{result_tags},{site_tags}"
+                            else:
+                                combined_tags = site_tags
+                        else:
+                            combined_tags = result_tags
+                        
+                        # 使用合并后的标签添加书籍
+                        book = bookshelf.add_book(file_path, result['title'], result.get('author', ''), combined_tags)
+                        
+                        logger.info(f"小说已添加到书库: {result['title']}, 作者: {result.get('author', '')}, 标签: {combined_tags}")
+                    except Exception as e:
+                        logger.error(f"添加到书库失败: {e}")
+                
+                # 发送成功通知
+                new_chapters = result.get('new_chapters', 0)
+                duplicate_count = result.get('duplicate_count', 0)
+                message = result.get('message', '')
+                
+                if new_chapters > 0:
+                    logger.info(f"爬取成功: {result['title']}, 新增 {new_chapters} 章, 跳过 {duplicate_count} 章")
+                elif duplicate_count > 0:
+                    logger.info(f"爬取成功: {result['title']}, 跳过 {duplicate_count} 个重复章节")
+                
+                self._notify_crawl_success(task_id, novel_id, result['title'], already_exists=already_exists, file_path=result.get('file_path', ''))
+                
+        except Exception as e:
+            task.failed_count += 1
+            logger.error(f"爬取小说 {novel_id} 时发生异常: {e}")
+            
+            # 保存异常记录
+            db_manager.add_crawl_history(
+                site_id=task.site_id,
+                novel_id=novel_id,
+                novel_title=novel_id,
+                status="failed",
+                file_path="",
+                error_message=str(e)
+            )
+    
     async def _async_parse_novel_detail(self, parser, novel_id: str) -> Dict[str, Any]:
         """异步解析小说详情"""
         try:
@@ -417,6 +451,48 @@ class CrawlerManager:
             logger.warning(f"从最后一章URL爬取失败: {e}，回退到常规爬取模式")
             return await self._async_parse_novel_detail(parser, novel_id)
     
+    def _open_chapter_writer(self, parser, site_id: int, novel_id: str, storage_folder: str,
+                             append_path: Optional[str] = None):
+        """
+        打开本次爬取的章节写入器，并关联章节清单
+        
+        追加模式加载已有小说的清单（缺失时扫描文件重建），写入前按清单跳过重复章节；
+        暂存文件对应新的清单，在保存时写到最终文件旁
+        
+        Args:
+            parser: 解析器实例
+            site_id: 网站ID
+            novel_id: 小说ID
+            storage_folder: 存储文件夹
+            append_path: 增量模式下要追加的已有文件；为None时写入暂存文件
+        
+        Returns:
+            ChapterWriter: 章节写入器
+        """
+        import os
+        import re
+        from src.utils.chapter_writer import ChapterWriter, format_appended_chapter
+        from src.utils.chapter_manifest import ChapterManifest
+        from src.spiders.base_parser_v2 import BaseParser
+        
+        if append_path:
+            writer = ChapterWriter(append_path, append=True, formatter=format_appended_chapter)
+            # 清单对应追加前的文件内容，本次（含恢复的）章节由写入器重新登记
+            writer.attach_manifest(ChapterManifest.load(append_path, expected_size=writer.base_size), dedupe=True)
+            return writer
+        
+        safe_id = re.sub(r'[<>:"/\\|?*]', '_', str(novel_id))
+        # 使用非书籍后缀，中断后保留的暂存文件不会被书架扫描当作书籍导入
+        staging_path = os.path.join(storage_folder, f".crawling_{site_id}_{safe_id}.part")
+        writer = ChapterWriter(staging_path)
+        # 只有支持增量爬取的解析器才能从中断处继续，否则丢弃暂存内容重新爬取
+        supports_resume = type(parser).parse_novel_detail_incremental is not BaseParser.parse_novel_detail_incremental
+        if writer.recovered_count and not supports_resume:
+            writer.discard()
+            writer = ChapterWriter(staging_path)
+        writer.attach_manifest(ChapterManifest())
+        return writer
+    
     async def _incremental_crawl(self, parser, novel_id: str, site_id: int, novel_title: str, storage_folder: str, parse_result: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         增量爬取：只爬取新章节，追加到已有文件
@@ -433,10 +509,6 @@ class CrawlerManager:
             爬取结果
         """
         from src.core.database_manager import DatabaseManager
-        from src.utils.file_helpers import (
-            read_text_file, write_text_file, append_chapters_to_file,
-            calculate_file_hash, calculate_content_hash
-        )
         import os
         
         db_manager = DatabaseManager()
@@ -467,171 +539,196 @@ class CrawlerManager:
                 'file_path': last_successful.get('file_path', '')
             }
         
-        # 3. 爬取所有章节（如果提供了parse_result则使用，否则重新解析）
+        # 3. 打开章节流式写入器：增量模式直接追加到已有文件，其余情况写入暂存文件；
+        #    上次爬取中途崩溃时按日志恢复已写入的章节，并从最后一章继续
+        storage_folder = os.path.expanduser(storage_folder)
+        existing_file = last_successful.get('file_path', '') if last_successful else ''
+        append_mode = bool(last_chapter_url) and bool(existing_file) and os.path.exists(existing_file)
+        writer = self._open_chapter_writer(parser, site_id, novel_id, storage_folder, existing_file if append_mode else None)
+        known_title = writer.info.get('title') or (last_successful.get('novel_title') if last_successful else None)
+        known_author = writer.info.get('author') or (last_successful.get('author', '') if last_successful else None)
+        if writer.recovered_count and writer.chapters[-1].get('url'):
+            last_chapter_url = writer.chapters[-1]['url']
+            start_index += writer.recovered_count
+            logger.info(f"恢复上次中断的爬取：已写入 {writer.recovered_count} 章，从 {last_chapter_url} 继续")
+        
+        # 4. 爬取所有章节（如果提供了parse_result则使用，否则重新解析）
         used_incremental_crawl = False  # 标记是否使用了增量爬取
         
         if parse_result is None:
-            # 优先尝试增量爬取
-            if last_chapter_url and hasattr(parser, 'parse_novel_detail_incremental'):
-                try:
-                    logger.info(f"使用增量爬取模式，从URL: {last_chapter_url} 开始")
-                    result = parser.parse_novel_detail_incremental(
-                        novel_id=novel_id,
-                        start_url=last_chapter_url,
-                        title=last_successful.get('novel_title') if last_successful else None,
-                        author=last_successful.get('author', '') if last_successful else None,
-                        start_index=start_index
-                    )
+            parser.stream_chapters_to(writer)
+            try:
+                # 优先尝试增量爬取
+                if last_chapter_url and hasattr(parser, 'parse_novel_detail_incremental'):
+                    try:
+                        logger.info(f"使用增量爬取模式，从URL: {last_chapter_url} 开始")
+                        # 在线程池中执行，避免阻塞事件循环（多本书并发爬取）
+                        loop = asyncio.get_event_loop()
+                        result = await loop.run_in_executor(None, partial(
+                            parser.parse_novel_detail_incremental,
+                            novel_id=novel_id,
+                            start_url=last_chapter_url,
+                            title=known_title,
+                            author=known_author,
+                            start_index=start_index
+                        ))
                     
-                    used_incremental_crawl = True  # 标记使用了增量爬取
+                        used_incremental_crawl = True  # 标记使用了增量爬取
                     
-                    # 检查是否成功爬取到新章节
-                    if result and result.get('chapters'):
-                        logger.info(f"增量爬取成功，获取到 {len(result['chapters'])} 个新章节")
-                    else:
-                        logger.info("增量爬取没有找到新章节")
-                        return {
-                            'success': True,
-                            'title': last_successful.get('novel_title', novel_title),
-                            'author': last_successful.get('author', parser.novel_site_name),
-                            'message': '没有新章节需要更新',
-                            'new_chapters': 0,
-                            'already_exists': True
-                        }
-                except NotImplementedError:
-                    logger.info("解析器不支持增量爬取，尝试从最后一章URL开始爬取")
-                    result = await self._crawl_from_last_chapter(parser, novel_id, last_chapter_url, last_successful.get('novel_title'))
-                    used_incremental_crawl = True  # 标记使用了增量爬取（通过最后一章URL）
-                except Exception as e:
-                    logger.warning(f"增量爬取失败: {e}，尝试从最后一章URL开始爬取")
-                    result = await self._crawl_from_last_chapter(parser, novel_id, last_chapter_url, last_successful.get('novel_title'))
-                    used_incremental_crawl = True  # 标记使用了增量爬取（通过最后一章URL）
-            else:
-                result = await self._async_parse_novel_detail(parser, novel_id)
+                        # 检查是否成功爬取到新章节
+                        if result and result.get('chapters'):
+                            logger.info(f"增量爬取成功，获取到 {len(result['chapters'])} 个新章节")
+                        elif not writer.chapters:
+                            logger.info("增量爬取没有找到新章节")
+                            writer.discard()
+                            return {
+                                'success': True,
+                                'title': last_successful.get('novel_title', novel_title),
+                                'author': last_successful.get('author', parser.novel_site_name),
+                                'message': '没有新章节需要更新',
+                                'new_chapters': 0,
+                                'already_exists': True
+                            }
+                    except NotImplementedError:
+                        logger.info("解析器不支持增量爬取，尝试从最后一章URL开始爬取")
+                        result = await self._crawl_from_last_chapter(parser, novel_id, last_chapter_url, known_title)
+                        used_incremental_crawl = True  # 标记使用了增量爬取（通过最后一章URL）
+                    except Exception as e:
+                        logger.warning(f"增量爬取失败: {e}，尝试从最后一章URL开始爬取")
+                        result = await self._crawl_from_last_chapter(parser, novel_id, last_chapter_url, known_title)
+                        used_incremental_crawl = True  # 标记使用了增量爬取（通过最后一章URL）
+                else:
+                    result = await self._async_parse_novel_detail(parser, novel_id)
+                
+            except BaseException:
+                writer.close()
+                raise
+            finally:
+                parser.stream_chapters_to(None)
                 
             if 'success' in result and not result['success']:
+                # 保留已写入的章节和日志，下次爬取时继续
+                writer.close()
                 return result
         else:
             result = parse_result
         
-        # 更新标题（从解析结果中获取）
-        actual_title = result.get('title', novel_title)
+        try:
+            # 更新标题（从解析结果中获取）
+            actual_title = result.get('title', novel_title)
         
-        all_chapters = result.get('chapters', [])
+            # 解析器未流式写入的章节（仍带正文）在这里补写，之后只使用写入器中的章节元数据；
+            # 追加模式下与已有章节重复的（按章节清单集合查找）会被跳过
+            writer.write_chapters([chapter for chapter in result.get('chapters', []) if 'content' in chapter], release=True)
+            all_chapters = writer.chapters
+            manifest = writer.manifest
         
-        # 4. 保存策略
-        duplicate_count = 0  # 默认值，后续可能被覆盖
-        if all_chapters:
-            if last_successful and os.path.exists(last_successful['file_path']):
-                if used_incremental_crawl:
-                    # 增量爬取模式：读取已有文件，追加新章节
-                    old_content = read_text_file(last_successful['file_path'])
-                    new_content = append_chapters_to_file(old_content, all_chapters)
-                    
-                    # 保存文件
-                    file_path = last_successful['file_path']
-                    write_text_file(file_path, new_content)
+            # 5. 保存策略
+            duplicate_count = writer.duplicate_count
+            if all_chapters:
+                if last_successful and os.path.exists(last_successful['file_path']):
+                    if writer.append:
+                        # 增量爬取模式：新章节已直接追加到已有文件末尾，无需读取和重写原有内容
+                        file_path = writer.commit()
+                        manifest.save(file_path)
                     
-                    logger.info(f"增量爬取模式：追加 {len(all_chapters)} 个新章节")
+                        logger.info(f"增量爬取模式：追加 {len(all_chapters)} 个新章节")
                     
-                    # 更新数据库记录
-                    update_data = {
-                        'file_path': file_path,
-                        'chapter_count': last_successful.get('chapter_count', 0) + len(all_chapters),
-                        'last_chapter_index': last_successful.get('chapter_count', 0) + len(all_chapters) - 1,
-                        'last_chapter_title': all_chapters[-1].get('title', ''),
-                        'last_chapter_url': all_chapters[-1].get('url', ''),
-                        'content_hash': calculate_file_hash(file_path) if file_path else '',
-                        'last_update_time': datetime.now().isoformat()
-                    }
-                    logger.info(f"更新最后一章: {update_data['last_chapter_title']} (索引: {update_data['last_chapter_index']})")
-                else:
-                    # 常规爬取模式：覆盖已有文件（返回的是完整章节列表）
-                    # 注意：因为 last_successful 存在，必须使用已有文件路径，不能创建新文件
-                    file_path = last_successful['file_path']
-                    
-                    # 将所有章节转换为文本格式
-                    content_lines = []
-                    for chapter in all_chapters:
-                        title = chapter.get('title', '')
-                        content = chapter.get('content', '')
-                        content_lines.append(f"## {title}\n\n{content}\n")
-                    
-                    new_content = "\n".join(content_lines)
-                    write_text_file(file_path, new_content)
+                        # 更新数据库记录
+                        update_data = {
+                            'file_path': file_path,
+                            'chapter_count': last_successful.get('chapter_count', 0) + len(all_chapters),
+                            'last_chapter_index': last_successful.get('chapter_count', 0) + len(all_chapters) - 1,
+                            'last_chapter_title': all_chapters[-1].get('title', ''),
+                            'last_chapter_url': all_chapters[-1].get('url', ''),
+                            'content_hash': manifest.digest,
+                            'last_update_time': datetime.now().isoformat()
+                        }
+                        logger.info(f"更新最后一章: {update_data['last_chapter_title']} (索引: {update_data['last_chapter_index']})")
+                    else:
+                        # 常规爬取模式：覆盖已有文件（返回的是完整章节列表）
+                        # 注意：因为 last_successful 存在，必须使用已有文件路径，不能创建新文件
+                        # 章节已逐章写入暂存文件，原子地替换已有文件
+                        file_path = writer.commit(last_successful['file_path'])
+                        manifest.save(file_path)
                     
-                    logger.info(f"常规爬取模式：覆盖已有文件 {file_path}，共 {len(all_chapters)} 个章节")
+                        logger.info(f"常规爬取模式：覆盖已有文件 {file_path}，共 {len(all_chapters)} 个章节")
                     
-                    # 更新数据库记录
-                    update_data = {
-                        'file_path': file_path,
-                        'chapter_count': len(all_chapters),
-                        'content_hash': calculate_file_hash(file_path) if file_path else '',
-                        'last_update_time': datetime.now().isoformat()
-                    }
-                    # 保持原有的最后一章信息不变（因为无法确定哪些是真正的新章节）
-                    logger.info(f"常规爬取模式，保持原有的最后一章信息不变: {last_successful.get('last_chapter_title', '')} (索引: {last_successful.get('last_chapter_index', -1)})")
+                        # 更新数据库记录
+                        update_data = {
+                            'file_path': file_path,
+                            'chapter_count': len(all_chapters),
+                            'content_hash': manifest.digest,
+                            'last_update_time': datetime.now().isoformat()
+                        }
+                        # 保持原有的最后一章信息不变（因为无法确定哪些是真正的新章节）
+                        logger.info(f"常规爬取模式，保持原有的最后一章信息不变: {last_successful.get('last_chapter_title', '')} (索引: {last_successful.get('last_chapter_index', -1)})")
                 
-                # 如果标题等于ID，修复为正确的标题
-                if last_successful.get('novel_title') == novel_id:
-                    logger.info(f"检测到错误标题（等于ID），自动修复: {novel_id} -> {actual_title}")
-                    update_data['novel_title'] = actual_title
+                    # 如果标题等于ID，修复为正确的标题
+                    if last_successful.get('novel_title') == novel_id:
+                        logger.info(f"检测到错误标题（等于ID），自动修复: {novel_id} -> {actual_title}")
+                        update_data['novel_title'] = actual_title
                 
-                db_manager.update_crawl_history_full(
-                    last_successful['id'],
-                    **update_data
-                )
-            else:
-                # 首次爬取：保存完整文件
-                storage_folder = os.path.expanduser(storage_folder)
-                file_path = parser.save_to_file(result, storage_folder)
+                    db_manager.update_crawl_history_full(
+                        last_successful['id'],
+                        **update_data
+                    )
+                else:
+                    # 首次爬取：章节已在暂存文件中，加上标题后移动到最终文件
+                    file_path = parser.save_to_file(result, storage_folder, writer=writer)
+                    # 章节偏移相对于暂存文件，需加上写在正文前的标题长度
+                    manifest.save(file_path, offset_shift=writer.header_bytes)
+                
+                    # 创建爬取历史记录
+                    db_manager.add_crawl_history(
+                        site_id=site_id,
+                        novel_id=novel_id,
+                        novel_title=actual_title,
+                        status='success',
+                        file_path=file_path,
+                        error_message='',
+                        book_type='多章节' if len(all_chapters) > 1 else '短篇',
+                        chapter_count=len(all_chapters),
+                        last_chapter_index=len(all_chapters) - 1 if all_chapters else -1,
+                        last_chapter_title=all_chapters[-1].get('title', '') if all_chapters else '',
+                        last_chapter_url=all_chapters[-1].get('url', '') if all_chapters else '',
+                        content_hash=manifest.digest,
+                        serial_mode=len(all_chapters) > 1  # 多章节自动启用连载模式
+                    )
                 
-                # 创建爬取历史记录
-                db_manager.add_crawl_history(
-                    site_id=site_id,
-                    novel_id=novel_id,
-                    novel_title=actual_title,
-                    status='success',
-                    file_path=file_path,
-                    error_message='',
-                    book_type='多章节' if len(all_chapters) > 1 else '短篇',
-                    chapter_count=len(all_chapters),
-                    last_chapter_index=len(all_chapters) - 1 if all_chapters else -1,
-                    last_chapter_title=all_chapters[-1].get('title', '') if all_chapters else '',
-                    last_chapter_url=all_chapters[-1].get('url', '') if all_chapters else '',
-                    content_hash=calculate_file_hash(file_path) if file_path else '',
-                    serial_mode=len(all_chapters) > 1  # 多章节自动启用连载模式
-                )
+                    logger.info(f"首次爬取，保存 {len(all_chapters)} 个章节")
                 
-                logger.info(f"首次爬取，保存 {len(all_chapters)} 个章节")
-        else:
-            # 没有新章节
-            logger.info(f"没有新章节，跳过爬取（已跳过 {duplicate_count} 个重复章节）")
+                gaps = manifest.find_gaps()
+                if gaps:
+                    logger.warning(f"章节编号存在缺口（共 {len(gaps)} 处）: {gaps[:20]}")
+            else:
+                # 没有新章节
+                writer.discard()
+                logger.info(f"没有新章节，跳过爬取（已跳过 {duplicate_count} 个重复章节）")
+                return {
+                    'success': True,
+                    'title': novel_title,
+                    'message': '没有新章节需要更新',
+                    'new_chapters': 0,
+                    'duplicate_count': duplicate_count,
+                    'already_exists': True
+                }
+        
+            # 反爬虫延迟由抓取调度器按主机限速与自适应退避统一处理，这里不再额外等待
+        
             return {
                 'success': True,
-                'title': novel_title,
-                'message': '没有新章节需要更新',
-                'new_chapters': 0,
+                'title': result['title'],
+                'author': result.get('author', parser.novel_site_name),  # 返回作者信息，优先使用解析结果中的作者，否则使用网站名称
+                'file_path': file_path if 'file_path' in locals() else last_successful.get('file_path') if last_successful else '',
+                'total_chapters': len(all_chapters) + (last_successful.get('chapter_count', 0) if last_successful else 0),
+                'new_chapters': len(all_chapters),
                 'duplicate_count': duplicate_count,
-                'already_exists': True
+                'already_exists': bool(last_successful) or getattr(parser, '_last_save_collided', False)
             }
-        
-        # 反爬虫优化：添加延迟
-        if len(all_chapters) > 5:
-            import time
-            delay = min(len(all_chapters) * 0.5, 10)  # 最多延迟10秒
-            logger.info(f"爬取了 {len(all_chapters)} 个新章节，延迟 {delay} 秒")
-            await asyncio.sleep(delay)
-        
-        return {
-            'success': True,
-            'title': result['title'],
-            'author': result.get('author', parser.novel_site_name),  # 返回作者信息，优先使用解析结果中的作者，否则使用网站名称
-            'file_path': file_path if 'file_path' in locals() else last_successful.get('file_path') if last_successful else '',
-            'total_chapters': len(all_chapters) + (last_successful.get('chapter_count', 0) if last_successful else 0),
-            'new_chapters': len(all_chapters),
-            'already_exists': bool(last_successful) or getattr(parser, '_last_save_collided', False)
-        }
+        finally:
+            # 异常中断时保留日志，下次爬取可从已写入的章节继续
+            writer.close()
     
     def stop_crawl_task(self, task_id: str) -> bool:
         """停止爬取任务"""
@@ -3,6 +3,7 @@
 """
 
 import os
+import re
 import sqlite3
 import requests
 import socket
@@ -14,6 +15,9 @@ from pathlib import Path
 from datetime import datetime
 
 from src.core.book import Book
+from src.core.db_connection_pool import SQLiteConnectionPool
+from src.core.book_window import BookFilter
+from src.core.permission_cache import PermissionSnapshot, PermissionSnapshotCache
 from src.config.config_manager import ConfigManager
 from src.utils.file_utils import FileUtils
 from src.utils.logger import get_logger
@@ -51,9 +55,61 @@ def convert_to_pinyin(text: str) -> str:
         logger.error(f"拼音转换失败: {e}")
         return ""
 
+def convert_to_pinyin_initials(text: str) -> str:
+    """
+    将书名转换为拼音首字母（如"三体"为"st"），非汉字部分取每个单词的首字符
+    
+    Args:
+        text: 书名
+        
+    Returns:
+        str: 小写的拼音首字母
+    """
+    if not _PY_PINYIN_AVAILABLE:
+        return ""
+    
+    try:
+        initials = []
+        for item in pinyin(text, style=Style.FIRST_LETTER):  # type: ignore
+            if item:
+                initials.extend(word[0] for word in re.findall(r'\w+', item[0]))
+        return "".join(initials).lower()
+    except Exception as e:
+        logger.error(f"拼音首字母转换失败: {e}")
+        return ""
+
+def _reading_stats_recompute_sql(row: str) -> str:
+    """
+    触发器语句：按 reading_history 重算 row（OLD/NEW）所在的统计汇总行
+    
+    Args:
+        row: 触发器中的行别名
+        
+    Returns:
+        str: SQL 语句
+    """
+    day = f"substr({row}.read_date, 1, 10)"
+    user = f"COALESCE({row}.user_id, 0)"
+    return f"""
+        DELETE FROM reading_daily_stats
+        WHERE user_id = {user} AND day = {day} AND book_path = {row}.book_path;
+        INSERT INTO reading_daily_stats (user_id, day, book_path, reading_time, pages_read, records,
+                                         longest_session, max_progress, first_read, last_read)
+        SELECT {user}, {day}, {row}.book_path, SUM(duration), SUM(COALESCE(pages_read, 0)), COUNT(*),
+               MAX(duration), MAX(COALESCE(reading_progress, 0)), MIN(read_date), MAX(read_date)
+        FROM reading_history
+        WHERE book_path = {row}.book_path
+          AND read_date >= {day} AND read_date <= {day} || char(1114111)
+          AND substr(read_date, 1, 10) = {day} AND COALESCE(user_id, 0) = {user}
+        GROUP BY book_path;
+    """
+
 class DatabaseManager:
     """数据库管理器类"""
     
+    # 已完成表结构初始化的数据库路径（同一进程内无需重复建表/迁移）
+    _initialized_paths: set = set()
+    
     def __init__(self, db_path: Optional[str] = None):
         """
         初始化数据库管理器
@@ -74,7 +130,30 @@ class DatabaseManager:
         # 确保数据库目录存在（如果是内存数据库则跳过）
         if self.db_path != ':memory:':
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        self._init_database()
+        
+        # 同一数据库路径共享按线程复用的长连接
+        self._pool = SQLiteConnectionPool.get_pool(self.db_path)
+        # 同一数据库路径共享的用户权限快照
+        self._permission_cache = PermissionSnapshotCache.for_database(self.db_path)
+        # 是否存在书架搜索索引（books_fts），首次搜索时检查
+        self._book_search_indexed: Optional[bool] = None
+        
+        if self.db_path == ':memory:' or self.db_path not in DatabaseManager._initialized_paths \
+                or not os.path.exists(self.db_path):
+            self._init_database()
+            self._permission_cache.invalidate()
+            DatabaseManager._initialized_paths.add(self.db_path)
+    
+    def connection(self):
+        """
+        获取当前线程的数据库事务单元（上下文管理器）
+        
+        最外层退出时自动提交，异常时回滚；嵌套使用时共享同一事务。
+        
+        Returns:
+            ContextManager[sqlite3.Connection]: 数据库连接上下文
+        """
+        return self._pool.transaction()
     
     def get_db_path(self) -> str:
         """
@@ -108,7 +187,7 @@ class DatabaseManager:
     
     def _init_database(self) -> None:
         """初始化数据库表结构"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.transaction() as conn:
             cursor = conn.cursor()
             
             # 启用 WAL 模式以支持并发读写
@@ -387,6 +466,17 @@ class DatabaseManager:
             # 添加格式索引用于筛选
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_format ON books(format)")
             
+            # 书架排序用的大小、标签索引
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_file_size ON books(file_size)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_tags ON books(tags)")
+            
+            # 阅读统计汇总表（由触发器随reading_history增量维护）
+            self._init_reading_stats(cursor)
+            # 书架阅读进度投影（由触发器随book_metadata维护）
+            self._init_reading_state(cursor)
+            # 书架搜索索引（由触发器随books维护）
+            self._init_book_search(cursor)
+            
             # 创建代理设置表（支持多条记录）
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS proxy_settings (
@@ -524,8 +614,256 @@ class DatabaseManager:
             self._add_column_if_not_exists(cursor, "crawl_history", "first_crawl_time", "TEXT")
             self._add_column_if_not_exists(cursor, "crawl_history", "last_update_time", "TEXT")
             self._add_column_if_not_exists(cursor, "crawl_history", "pinyin", "TEXT", "''")
-
-            conn.commit()
+    
+    def _init_reading_stats(self, cursor: sqlite3.Cursor) -> None:
+        """
+        创建阅读统计汇总表及同步触发器
+        
+        reading_daily_stats 按 (用户, 日期, 书籍) 汇总 reading_history：插入记录时累加，
+        删除或修改记录时重算对应的一组。统计界面的总计、趋势、热图和书籍排行都只查询汇总表。
+        表不存在时根据已有阅读记录一次性回填。
+        
+        Args:
+            cursor: 数据库游标
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reading_daily_stats'")
+        needs_backfill = cursor.fetchone() is None
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS reading_daily_stats (
+                user_id INTEGER NOT NULL DEFAULT 0,
+                day TEXT NOT NULL,                    -- read_date 的日期部分（YYYY-MM-DD）
+                book_path TEXT NOT NULL,
+                reading_time INTEGER NOT NULL DEFAULT 0,
+                pages_read INTEGER NOT NULL DEFAULT 0,
+                records INTEGER NOT NULL DEFAULT 0,
+                longest_session INTEGER NOT NULL DEFAULT 0,
+                max_progress REAL NOT NULL DEFAULT 0,
+                first_read TEXT,
+                last_read TEXT,
+                PRIMARY KEY (user_id, day, book_path)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_stats_day ON reading_daily_stats(day)")
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_reading_stats_insert AFTER INSERT ON reading_history
+            BEGIN
+                INSERT INTO reading_daily_stats (user_id, day, book_path, reading_time, pages_read, records,
+                                                 longest_session, max_progress, first_read, last_read)
+                VALUES (COALESCE(NEW.user_id, 0), substr(NEW.read_date, 1, 10), NEW.book_path,
+                        NEW.duration, COALESCE(NEW.pages_read, 0), 1, NEW.duration,
+                        COALESCE(NEW.reading_progress, 0), NEW.read_date, NEW.read_date)
+                ON CONFLICT (user_id, day, book_path) DO UPDATE SET
+                    reading_time = reading_time + excluded.reading_time,
+                    pages_read = pages_read + excluded.pages_read,
+                    records = records + 1,
+                    longest_session = MAX(longest_session, excluded.longest_session),
+                    max_progress = MAX(max_progress, excluded.max_progress),
+                    first_read = MIN(first_read, excluded.first_read),
+                    last_read = MAX(last_read, excluded.last_read);
+            END
+        """)
+        # 删除时汇总行已不存在（如重置统计时先清空了汇总表）则无需重算
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_reading_stats_delete AFTER DELETE ON reading_history
+            WHEN EXISTS (
+                SELECT 1 FROM reading_daily_stats
+                WHERE user_id = COALESCE(OLD.user_id, 0) AND day = substr(OLD.read_date, 1, 10)
+                  AND book_path = OLD.book_path
+            )
+            BEGIN
+                {_reading_stats_recompute_sql("OLD")}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_reading_stats_update
+            AFTER UPDATE OF book_path, read_date, duration, pages_read, user_id, reading_progress
+            ON reading_history
+            BEGIN
+                {_reading_stats_recompute_sql("OLD")}
+                {_reading_stats_recompute_sql("NEW")}
+            END
+        """)
+        
+        if needs_backfill:
+            cursor.execute("""
+                INSERT INTO reading_daily_stats (user_id, day, book_path, reading_time, pages_read, records,
+                                                 longest_session, max_progress, first_read, last_read)
+                SELECT COALESCE(user_id, 0), substr(read_date, 1, 10), book_path,
+                       SUM(duration), SUM(COALESCE(pages_read, 0)), COUNT(*), MAX(duration),
+                       MAX(COALESCE(reading_progress, 0)), MIN(read_date), MAX(read_date)
+                FROM reading_history
+                GROUP BY COALESCE(user_id, 0), substr(read_date, 1, 10), book_path
+            """)
+            if cursor.rowcount:
+                logger.info(f"已根据阅读记录生成统计汇总: {cursor.rowcount} 条")
+    
+    def _init_reading_state(self, cursor: sqlite3.Cursor) -> None:
+        """
+        创建书架阅读进度投影表及同步触发器
+        
+        book_reading_state 从 book_metadata 的 JSON 中取出阅读进度和最后阅读时间，
+        书架按进度、最后阅读时间排序（读完的书排在最后）时可以直接走索引分页。
+        表不存在时根据已有元数据一次性回填。
+        
+        Args:
+            cursor: 数据库游标
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_reading_state'")
+        needs_backfill = cursor.fetchone() is None
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS book_reading_state (
+                user_id INTEGER NOT NULL DEFAULT 0,
+                book_path TEXT NOT NULL,
+                reading_progress REAL NOT NULL DEFAULT 0,
+                last_read_date TEXT,
+                completed INTEGER NOT NULL DEFAULT 0,  -- reading_progress >= 1
+                PRIMARY KEY (user_id, book_path)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_reading_state_last_read
+            ON book_reading_state(user_id, completed, last_read_date)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_reading_state_progress
+            ON book_reading_state(user_id, completed, reading_progress)
+        """)
+        
+        # 元数据不是合法 JSON 时按未读处理，不能让触发器报错导致保存失败
+        progress_sql = ("COALESCE(CASE WHEN json_valid({0}.metadata) "
+                        "THEN CAST(json_extract({0}.metadata, '$.reading_progress') AS REAL) END, 0)")
+        last_read_sql = ("CASE WHEN json_valid({0}.metadata) "
+                         "THEN json_extract({0}.metadata, '$.last_read_date') END")
+        upsert_sql = f"""
+            INSERT OR REPLACE INTO book_reading_state (user_id, book_path, reading_progress, last_read_date, completed)
+            SELECT COALESCE(NEW.user_id, 0), NEW.book_path, p.progress, {last_read_sql.format("NEW")}, p.progress >= 1
+            FROM (SELECT {progress_sql.format("NEW")} AS progress) p;
+        """
+        # INSERT OR REPLACE INTO book_metadata 只触发 INSERT 触发器
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_reading_state_insert AFTER INSERT ON book_metadata
+            BEGIN
+                {upsert_sql}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_reading_state_update
+            AFTER UPDATE OF book_path, user_id, metadata ON book_metadata
+            BEGIN
+                DELETE FROM book_reading_state
+                WHERE user_id = COALESCE(OLD.user_id, 0) AND book_path = OLD.book_path;
+                {upsert_sql}
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_reading_state_delete AFTER DELETE ON book_metadata
+            BEGIN
+                DELETE FROM book_reading_state
+                WHERE user_id = COALESCE(OLD.user_id, 0) AND book_path = OLD.book_path;
+            END
+        """)
+        
+        if needs_backfill:
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO book_reading_state (user_id, book_path, reading_progress, last_read_date, completed)
+                SELECT COALESCE(bm.user_id, 0), bm.book_path, {progress_sql.format("bm")},
+                       {last_read_sql.format("bm")}, {progress_sql.format("bm")} >= 1
+                FROM book_metadata bm
+            """)
+            if cursor.rowcount:
+                logger.info(f"已根据书籍元数据生成阅读进度投影: {cursor.rowcount} 条")
+    
+    def _init_book_search(self, cursor: sqlite3.Cursor) -> None:
+        """
+        创建书架搜索索引及同步触发器
+        
+        books_fts 是 trigram 分词的 FTS5 表（标题、作者、标签、拼音、拼音首字母），
+        任意不少于3个字符的子串都可以走索引匹配；拼音首字母另存为 books.pinyin_initials，
+        并建立普通索引用于短关键词的前缀匹配。FTS 行的 rowid 与 books 的 rowid 一致，
+        两者数量不一致（如索引建立前已有书籍）时重建索引。索引中的文本均为小写，
+        排序时可以直接在索引行上比较前缀，不需要回表。
+        
+        Args:
+            cursor: 数据库游标
+        """
+        self._add_column_if_not_exists(cursor, "books", "pinyin_initials", "TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_books_pinyin_initials ON books(pinyin_initials)")
+        
+        # 补全拼音首字母（新增列之前添加的书籍）
+        if _PY_PINYIN_AVAILABLE:
+            cursor.execute("SELECT path, title FROM books WHERE pinyin_initials IS NULL")
+            rows = cursor.fetchall()
+            if rows:
+                cursor.executemany(
+                    "UPDATE books SET pinyin_initials = ? WHERE path = ?",
+                    [(convert_to_pinyin_initials(title) if title else "", path) for path, title in rows]
+                )
+                logger.info(f"已为 {len(rows)} 本书生成拼音首字母")
+        
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+                    path UNINDEXED, title, author, tags, pinyin, initials,
+                    tokenize = 'trigram'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"当前SQLite不支持FTS5 trigram分词，书架搜索将逐行匹配: {e}")
+            return
+        
+        # 排序权重：标题 > 拼音首字母 > 作者 > 拼音 > 标签
+        cursor.execute("INSERT INTO books_fts(books_fts, rank) VALUES('rank', 'bm25(0, 10, 4, 1, 2, 5)')")
+        
+        insert_sql = """
+            INSERT INTO books_fts (rowid, path, title, author, tags, pinyin, initials)
+            VALUES (NEW.rowid, NEW.path, lower(COALESCE(NEW.title, '')), lower(COALESCE(NEW.author, '')),
+                    lower(COALESCE(NEW.tags, '')), lower(COALESCE(NEW.pinyin, '')), COALESCE(NEW.pinyin_initials, ''));
+        """
+        # INSERT OR REPLACE INTO books 删除旧行时不触发 DELETE 触发器，插入前先删除同路径的索引行
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_books_fts_before_insert BEFORE INSERT ON books
+            BEGIN
+                DELETE FROM books_fts WHERE rowid IN (SELECT rowid FROM books WHERE path = NEW.path);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_books_fts_insert AFTER INSERT ON books
+            BEGIN
+                {insert_sql}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_books_fts_update
+            AFTER UPDATE OF path, title, author, tags, pinyin, pinyin_initials ON books
+            WHEN OLD.path IS NOT NEW.path OR OLD.title IS NOT NEW.title OR OLD.author IS NOT NEW.author
+                OR OLD.tags IS NOT NEW.tags OR OLD.pinyin IS NOT NEW.pinyin
+                OR OLD.pinyin_initials IS NOT NEW.pinyin_initials
+            BEGIN
+                DELETE FROM books_fts WHERE rowid = OLD.rowid;
+                {insert_sql}
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_books_fts_delete AFTER DELETE ON books
+            BEGIN
+                DELETE FROM books_fts WHERE rowid = OLD.rowid;
+            END
+        """)
+        
+        cursor.execute("SELECT (SELECT COUNT(*) FROM books), (SELECT COUNT(*) FROM books_fts)")
+        book_count, indexed_count = cursor.fetchone()
+        if book_count != indexed_count:
+            cursor.execute("DELETE FROM books_fts")
+            cursor.execute("""
+                INSERT INTO books_fts (rowid, path, title, author, tags, pinyin, initials)
+                SELECT rowid, path, lower(COALESCE(title, '')), lower(COALESCE(author, '')), lower(COALESCE(tags, '')),
+                       lower(COALESCE(pinyin, '')), COALESCE(pinyin_initials, '')
+                FROM books
+            """)
+            logger.info(f"已重建书架搜索索引: {book_count} 本书")
     
     def _get_connection_with_retry(self, max_retries: int = 3) -> sqlite3.Connection:
         """
@@ -615,22 +953,24 @@ class DatabaseManager:
             bool: 添加是否成功
         """
         try:
-            # 生成书名拼音
+            # 生成书名拼音和拼音首字母
             pinyin_text = convert_to_pinyin(book.title) if book.title else ""
+            initials_text = convert_to_pinyin_initials(book.title) if book.title else ""
             
             # 构建精简的metadata
             metadata_json = self._build_minimal_metadata(book)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT OR REPLACE INTO books 
-                    (path, title, pinyin, author, format, add_date, tags, metadata, file_size)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    (path, title, pinyin, pinyin_initials, author, format, add_date, tags, metadata, file_size)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     book.path,
                     book.title,
                     pinyin_text,
+                    initials_text,
                     book.author,
                     book.format,
                     book.add_date,
@@ -643,7 +983,8 @@ class DatabaseManager:
                 if user_id is not None:
                     cursor.execute("INSERT OR REPLACE INTO user_books (user_id, book_path) VALUES (?, ?)", (user_id, book.path))
                 
-                conn.commit()
+                if user_id is not None:
+                    self._permission_cache.invalidate(user_id)
                 
                 logger.info(f"书籍已添加到数据库: {book.title} (metadata大小: {len(metadata_json)} 字节)")
                 return True
@@ -662,7 +1003,7 @@ class DatabaseManager:
             Optional[Book]: 书籍对象，如果不存在则返回None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM books WHERE path = ?", (book_path,))
@@ -680,7 +1021,7 @@ class DatabaseManager:
         获取所有书籍（不区分用户）
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM books ORDER BY pinyin ASC")
@@ -695,7 +1036,7 @@ class DatabaseManager:
         获取某用户的书籍列表（根据 user_books 归属表）
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -721,7 +1062,7 @@ class DatabaseManager:
             List[tuple]: 书籍和阅读信息的元组列表 [(book, reading_info), ...]
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
 
@@ -823,6 +1164,216 @@ class DatabaseManager:
             logger.error(f"批量获取书籍和阅读信息失败: {e}")
             return []
     
+    # 书架排序键 -> 排序列（b 为 books，s 为 book_reading_state）
+    BOOK_SORT_COLUMNS = {
+        "id": "b.path",
+        "title": "b.title",
+        "author": "b.author",
+        "format": "b.format",
+        "size": "b.file_size",
+        "file_size": "b.file_size",
+        "tags": "b.tags",
+        "add_date": "b.add_date",
+        "last_read": "s.last_read_date",
+        "last_read_date": "s.last_read_date",
+        "progress": "s.reading_progress",
+    }
+    
+    def _book_filter_sql(self, book_filter: BookFilter) -> tuple:
+        """
+        书架筛选条件对应的 FROM/WHERE 子句
+        
+        Args:
+            book_filter: 筛选条件
+            
+        Returns:
+            tuple: (FROM 子句, WHERE 条件列表, 参数列表)
+        """
+        from_sql = ("FROM books b LEFT JOIN book_reading_state s "
+                    "ON s.user_id = ? AND s.book_path = b.path")
+        params: List[Any] = [book_filter.user_id or 0]
+        conditions: List[str] = []
+        if book_filter.user_id is not None:
+            conditions.append("b.path IN (SELECT book_path FROM user_books WHERE user_id = ?)")
+            params.append(book_filter.user_id)
+        if book_filter.book_format:
+            conditions.append("ltrim(lower(b.format), '.') = ?")
+            params.append(book_filter.book_format)
+        if book_filter.author:
+            conditions.append("lower(b.author) = ?")
+            params.append(book_filter.author)
+        if book_filter.keywords:
+            keyword_sql, keyword_params = self._book_keyword_sql(book_filter.keywords, book_filter.match_all)
+            conditions.append(keyword_sql)
+            params.extend(keyword_params)
+        return from_sql, conditions, params
+    
+    # trigram 分词只能匹配不少于该字符数的子串
+    BOOK_SEARCH_MIN_INDEXED_CHARS = 3
+    # 关键词匹配的列（书架搜索框不匹配拼音首字母）
+    BOOK_SEARCH_COLUMNS = ("title", "author", "tags", "pinyin")
+    
+    def _has_book_search_index(self) -> bool:
+        """数据库中是否存在书架搜索索引（SQLite 不支持 FTS5 trigram 时不会创建）"""
+        if self._book_search_indexed is None:
+            try:
+                with self._pool.transaction() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")
+                    self._book_search_indexed = cursor.fetchone() is not None
+            except sqlite3.Error as e:
+                logger.error(f"检查书架搜索索引失败: {e}")
+                return False
+        return self._book_search_indexed
+    
+    def _book_fts_query(self, keywords: List[str], match_all: bool, with_initials: bool) -> str:
+        """
+        把关键词转换为 books_fts 的 MATCH 表达式（每个关键词作为一个短语，即子串匹配）
+        
+        Args:
+            keywords: 关键词（均不少于3个字符）
+            match_all: 是否要求全部关键词匹配
+            with_initials: 是否同时匹配拼音首字母
+            
+        Returns:
+            str: MATCH 表达式
+        """
+        columns = self.BOOK_SEARCH_COLUMNS + (("initials",) if with_initials else ())
+        phrases = ['"' + keyword.replace('"', '""') + '"' for keyword in keywords]
+        joiner = " AND " if match_all else " OR "
+        return "{" + " ".join(columns) + "} : (" + joiner.join(phrases) + ")"
+    
+    def _book_keyword_sql(self, keywords, match_all: bool, with_initials: bool = False) -> tuple:
+        """
+        关键词匹配条件（b 为 books）
+        
+        不少于3个字符的关键词合并为一次全文索引查询，更短的关键词（或没有索引时）逐行匹配子串。
+        
+        Args:
+            keywords: 小写关键词
+            match_all: 是否要求全部关键词匹配
+            with_initials: 是否同时匹配拼音首字母
+            
+        Returns:
+            tuple: (条件SQL, 参数列表)
+        """
+        if self._has_book_search_index():
+            indexed = [k for k in keywords if len(k) >= self.BOOK_SEARCH_MIN_INDEXED_CHARS]
+            scanned = [k for k in keywords if len(k) < self.BOOK_SEARCH_MIN_INDEXED_CHARS]
+        else:
+            indexed, scanned = [], list(keywords)
+        parts: List[str] = []
+        params: List[Any] = []
+        if indexed:
+            parts.append("b.rowid IN (SELECT rowid FROM books_fts WHERE books_fts MATCH ?)")
+            params.append(self._book_fts_query(indexed, match_all, with_initials))
+        # LIKE 本身对 ASCII 字母不区分大小写，比逐行 lower() 后 instr() 快一倍多
+        columns = ["b.title", "b.author", "b.pinyin", "b.tags"] + (["b.pinyin_initials"] if with_initials else [])
+        for keyword in scanned:
+            pattern = "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            parts.append("(" + " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in columns) + ")")
+            params.extend([pattern] * len(columns))
+        joiner = " AND " if match_all else " OR "
+        return "(" + joiner.join(parts) + ")", params
+    
+    def count_books_by_filter(self, book_filter: BookFilter) -> Dict[str, tuple]:
+        """
+        按格式统计符合筛选条件的书籍数量
+        
+        Args:
+            book_filter: 筛选条件
+            
+        Returns:
+            Dict[str, tuple]: 格式 -> (书籍数, 已读完数, 没有阅读进度的书籍数)
+        """
+        from_sql, conditions, params = self._book_filter_sql(book_filter)
+        where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            with self._pool.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT b.format, COUNT(*),
+                           SUM(CASE WHEN s.completed = 1 THEN 1 ELSE 0 END),
+                           SUM(CASE WHEN s.book_path IS NULL THEN 1 ELSE 0 END)
+                    {from_sql} {where_sql}
+                    GROUP BY b.format
+                """, params)
+                return {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            logger.error(f"统计书架书籍数量失败: {e}")
+            return {}
+    
+    def get_books_page(self, book_filter: BookFilter, sort_key: str, reverse: bool,
+                       offset: int, limit: int, total: int, completed: int,
+                       no_progress: int) -> List[tuple]:
+        """
+        按排序分页获取书籍及阅读进度（读完的书始终排在最后）
+        
+        结果按"未读完 / 读完"（按进度、最后阅读时间排序时再分出没有进度记录的书籍）分段，
+        每段单独按排序列的索引扫描并在取够行数后停止，而不是对全部书籍排序后再取一页。
+        各段的行数由 count_books_by_filter 的结果给出。
+        
+        Args:
+            book_filter: 筛选条件
+            sort_key: 排序键（见 BOOK_SORT_COLUMNS）
+            reverse: 是否倒序
+            offset: 起始位置
+            limit: 最多返回的行数
+            total: 符合条件的书籍数
+            completed: 其中已读完的数量
+            no_progress: 其中没有阅读进度记录的数量
+            
+        Returns:
+            List[tuple]: [(book, reading_info), ...]，没有阅读进度记录时 reading_info 为None
+        """
+        column = self.BOOK_SORT_COLUMNS.get(sort_key, "b.title")
+        direction = "DESC" if reverse else "ASC"
+        if column.startswith("s."):
+            order_sql = f"{column} {direction}, s.book_path {direction}"
+            # 没有进度记录的书籍相当于进度为0、从未阅读，正序时在前，倒序时在后
+            in_progress = ("s.completed = 0", order_sql, total - completed - no_progress)
+            unread = ("s.book_path IS NULL", "b.pinyin, b.rowid", no_progress)
+            segments = [in_progress, unread] if reverse else [unread, in_progress]
+        else:
+            order_sql = f"{column} {direction}, b.rowid {direction}"
+            segments = [("s.completed IS NOT 1", order_sql, total - completed)]
+        segments.append(("s.completed = 1", order_sql, completed))
+        
+        from_sql, conditions, params = self._book_filter_sql(book_filter)
+        results: List[tuple] = []
+        try:
+            with self._pool.transaction() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.cursor()
+                for segment_sql, segment_order, size in segments:
+                    if limit <= 0:
+                        break
+                    if offset >= size:
+                        offset -= size
+                        continue
+                    cursor.execute(f"""
+                        SELECT b.*, s.book_path AS state_path, s.reading_progress AS state_progress,
+                               s.last_read_date AS state_last_read
+                        {from_sql}
+                        WHERE {' AND '.join(conditions + [segment_sql])}
+                        ORDER BY {segment_order}
+                        LIMIT ? OFFSET ?
+                    """, params + [min(limit, size - offset), offset])
+                    rows = cursor.fetchall()
+                    for row in rows:
+                        reading_info = None
+                        if row['state_path'] is not None:
+                            reading_info = {
+                                'last_read_date': row['state_last_read'],
+                                'reading_progress': row['state_progress'] or 0,
+                            }
+                        results.append((self._row_to_book(row), reading_info))
+                    limit -= len(rows)
+                    offset = 0
+        except sqlite3.Error as e:
+            logger.error(f"分页获取书架书籍失败: {e}")
+        return results
+    
     def update_book(self, book: Book, old_path: Optional[str] = None) -> bool:
         """
         更新书籍信息
@@ -835,13 +1386,14 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            # 生成书名拼音
+            # 生成书名拼音和拼音首字母
             pinyin_text = convert_to_pinyin(book.title) if book.title else ""
+            initials_text = convert_to_pinyin_initials(book.title) if book.title else ""
             
             # 构建精简的metadata
             metadata_json = self._build_minimal_metadata(book)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # 如果提供了旧路径，使用旧路径作为WHERE条件（用于路径更新）
@@ -849,12 +1401,14 @@ class DatabaseManager:
                 
                 cursor.execute("""
                     UPDATE books 
-                    SET path = ?, title = ?, pinyin = ?, author = ?, format = ?, tags = ?, metadata = ?, file_size = ?
+                    SET path = ?, title = ?, pinyin = ?, pinyin_initials = ?, author = ?, format = ?, tags = ?,
+                        metadata = ?, file_size = ?
                     WHERE path = ?
                 """, (
                     book.path,
                     book.title,
                     pinyin_text,
+                    initials_text,
                     book.author,
                     book.format,
                     book.tags if book.tags else "",
@@ -862,7 +1416,6 @@ class DatabaseManager:
                     book.file_size,
                     where_path
                 ))
-                conn.commit()
                 
                 success = cursor.rowcount > 0
                 if success:
@@ -885,13 +1438,15 @@ class DatabaseManager:
             bool: 删除是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # 【修复】先删除关联表数据
+                ownership_changed = False
                 if cleanup_associated:
                     # 删除用户书籍关联
                     cursor.execute("DELETE FROM user_books WHERE book_path = ?", (book_path,))
+                    ownership_changed = cursor.rowcount > 0
                     # 删除阅读进度（如果有）
                     try:
                         cursor.execute("DELETE FROM reading_progress WHERE book_path = ?", (book_path,))
@@ -900,7 +1455,8 @@ class DatabaseManager:
                 
                 # 删除主表数据
                 cursor.execute("DELETE FROM books WHERE path = ?", (book_path,))
-                conn.commit()
+                if ownership_changed:
+                    self._permission_cache.invalidate()
                 
                 deleted = cursor.rowcount > 0
                 if deleted:
@@ -910,66 +1466,103 @@ class DatabaseManager:
             logger.error(f"删除书籍失败: {e}")
             return False
     
-    def search_books(self, keyword: str, format: Optional[str] = None) -> List[Book]:
+    def search_books(self, keyword: str, format: Optional[str] = None, user_id: Optional[int] = None,
+                     limit: Optional[int] = None) -> List[Book]:
         """
-        搜索书籍（按标题、拼音、作者和标签）
+        搜索书籍（按标题、作者、标签、拼音和拼音首字母），结果按相关度排序
+        
+        关键词不少于3个字符时通过 books_fts 索引匹配，按书名完全匹配、前缀匹配、BM25 相关度排序；
+        更短的关键词先通过拼音首字母和书名索引取前缀匹配的书籍，再逐行匹配子串补足。
         
         Args:
-            keyword: 搜索关键词（支持英文逗号分割多个关键词）
+            keyword: 搜索关键词（支持英文逗号分割多个关键词），为空时返回全部书籍
             format: 可选，文件格式筛选
+            user_id: 可选，只搜索该用户的书籍
+            limit: 可选，最多返回的书籍数
             
         Returns:
             List[Book]: 匹配的书籍列表
         """
+        # 支持使用英文逗号分割多个关键词
+        keywords = [k.strip().lower() for k in (keyword or "").split(',') if k.strip()]
+        
+        conditions: List[str] = []
+        params: List[Any] = []
+        if user_id is not None:
+            conditions.append("b.path IN (SELECT book_path FROM user_books WHERE user_id = ?)")
+            params.append(user_id)
+        if format:
+            conditions.append("lower(b.format) = ?")
+            params.append(format.lower())
+        limit_sql = " LIMIT ?" if limit is not None else ""
+        limit_params = [limit] if limit is not None else []
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
-                # 支持使用英文逗号分割多个关键词
-                keywords = [k.strip() for k in keyword.split(',') if k.strip()]
-                
                 if not keywords:
-                    # 如果没有有效关键词，返回空列表
-                    return []
-                
-                # 构建SQL查询条件
-                conditions = []
-                params = []
-                
-                # 为每个关键词构建搜索条件
-                for k in keywords:
-                    search_pattern = f"%{k}%"
-                    # 每个关键词在标题、拼音、作者、标签中搜索
-                    condition = "(title LIKE ? OR pinyin LIKE ? OR author LIKE ? OR tags LIKE ?)"
-                    conditions.append(condition)
-                    params.extend([search_pattern, search_pattern, search_pattern, search_pattern])
-                
-                # 组合所有条件（OR关系）
-                where_clause = " OR ".join(conditions)
-                
-                if format:
-                    sql = f"""
-                        SELECT * FROM books 
-                        WHERE ({where_clause}) AND format = ?
-                        ORDER BY add_date DESC
-                    """
-                    params.append(format.lower())
-                else:
-                    sql = f"""
-                        SELECT * FROM books 
-                        WHERE {where_clause}
-                        ORDER BY add_date DESC
-                    """
-                
-                cursor.execute(sql, params)
+                    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                    cursor.execute(f"SELECT b.* FROM books b {where_sql} ORDER BY b.pinyin{limit_sql}",
+                                   params + limit_params)
+                    return [self._row_to_book(row) for row in cursor.fetchall()]
+                
+                if self._has_book_search_index() and \
+                        all(len(k) >= self.BOOK_SEARCH_MIN_INDEXED_CHARS for k in keywords):
+                    # 书名完全匹配、书名/拼音首字母/拼音前缀匹配的排在前面，其余按 BM25 相关度；
+                    # 在索引行（小写）上排序截取后再回表
+                    exact_sql = " OR ".join(["f.title = ?"] * len(keywords))
+                    prefix_sql = " OR ".join(["instr(f.title, ?) = 1 OR instr(f.initials, ?) = 1 "
+                                              "OR instr(f.pinyin, ?) = 1"] * len(keywords))
+                    boost_params = keywords + [k for k in keywords for _ in range(3)]
+                    join_sql = "JOIN books b ON b.rowid = f.rowid" if conditions else ""
+                    where_sql = "".join(f" AND {c}" for c in conditions)
+                    cursor.execute(f"""
+                        SELECT b.* FROM (
+                            SELECT f.rowid AS id,
+                                   CASE WHEN {exact_sql} THEN 0 WHEN {prefix_sql} THEN 1 ELSE 2 END AS boost,
+                                   f.rank AS score
+                            FROM books_fts f {join_sql}
+                            WHERE books_fts MATCH ?{where_sql}
+                            ORDER BY boost, score{limit_sql}
+                        ) m JOIN books b ON b.rowid = m.id
+                        ORDER BY m.boost, m.score
+                    """, boost_params + [self._book_fts_query(keywords, False, True)] + params + limit_params)
+                    return [self._row_to_book(row) for row in cursor.fetchall()]
+                
+                keyword_sql, keyword_params = self._book_keyword_sql(keywords, False, with_initials=True)
+                where_sql = " AND ".join(conditions + [keyword_sql])
+                
+                # 短关键词：先通过拼音首字母和书名索引取前缀匹配的书籍
+                short_keywords = [k for k in keywords if len(k) < self.BOOK_SEARCH_MIN_INDEXED_CHARS]
+                range_sql = " OR ".join(["(b.pinyin_initials >= ? AND b.pinyin_initials < ?) "
+                                         "OR (b.title >= ? AND b.title < ?)"] * len(short_keywords))
+                range_params = [v for k in short_keywords for v in (k, k + "\U0010ffff") * 2]
+                cursor.execute(f"""
+                    SELECT b.* FROM books b
+                    WHERE ({range_sql}) AND {where_sql}
+                    ORDER BY length(b.title), b.pinyin{limit_sql}
+                """, range_params + params + keyword_params + limit_params)
                 rows = cursor.fetchall()
                 
-                return [self._row_to_book(row) for row in rows if row]
+                # 再逐行匹配子串补足：不排序，取够数量即停止扫描
+                if limit is None or len(rows) < limit:
+                    found = {row['path'] for row in rows}
+                    rest_limit = [limit + len(found)] if limit is not None else []
+                    cursor.execute(f"SELECT b.* FROM books b WHERE {where_sql}{limit_sql}",
+                                   params + keyword_params + rest_limit)
+                    rest = [row for row in cursor.fetchall() if row['path'] not in found]
+                    rest.sort(key=lambda row: row['pinyin'] or "")
+                    rows.extend(rest)
+                    if limit is not None:
+                        rows = rows[:limit]
+                
+                return [self._row_to_book(row) for row in rows]
         except sqlite3.Error as e:
             logger.error(f"搜索书籍失败: {e}")
             return []
-    
+
     def get_sorted_books(self, sort_key: str, reverse: bool = False) -> List[Book]:
         """
         获取排序后的书籍列表（使用数据库排序）
@@ -982,7 +1575,7 @@ class DatabaseManager:
             List[Book]: 排序后的书籍列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
@@ -1052,7 +1645,7 @@ class DatabaseManager:
             bool: 添加是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # 设置用户ID（多用户模式关闭时使用0）
@@ -1118,7 +1711,6 @@ class DatabaseManager:
                     current_time
                 ))
                 
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             logger.error(f"添加阅读记录失败: {e}")
@@ -1138,7 +1730,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 阅读历史记录列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
@@ -1183,7 +1775,7 @@ class DatabaseManager:
             Optional[Dict[str, Any]]: 最新的阅读记录，如果不存在则返回None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
@@ -1308,7 +1900,7 @@ class DatabaseManager:
             bool: 添加是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 timestamp = time.time()
                 created_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -1330,7 +1922,6 @@ class DatabaseManager:
                         VALUES (?, ?, ?, ?, ?, ?)
                     """, (book_path, position, note, timestamp, created_date, user_id_value))
                 
-                conn.commit()
                 return cursor.lastrowid is not None
         except sqlite3.Error as e:
             logger.error(f"添加书签失败: {e}")
@@ -1348,7 +1939,7 @@ class DatabaseManager:
             bool: 删除是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 if user_id is not None and user_id > 0:
@@ -1356,7 +1947,6 @@ class DatabaseManager:
                 else:
                     cursor.execute("DELETE FROM bookmarks WHERE id = ?", (bookmark_id,))
                 
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"删除书签失败: {e}")
@@ -1374,7 +1964,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 书签列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
@@ -1408,7 +1998,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 书签列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
@@ -1436,7 +2026,7 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 if user_id is not None and user_id > 0:
@@ -1448,7 +2038,6 @@ class DatabaseManager:
                         UPDATE bookmarks SET note = ? WHERE id = ?
                     """, (note, bookmark_id))
                 
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"更新书签备注失败: {e}")
@@ -1466,7 +2055,7 @@ class DatabaseManager:
             bool: 保存是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 updated_at = datetime.now().isoformat()
                 created_at = datetime.now().isoformat()
@@ -1489,7 +2078,6 @@ class DatabaseManager:
                     created_at,
                     updated_at
                 ))
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             logger.error(f"保存代理设置失败: {e}")
@@ -1503,7 +2091,7 @@ class DatabaseManager:
             Dict[str, Any]: 代理设置字典
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM proxy_settings ORDER BY id DESC LIMIT 1")
@@ -1559,7 +2147,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 代理设置列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM proxy_settings ORDER BY name")
@@ -1590,7 +2178,7 @@ class DatabaseManager:
             bool: 添加是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 created_at = datetime.now().isoformat()
                 updated_at = datetime.now().isoformat()
@@ -1610,7 +2198,6 @@ class DatabaseManager:
                     created_at,
                     updated_at
                 ))
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             logger.error(f"添加代理设置失败: {e}")
@@ -1628,7 +2215,7 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 updated_at = datetime.now().isoformat()
                 
@@ -1648,7 +2235,6 @@ class DatabaseManager:
                     updated_at,
                     proxy_id
                 ))
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"更新代理设置失败: {e}")
@@ -1665,10 +2251,9 @@ class DatabaseManager:
             bool: 删除是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM proxy_settings WHERE id = ?", (proxy_id,))
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"删除代理设置失败: {e}")
@@ -1685,7 +2270,7 @@ class DatabaseManager:
             bool: 操作是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 updated_at = datetime.now().isoformat()
                 
@@ -1695,7 +2280,6 @@ class DatabaseManager:
                 # 启用指定代理
                 cursor.execute("UPDATE proxy_settings SET enabled = 1, updated_at = ? WHERE id = ?", (updated_at, proxy_id))
                 
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"启用代理设置失败: {e}")
@@ -1709,7 +2293,7 @@ class DatabaseManager:
             Optional[Dict[str, Any]]: 启用的代理设置，如果没有则返回None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM proxy_settings WHERE enabled = 1 LIMIT 1")
@@ -1737,7 +2321,7 @@ class DatabaseManager:
             bool: 保存是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 now = datetime.now().isoformat()
                 
@@ -1786,7 +2370,6 @@ class DatabaseManager:
                         now
                     ))
                 
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             logger.error(f"保存书籍网站配置失败: {e}")
@@ -1800,7 +2383,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 网站配置列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM novel_sites ORDER BY rating DESC, created_at")
@@ -1822,7 +2405,7 @@ class DatabaseManager:
             int: 爬取成功的书籍数量
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT COUNT(DISTINCT novel_id) 
@@ -1848,10 +2431,9 @@ class DatabaseManager:
             bool: 删除是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM novel_sites WHERE id = ?", (site_id,))
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"删除书籍网站配置失败: {e}")
@@ -1881,7 +2463,7 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 now = datetime.now().isoformat()
                 cursor.execute("""
@@ -1889,7 +2471,6 @@ class DatabaseManager:
                     SET status = ?, updated_at = ?
                     WHERE id = ?
                 """, (status, now, site_id))
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"更新网站状态失败: {e}")
@@ -1903,7 +2484,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: CMS T1网站列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -1962,7 +2543,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: CMS T2网站列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2021,7 +2602,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: CMS T3网站列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2080,7 +2661,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: CMS T4网站列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2139,7 +2720,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: CMS T5网站列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2198,7 +2779,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: CMS T6网站列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2325,7 +2906,7 @@ class DatabaseManager:
             Optional[Dict[str, Any]]: 网站配置字典，如果不存在则返回None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM novel_sites WHERE id = ?", (site_id,))
@@ -2377,7 +2958,7 @@ class DatabaseManager:
             # 生成书名拼音
             pinyin_text = convert_to_pinyin(novel_title) if novel_title else ""
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 crawl_time = datetime.now().isoformat()
 
@@ -2406,7 +2987,6 @@ class DatabaseManager:
                     crawl_time if status == 'success' else None,
                     pinyin_text
                 ))
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             logger.error(f"添加爬取历史记录失败: {e}")
@@ -2424,7 +3004,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 爬取历史记录列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 query = """
@@ -2463,7 +3043,7 @@ class DatabaseManager:
         try:
             from datetime import datetime, timedelta
             end_next = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute(
@@ -2492,7 +3072,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 爬取历史记录列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2518,7 +3098,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 爬取历史记录列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2544,7 +3124,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 匹配的爬取历史记录列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2572,7 +3152,7 @@ class DatabaseManager:
                   如果是连载模式且check_serial_mode=True，返回False允许增量更新
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2613,7 +3193,7 @@ class DatabaseManager:
             int: 连续失败次数
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2654,7 +3234,7 @@ class DatabaseManager:
             是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -2663,7 +3243,6 @@ class DatabaseManager:
                     WHERE site_id = ? AND novel_id = ?
                 """, (new_title, site_id, novel_id))
                 
-                conn.commit()
                 
                 if cursor.rowcount > 0:
                     logger.info(f"修复小说标题成功: {novel_id} -> {new_title}")
@@ -2688,7 +3267,7 @@ class DatabaseManager:
             爬取记录字典，如果没有则返回None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -2715,7 +3294,7 @@ class DatabaseManager:
             是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 if not kwargs:
@@ -2736,7 +3315,6 @@ class DatabaseManager:
                     WHERE id = ?
                 """, update_values)
                 
-                conn.commit()
                 logger.info(f"更新爬取历史记录 {history_id} 成功，更新字段: {list(kwargs.keys())}")
                 return True
         except sqlite3.Error as e:
@@ -2754,10 +3332,9 @@ class DatabaseManager:
             bool: 删除是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM crawl_history WHERE id = ?", (history_id,))
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"删除爬取历史记录失败: {e}")
@@ -2776,7 +3353,7 @@ class DatabaseManager:
             bool: 保存是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 now = datetime.now().isoformat()
                 
@@ -2791,7 +3368,6 @@ class DatabaseManager:
                     now,
                     now
                 ))
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             logger.error(f"保存书籍网站备注失败: {e}")
@@ -2808,7 +3384,7 @@ class DatabaseManager:
             Optional[str]: 备注内容，如果不存在则返回None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT note_content FROM novel_site_notes 
@@ -2828,10 +3404,9 @@ class DatabaseManager:
         删除书籍网站备注
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM novel_site_notes WHERE site_id = ?", (site_id,))
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"删除书籍网站备注失败: {e}")
@@ -2845,14 +3420,14 @@ class DatabaseManager:
     def create_user(self, username: str, password: str, role: str = "user") -> Optional[int]:
         """创建用户；返回用户ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 now = datetime.now().isoformat()
                 cursor.execute("""
                     INSERT INTO users (username, password_hash, role, created_at)
                     VALUES (?, ?, ?, ?)
                 """, (username, self._hash_password(password), role, now))
-                conn.commit()
+                self._permission_cache.invalidate(cursor.lastrowid)
                 return cursor.lastrowid
         except sqlite3.Error as e:
             logger.error(f"创建用户失败: {e}")
@@ -2861,10 +3436,9 @@ class DatabaseManager:
     def set_user_password(self, user_id: int, new_password: str) -> bool:
         """设置用户密码"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (self._hash_password(new_password), user_id))
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"设置用户密码失败: {e}")
@@ -2873,7 +3447,7 @@ class DatabaseManager:
     def authenticate(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """认证，成功返回用户字典"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
@@ -2891,7 +3465,7 @@ class DatabaseManager:
     def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
         """根据用户ID获取用户信息"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
@@ -2906,12 +3480,12 @@ class DatabaseManager:
     def set_user_permissions(self, user_id: int, perm_keys: List[str]) -> bool:
         """设置用户权限（覆盖式）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM user_permissions WHERE user_id = ?", (user_id,))
                 for key in perm_keys:
                     cursor.execute("INSERT OR REPLACE INTO user_permissions (user_id, perm_key, allowed) VALUES (?, ?, 1)", (user_id, key))
-                conn.commit()
+                self._permission_cache.invalidate(user_id)
                 return True
         except sqlite3.Error as e:
             logger.error(f"设置用户权限失败: {e}")
@@ -2942,22 +3516,72 @@ class DatabaseManager:
             return True  # 出错时默认允许
     
     def has_permission(self, user_id: Optional[int], perm_key: str, role: Optional[str] = None) -> bool:
-        """检查权限；超级管理拥有全部权限"""
+        """检查权限；超级管理拥有全部权限（使用缓存的权限快照）"""
         try:
             if role == "superadmin" or role == "super_admin":
                 return True
             # 如果user_id为None或0，表示未登录用户，默认无权限
             if not user_id:
                 return False
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT allowed FROM user_permissions WHERE user_id = ? AND perm_key = ?", (user_id, perm_key))
-                row = cursor.fetchone()
-                return bool(row and (row[0] == 1))
+            return perm_key in self.get_permission_snapshot(user_id).permissions
         except sqlite3.Error as e:
             logger.error(f"检查权限失败: {e}")
             return False
 
+    def get_permission_snapshot(self, user_id: int) -> PermissionSnapshot:
+        """
+        获取用户的权限快照（角色、已授权权限、归属书籍）
+        
+        快照在用户、权限或书籍归属变化前一直有效，修改这些数据的方法会使其失效；
+        绕过本类直接修改相关表后需调用 invalidate_permission_cache。
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            PermissionSnapshot: 权限快照
+        """
+        return self._permission_cache.get(user_id, self._load_permission_snapshot)
+
+    def _load_permission_snapshot(self, user_id: int) -> PermissionSnapshot:
+        """从数据库加载用户权限快照"""
+        with self._pool.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT role FROM users WHERE id = ?", (user_id,))
+            row = cursor.fetchone()
+            role = row[0] if row else None
+            cursor.execute("SELECT perm_key FROM user_permissions WHERE user_id = ? AND allowed = 1", (user_id,))
+            permissions = frozenset(r[0] for r in cursor.fetchall() if r[0])
+            cursor.execute("SELECT book_path FROM user_books WHERE user_id = ?", (user_id,))
+            books = frozenset(r[0] for r in cursor.fetchall())
+        return PermissionSnapshot(user_id=user_id, role=role, permissions=permissions, books=books)
+
+    def invalidate_permission_cache(self, user_id: Optional[int] = None) -> None:
+        """
+        使权限快照失效（直接修改 users / user_permissions / user_books 表后调用）
+        
+        Args:
+            user_id: 只使该用户的快照失效；为None时全部失效
+        """
+        self._permission_cache.invalidate(user_id)
+
+    def user_owns_book(self, user_id: int, book_path: str) -> bool:
+        """
+        书籍是否归属该用户（使用缓存的权限快照）
+        
+        Args:
+            user_id: 用户ID
+            book_path: 书籍路径
+            
+        Returns:
+            bool: 是否归属
+        """
+        try:
+            return book_path in self.get_permission_snapshot(user_id).books
+        except sqlite3.Error as e:
+            logger.error(f"检查书籍归属失败: {e}")
+            return False
+
     def get_all_permissions(self) -> List[Dict[str, Any]]:
         """
         获取所有权限的完整信息（包括key和description）
@@ -2966,7 +3590,7 @@ class DatabaseManager:
             List[Dict[str, Any]]: 权限列表，每个权限包含key和description
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 cursor.execute("SELECT key, description FROM permissions ORDER BY key")
@@ -2979,10 +3603,10 @@ class DatabaseManager:
     def assign_book_to_user(self, user_id: int, book_path: str) -> bool:
         """将书籍标注为该用户的书籍（不用于显示，仅过滤用）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("INSERT OR REPLACE INTO user_books (user_id, book_path) VALUES (?, ?)", (user_id, book_path))
-                conn.commit()
+                self._permission_cache.invalidate(user_id)
                 return True
         except sqlite3.Error as e:
             logger.error(f"书籍归属用户失败: {e}")
@@ -2999,14 +3623,7 @@ class DatabaseManager:
             List[str]: 用户拥有的权限键列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT perm_key FROM user_permissions 
-                    WHERE user_id = ? AND allowed = 1
-                """, (user_id,))
-                rows = cursor.fetchall()
-                return [row[0] for row in rows if row and row[0]]
+            return sorted(self.get_permission_snapshot(user_id).permissions)
         except sqlite3.Error as e:
             logger.error(f"获取用户权限失败: {e}")
             return []
@@ -3023,10 +3640,9 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE bookmarks SET book_path = ? WHERE book_path = ?", (new_path, old_path))
-                conn.commit()
                 logger.info(f"更新书签表路径引用: {old_path} -> {new_path}")
                 return True
         except sqlite3.Error as e:
@@ -3045,7 +3661,7 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 # 从新路径中提取新的书籍名称（去掉目录路径和文件扩展名）
                 # 文件名可能带时间戳后缀（如 _20260712_1809），剥离后仅保留书籍名称
@@ -3055,7 +3671,6 @@ class DatabaseManager:
                 # 更新文件路径和书籍名称
                 cursor.execute("UPDATE crawl_history SET file_path = ?, novel_title = ? WHERE file_path = ?", 
                              (new_path, new_title, old_path))
-                conn.commit()
                 logger.info(f"更新爬取历史表路径引用和名称: {old_path} -> {new_path}, 新名称: {new_title}")
                 return True
         except sqlite3.Error as e:
@@ -3074,10 +3689,9 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE reading_history SET book_path = ? WHERE book_path = ?", (new_path, old_path))
-                conn.commit()
                 logger.info(f"更新阅读历史表路径引用: {old_path} -> {new_path}")
                 return True
         except sqlite3.Error as e:
@@ -3098,7 +3712,7 @@ class DatabaseManager:
             bool: 保存是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 
@@ -3112,7 +3726,6 @@ class DatabaseManager:
                     VALUES (?, ?, ?, ?)
                 """, (book_path, user_id_value, metadata, last_updated))
                 
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             logger.error(f"保存书籍元数据失败: {e}")
@@ -3130,7 +3743,7 @@ class DatabaseManager:
             Optional[str]: 元数据JSON字符串，如果不存在则返回None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # 设置用户ID（多用户模式关闭时使用0）
@@ -3161,7 +3774,7 @@ class DatabaseManager:
             bool: 删除是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # 设置用户ID（多用户模式关闭时使用0）
@@ -3172,7 +3785,6 @@ class DatabaseManager:
                     WHERE book_path = ? AND user_id = ?
                 """, (book_path, user_id_value))
                 
-                conn.commit()
                 return cursor.rowcount > 0
         except sqlite3.Error as e:
             logger.error(f"删除书籍元数据失败: {e}")
@@ -3190,10 +3802,9 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE book_metadata SET book_path = ? WHERE book_path = ?", (new_path, old_path))
-                conn.commit()
                 logger.info(f"更新书籍元数据表路径引用: {old_path} -> {new_path}")
                 return True
         except sqlite3.Error as e:
@@ -3208,7 +3819,7 @@ class DatabaseManager:
             bool: 迁移是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # 获取所有有metadata的阅读记录
@@ -3234,7 +3845,6 @@ class DatabaseManager:
                     
                     migrated_count += 1
                 
-                conn.commit()
                 logger.info(f"成功迁移 {migrated_count} 条metadata记录到新表")
                 return True
         except sqlite3.Error as e:
@@ -3253,10 +3863,11 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE user_books SET book_path = ? WHERE book_path = ?", (new_path, old_path))
-                conn.commit()
+                if cursor.rowcount:
+                    self._permission_cache.invalidate()
                 logger.info(f"更新用户书籍关联表路径引用: {old_path} -> {new_path}")
                 return True
         except sqlite3.Error as e:
@@ -3275,10 +3886,9 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("UPDATE vocabulary SET book_id = ? WHERE book_id = ?", (new_path, old_path))
-                conn.commit()
                 logger.info(f"更新词汇表路径引用: {old_path} -> {new_path}")
                 return True
         except sqlite3.Error as e:
@@ -3304,7 +3914,7 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # 构建更新语句
@@ -3344,7 +3954,6 @@ class DatabaseManager:
                 update_values.extend([site_id, novel_id])
                 cursor.execute(update_sql, update_values)
                 rows_affected = cursor.rowcount
-                conn.commit()
                 
                 logger.info(f"更新爬取历史记录状态: 网站ID={site_id}, 小说ID={novel_id}, 状态={status}, 影响行数={rows_affected}")
                 if rows_affected == 0:
@@ -3368,7 +3977,7 @@ class DatabaseManager:
             bool: 更新是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -3377,7 +3986,6 @@ class DatabaseManager:
                     WHERE site_id = ? AND novel_id = ?
                 """, (error_message, datetime.now().isoformat(), site_id, novel_id))
                 
-                conn.commit()
                 logger.info(f"更新爬取历史记录错误信息: 网站ID={site_id}, 小说ID={novel_id}")
                 return True
                 
@@ -3406,7 +4014,7 @@ class DatabaseManager:
         }
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
@@ -3487,7 +4095,6 @@ class DatabaseManager:
                     result['details'].append(detail)
                 
                 # 提交所有更改
-                conn.commit()
                 
                 logger.info(f"修复完成: 成功 {result['fixed']} 本，失败 {result['failed']} 本")
                 
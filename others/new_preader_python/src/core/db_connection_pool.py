@@ -0,0 +1,137 @@
+"""
+SQLite连接池：按线程复用长连接，统一事务单元
+同一数据库路径的所有DatabaseManager实例共享一个连接池，避免每次调用都重新连接、重复设置PRAGMA
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 每个连接缓存的预编译语句数量（sqlite3默认仅128）
+STATEMENT_CACHE_SIZE = 512
+
+
+class SQLiteConnectionPool:
+    """
+    线程感知的SQLite连接池
+
+    每个线程持有一条长连接（sqlite3连接默认不允许跨线程使用），
+    通过 transaction() 获取事务单元：最外层正常退出时提交，异常时回滚，
+    嵌套调用共享同一事务，只在最外层提交。
+    """
+
+    _pools: Dict[str, "SQLiteConnectionPool"] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, db_path: str, busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # 线程ID -> 连接，用于统一关闭
+        self._connections: Dict[int, sqlite3.Connection] = {}
+
+    @classmethod
+    def get_pool(cls, db_path: str) -> "SQLiteConnectionPool":
+        """
+        获取指定数据库路径的共享连接池
+
+        Args:
+            db_path: 数据库文件路径
+
+        Returns:
+            SQLiteConnectionPool: 连接池实例
+        """
+        with cls._pools_lock:
+            pool = cls._pools.get(db_path)
+            if pool is None:
+                pool = cls(db_path)
+                cls._pools[db_path] = pool
+            return pool
+
+    @classmethod
+    def close_all(cls) -> None:
+        """关闭所有连接池中的连接（应用退出时调用）"""
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+        for pool in pools:
+            pool.close()
+
+    def _create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            # 连接只在所属线程中使用，关闭操作可能来自其他线程
+            check_same_thread=False,
+        )
+        # 连接级PRAGMA只需设置一次
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                # 清理已结束线程遗留的连接
+                alive = {t.ident for t in threading.enumerate()}
+                for ident in [i for i in self._connections if i not in alive]:
+                    try:
+                        self._connections.pop(ident).close()
+                    except Exception:
+                        pass
+                self._connections[threading.get_ident()] = conn
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        事务单元：获取当前线程的长连接
+
+        最外层退出时提交（异常时回滚），并恢复 row_factory，
+        避免调用方设置的 sqlite3.Row 影响其他方法。
+
+        Yields:
+            sqlite3.Connection: 当前线程的数据库连接
+        """
+        conn = self._get_connection()
+        depth = getattr(self._local, "depth", 0)
+        row_factory = conn.row_factory
+        self._local.depth = depth + 1
+        try:
+            yield conn
+            if depth == 0:
+                conn.commit()
+        except BaseException:
+            if depth == 0:
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+            raise
+        finally:
+            self._local.depth = depth
+            conn.row_factory = row_factory
+
+    def close(self) -> None:
+        """关闭连接池中所有线程的连接"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.debug(f"关闭数据库连接失败: {e}")
+        # 当前线程下次使用时重新建立连接
+        self._local = threading.local()
@@ -0,0 +1,184 @@
+"""
+全文索引流水线：为一批书籍建立章节块索引
+
+- 解析（读取文件、解析 EPUB/PDF 等格式、切分章节块）在进程池中进行，不占用界面进程的 GIL；
+  工作进程以较低优先级运行，不打开搜索数据库，只返回索引行
+- 主进程中只有一个写入线程：多本书的索引行累积成大批次，在一个事务中写入，
+  同时记录每本书的索引状态（search_index_state），中途退出后下次只处理未完成的书籍
+- 每次提交后短暂让出写锁，界面的进度保存等写操作不会长时间等待
+- 待索引书籍较少、无法创建进程或进程池出错时，在当前线程内逐本解析（写入方式相同）
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.search import SearchEngine, build_index_rows
+from src.utils.logger import get_logger
+from src.utils.process_pool import run_in_processes
+
+logger = get_logger(__name__)
+
+# 每个任务解析的书籍数：越大进程间往返越少，越小取消越及时
+DEFAULT_CHUNK_SIZE = 8
+# 待索引书籍少于该数量时不启动进程池（启动工作进程本身需要数百毫秒）
+DEFAULT_PROCESS_MIN_BOOKS = 50
+# 单个写入事务累积的索引块数（每块约 2000 字符）
+DEFAULT_BATCH_BLOCKS = 4000
+# 每次提交后让出写锁的时间（秒）
+WRITE_PAUSE = 0.02
+
+IndexTask = Tuple[str, str, Optional[str]]  # (路径, 标题, PDF密码)
+
+
+def parse_books_for_index(tasks: List[IndexTask]) -> List[Dict[str, Any]]:
+    """
+    解析一批书籍并切分为索引行（模块级函数，可在工作进程中执行）
+
+    Args:
+        tasks: 待解析的书籍
+
+    Returns:
+        List[Dict[str, Any]]: 每本书一项，格式见 SearchEngine.write_index_batch
+    """
+    from src.core.book import Book
+    from src.utils.parse_result_store import get_file_identity
+
+    results = []
+    for path, title, password in tasks:
+        identity = get_file_identity(path)
+        try:
+            book = Book(path, title, password=password)
+            if book.file_not_found:
+                raise FileNotFoundError(f"文件不存在: {path}")
+            # 后台解析不显示 Book 自带的加载动画
+            book.ui_managed_loading = True
+            content = book.get_content()
+            rows = build_index_rows(path, content, book.chapters) if content else []
+            results.append({"book_id": path, "rows": rows, "identity": identity, "error": None})
+        except Exception as e:
+            results.append({"book_id": path, "rows": [], "identity": identity, "error": str(e) or type(e).__name__})
+    return results
+
+
+def get_pipeline_settings() -> Tuple[int, int, int]:
+    """
+    读取 advanced 配置中的索引流水线参数
+
+    Returns:
+        Tuple[int, int, int]: (工作进程数，0 表示 CPU 核数减一, 启用进程池的最少书籍数, 每个事务的索引块数)
+    """
+    advanced: Dict[str, Any] = {}
+    try:
+        from src.config.config_manager import ConfigManager
+        advanced = ConfigManager.get_instance().get_config().get("advanced", {})
+    except Exception as e:
+        logger.warning(f"读取索引流水线配置失败，使用默认值: {e}")
+    return (
+        int(advanced.get("index_workers", 0) or 0),
+        int(advanced.get("index_process_min_books", DEFAULT_PROCESS_MIN_BOOKS)),
+        int(advanced.get("index_batch_blocks", DEFAULT_BATCH_BLOCKS) or DEFAULT_BATCH_BLOCKS),
+    )
+
+
+class _BatchWriter:
+    """累积解析结果，达到批次大小时在一个事务中写入"""
+
+    def __init__(self, search_engine: SearchEngine, total: int, batch_blocks: int,
+                 progress_callback: Optional[Callable[[int, int], None]]):
+        self.search_engine = search_engine
+        self.total = total
+        self.batch_blocks = batch_blocks
+        self.progress_callback = progress_callback
+        self.done = 0
+        self.failed = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_blocks = 0
+
+    def add(self, results: List[Dict[str, Any]]) -> None:
+        for result in results:
+            if result.get("error"):
+                self.failed += 1
+                logger.error(f"后台索引书籍失败 {result['book_id']}: {result['error']}")
+            self._pending.append(result)
+            self._pending_blocks += len(result.get("rows") or [])
+        if self._pending_blocks >= self.batch_blocks:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_blocks = self._pending, [], 0
+        try:
+            self.search_engine.write_index_batch(pending)
+        except Exception as e:
+            logger.error(f"写入索引批次失败（{len(pending)} 本）: {e}")
+        self.done += len(pending)
+        if self.progress_callback:
+            try:
+                self.progress_callback(self.done, self.total)
+            except Exception:
+                pass
+        # 让出写锁和 GIL，界面的写操作可以插入
+        time.sleep(WRITE_PAUSE)
+
+
+def run_index_pipeline(search_engine: SearchEngine, tasks: Sequence[IndexTask],
+                       progress_callback: Optional[Callable[[int, int], None]] = None,
+                       is_cancelled: Optional[Callable[[], bool]] = None,
+                       workers: Optional[int] = None,
+                       min_books: Optional[int] = None,
+                       batch_blocks: Optional[int] = None) -> Dict[str, int]:
+    """
+    为书籍建立全文索引（在调用线程中写入，应在后台线程调用）
+
+    Args:
+        search_engine: 搜索引擎
+        tasks: 待索引的书籍
+        progress_callback: 进度回调(已写入数量, 总数)，每个写入事务后调用一次
+        is_cancelled: 返回是否已请求取消（已写入的书籍下次不再处理）
+        workers: 工作进程数，默认读取配置（0 表示 CPU 核数减一，至少一个）
+        min_books: 启用进程池的最少书籍数，默认读取配置
+        batch_blocks: 每个写入事务的索引块数，默认读取配置
+
+    Returns:
+        Dict[str, int]: {"indexed": 已写入的书籍数, "failed": 解析失败数, "total": 总数}
+    """
+    tasks = list(tasks)
+    config_workers, config_min_books, config_batch_blocks = get_pipeline_settings()
+    workers = workers or config_workers or max((os.cpu_count() or 1) - 1, 1)
+    min_books = config_min_books if min_books is None else min_books
+    writer = _BatchWriter(search_engine, len(tasks), batch_blocks or config_batch_blocks, progress_callback)
+
+    def cancelled() -> bool:
+        return bool(is_cancelled and is_cancelled())
+
+    pending: Dict[int, List[IndexTask]] = {
+        index: tasks[start:start + DEFAULT_CHUNK_SIZE]
+        for index, start in enumerate(range(0, len(tasks), DEFAULT_CHUNK_SIZE))
+    }
+    started = time.monotonic()
+    if tasks and len(tasks) >= min_books:
+        try:
+            run_in_processes(parse_books_for_index, pending, min(workers, len(pending)),
+                             lambda index, results: writer.add(results), cancelled)
+        except Exception as e:
+            if not cancelled():
+                logger.warning(f"多进程索引失败，剩余 {len(pending)} 批改为在当前进程解析: {e}")
+
+    for index in list(pending):
+        if cancelled():
+            break
+        for task in pending.pop(index):
+            writer.add(parse_books_for_index([task]))
+            # 在当前进程解析时每本书之后让出 GIL
+            time.sleep(0)
+    writer.flush()
+
+    elapsed = time.monotonic() - started
+    if cancelled():
+        logger.info(f"索引已取消，完成 {writer.done}/{len(tasks)} 本")
+    elif tasks:
+        logger.info(f"索引完成: {writer.done} 本，失败 {writer.failed} 本，耗时 {elapsed:.1f}s")
+    return {"indexed": writer.done, "failed": writer.failed, "total": len(tasks)}
+
@@ -0,0 +1,145 @@
+"""
+字符显示宽度引擎 - 供各分页器共享的表驱动宽度计算
+
+- 基本多文种平面（BMP）使用预计算的查找表，astral 平面使用区间二分查找
+- 整段文本的宽度一次性在 C 层计算（str.translate / bytes.translate），
+  不再逐字符走一长串区间比较
+- 提供前缀宽度数组，换行时可按区间二分定位断点，无需逐字符拼接字符串
+"""
+
+import bisect
+from itertools import accumulate
+from typing import List, Sequence, Tuple
+
+# 宽字符区间（闭区间，码位）
+CJK_WIDE_RANGES: Tuple[Tuple[int, int], ...] = (
+    (0x4E00, 0x9FFF),   # CJK统一汉字
+    (0x3400, 0x4DBF),   # CJK扩展A
+    (0xFF00, 0xFFEF),   # 全角字符
+    (0x3000, 0x303F),   # CJK符号和标点
+    # 旧实现中扩展B区的边界写作 '\u20000' <= char <= '\u2a6df'，实际被解析为
+    # '\u2000' + '0' 与 '\u2a6d' + 'f'，效果是 U+2001–U+2A6D（通用标点、
+    # 各类符号、制表符等）按宽字符处理；保留该区间以保证分页结果不变
+    (0x2001, 0x2A6D),
+)
+
+# astral 平面宽字符区间：CJK 扩展B及之后的表意文字补充平面/第三平面
+ASTRAL_WIDE_RANGES: Tuple[Tuple[int, int], ...] = (
+    (0x20000, 0x2FFFD),
+    (0x30000, 0x3FFFD),
+)
+
+# 终端分页器（SmartTextPagination）额外按宽字符处理的标点
+TERMINAL_WIDE_CHARS = "，。；：！？、（）【】《》''「」『』〈〉〔〕〖〗〘〙〚〛　"
+# 健壮分页器（RobustTextPagination）额外按宽字符处理的标点
+ROBUST_WIDE_CHARS = (
+    "，。；：！？、（）【】《》\"'\"'「」『』〈〉〔〕〖〗〘〙〚〛﹃﹄﹁﹂"
+    "—…～‖·‘’“”〔〕〈〉《》『』【】〖〗〘〙〚〛"
+    "　"
+)
+# 控制字符（零宽）
+CONTROL_CHARS = "".join(chr(code) for code in range(32)) + "\x7f"
+
+_WIDTH_CHARS = ("\x00", "\x01", "\x02")
+
+
+class CharWidthTable:
+    """表驱动的字符宽度计算器"""
+
+    def __init__(self, wide_ranges: Sequence[Tuple[int, int]] = CJK_WIDE_RANGES,
+                 wide_chars: str = "", zero_width_chars: str = "",
+                 astral_wide_ranges: Sequence[Tuple[int, int]] = ASTRAL_WIDE_RANGES):
+        """
+        构建宽度查找表
+
+        Args:
+            wide_ranges: BMP 内宽度为2的码位区间（闭区间）
+            wide_chars: 额外宽度为2的字符
+            zero_width_chars: 宽度为0的字符（优先级低于宽字符）
+            astral_wide_ranges: astral 平面宽度为2的码位区间（闭区间）
+        """
+        table = bytearray(b"\x01") * 0x10000
+        for char in zero_width_chars:
+            table[ord(char)] = 0
+        for low, high in wide_ranges:
+            table[low:high + 1] = b"\x02" * (high - low + 1)
+        for char in wide_chars:
+            table[ord(char)] = 2
+        self._table = bytes(table)
+        # str.translate 使用的映射：码位 -> 以 chr(宽度) 表示的单字符
+        self._translate_table = tuple(_WIDTH_CHARS[width] for width in table)
+        # ASCII 文本先编码为 bytes，再用 bytes.translate 一次完成
+        self._ascii_table = self._table[:128] + bytes(128)
+        self._ascii_uniform = self._table[:128] == b"\x01" * 128
+        self._astral_starts = [low for low, _ in astral_wide_ranges]
+        self._astral_ends = [high for _, high in astral_wide_ranges]
+
+    def char_width(self, char: str) -> int:
+        """
+        获取单个字符的显示宽度
+
+        Args:
+            char: 字符
+
+        Returns:
+            int: 显示宽度（0/1/2）
+        """
+        code = ord(char)
+        if code < 0x10000:
+            return self._table[code]
+        return self._astral_width(code)
+
+    def _astral_width(self, code: int) -> int:
+        index = bisect.bisect_right(self._astral_starts, code) - 1
+        return 2 if index >= 0 and code <= self._astral_ends[index] else 1
+
+    def widths(self, text: str) -> bytes:
+        """
+        计算文本中每个字符的显示宽度
+
+        Args:
+            text: 文本
+
+        Returns:
+            bytes: 与 text 等长，第 i 个字节为第 i 个字符的宽度
+        """
+        if text.isascii():
+            return text.encode("ascii").translate(self._ascii_table)
+        try:
+            return text.translate(self._translate_table).encode("latin-1")
+        except UnicodeEncodeError:
+            # 含 astral 平面字符（不在 BMP 查找表中），逐字符处理
+            return bytes(self.char_width(char) for char in text)
+
+    def text_width(self, text: str) -> int:
+        """
+        计算文本显示宽度
+
+        Args:
+            text: 文本
+
+        Returns:
+            int: 显示宽度
+        """
+        if self._ascii_uniform and text.isascii():
+            return len(text)
+        widths = self.widths(text)
+        return len(widths) + widths.count(2) - widths.count(0)
+
+    def prefix_widths(self, text: str) -> List[int]:
+        """
+        计算前缀宽度数组：result[i] 为 text[:i] 的显示宽度（长度为 len(text) + 1）
+
+        Args:
+            text: 文本
+
+        Returns:
+            List[int]: 前缀宽度数组
+        """
+        return list(accumulate(self.widths(text), initial=0))
+
+
+# 终端分页器（SmartTextPagination）使用的宽度表
+TERMINAL_WIDTH_TABLE = CharWidthTable(wide_chars=TERMINAL_WIDE_CHARS)
+# 健壮分页器（RobustTextPagination）使用的宽度表：控制字符宽度为0
+ROBUST_WIDTH_TABLE = CharWidthTable(wide_chars=ROBUST_WIDE_CHARS, zero_width_chars=CONTROL_CHARS)
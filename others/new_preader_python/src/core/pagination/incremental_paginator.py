@@ -0,0 +1,388 @@
+"""
+增量分页器 - 按视口需要逐页排版，并记录页起点检查点
+
+排版规则与 SmartTextPagination 完全一致（相同的段落切分、智能换行与间距处理），
+区别在于不会一次性排版全文：
+- 只在需要某一页时才向后排版到该页，打开大文件时首屏耗时与全文长度无关
+- 每一页的起点（段落、行、子行）记录为检查点，页内容随时可从检查点重新生成，
+  内存中只保留最近访问的少量页面
+- 页起始字符偏移有序，字符偏移 -> 页码 通过二分查找定位
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from .terminal_paginator import PageMetrics, SmartTextPagination
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 内存中保留的已排版页面数量
+PAGE_CACHE_SIZE = 64
+# 内容丢失超过该比例时需要切换到健壮分页策略（与 TerminalPaginator 一致）
+MAX_CONTENT_LOSS_RATIO = 0.05
+
+# 段落：(正文起点, 正文终点, 下一段落的扫描起点)
+Paragraph = Tuple[int, int, int]
+# 页起点检查点：(所在段落, 所在原始行的起点, 该行换行后的子行序号)
+Checkpoint = Tuple[Paragraph, int, int]
+# 已排版页面：(页面行列表, 每行在原文中的起始偏移)
+LaidOutPage = Tuple[List[str], List[int]]
+
+
+class IncrementalPaginator:
+    """增量分页器：按需排版并维护页起点检查点索引（线程安全）"""
+
+    def __init__(self, content: str, metrics: PageMetrics,
+                 wrapper: Optional[SmartTextPagination] = None,
+                 cache_size: int = PAGE_CACHE_SIZE):
+        """
+        初始化增量分页器（不做任何排版）
+
+        Args:
+            content: 要分页的全文
+            metrics: 页面度量数据
+            wrapper: 提供换行算法的智能分页策略实例
+            cache_size: 内存中保留的页面数量
+        """
+        self.content = content or ""
+        self.metrics = metrics
+        self._wrapper = wrapper or SmartTextPagination()
+        self._width = metrics.content_width
+        self._max_lines = max(1, int(metrics.lines_per_page))
+        self._line_spacing = int(metrics.line_spacing)
+        self._paragraph_spacing = int(metrics.paragraph_spacing)
+
+        self._lock = threading.RLock()
+        self._checkpoints: List[Optional[Checkpoint]] = []
+        self._page_offsets: List[int] = []
+        self._cache: "OrderedDict[int, LaidOutPage]" = OrderedDict()
+        self._cache_size = max(4, int(cache_size))
+        # 完整性统计（用于判断是否需要健壮分页）
+        self._processed_chars = 0
+        self._line_count = 0
+
+        first = self._next_paragraph(0)
+        self._frontier: Optional[Iterator[Tuple[Checkpoint, List[str], List[int]]]] = (
+            self._iter_pages((first, first[0], 0)) if first is not None else None
+        )
+        if self._frontier is None:
+            self._finish_empty()
+
+    # ------------------------------------------------------------------
+    # 公共接口
+    # ------------------------------------------------------------------
+
+    @property
+    def page_count(self) -> int:
+        """已排版的页数（排版完成后即总页数）"""
+        return len(self._checkpoints)
+
+    @property
+    def is_complete(self) -> bool:
+        """是否已排版到文末"""
+        return self._frontier is None
+
+    @property
+    def needs_fallback(self) -> bool:
+        """排版完成后内容丢失是否超过阈值（需要切换到健壮分页策略）"""
+        if not self.is_complete or not self.content:
+            return False
+        processed = self._processed_chars + max(0, self._line_count - 1)
+        return (len(self.content) - processed) / len(self.content) > MAX_CONTENT_LOSS_RATIO
+
+    def ensure_page(self, index: int) -> bool:
+        """
+        向后排版直到指定页可用
+
+        Args:
+            index: 页码（从0开始）
+
+        Returns:
+            bool: 该页是否存在
+        """
+        with self._lock:
+            if index >= self.page_count:
+                self._advance(index - self.page_count + 1, cache_pages=True)
+            return 0 <= index < self.page_count
+
+    def layout_step(self, max_pages: int) -> bool:
+        """
+        后台排版一小段（不占用页面缓存）
+
+        Args:
+            max_pages: 本次最多排版的页数
+
+        Returns:
+            bool: 是否还有未排版的内容
+        """
+        with self._lock:
+            self._advance(max_pages, cache_pages=False)
+            return not self.is_complete
+
+    def finish(self) -> int:
+        """
+        排版剩余全部内容
+
+        Returns:
+            int: 总页数
+        """
+        while self.layout_step(256):
+            pass
+        return self.page_count
+
+    def get_page(self, index: int) -> Optional[List[str]]:
+        """
+        获取指定页的行列表（必要时向后排版或从检查点重新生成）
+
+        Args:
+            index: 页码（从0开始）
+
+        Returns:
+            Optional[List[str]]: 页面行列表，页码无效时返回None
+        """
+        page = self._get_laid_out_page(index)
+        return page[0] if page else None
+
+    def get_line_offsets(self, index: int) -> Optional[List[int]]:
+        """
+        获取指定页每一行在原文中的起始偏移
+
+        Args:
+            index: 页码（从0开始）
+
+        Returns:
+            Optional[List[int]]: 行偏移列表，页码无效时返回None
+        """
+        page = self._get_laid_out_page(index)
+        return page[1] if page else None
+
+    def get_page_offset(self, index: int) -> Optional[int]:
+        """
+        获取指定页在原文中的起始字符偏移
+
+        Args:
+            index: 页码（从0开始）
+
+        Returns:
+            Optional[int]: 起始偏移，页码无效时返回None
+        """
+        if not self.ensure_page(index):
+            return None
+        return self._page_offsets[index]
+
+    def find_page_by_offset(self, offset: int) -> int:
+        """
+        根据字符偏移查找所在页码，只排版到覆盖该偏移为止
+
+        Args:
+            offset: 原文字符偏移
+
+        Returns:
+            int: 页码（从0开始）
+        """
+        offset = max(0, int(offset))
+        with self._lock:
+            while not self.is_complete and (not self._page_offsets or self._page_offsets[-1] <= offset):
+                self._advance(1, cache_pages=False)
+            index = bisect.bisect_right(self._page_offsets, offset) - 1
+            return max(0, min(index, self.page_count - 1))
+
+    # ------------------------------------------------------------------
+    # 排版实现
+    # ------------------------------------------------------------------
+
+    def _advance(self, count: int, cache_pages: bool) -> None:
+        """推进排版前沿 count 页（调用方需持有锁）"""
+        while count > 0 and self._frontier is not None:
+            try:
+                checkpoint, lines, offsets = next(self._frontier)
+            except StopIteration:
+                self._frontier = None
+                if not self._checkpoints:
+                    self._finish_empty()
+                logger.debug(f"增量分页完成: 共{self.page_count}页")
+                break
+            index = len(self._checkpoints)
+            self._checkpoints.append(checkpoint)
+            self._page_offsets.append(offsets[0] if offsets else 0)
+            self._processed_chars += sum(len(line) for line in lines)
+            self._line_count += len(lines)
+            if cache_pages:
+                self._cache_put(index, (lines, offsets))
+            count -= 1
+
+    def _finish_empty(self) -> None:
+        """没有任何正文时保留一页空白页"""
+        self._frontier = None
+        self._checkpoints.append(None)
+        self._page_offsets.append(0)
+        self._line_count += 1
+
+    def _get_laid_out_page(self, index: int) -> Optional[LaidOutPage]:
+        if not self.ensure_page(index):
+            return None
+        with self._lock:
+            page = self._cache.get(index)
+            if page is not None:
+                self._cache.move_to_end(index)
+                return page
+            checkpoint = self._checkpoints[index]
+        # 从检查点重新生成只需要排版一页，不需要持有锁
+        page = ([""], [0])
+        if checkpoint is not None:
+            for _, lines, offsets in self._iter_pages(checkpoint):
+                page = (lines, offsets)
+                break
+        with self._lock:
+            self._cache_put(index, page)
+        return page
+
+    def _cache_put(self, index: int, page: LaidOutPage) -> None:
+        self._cache[index] = page
+        self._cache.move_to_end(index)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _next_paragraph(self, pos: int) -> Optional[Paragraph]:
+        """从 pos 开始查找下一个非空段落（与 content.split('\\n\\n') + strip 等价）"""
+        content = self.content
+        length = len(content)
+        while pos <= length:
+            sep = content.find('\n\n', pos)
+            end = sep if sep != -1 else length
+            next_pos = sep + 2 if sep != -1 else length + 1
+            raw = content[pos:end]
+            stripped = raw.strip()
+            if stripped:
+                start = pos + len(raw) - len(raw.lstrip())
+                return start, start + len(stripped), next_pos
+            pos = next_pos
+        return None
+
+    def _iter_paragraph_lines(self, line_pos: int, text_end: int,
+                              sub_index: int) -> Iterator[Tuple[str, int, int, int, bool]]:
+        """
+        逐行换行段落正文
+
+        Yields:
+            Tuple[str, int, int, int, bool]: (显示行, 行起始偏移, 原始行起点, 子行序号, 是否段落最后一行)
+        """
+        content = self.content
+        pos = line_pos
+        while True:
+            newline = content.find('\n', pos, text_end)
+            end = newline if newline != -1 else text_end
+            wrapped, offsets = self._wrap_source_line(pos, end)
+            last_source_line = newline == -1
+            for k in range(sub_index, len(wrapped)):
+                yield wrapped[k], offsets[k], pos, k, last_source_line and k == len(wrapped) - 1
+            sub_index = 0
+            if last_source_line:
+                return
+            pos = newline + 1
+
+    def _wrap_source_line(self, start: int, end: int) -> Tuple[List[str], List[int]]:
+        """对原文中的一行进行换行，并计算每个子行在原文中的起始偏移"""
+        source = self.content[start:end]
+        text = source.replace('　', '  ').expandtabs(4)
+        if not text.strip():
+            return [""], [start]
+        wrapped = self._wrapper._wrap_single_line(text, self._width)
+        offsets = []
+        consumed = 0
+        if text is source or text == source:
+            for line in wrapped:
+                offsets.append(start + consumed)
+                consumed += len(line)
+            return wrapped, offsets
+        # 全角空格/制表符展开后长度变化，需要把展开后的位置映射回原文
+        columns = []
+        column = 0
+        for char in source:
+            columns.append(column)
+            if char == '　':
+                column += 2
+            elif char == '\t':
+                column += 4 - column % 4
+            else:
+                column += 1
+        for line in wrapped:
+            offsets.append(start + max(0, bisect.bisect_right(columns, consumed) - 1))
+            consumed += len(line)
+        return wrapped, offsets
+
+    def _iter_pages(self, checkpoint: Checkpoint) -> Iterator[Tuple[Checkpoint, List[str], List[int]]]:
+        """
+        从检查点开始逐页排版（规则与 SmartTextPagination.paginate 相同）
+
+        Yields:
+            Tuple[Checkpoint, List[str], List[int]]: (页起点检查点, 页面行, 行偏移)
+        """
+        max_lines = self._max_lines
+        line_spacing = self._line_spacing
+        paragraph_spacing = self._paragraph_spacing
+        paragraph, line_pos, sub_index = checkpoint
+        page_start = checkpoint
+        lines: List[str] = []
+        offsets: List[int] = []
+
+        while paragraph is not None:
+            for line, offset, src_pos, k, is_last in self._iter_paragraph_lines(line_pos, paragraph[1], sub_index):
+                if len(lines) >= max_lines:
+                    yield page_start, lines, offsets
+                    lines, offsets = [], []
+                    page_start = (paragraph, src_pos, k)
+                lines.append(line)
+                offsets.append(offset)
+                # 行间距（段落最后一行除外，空间不足时跳过）
+                if not is_last and line_spacing > 0 and len(lines) + line_spacing <= max_lines:
+                    lines.extend([""] * line_spacing)
+                    offsets.extend([offset] * line_spacing)
+
+            next_paragraph = self._next_paragraph(paragraph[2])
+            if next_paragraph is not None:
+                if len(lines) + paragraph_spacing <= max_lines:
+                    lines.extend([""] * paragraph_spacing)
+                    offsets.extend([next_paragraph[0]] * paragraph_spacing)
+                else:
+                    # 空间不足以放下段落间距，新段落从新页开始
+                    if lines:
+                        yield page_start, lines, offsets
+                    lines, offsets = [], []
+                    page_start = (next_paragraph, next_paragraph[0], 0)
+                line_pos = next_paragraph[0]
+            paragraph = next_paragraph
+            sub_index = 0
+
+        if lines:
+            yield page_start, lines, offsets
+
+
+class PageSequence(Sequence):
+    """
+    增量分页结果的只读序列视图
+
+    长度为已排版的页数，随后台排版增长；按下标访问时通过 getter 取值，
+    可直接替代原先的页面列表（all_pages）和偏移列表使用。
+    """
+
+    def __init__(self, paginator: IncrementalPaginator, getter: Callable[[int], Any]):
+        self._paginator = paginator
+        self._getter = getter
+
+    def __len__(self) -> int:
+        return self._paginator.page_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("page index out of range")
+        return self._getter(index)
@@ -4,10 +4,13 @@
 
 import math
 import re
+import bisect
 from typing import List, Tuple, Dict, Any, Optional
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
+from .char_width import ROBUST_WIDTH_TABLE
+
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -274,17 +277,20 @@ class RobustTextPagination(PaginationStrategy):
         return result_lines
     
     def _wrap_single_line(self, line: str, width: int) -> List[str]:
-        """对单行文本进行智能换行 - 健壮的中文换行算法"""
+        """对单行文本进行智能换行 - 健壮的中文换行算法
+        
+        基于前缀宽度数组二分定位每一行能放下的字符，整段切片而不是逐字符拼接；
+        只在放不下的字符处应用断行规则。
+        """
         if not line:
             return [""]
-            
+        
+        prefix = ROBUST_WIDTH_TABLE.prefix_widths(line)
         # 如果行长度不超过宽度，直接返回
-        if self._calculate_display_width(line) <= width:
+        if prefix[-1] <= width:
             return [line]
         
         lines = []
-        current_line = ""
-        current_width = 0
         
         # 更全面的中文标点符号处理
         # 不能在行首的标点
@@ -292,104 +298,59 @@ class RobustTextPagination(PaginationStrategy):
         # 不能在行尾的标点  
         no_line_end = "（【《'\"『「【〖〘〚"
         
-        i = 0
-        while i < len(line):
-            char = line[i]
-            char_width = self._get_char_width(char)
+        length = len(line)
+        # 当前行为 line[start:pos]
+        start = 0
+        pos = 0
+        while pos < length:
+            if pos == start:
+                # 空行总是接收下一个字符
+                pos += 1
+                continue
+            # 放入宽度允许的所有字符（当前行已超宽时不再放入）
+            fit_end = bisect.bisect_right(prefix, prefix[start] + width, pos) - 1
+            if fit_end > pos:
+                pos = fit_end
+            if pos >= length:
+                break
             
-            # 检查是否需要换行
-            if current_width + char_width > width and current_line:
-                # 如果当前行已经有内容，寻找最佳换行点
-                
-                # 优先在空格处换行
-                if char in " \t":
-                    lines.append(current_line)
-                    current_line = ""
-                    current_width = 0
-                    i += 1
-                    continue
-                
-                # 检查标点符号规则
-                if char in no_line_start:
-                    # 标点符号不能出现在行首，检查是否可以加入当前行
-                    # 如果当前行还有空间，加入当前行
-                    if current_width + char_width <= width:
-                        current_line += char
-                        current_width += char_width
-                    else:
-                        # 空间不足，换行后添加标点
-                        lines.append(current_line)
-                        current_line = char
-                        current_width = char_width
-                    i += 1
-                elif char in no_line_end:
-                    # 标点符号不能出现在行尾，检查是否可以加入当前行
-                    lines.append(current_line)
-                    current_line = char
-                    current_width = char_width
-                    i += 1
-                else:
-                    # 普通字符，检查是否有更好的换行点
-                    # 尝试寻找最近的标点或空格
-                    break_pos = self._find_best_break_point(current_line, char, width)
-                    if break_pos > 0:
-                        # 在最佳位置换行
-                        lines.append(current_line[:break_pos].rstrip())
-                        remaining = current_line[break_pos:] + char
-                        current_line = remaining
-                        current_width = self._calculate_display_width(remaining)
-                    else:
-                        # 没有找到更好的换行点，强制换行
-                        lines.append(current_line)
-                        current_line = char
-                        current_width = char_width
-                    i += 1
+            # line[pos] 放不下，寻找换行点
+            char = line[pos]
+            if char in " \t":
+                # 优先在空格处换行（空格本身丢弃）
+                lines.append(line[start:pos])
+                start = pos = pos + 1
+            elif char in no_line_start or char in no_line_end:
+                # 标点符号不能出现在行首/行尾，换行后与下一行一起处理
+                lines.append(line[start:pos])
+                start = pos
+                pos += 1
             else:
-                current_line += char
-                current_width += char_width
-                i += 1
+                # 普通字符，尝试寻找最近的标点或空格
+                break_pos = self._find_best_break_point(line[start:pos], char, width)
+                if break_pos > 0:
+                    # 在最佳位置换行
+                    lines.append(line[start:start + break_pos].rstrip())
+                    start += break_pos
+                else:
+                    # 没有找到更好的换行点，强制换行
+                    lines.append(line[start:pos])
+                    start = pos
+                pos += 1
         
         # 添加最后一行
-        if current_line:
-            lines.append(current_line)
+        if start < length:
+            lines.append(line[start:])
         
         return lines if lines else [""]
     
     def _get_char_width(self, char: str) -> int:
-        """获取字符显示宽度 - 更健壮的中文字符宽度计算"""
-        # 中文字符范围（更全面）
-        if '\u4e00' <= char <= '\u9fff':  # CJK统一汉字
-            return 2
-        elif '\u3400' <= char <= '\u4dbf':  # CJK扩展A
-            return 2
-        elif '\u20000' <= char <= '\u2a6df':  # CJK扩展B
-            return 2
-        elif '\uff00' <= char <= '\uffef':  # 全角字符
-            return 2
-        elif '\u3000' <= char <= '\u303f':  # CJK符号和标点
-            return 2
-        # 更全面的中文标点符号
-        elif char in "，。；：！？、（）【】《》\"'\"'「」『』〈〉〔〕〖〗〘〙〚〛﹃﹄﹁﹂":
-            return 2
-        elif char in "—…～‖·‘’“”〔〕〈〉《》『』【】〖〗〘〙〚〛":
-            return 2
-        elif char in "　":  # 全角空格
-            return 2
-        # 对于半角标点符号，使用更合理的宽度计算
-        elif char in ". , ; : ! ? ( ) [ ] { } < > \" '":  # 半角标点符号
-            return 1
-        # 特殊处理：常见格式标记字符
-        elif char in "*#@$%&+-=^_`|~\\":  # 常见的格式标记字符，按半角处理
-            return 1
-        # 控制字符和不可见字符
-        elif ord(char) < 32 or ord(char) == 127:
-            return 0
-        else:
-            return 1
+        """获取字符显示宽度 - 查表计算（CJK、全角字符与中文标点宽度为2，控制字符为0）"""
+        return ROBUST_WIDTH_TABLE.char_width(char)
     
     def _calculate_display_width(self, text: str) -> int:
         """计算文本显示宽度"""
-        return sum(self._get_char_width(char) for char in text)
+        return ROBUST_WIDTH_TABLE.text_width(text)
     
     def _find_best_break_point(self, current_line: str, next_char: str, max_width: int) -> int:
         """寻找最佳换行点"""
@@ -427,14 +388,18 @@ class RobustTextPagination(PaginationStrategy):
             
             # 逐字符处理，确保不丢失任何内容
             current_line = ""
+            current_width = 0
             for char in paragraph:
-                if self._calculate_display_width(current_line + char) <= chars_per_line:
+                char_width = self._get_char_width(char)
+                if current_width + char_width <= chars_per_line:
                     current_line += char
+                    current_width += char_width
                 else:
                     # 当前行已满，添加到页面
                     if current_line:
                         current_page_lines.append(current_line)
                         current_line = char
+                        current_width = char_width
                     
                     # 检查当前页是否已满
                     if len(current_page_lines) >= lines_per_page:
@@ -445,6 +410,7 @@ class RobustTextPagination(PaginationStrategy):
             if current_line:
                 current_page_lines.append(current_line)
                 current_line = ""
+                current_width = 0
             
             # 添加段落分隔空行
             if len(current_page_lines) < lines_per_page:
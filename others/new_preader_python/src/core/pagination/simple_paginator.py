@@ -3,9 +3,12 @@
 """
 
 import re
+import bisect
 from typing import List, Optional
 from dataclasses import dataclass
 
+from .char_width import TERMINAL_WIDTH_TABLE
+
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -98,28 +101,24 @@ class SimpleTextPagination:
         return paragraphs
     
     def _simple_wrap(self, text: str, width: int) -> List[str]:
-        """简单换行算法"""
+        """简单换行算法（按显示宽度，CJK 字符占2列）"""
         if not text.strip():
             return [""]
         
-        # 如果行长度不超过宽度，直接返回
-        if len(text) <= width:
+        prefix = TERMINAL_WIDTH_TABLE.prefix_widths(text)
+        # 如果行宽度不超过限制，直接返回
+        if prefix[-1] <= width:
             return [text]
         
         lines = []
-        current_line = ""
-        
-        # 按字符逐个处理，确保不丢失任何内容
-        for char in text:
-            if len(current_line) < width:
-                current_line += char
-            else:
-                lines.append(current_line)
-                current_line = char
-        
-        # 添加最后一行
-        if current_line:
-            lines.append(current_line)
+        length = len(text)
+        start = 0
+        
+        # 按宽度整段切分，每行至少一个字符，确保不丢失任何内容
+        while start < length:
+            end = max(start + 1, bisect.bisect_right(prefix, prefix[start] + width, start + 1) - 1)
+            lines.append(text[start:end])
+            start = end
         
         return lines if lines else [""]
 
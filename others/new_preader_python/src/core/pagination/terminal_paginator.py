@@ -5,12 +5,15 @@
 
 import math
 import re
+import bisect
 import cjkwrap
 from typing import List, Tuple, Dict, Any, Optional
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 
 
+from .char_width import TERMINAL_WIDTH_TABLE
+
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -168,92 +171,43 @@ class SmartTextPagination(PaginationStrategy):
         return result_lines
     
     def _wrap_single_line(self, line: str, width: int) -> List[str]:
-        """对单行文本进行智能换行 - 优化的中文换行算法"""
+        """对单行文本进行智能换行 - 优化的中文换行算法
+        
+        基于前缀宽度数组二分定位每一行的断点，整段切片而不是逐字符拼接：
+        放不下的字符移到下一行，不能在行首的标点则跟随在当前行末尾。
+        """
         if not line:
             return [""]
-            
+        
+        prefix = TERMINAL_WIDTH_TABLE.prefix_widths(line)
         # 如果行长度不超过宽度，直接返回
-        if self._calculate_display_width(line) <= width:
+        if prefix[-1] <= width:
             return [line]
         
-        lines = []
-        current_line = ""
-        current_width = 0
-        
-        # 优化的中文标点符号处理
         # 不能在行首的标点
         no_line_start = "，。；：！？、）】》"
-        # 不能在行尾的标点  
-        no_line_end = "（【《"
         
-        i = 0
-        while i < len(line):
-            char = line[i]
-            char_width = self._get_char_width(char)
-            
-            # 检查是否需要换行（使用更宽松的条件）
-            if current_width + char_width > width and current_line:
-                # 如果当前行已经有内容，尝试寻找更好的换行点
-                # 优先在标点符号或空格处换行
-                if char in no_line_start:
-                    # 标点符号不能出现在行首，强制加入当前行
-                    current_line += char
-                    current_width += char_width
-                    i += 1
-                else:
-                    # 寻找合适的换行点
-                    # 如果当前字符是空格或标点，直接换行
-                    if char in " \t" or char in no_line_end:
-                        lines.append(current_line)
-                        current_line = char
-                        current_width = char_width
-                        i += 1
-                    else:
-                        # 尝试在当前字符前换行
-                        lines.append(current_line)
-                        current_line = char
-                        current_width = char_width
-                        i += 1
-            else:
-                current_line += char
-                current_width += char_width
-                i += 1
-        
-        # 添加最后一行
-        if current_line:
-            lines.append(current_line)
+        lines = []
+        length = len(line)
+        start = 0
+        while start < length:
+            # 当前行至少包含一个字符，之后尽量放入宽度允许的字符
+            end = max(start + 1, bisect.bisect_right(prefix, prefix[start] + width, start + 1) - 1)
+            # 标点符号不能出现在行首，强制加入当前行
+            while end < length and line[end] in no_line_start:
+                end += 1
+            lines.append(line[start:end])
+            start = end
         
         return lines if lines else [""]
     
     def _get_char_width(self, char: str) -> int:
-        """获取字符显示宽度 - 优化的中文字符宽度计算"""
-        # 中文字符范围（更全面）
-        if '\u4e00' <= char <= '\u9fff':  # CJK统一汉字
-            return 2
-        elif '\u3400' <= char <= '\u4dbf':  # CJK扩展A
-            return 2
-        elif '\u20000' <= char <= '\u2a6df':  # CJK扩展B
-            return 2
-        elif '\uff00' <= char <= '\uffef':  # 全角字符
-            return 2
-        elif '\u3000' <= char <= '\u303f':  # CJK符号和标点
-            return 2
-        elif char in "，。；：！？、（）【】《》""''「」『』〈〉〔〕〖〗〘〙〚〛":  # 中文标点
-            return 2
-        elif char in "　":  # 全角空格
-            return 2
-        # 对于半角标点符号，使用更合理的宽度计算
-        elif char in ".,;:!?()[]{}<>\"'":  # 半角标点符号
-            return 1
-        # 特殊处理：常见格式标记字符
-        elif char in "*#@$%&":  # 常见的格式标记字符，按半角处理
-            return 1
-        else:
-            return 1
+        """获取字符显示宽度 - 查表计算（CJK 与全角字符宽度为2）"""
+        return TERMINAL_WIDTH_TABLE.char_width(char)
     
     def _calculate_display_width(self, text: str) -> int:
         """计算文本显示宽度"""
-        return sum(self._get_char_width(char) for char in text)
+        return TERMINAL_WIDTH_TABLE.text_width(text)
 
 
 
@@ -0,0 +1,370 @@
+"""
+分页宽度引擎基准：在生成的中英文混排文本上比较旧的逐字符宽度计算/换行与表驱动实现，
+并校验两者输出完全一致
+
+用法：python -m src.core.pagination_benchmark [--chars 1000000] [--widths 40 80 120]
+
+- 旧实现（区间比较的 _get_char_width + 逐字符拼接的 _wrap_single_line）原样保留在本模块中，
+  以子类的方式替换当前分页策略的对应方法，其余分页逻辑共用
+- 校验内容：BMP 全部码位的字符宽度、每一行的换行结果、完整分页结果（智能/健壮两种策略）
+  以及健壮分页器的备用分页结果；任何不一致都会抛出 AssertionError
+- 语料只包含 BMP 字符：astral 平面的表意文字旧实现按宽度 1 处理，新实现按 2 处理，属于有意的修正；
+  SimpleTextPagination 改为按显示宽度换行，也是有意的输出变化，不参与比较
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.pagination.robust_paginator import PageMetrics as RobustPageMetrics, RobustTextPagination
+from src.core.pagination.terminal_paginator import PageMetrics, PaginationStrategy, SmartTextPagination
+
+_CJK_CHARS = ("的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会家可下而过天去能对小多然于心学"
+              "么之都好看起发当没成只如事把还用第样道想作种开美总从无情己面最女但现前些所同日手又行意动方期它头经长儿回位分爱老")
+_ENGLISH_WORDS = ("the", "reader", "page", "terminal", "width", "chapter", "novel", "Python", "wrap", "line",
+                  "OK", "HTTP", "v2", "2024", "x", "internationalization")
+# 两种分页器的断行标点、宽度不同的标点（含 U+2001–U+2A6D 区间内的符号）与格式标记字符
+_PUNCTUATION = ("，", "。", "；", "：", "！", "？", "、", "（", "）", "【", "】", "《", "》", "「", "」", "『", "』",
+                "〖", "〗", "“", "”", "‘", "’", "—", "…", "～", "·", "﹃", "﹄", ",", ".", ";", ":", "!", "?",
+                "(", ")", "[", "]", "\"", "'", "*", "#", "@", "-", "=", "|", "~")
+_SPACES = (" ", " ", "　", "\t")
+_CONTROL = ("\x01", "\x07", "\x1b", "\x7f")
+# 默认的换行宽度（列）
+DEFAULT_WIDTHS = (40, 80, 120)
+# 完整分页时每页行数
+_LINES_PER_PAGE = 30
+
+
+def _legacy_terminal_char_width(char: str) -> int:
+    """旧 SmartTextPagination._get_char_width"""
+    if '\u4e00' <= char <= '\u9fff':
+        return 2
+    elif '\u3400' <= char <= '\u4dbf':
+        return 2
+    elif '\u20000' <= char <= '\u2a6df':
+        return 2
+    elif '\uff00' <= char <= '\uffef':
+        return 2
+    elif '\u3000' <= char <= '\u303f':
+        return 2
+    elif char in "，。；：！？、（）【】《》""''「」『』〈〉〔〕〖〗〘〙〚〛":
+        return 2
+    elif char in "　":
+        return 2
+    elif char in ".,;:!?()[]{}<>\"'":
+        return 1
+    elif char in "*#@$%&":
+        return 1
+    else:
+        return 1
+
+
+def _legacy_robust_char_width(char: str) -> int:
+    """旧 RobustTextPagination._get_char_width"""
+    if '\u4e00' <= char <= '\u9fff':
+        return 2
+    elif '\u3400' <= char <= '\u4dbf':
+        return 2
+    elif '\u20000' <= char <= '\u2a6df':
+        return 2
+    elif '\uff00' <= char <= '\uffef':
+        return 2
+    elif '\u3000' <= char <= '\u303f':
+        return 2
+    elif char in "，。；：！？、（）【】《》\"'\"'「」『』〈〉〔〕〖〗〘〙〚〛﹃﹄﹁﹂":
+        return 2
+    elif char in "—…～‖·‘’“”〔〕〈〉《》『』【】〖〗〘〙〚〛":
+        return 2
+    elif char in "　":
+        return 2
+    elif char in ". , ; : ! ? ( ) [ ] { } < > \" '":
+        return 1
+    elif char in "*#@$%&+-=^_`|~\\":
+        return 1
+    elif ord(char) < 32 or ord(char) == 127:
+        return 0
+    else:
+        return 1
+
+
+class _LegacySmartPagination(SmartTextPagination):
+    """重构前的智能分页策略（逐字符计算宽度并拼接行）"""
+
+    def _wrap_single_line(self, line: str, width: int) -> List[str]:
+        if not line:
+            return [""]
+        if self._calculate_display_width(line) <= width:
+            return [line]
+
+        lines = []
+        current_line = ""
+        current_width = 0
+        no_line_start = "，。；：！？、）】》"
+        no_line_end = "（【《"
+
+        i = 0
+        while i < len(line):
+            char = line[i]
+            char_width = self._get_char_width(char)
+            if current_width + char_width > width and current_line:
+                if char in no_line_start:
+                    current_line += char
+                    current_width += char_width
+                    i += 1
+                else:
+                    if char in " \t" or char in no_line_end:
+                        lines.append(current_line)
+                        current_line = char
+                        current_width = char_width
+                        i += 1
+                    else:
+                        lines.append(current_line)
+                        current_line = char
+                        current_width = char_width
+                        i += 1
+            else:
+                current_line += char
+                current_width += char_width
+                i += 1
+
+        if current_line:
+            lines.append(current_line)
+        return lines if lines else [""]
+
+    def _get_char_width(self, char: str) -> int:
+        return _legacy_terminal_char_width(char)
+
+    def _calculate_display_width(self, text: str) -> int:
+        return sum(self._get_char_width(char) for char in text)
+
+
+class _LegacyRobustPagination(RobustTextPagination):
+    """重构前的健壮分页策略（逐字符计算宽度并拼接行）"""
+
+    def _wrap_single_line(self, line: str, width: int) -> List[str]:
+        if not line:
+            return [""]
+        if self._calculate_display_width(line) <= width:
+            return [line]
+
+        lines = []
+        current_line = ""
+        current_width = 0
+        no_line_start = "，。；：！？、）】》'\"”』」】〗〙〛"
+        no_line_end = "（【《'\"『「【〖〘〚"
+
+        i = 0
+        while i < len(line):
+            char = line[i]
+            char_width = self._get_char_width(char)
+            if current_width + char_width > width and current_line:
+                if char in " \t":
+                    lines.append(current_line)
+                    current_line = ""
+                    current_width = 0
+                    i += 1
+                    continue
+                if char in no_line_start:
+                    if current_width + char_width <= width:
+                        current_line += char
+                        current_width += char_width
+                    else:
+                        lines.append(current_line)
+                        current_line = char
+                        current_width = char_width
+                    i += 1
+                elif char in no_line_end:
+                    lines.append(current_line)
+                    current_line = char
+                    current_width = char_width
+                    i += 1
+                else:
+                    break_pos = self._find_best_break_point(current_line, char, width)
+                    if break_pos > 0:
+                        lines.append(current_line[:break_pos].rstrip())
+                        remaining = current_line[break_pos:] + char
+                        current_line = remaining
+                        current_width = self._calculate_display_width(remaining)
+                    else:
+                        lines.append(current_line)
+                        current_line = char
+                        current_width = char_width
+                    i += 1
+            else:
+                current_line += char
+                current_width += char_width
+                i += 1
+
+        if current_line:
+            lines.append(current_line)
+        return lines if lines else [""]
+
+    def _get_char_width(self, char: str) -> int:
+        return _legacy_robust_char_width(char)
+
+    def _calculate_display_width(self, text: str) -> int:
+        return sum(self._get_char_width(char) for char in text)
+
+    def _fallback_pagination(self, content: str, metrics: RobustPageMetrics,
+                             integrity_check: Dict) -> List[List[str]]:
+        lines_per_page = metrics.lines_per_page
+        chars_per_line = metrics.content_width
+        paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
+
+        pages = []
+        current_page_lines = []
+        for paragraph in paragraphs:
+            current_line = ""
+            for char in paragraph:
+                if self._calculate_display_width(current_line + char) <= chars_per_line:
+                    current_line += char
+                else:
+                    if current_line:
+                        current_page_lines.append(current_line)
+                        current_line = char
+                    if len(current_page_lines) >= lines_per_page:
+                        pages.append(current_page_lines[:])
+                        current_page_lines = []
+            if current_line:
+                current_page_lines.append(current_line)
+            if len(current_page_lines) < lines_per_page:
+                current_page_lines.append("")
+            if len(current_page_lines) >= lines_per_page:
+                pages.append(current_page_lines[:])
+                current_page_lines = []
+
+        if current_page_lines:
+            pages.append(current_page_lines)
+        return pages or [[""]]
+
+
+def generate_text(chars: int, seed: int = 1) -> str:
+    """
+    生成中英文混排文本（只含 BMP 字符）
+
+    Args:
+        chars: 大约的字符数
+        seed: 随机种子
+
+    Returns:
+        str: 文本，段落之间为空行，段落内有少量单换行
+    """
+    rnd = random.Random(seed)
+    parts: List[str] = []
+    length = 0
+    while length < chars:
+        roll = rnd.random()
+        if roll < 0.55:
+            piece = ''.join(rnd.choice(_CJK_CHARS) for _ in range(rnd.randint(1, 12)))
+        elif roll < 0.75:
+            piece = rnd.choice(_ENGLISH_WORDS) + " "
+        elif roll < 0.92:
+            piece = rnd.choice(_PUNCTUATION)
+        elif roll < 0.97:
+            piece = rnd.choice(_SPACES)
+        elif roll < 0.98:
+            piece = rnd.choice(_CONTROL)
+        elif roll < 0.995:
+            piece = "\n"
+        else:
+            piece = "\n\n"
+        parts.append(piece)
+        length += len(piece)
+    return ''.join(parts)
+
+
+def check_char_widths() -> None:
+    """
+    校验 BMP 全部码位的字符宽度与旧实现一致
+
+    Raises:
+        AssertionError: 存在宽度不一致的码位
+    """
+    for legacy, current in ((_legacy_terminal_char_width, SmartTextPagination()._get_char_width),
+                            (_legacy_robust_char_width, RobustTextPagination()._get_char_width)):
+        mismatched = [code for code in range(0x10000) if legacy(chr(code)) != current(chr(code))]
+        if mismatched:
+            raise AssertionError(f"字符宽度不一致: {len(mismatched)} 个码位，例如 U+{mismatched[0]:04X}")
+
+
+def _timed(func: Callable[[], object]) -> Tuple[object, float]:
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _compare(name: str, legacy: object, current: object) -> None:
+    if legacy != current:
+        raise AssertionError(f"{name}: 输出与旧实现不一致")
+
+
+def run_benchmark(chars: int = 1_000_000,
+                  widths: Sequence[int] = DEFAULT_WIDTHS) -> Dict[str, Dict[int, Dict[str, float]]]:
+    """
+    在同一文本上运行旧实现与当前实现，校验输出一致并统计耗时
+
+    Args:
+        chars: 文本字符数
+        widths: 换行宽度（列）
+
+    Returns:
+        Dict[str, Dict[int, Dict[str, float]]]: 策略名 -> 宽度 -> {"wrap_legacy_ms", "wrap_current_ms",
+            "paginate_legacy_ms", "paginate_current_ms"[, "fallback_legacy_ms", "fallback_current_ms"]}
+
+    Raises:
+        AssertionError: 任一比较项不一致
+    """
+    check_char_widths()
+    text = generate_text(chars)
+    lines = [line for line in text.split('\n') if line]
+    strategies: List[Tuple[str, PaginationStrategy, PaginationStrategy, type]] = [
+        ("smart", _LegacySmartPagination(), SmartTextPagination(), PageMetrics),
+        ("robust", _LegacyRobustPagination(), RobustTextPagination(), RobustPageMetrics),
+    ]
+    results: Dict[str, Dict[int, Dict[str, float]]] = {}
+    for name, legacy, current, metrics_class in strategies:
+        results[name] = {}
+        for width in widths:
+            stats: Dict[str, float] = {}
+            old_lines, stats["wrap_legacy_ms"] = _timed(lambda: [legacy._wrap_single_line(l, width) for l in lines])
+            new_lines, stats["wrap_current_ms"] = _timed(lambda: [current._wrap_single_line(l, width) for l in lines])
+            _compare(f"{name} 换行（宽度 {width}）", old_lines, new_lines)
+
+            metrics = metrics_class(content_width=width, lines_per_page=_LINES_PER_PAGE)
+            old_pages, stats["paginate_legacy_ms"] = _timed(lambda: legacy.paginate(text, metrics))
+            new_pages, stats["paginate_current_ms"] = _timed(lambda: current.paginate(text, metrics))
+            _compare(f"{name} 分页（宽度 {width}）", old_pages, new_pages)
+
+            if isinstance(current, RobustTextPagination):
+                old_pages, stats["fallback_legacy_ms"] = _timed(
+                    lambda: legacy._fallback_pagination(text, metrics, {}))
+                new_pages, stats["fallback_current_ms"] = _timed(
+                    lambda: current._fallback_pagination(text, metrics, {}))
+                _compare(f"{name} 备用分页（宽度 {width}）", old_pages, new_pages)
+            results[name][width] = stats
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """命令行入口：校验输出一致，并输出各策略、各宽度下旧实现与当前实现的耗时"""
+    parser = argparse.ArgumentParser(description="比较旧的逐字符宽度计算/换行与表驱动实现的耗时，并校验输出一致")
+    parser.add_argument("--chars", type=int, default=1_000_000, help="文本字符数")
+    parser.add_argument("--widths", type=int, nargs="+", default=list(DEFAULT_WIDTHS), help="换行宽度（列）")
+    args = parser.parse_args(argv)
+
+    print(f"文本: {args.chars / 1e6:.1f}M 字符（中英文混排），宽度: {', '.join(map(str, args.widths))}")
+    results = run_benchmark(args.chars, args.widths)
+    print("字符宽度、换行、分页结果与旧实现一致")
+    for name, by_width in results.items():
+        print(f"\n{name}:")
+        for width, stats in by_width.items():
+            line = (f"  宽度 {width}: 换行 {stats['wrap_legacy_ms']:.0f} -> {stats['wrap_current_ms']:.0f} ms，"
+                    f"分页 {stats['paginate_legacy_ms']:.0f} -> {stats['paginate_current_ms']:.0f} ms")
+            if "fallback_legacy_ms" in stats:
+                line += f"，备用分页 {stats['fallback_legacy_ms']:.0f} -> {stats['fallback_current_ms']:.0f} ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+用户权限快照缓存
+
+多用户模式下界面操作和书架渲染会反复检查权限。这里按用户缓存一份快照
+（角色、已授权的权限键、归属书籍，均为集合），检查权限只是一次字典/集合查找。
+
+失效使用版本号：
+- 全局版本：用户或权限整体变化（删除书籍、批量改路径等）时递增，所有快照失效
+- 用户版本：只影响单个用户的变化（设置权限、书籍归属）时递增，只有该用户的快照失效
+快照记录加载前读到的版本号，加载期间发生的修改会使其在下次读取时重新加载。
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class PermissionSnapshot:
+    """单个用户的权限快照"""
+    user_id: int
+    role: Optional[str]
+    permissions: FrozenSet[str]
+    books: FrozenSet[str]
+
+
+class PermissionSnapshotCache:
+    """按数据库路径共享的权限快照缓存"""
+
+    _caches: Dict[str, "PermissionSnapshotCache"] = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self):
+        self._version = 0
+        self._user_versions: Dict[int, int] = {}
+        # 用户ID -> ((全局版本, 用户版本), 快照)
+        self._snapshots: Dict[int, Tuple[Tuple[int, int], PermissionSnapshot]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, db_path: str) -> "PermissionSnapshotCache":
+        """
+        获取指定数据库共享的缓存（同一数据库的多个 DatabaseManager 实例共用）
+
+        Args:
+            db_path: 数据库文件路径
+
+        Returns:
+            PermissionSnapshotCache: 缓存实例
+        """
+        with cls._caches_lock:
+            cache = cls._caches.get(db_path)
+            if cache is None:
+                cache = cls._caches[db_path] = cls()
+            return cache
+
+    def _current_version(self, user_id: int) -> Tuple[int, int]:
+        return self._version, self._user_versions.get(user_id, 0)
+
+    def get(self, user_id: int, loader: Callable[[int], PermissionSnapshot]) -> PermissionSnapshot:
+        """
+        获取用户快照，版本过期或不存在时调用 loader 重新加载
+
+        Args:
+            user_id: 用户ID
+            loader: 从数据库加载快照的函数
+
+        Returns:
+            PermissionSnapshot: 权限快照
+        """
+        cached = self._snapshots.get(user_id)
+        if cached is not None and cached[0] == self._current_version(user_id):
+            return cached[1]
+        with self._lock:
+            version = self._current_version(user_id)
+        snapshot = loader(user_id)
+        with self._lock:
+            # 只有加载期间没有发生修改时才保存，否则下次读取会再次加载
+            if version == self._current_version(user_id):
+                self._snapshots[user_id] = (version, snapshot)
+        return snapshot
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """
+        使快照失效
+
+        Args:
+            user_id: 只使该用户的快照失效；为None时使全部快照失效
+        """
+        with self._lock:
+            if user_id is None:
+                self._version += 1
+                self._snapshots.clear()
+            else:
+                self._user_versions[user_id] = self._user_versions.get(user_id, 0) + 1
+                self._snapshots.pop(user_id, None)
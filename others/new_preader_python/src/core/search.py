@@ -1,18 +1,122 @@
 """
 全文搜索模块
+
+按章节 + 位置块建立外部内容（external content）FTS5 索引：正文只在 search_chapters 表中存储一次，
+FTS5 表只保存倒排索引；优先使用 trigram 分词器，使连续中文也能按子串命中，
+命中结果携带章节序号与字符偏移，阅读器可直接跳转。
+每本书的索引状态（已索引/没有正文/解析失败）记录在 search_index_state 中，补索引任务据此续建。
 """
 
 import os
 import re
-from typing import Dict, List, Tuple, Optional
+import time
+from typing import Any, Dict, List, Tuple, Optional
 import sqlite3
 
 from dataclasses import dataclass
 
+from src.core.db_connection_pool import SQLiteConnectionPool
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 每个索引块的字符数（块越小定位越精确，行数越多）
+BLOCK_SIZE = 2000
+# 相邻块的重叠字符数，避免关键词被块边界截断
+BLOCK_OVERLAP = 64
+# trigram 分词器要求查询词至少3个字符，更短的词走 LIKE 扫描
+TRIGRAM_MIN_LENGTH = 3
+# unicode61 分词器把连续的中文（非 ASCII 字符）当作一个词，这类查询词只能走 LIKE
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+# 预览片段在命中位置前后保留的字符数
+SNIPPET_RADIUS = 20
+
+# 未提供章节信息时用于切分章节的标题行
+_CHAPTER_TITLE_RE = re.compile(
+    r'^[ \t　]*(第[0-9零一二三四五六七八九十百千万两]+[章节回卷集部篇].*|Chapter\s+\d+.*|CHAPTER\s+\d+.*)$',
+    re.MULTILINE
+)
+
+# 书籍索引状态
+INDEX_STATUS_INDEXED = "indexed"  # 已写入索引块
+INDEX_STATUS_EMPTY = "empty"      # 解析成功但没有正文
+INDEX_STATUS_FAILED = "failed"    # 解析失败（文件变化后会重试）
+
+IndexRow = Tuple[str, int, str, int, int, str]  # (book_id, 章节序号, 章节标题, 块序号, 起始偏移, 正文)
+
+
+def resolve_chapters(content: str,
+                     chapters: Optional[List[Dict[str, Any]]]) -> List[Tuple[int, str, int, int]]:
+    """
+    计算各章节在全文中的范围
+
+    Args:
+        content: 书籍全文
+        chapters: 解析器给出的章节列表（含 title，可能含 start/content）
+
+    Returns:
+        List[Tuple[int, str, int, int]]: (章节序号, 章节标题, 起始偏移, 结束偏移) 列表，
+        章节序号与 chapters 列表下标一致
+    """
+    starts: List[Tuple[int, str, int]] = []
+    cursor = 0
+    for chapter_index, chapter in enumerate(chapters or []):
+        if not isinstance(chapter, dict):
+            continue
+        title = str(chapter.get("title", "") or "")
+        start = chapter.get("start")
+        if not isinstance(start, int) or start < cursor:
+            # 解析器未提供偏移时，依次在全文中定位章节正文/标题
+            start = -1
+            body = str(chapter.get("content", "") or "").strip()
+            for probe in (body[:64], title.strip()):
+                if probe:
+                    start = content.find(probe, cursor)
+                    if start >= 0:
+                        break
+        if start < 0:
+            continue
+        starts.append((chapter_index, title, start))
+        cursor = start
+
+    if not starts:
+        starts = [(i, m.group(1).strip(), m.start())
+                  for i, m in enumerate(_CHAPTER_TITLE_RE.finditer(content))]
+    if not starts:
+        starts = [(0, "", 0)]
+    # 第一章之前的前言部分并入第一章
+    starts[0] = (starts[0][0], starts[0][1], 0)
+
+    ranges = []
+    for i, (chapter_index, title, start) in enumerate(starts):
+        end = starts[i + 1][2] if i + 1 < len(starts) else len(content)
+        if end > start:
+            ranges.append((chapter_index, title, start, end))
+    return ranges
+
+
+def build_index_rows(book_id: str, content: str,
+                     chapters: Optional[List[Dict[str, Any]]] = None) -> List[IndexRow]:
+    """
+    把书籍全文切分为章节内的位置块（不访问数据库，可在工作进程中调用）
+
+    Args:
+        book_id: 书籍ID
+        content: 书籍全文
+        chapters: 可选，解析器给出的章节列表
+
+    Returns:
+        List[IndexRow]: search_chapters 的行
+    """
+    rows = []
+    for chapter_index, title, start, end in resolve_chapters(content, chapters):
+        for block_index, block_start in enumerate(range(start, end, BLOCK_SIZE)):
+            block_end = min(block_start + BLOCK_SIZE + BLOCK_OVERLAP, end)
+            rows.append((book_id, chapter_index, title, block_index, block_start,
+                         content[block_start:block_end]))
+    return rows
+
+
 @dataclass
 class SearchResult:
     """搜索结果数据类"""
@@ -20,180 +124,367 @@ class SearchResult:
     position: str  # 可以是页码、章节或位置
     preview: str    # 匹配内容的预览
     score: float    # 匹配分数
+    chapter_index: int = -1  # 命中的章节序号
+    offset: int = -1         # 命中位置在全文中的字符偏移
 
 class SearchEngine:
     """全文搜索引擎"""
-    
+
     def __init__(self, db_path: str):
         """
         初始化搜索引擎
-        
+
         Args:
             db_path: 数据库文件路径
         """
         self.db_path = os.path.expanduser(db_path)
+        self._pool = SQLiteConnectionPool.get_pool(self.db_path)
+        self.tokenizer = "trigram"
         self._init_db()
-    
+
     def _init_db(self) -> None:
         """初始化数据库"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.transaction() as conn:
             cursor = conn.cursor()
+            # 旧版索引将全文存为一行且正文存储两份，直接移除，由后台补索引任务按新结构重建
+            cursor.execute("DROP TABLE IF EXISTS search_index")
+            cursor.execute("DROP TABLE IF EXISTS search_content")
+
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS search_index (
+                CREATE TABLE IF NOT EXISTS search_chapters (
+                    id INTEGER PRIMARY KEY,
                     book_id TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    position TEXT NOT NULL,
-                    PRIMARY KEY (book_id, position)
+                    chapter_index INTEGER NOT NULL,
+                    chapter_title TEXT NOT NULL DEFAULT '',
+                    block_index INTEGER NOT NULL,
+                    start_offset INTEGER NOT NULL,
+                    content TEXT NOT NULL
                 )
             """)
             cursor.execute("""
-                CREATE VIRTUAL TABLE IF NOT EXISTS search_content 
-                USING fts5(book_id, content, position)
+                CREATE INDEX IF NOT EXISTS idx_search_chapters_book
+                ON search_chapters(book_id, chapter_index, block_index)
             """)
-            conn.commit()
-    
-    def index_book(self, book_id: str, content: str, position: str) -> None:
+            try:
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS search_chapters_fts
+                    USING fts5(content, content='search_chapters', content_rowid='id', tokenize='trigram')
+                """)
+            except sqlite3.OperationalError as e:
+                # SQLite < 3.34 不支持 trigram，退回默认分词器（短词仍可走 LIKE）
+                logger.warning(f"FTS5 trigram 分词器不可用，使用默认分词器: {e}")
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS search_chapters_fts
+                    USING fts5(content, content='search_chapters', content_rowid='id')
+                """)
+            # CREATE ... IF NOT EXISTS 对已存在的表不生效：以实际建表语句为准
+            # （旧版 SQLite 建立的 unicode61 索引在升级后仍是 unicode61，短词和中文子串需要走 LIKE）
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'search_chapters_fts'")
+            row = cursor.fetchone()
+            self.tokenizer = "trigram" if row and "trigram" in (row[0] or "").lower() else "unicode61"
+            # 外部内容表通过触发器与正文表保持同步
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS search_chapters_ai AFTER INSERT ON search_chapters BEGIN
+                    INSERT INTO search_chapters_fts(rowid, content) VALUES (new.id, new.content);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS search_chapters_ad AFTER DELETE ON search_chapters BEGIN
+                    INSERT INTO search_chapters_fts(search_chapters_fts, rowid, content)
+                    VALUES ('delete', old.id, old.content);
+                END
+            """)
+
+            # 每本书的索引状态：补索引任务据此跳过已完成（或没有正文、解析失败）的书籍，中断后可继续
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index_state'")
+            needs_backfill = cursor.fetchone() is None
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS search_index_state (
+                    book_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    file_size INTEGER,
+                    file_mtime_ns INTEGER,
+                    blocks INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    updated_at REAL
+                )
+            """)
+            if needs_backfill:
+                cursor.execute("""
+                    INSERT INTO search_index_state (book_id, status, blocks, updated_at)
+                    SELECT book_id, ?, COUNT(*), ? FROM search_chapters GROUP BY book_id
+                """, (INDEX_STATUS_INDEXED, time.time()))
+
+    def index_book(self, book_id: str, content: str,
+                   chapters: Optional[List[Dict[str, Any]]] = None) -> None:
         """
-        索引书籍内容
-        
+        按章节和位置块索引书籍内容（重复索引会先清除旧数据）
+
         Args:
             book_id: 书籍ID
-            content: 要索引的内容
-            position: 内容位置(页码/章节等)
+            content: 书籍全文
+            chapters: 可选，解析器给出的章节列表
         """
-        with sqlite3.connect(self.db_path) as conn:
+        self.write_index_batch([{
+            "book_id": book_id,
+            "rows": build_index_rows(book_id, content, chapters),
+            "identity": None,
+            "error": None,
+        }])
+
+    def write_index_batch(self, results: List[Dict[str, Any]]) -> int:
+        """
+        在一个事务中写入多本书的索引块和索引状态（每本书先清除旧数据）
+
+        Args:
+            results: 每本书一项：{"book_id", "rows": 索引行, "identity": (大小, mtime_ns, inode) 或None,
+                     "error": 解析失败时的错误信息}
+
+        Returns:
+            int: 写入的索引块数
+        """
+        states = []
+        rows: List[IndexRow] = []
+        now = time.time()
+        for result in results:
+            book_rows = result.get("rows") or []
+            if result.get("error"):
+                status = INDEX_STATUS_FAILED
+            else:
+                status = INDEX_STATUS_INDEXED if book_rows else INDEX_STATUS_EMPTY
+            identity = result.get("identity") or (None, None, None)
+            states.append((result["book_id"], status, identity[0], identity[1], len(book_rows),
+                           result.get("error"), now))
+            rows.extend(book_rows)
+
+        with self._pool.transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO search_index 
-                VALUES (?, ?, ?)
-            """, (book_id, content, position))
-            cursor.execute("""
-                INSERT OR REPLACE INTO search_content 
-                VALUES (?, ?, ?)
-            """, (book_id, content, position))
-            conn.commit()
-    
+            cursor.executemany("DELETE FROM search_chapters WHERE book_id = ?",
+                               [(state[0],) for state in states])
+            cursor.executemany("""
+                INSERT INTO search_chapters
+                (book_id, chapter_index, chapter_title, block_index, start_offset, content)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            cursor.executemany("""
+                INSERT OR REPLACE INTO search_index_state
+                (book_id, status, file_size, file_mtime_ns, blocks, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, states)
+        return len(rows)
+
+    def get_index_states(self) -> Dict[str, Tuple[str, Optional[int], Optional[int]]]:
+        """
+        返回所有书籍的索引状态
+
+        Returns:
+            Dict[str, Tuple[str, Optional[int], Optional[int]]]: book_id -> (状态, 文件大小, mtime_ns)
+        """
+        try:
+            with self._pool.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT book_id, status, file_size, file_mtime_ns FROM search_index_state")
+                return {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+        except sqlite3.Error as e:
+            logger.error(f"获取索引状态失败: {e}")
+            return {}
+
     def get_indexed_book_ids(self) -> set:
         """
-        返回已建立全文索引的 book_id 集合
-        
+        返回已建立全文索引的 book_id 集合（包括没有正文的书籍）
+
         Returns:
             set: 已索引的 book_id 集合
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT book_id FROM search_index")
+                cursor.execute("SELECT book_id FROM search_index_state WHERE status != ?",
+                               (INDEX_STATUS_FAILED,))
                 return {row[0] for row in cursor.fetchall()}
         except sqlite3.Error as e:
             logger.error(f"获取已索引书籍列表失败: {e}")
             return set()
-    
+
     def is_book_indexed(self, book_id: str) -> bool:
         """
         判断指定书籍是否已建立全文索引
-        
+
         Args:
             book_id: 书籍ID（即书籍路径）
-            
+
         Returns:
             bool: 是否已索引
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT 1 FROM search_index WHERE book_id = ? LIMIT 1", (book_id,))
+                cursor.execute("SELECT 1 FROM search_chapters WHERE book_id = ? LIMIT 1", (book_id,))
                 return cursor.fetchone() is not None
         except sqlite3.Error as e:
             logger.error(f"检查书籍索引状态失败: {e}")
             return False
-    
+
     def clear_index(self) -> None:
         """清空全部全文搜索索引（用于重建索引）"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM search_index")
-            cursor.execute("DELETE FROM search_content")
-            conn.commit()
-    
+            # 直接删表重建，比逐行触发删除快得多
+            cursor.execute("DROP TRIGGER IF EXISTS search_chapters_ai")
+            cursor.execute("DROP TRIGGER IF EXISTS search_chapters_ad")
+            cursor.execute("DROP TABLE IF EXISTS search_chapters_fts")
+            cursor.execute("DROP TABLE IF EXISTS search_chapters")
+            cursor.execute("DROP TABLE IF EXISTS search_index_state")
+        self._init_db()
+
+    def get_index_stats(self) -> Dict[str, Any]:
+        """
+        获取索引规模统计，用于比较不同索引结构的体积
+
+        Returns:
+            Dict[str, Any]: 书籍数、块数、正文字节数、倒排索引字节数、分词器
+        """
+        try:
+            with self._pool.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT COUNT(DISTINCT book_id), COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0)
+                    FROM search_chapters
+                """)
+                books, blocks, content_bytes = cursor.fetchone()
+                cursor.execute("SELECT COALESCE(SUM(LENGTH(block)), 0) FROM search_chapters_fts_data")
+                index_bytes = cursor.fetchone()[0]
+                return {
+                    "books": books,
+                    "blocks": blocks,
+                    "content_bytes": content_bytes,
+                    "index_bytes": index_bytes,
+                    "tokenizer": self.tokenizer
+                }
+        except sqlite3.Error as e:
+            logger.error(f"获取索引统计失败: {e}")
+            return {}
+
     def search(self, query: str, book_id: Optional[str] = None) -> List[SearchResult]:
         """
         执行搜索
-        
+
         Args:
-            query: 搜索查询
+            query: 搜索查询（空格分隔的多个词需同时命中）
             book_id: 可选，限制搜索的书籍ID
-            
+
         Returns:
-            搜索结果列表
+            搜索结果列表，按相关度排序，包含章节序号与全文偏移
         """
         # 验证和清理查询字符串
         if not query or not query.strip():
             return []
-            
+
         # 清理查询字符串，移除可能导致SQL错误的特殊字符
         cleaned_query = self._clean_search_query(query)
         if not cleaned_query:
             return []
-            
+
+        terms = cleaned_query.split()
+        if self.tokenizer == "trigram":
+            match_terms = [t for t in terms if len(t) >= TRIGRAM_MIN_LENGTH]
+        else:
+            match_terms = [t for t in terms if not _NON_ASCII_RE.search(t)]
+        like_terms = [t for t in terms if t not in match_terms]
+
+        conditions = []
+        params: List[Any] = []
+        if match_terms:
+            conditions.append("search_chapters_fts MATCH ?")
+            params.append(" AND ".join(f'"{t}"' for t in match_terms))
+        for t in like_terms:
+            conditions.append("c.content LIKE ?")
+            params.append(f"%{t}%")
+        if book_id:
+            conditions.append("c.book_id = ?")
+            params.append(book_id)
+
+        if match_terms:
+            sql = f"""
+                SELECT c.book_id, c.chapter_index, c.chapter_title, c.start_offset, c.content,
+                       bm25(search_chapters_fts) AS score
+                FROM search_chapters_fts
+                JOIN search_chapters c ON c.id = search_chapters_fts.rowid
+                WHERE {" AND ".join(conditions)}
+                ORDER BY score
+                LIMIT 100
+            """
+        else:
+            sql = f"""
+                SELECT c.book_id, c.chapter_index, c.chapter_title, c.start_offset, c.content,
+                       0.0 AS score
+                FROM search_chapters c
+                WHERE {" AND ".join(conditions)}
+                ORDER BY c.book_id, c.chapter_index, c.block_index
+                LIMIT 100
+            """
+
         results = []
+        seen = set()
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.transaction() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
-                
-                if book_id:
-                    cursor.execute("""
-                        SELECT book_id, position, snippet(search_content, 2, '<b>', '</b>', '...', 20) as snippet, 
-                               bm25(search_content) as score
-                        FROM search_content
-                        WHERE content MATCH ? AND book_id = ?
-                        ORDER BY score
-                        LIMIT 100
-                    """, (cleaned_query, book_id))
-                else:
-                    cursor.execute("""
-                        SELECT book_id, position, snippet(search_content, 2, '<b>', '</b>', '...', 20) as snippet, 
-                               bm25(search_content) as score
-                        FROM search_content
-                        WHERE content MATCH ?
-                        ORDER BY score
-                        LIMIT 100
-                    """, (cleaned_query,))
-                
+                cursor.execute(sql, params)
                 for row in cursor:
+                    block = row['content']
+                    idx = block.find(terms[0])
+                    if idx < 0:
+                        idx = block.lower().find(terms[0].lower())
+                    offset = row['start_offset'] + max(idx, 0)
+                    # 块之间有重叠，同一位置可能被相邻块重复命中
+                    if (row['book_id'], offset) in seen:
+                        continue
+                    seen.add((row['book_id'], offset))
                     results.append(SearchResult(
                         book_id=row['book_id'],
-                        position=row['position'],
-                        preview=row['snippet'],
-                        score=row['score']
+                        position=row['chapter_title'],
+                        preview=self._make_snippet(block, idx, len(terms[0])),
+                        score=row['score'],
+                        chapter_index=row['chapter_index'],
+                        offset=offset
                     ))
         except sqlite3.Error as e:
             logger.error(f"搜索执行失败: {e}")
             return []
-        
+
         return results
-    
+
+    def _make_snippet(self, block: str, idx: int, length: int) -> str:
+        """生成命中位置附近的预览片段"""
+        if idx < 0:
+            return block[:SNIPPET_RADIUS * 2]
+        start = max(0, idx - SNIPPET_RADIUS)
+        end = min(len(block), idx + length + SNIPPET_RADIUS)
+        prefix = "..." if start > 0 else ""
+        suffix = "..." if end < len(block) else ""
+        return (f"{prefix}{block[start:idx]}<b>{block[idx:idx + length]}</b>"
+                f"{block[idx + length:end]}{suffix}").replace("\n", " ")
+
     def remove_book(self, book_id: str) -> None:
         """
         从索引中移除书籍
-        
+
         Args:
             book_id: 要移除的书籍ID
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM search_index WHERE book_id = ?", (book_id,))
-            cursor.execute("DELETE FROM search_content WHERE book_id = ?", (book_id,))
-            conn.commit()
-    
+            cursor.execute("DELETE FROM search_chapters WHERE book_id = ?", (book_id,))
+            cursor.execute("DELETE FROM search_index_state WHERE book_id = ?", (book_id,))
+
     def _clean_search_query(self, query: str) -> str:
         """
         清理搜索查询字符串，移除可能导致SQL错误的特殊字符
-        
+
         Args:
             query: 原始查询字符串
-            
+
         Returns:
             清理后的查询字符串
         """
@@ -202,4 +493,4 @@ class SearchEngine:
         # 移除首尾空格
         cleaned = cleaned.strip()
         # 确保查询不为空
-        return cleaned if cleaned else ""
\ No newline at end of file
+        return cleaned if cleaned else ""
@@ -0,0 +1,216 @@
+"""
+全文搜索基准：在生成的中文语料上比较旧索引结构与章节块索引的搜索延迟和索引体积
+
+用法：python -m src.core.search_benchmark [--books 20] [--chapters 40] [--chapter-chars 3000] [--queries 200]
+
+- 旧结构：每本书一行全文，正文存储两份（search_index 表 + 默认分词器的 FTS5 表 search_content）
+- 新结构：SearchEngine（search_chapters 正文表 + 外部内容 FTS5 索引，优先 trigram 分词器）
+- 查询词从语料中随机截取（2/4/8 个字符），同时统计命中率：
+  默认分词器把连续的中文当作一个词，旧结构对中文子串基本无法命中
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core.db_connection_pool import SQLiteConnectionPool
+from src.core.search import SearchEngine
+
+# 生成语料使用的常用汉字与标点
+_CORPUS_CHARS = ("的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要她出也得里后自以会家可下而过天去能对小多然于心学"
+                 "么之都好看起发当没成只如事把还用第样道想作种开美总从无情己面最女但现前些所同日手又行意动方期它头经长儿回位分爱老"
+                 "因很给名法间斯知世什两次使身者被高已亲其进此话常与活正感见明问力理尔点文几定本公特做外孩相西果走将月十实向声车全信重")
+_PUNCTUATION = "，，，。！？"
+# 查询词长度
+QUERY_LENGTHS = (2, 4, 8)
+
+
+def generate_corpus(books: int, chapters: int, chapter_chars: int, seed: int = 1) -> List[Tuple[str, str]]:
+    """
+    生成中文语料
+
+    Args:
+        books: 书籍数
+        chapters: 每本书的章节数
+        chapter_chars: 每章字符数
+        seed: 随机种子
+
+    Returns:
+        List[Tuple[str, str]]: (book_id, 全文) 列表
+    """
+    rnd = random.Random(seed)
+    corpus = []
+    for b in range(books):
+        parts = []
+        for c in range(chapters):
+            parts.append(f"第{c + 1}章 测试章节{c + 1}\n")
+            length = 0
+            while length < chapter_chars:
+                sentence = ''.join(rnd.choice(_CORPUS_CHARS) for _ in range(rnd.randint(8, 30)))
+                sentence += rnd.choice(_PUNCTUATION)
+                if rnd.random() < 0.2:
+                    sentence += "\n"
+                parts.append(sentence)
+                length += len(sentence)
+            parts.append("\n")
+        corpus.append((f"/bench/book{b:04d}.txt", ''.join(parts)))
+    return corpus
+
+
+def sample_queries(corpus: Sequence[Tuple[str, str]], count: int, seed: int = 2) -> List[str]:
+    """
+    从语料中随机截取查询词（不含标点和换行）
+
+    Args:
+        corpus: 语料
+        count: 每种长度的查询词数量
+        seed: 随机种子
+
+    Returns:
+        List[str]: 查询词
+    """
+    rnd = random.Random(seed)
+    queries = []
+    for length in QUERY_LENGTHS:
+        while sum(1 for q in queries if len(q) == length) < count:
+            _, text = rnd.choice(corpus)
+            start = rnd.randrange(0, len(text) - length)
+            term = text[start:start + length]
+            if all(ch in _CORPUS_CHARS for ch in term):
+                queries.append(term)
+    return queries
+
+
+def _build_legacy(db_path: str, corpus: Sequence[Tuple[str, str]]) -> sqlite3.Connection:
+    """按旧结构建立索引（与重构前的 SearchEngine 相同）"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE search_index (
+            book_id TEXT NOT NULL,
+            content TEXT NOT NULL,
+            position TEXT NOT NULL,
+            PRIMARY KEY (book_id, position)
+        )
+    """)
+    conn.execute("CREATE VIRTUAL TABLE search_content USING fts5(book_id, content, position)")
+    for book_id, content in corpus:
+        conn.execute("INSERT INTO search_index VALUES (?, ?, ?)", (book_id, content, "full_content"))
+        conn.execute("INSERT INTO search_content VALUES (?, ?, ?)", (book_id, content, "full_content"))
+    conn.commit()
+    return conn
+
+
+def _legacy_search(conn: sqlite3.Connection, term: str) -> int:
+    """旧结构的查询（MATCH + snippet + bm25），返回命中行数"""
+    rows = conn.execute("""
+        SELECT book_id, position, snippet(search_content, 2, '<b>', '</b>', '...', 20) AS snippet,
+               bm25(search_content) AS score
+        FROM search_content
+        WHERE content MATCH ?
+        ORDER BY score
+        LIMIT 100
+    """, (term,)).fetchall()
+    return len(rows)
+
+
+def _file_size(db_path: str) -> int:
+    """数据库文件大小（先把 WAL 合并回主文件）"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return sum(os.path.getsize(db_path + ext) for ext in ("", "-wal") if os.path.exists(db_path + ext))
+
+
+def _measure(search: Callable[[str], int], queries: Sequence[str]) -> Dict[int, Tuple[float, float, float]]:
+    """
+    按查询词长度统计延迟与命中率
+
+    Returns:
+        Dict[int, Tuple[float, float, float]]: 长度 -> (平均毫秒, P95 毫秒, 命中率)
+    """
+    stats = {}
+    for length in QUERY_LENGTHS:
+        timings = []
+        hits = 0
+        for term in (q for q in queries if len(q) == length):
+            started = time.perf_counter()
+            if search(term):
+                hits += 1
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        stats[length] = (sum(timings) / len(timings), timings[int(len(timings) * 0.95) - 1], hits / len(timings))
+    return stats
+
+
+def run_benchmark(books: int = 20, chapters: int = 40, chapter_chars: int = 3000,
+                  queries: int = 200) -> Dict[str, Dict[str, object]]:
+    """
+    建立两种索引并执行相同的查询
+
+    Args:
+        books: 书籍数
+        chapters: 每本书的章节数
+        chapter_chars: 每章字符数
+        queries: 每种长度的查询词数量
+
+    Returns:
+        Dict[str, Dict[str, object]]: {"legacy"/"chapters": {"build_s", "size_bytes", "search": 按长度的统计}}
+    """
+    corpus = generate_corpus(books, chapters, chapter_chars)
+    terms = sample_queries(corpus, queries)
+    results: Dict[str, Dict[str, object]] = {}
+    with tempfile.TemporaryDirectory(prefix="search_bench_") as tmp:
+        legacy_path = os.path.join(tmp, "legacy.sqlite")
+        started = time.perf_counter()
+        conn = _build_legacy(legacy_path, corpus)
+        build_s = time.perf_counter() - started
+        try:
+            results["legacy"] = {"build_s": build_s, "size_bytes": _file_size(legacy_path),
+                                 "search": _measure(lambda t: _legacy_search(conn, t), terms),
+                                 "tokenizer": "unicode61"}
+        finally:
+            conn.close()
+
+        engine_path = os.path.join(tmp, "chapters.sqlite")
+        engine = SearchEngine(engine_path)
+        started = time.perf_counter()
+        for book_id, content in corpus:
+            engine.index_book(book_id, content)
+        build_s = time.perf_counter() - started
+        try:
+            results["chapters"] = {"build_s": build_s, "size_bytes": _file_size(engine_path),
+                                   "search": _measure(lambda t: len(engine.search(t)), terms),
+                                   "tokenizer": engine.tokenizer}
+        finally:
+            SQLiteConnectionPool.close_all()
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """命令行入口：输出两种索引结构的建立耗时、数据库体积和各长度查询的延迟/命中率"""
+    parser = argparse.ArgumentParser(description="比较旧索引结构与章节块索引的搜索延迟和索引体积")
+    parser.add_argument("--books", type=int, default=20, help="书籍数")
+    parser.add_argument("--chapters", type=int, default=40, help="每本书的章节数")
+    parser.add_argument("--chapter-chars", type=int, default=3000, help="每章字符数")
+    parser.add_argument("--queries", type=int, default=200, help="每种长度的查询词数量")
+    args = parser.parse_args(argv)
+
+    total_chars = args.books * args.chapters * args.chapter_chars
+    print(f"语料: {args.books} 本 × {args.chapters} 章 × {args.chapter_chars} 字 ≈ {total_chars / 1e6:.1f}M 字")
+    results = run_benchmark(args.books, args.chapters, args.chapter_chars, args.queries)
+    for name, label in (("legacy", "旧结构（全文一行）"), ("chapters", "章节块")):
+        result = results[name]
+        print(f"\n{label} [{result['tokenizer']}]: 建立 {result['build_s']:.2f}s，"
+              f"数据库 {result['size_bytes'] / 1e6:.1f} MB")
+        for length, (avg_ms, p95_ms, hit_rate) in result["search"].items():
+            print(f"  {length} 字查询: 平均 {avg_ms:.2f} ms，P95 {p95_ms:.2f} ms，命中率 {hit_rate:.0%}")
+
+
+if __name__ == "__main__":
+    main()
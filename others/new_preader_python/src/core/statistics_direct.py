@@ -1,6 +1,10 @@
 """
 统计模块 - 直接数据库版本
 直接操作数据库进行统计计算，不使用JSON文件缓存
+
+各项统计读取按 (用户, 日期, 书籍) 汇总的 reading_daily_stats 表（由数据库触发器随
+reading_history 增量维护，见 DatabaseManager._init_reading_stats），每个视图只需一次分组查询，
+查询量与阅读记录条数无关
 """
 
 import sqlite3
@@ -37,80 +41,39 @@ class StatisticsDirect:
             Dict[str, Any]: 总体统计数据
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_manager.connection() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
                 # 构建查询条件
-                where_clause = ""
-                params = []
-                if user_id is not None:
-                    where_clause = "WHERE user_id = ?"
-                    params = [user_id]
-                
-                # 获取阅读历史记录总数
-                cursor.execute(f"SELECT COUNT(*) as total_records FROM reading_history {where_clause}", params)
-                total_records = cursor.fetchone()["total_records"]
-                
-                # 获取总阅读时间
-                cursor.execute(f"SELECT SUM(duration) as total_reading_time FROM reading_history {where_clause}", params)
-                total_reading_time = cursor.fetchone()["total_reading_time"] or 0
+                where_clause, params = self._user_filter(user_id)
                 
-                # 获取阅读过的书籍数量
-                cursor.execute(f"SELECT COUNT(DISTINCT book_path) as books_read FROM reading_history {where_clause}", params)
-                books_read = cursor.fetchone()["books_read"] or 0
-                
-                # 获取总阅读页数
-                cursor.execute(f"SELECT SUM(pages_read) as total_pages_read FROM reading_history {where_clause}", params)
-                total_pages_read = cursor.fetchone()["total_pages_read"] or 0
-                
-                # 获取最长阅读时段
-                cursor.execute(f"SELECT MAX(duration) as longest_session FROM reading_history {where_clause}", params)
-                longest_session = cursor.fetchone()["longest_session"] or 0
-                
-                # 获取首次和最后阅读日期
-                cursor.execute(f"SELECT MIN(read_date) as first_read_date, MAX(read_date) as last_read_date FROM reading_history {where_clause}", params)
-                date_result = cursor.fetchone()
-                first_read_date = date_result["first_read_date"]
-                last_read_date = date_result["last_read_date"]
-                
-                # 获取完成的书籍数量（如果表中有reading_progress字段）
-                books_finished = 0
-                try:
-                    # 检查表是否有reading_progress字段
-                    cursor.execute("PRAGMA table_info(reading_history)")
-                    columns = [row[1] for row in cursor.fetchall()]
-                    
-                    if 'reading_progress' in columns:
-                        if user_id is not None:
-                            cursor.execute("""
-                                SELECT COUNT(DISTINCT rh.book_path) as books_finished
-                                FROM reading_history rh
-                                JOIN books b ON rh.book_path = b.path
-                                WHERE rh.user_id = ? AND rh.reading_progress >= 0.98
-                            """, [user_id])
-                        else:
-                            cursor.execute("""
-                                SELECT COUNT(DISTINCT rh.book_path) as books_finished
-                                FROM reading_history rh
-                                JOIN books b ON rh.book_path = b.path
-                                WHERE rh.reading_progress >= 0.98
-                            """)
-                        books_finished = cursor.fetchone()["books_finished"] or 0
-                except:
-                    # 如果无法检查字段或查询失败，默认为0
-                    books_finished = 0
+                # 一次查询得到全部总计；已读完指阅读进度达到98%且仍在书库中的书籍
+                cursor.execute(f"""
+                    SELECT SUM(records) as total_records,
+                           SUM(reading_time) as total_reading_time,
+                           COUNT(DISTINCT book_path) as books_read,
+                           SUM(pages_read) as total_pages_read,
+                           MAX(longest_session) as longest_session,
+                           MIN(first_read) as first_read_date,
+                           MAX(last_read) as last_read_date,
+                           COUNT(DISTINCT CASE WHEN max_progress >= 0.98
+                                                    AND book_path IN (SELECT path FROM books)
+                                               THEN book_path END) as books_finished
+                    FROM reading_daily_stats {where_clause}
+                """, params)
+                result = cursor.fetchone()
                 
                 return {
-                    "reading_time": total_reading_time,
-                    "books_read": books_read,
-                    "pages_read": total_pages_read,
+                    "reading_time": result["total_reading_time"] or 0,
+                    "books_read": result["books_read"] or 0,
+                    "pages_read": result["total_pages_read"] or 0,
                     "words_read": 0,  # 不再使用基于字数的计算
-                    "books_finished": books_finished,
-                    "longest_session": longest_session,
-                    "first_read_date": first_read_date,
-                    "last_read_date": last_read_date,
-                    "total_records": total_records
+                    "books_finished": result["books_finished"] or 0,
+                    "longest_session": result["longest_session"] or 0,
+                    "first_read_date": result["first_read_date"],
+                    "last_read_date": result["last_read_date"],
+                    "total_records": result["total_records"] or 0
                 }
                 
         except sqlite3.Error as e:
@@ -127,6 +90,28 @@ class StatisticsDirect:
                 "total_records": 0
             }
     
+    @staticmethod
+    def _user_filter(user_id: Optional[int], column: str = "user_id",
+                     conditions: Optional[List[str]] = None, params: Optional[List[Any]] = None) -> Tuple[str, List[Any]]:
+        """
+        构建 WHERE 子句
+        
+        Args:
+            user_id: 用户ID，为None时不按用户过滤
+            column: 用户ID列名
+            conditions: 其他条件
+            params: 其他条件的参数
+            
+        Returns:
+            Tuple[str, List[Any]]: (WHERE 子句, 参数)
+        """
+        conditions = list(conditions or [])
+        params = list(params or [])
+        if user_id is not None:
+            conditions.append(f"{column} = ?")
+            params.append(user_id)
+        return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
+    
     def get_daily_stats(self, date_str: Optional[str] = None, user_id: Optional[int] = None) -> Dict[str, Any]:
         """
         获取指定日期的统计数据
@@ -142,24 +127,19 @@ class StatisticsDirect:
             date_str = datetime.now().strftime("%Y-%m-%d")
             
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_manager.connection() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
                 # 构建查询条件
-                where_clause = "WHERE read_date LIKE ?"
-                params = [f"{date_str}%"]
-                
-                if user_id is not None:
-                    where_clause = "WHERE read_date LIKE ? AND user_id = ?"
-                    params.append(user_id)
+                where_clause, params = self._user_filter(user_id, conditions=["day = ?"], params=[date_str])
                 
                 # 获取当天的阅读记录
                 cursor.execute(f"""
-                    SELECT SUM(duration) as reading_time, 
+                    SELECT SUM(reading_time) as reading_time, 
                            COUNT(DISTINCT book_path) as books_read,
                            SUM(pages_read) as pages_read
-                    FROM reading_history 
+                    FROM reading_daily_stats 
                     {where_clause}
                 """, params)
                 
@@ -196,24 +176,20 @@ class StatisticsDirect:
             Dict[str, Any]: 时间段统计数据
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_manager.connection() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
-                # 构建查询条件
-                where_clause = "WHERE read_date BETWEEN ? AND ?"
-                params = [f"{start_date} 00:00:00", f"{end_date} 23:59:59"]
-                
-                if user_id is not None:
-                    where_clause = "WHERE read_date BETWEEN ? AND ? AND user_id = ?"
-                    params.append(user_id)
+                # 构建查询条件（按日期比较，包含结束日期当天的全部记录）
+                where_clause, params = self._user_filter(
+                    user_id, conditions=["day BETWEEN ? AND ?"], params=[start_date, end_date])
                 
                 cursor.execute(f"""
-                    SELECT SUM(duration) as reading_time, 
+                    SELECT SUM(reading_time) as reading_time, 
                            COUNT(DISTINCT book_path) as books_read,
                            SUM(pages_read) as pages_read,
                            GROUP_CONCAT(DISTINCT book_path) as book_paths
-                    FROM reading_history 
+                    FROM reading_daily_stats 
                     {where_clause}
                 """, params)
                 
@@ -250,42 +226,38 @@ class StatisticsDirect:
             List[Dict[str, Any]]: 书籍统计列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_manager.connection() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
                 # 构建查询条件
-                where_clause = ""
-                params = [limit]
-                
-                if user_id is not None:
-                    where_clause = "WHERE user_id = ?"
-                    params = [user_id, limit]
+                where_clause, params = self._user_filter(user_id, column="s.user_id")
                 
+                # 书籍信息直接连接书籍表获取（只统计仍在书库中的书籍）
                 cursor.execute(f"""
-                    SELECT book_path, 
-                           SUM(duration) as total_reading_time,
-                           COUNT(*) as open_count
-                    FROM reading_history 
+                    SELECT s.book_path,
+                           b.title,
+                           b.author,
+                           SUM(s.reading_time) as total_reading_time,
+                           SUM(s.records) as open_count
+                    FROM reading_daily_stats s
+                    JOIN books b ON s.book_path = b.path
                     {where_clause}
-                    GROUP BY book_path 
+                    GROUP BY s.book_path 
                     ORDER BY total_reading_time DESC 
                     LIMIT ?
-                """, params)
+                """, params + [limit])
                 
                 books = []
                 for row in cursor.fetchall():
-                    # 获取书籍详细信息
-                    book = self.db_manager.get_book(row["book_path"])
-                    if book:
-                        books.append({
-                            "path": row["book_path"],
-                            "title": book.title,
-                            "author": book.author,
-                            "reading_time": row["total_reading_time"],
-                            "open_count": row["open_count"],
-                            "progress": row["total_reading_time"]  # 使用阅读时间作为进度参考
-                        })
+                    books.append({
+                        "path": row["book_path"],
+                        "title": row["title"],
+                        "author": row["author"],
+                        "reading_time": row["total_reading_time"],
+                        "open_count": row["open_count"],
+                        "progress": row["total_reading_time"]  # 使用阅读时间作为进度参考
+                    })
                 
                 return books
                 
@@ -305,30 +277,26 @@ class StatisticsDirect:
             List[Dict[str, Any]]: 作者统计列表
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_manager.connection() as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
                 # 构建查询条件
-                where_clause = "WHERE b.author IS NOT NULL AND b.author != ''"
-                params = [limit]
-                
-                if user_id is not None:
-                    where_clause = "WHERE b.author IS NOT NULL AND b.author != '' AND rh.user_id = ?"
-                    params = [user_id, limit]
+                where_clause, params = self._user_filter(
+                    user_id, column="s.user_id", conditions=["b.author IS NOT NULL AND b.author != ''"])
                 
                 cursor.execute(f"""
                     SELECT b.author,
-                           SUM(rh.duration) as total_reading_time,
-                           COUNT(DISTINCT rh.book_path) as book_count,
-                           GROUP_CONCAT(DISTINCT rh.book_path) as book_paths
-                    FROM reading_history rh
-                    JOIN books b ON rh.book_path = b.path
+                           SUM(s.reading_time) as total_reading_time,
+                           COUNT(DISTINCT s.book_path) as book_count,
+                           GROUP_CONCAT(DISTINCT s.book_path) as book_paths
+                    FROM reading_daily_stats s
+                    JOIN books b ON s.book_path = b.path
                     {where_clause}
                     GROUP BY b.author
                     ORDER BY total_reading_time DESC 
                     LIMIT ?
-                """, params)
+                """, params + [limit])
                 
                 authors = []
                 for row in cursor.fetchall():
@@ -359,38 +327,39 @@ class StatisticsDirect:
         """
         if year is None:
             year = datetime.now().year
+        
+        # 按日期范围查询，可以使用日期索引
+        return {
+            day: reading_time // 60  # 将阅读时间从秒转换为分钟
+            for day, reading_time in self._daily_reading_time(f"{year}-01-01", f"{year}-12-31", user_id).items()
+        }
+    
+    def _daily_reading_time(self, start_date: str, end_date: str, user_id: Optional[int] = None) -> Dict[str, int]:
+        """
+        一次分组查询获取日期范围内每天的阅读时间
+        
+        Args:
+            start_date: 开始日期（YYYY-MM-DD格式）
+            end_date: 结束日期（YYYY-MM-DD格式）
+            user_id: 用户ID，如果为None则获取所有用户数据
             
+        Returns:
+            Dict[str, int]: 有阅读记录的日期到阅读时间（秒）的映射
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.db_manager.connection() as conn:
                 cursor = conn.cursor()
-                
-                # 构建查询条件
-                where_clause = "WHERE strftime('%Y', read_date) = ?"
-                params = [str(year)]
-                
-                if user_id is not None:
-                    where_clause = "WHERE strftime('%Y', read_date) = ? AND user_id = ?"
-                    params.append(user_id)
-                
+                where_clause, params = self._user_filter(
+                    user_id, conditions=["day BETWEEN ? AND ?"], params=[start_date, end_date])
                 cursor.execute(f"""
-                    SELECT DATE(read_date) as read_date, 
-                           SUM(duration) as daily_reading_time
-                    FROM reading_history 
+                    SELECT day, SUM(reading_time)
+                    FROM reading_daily_stats
                     {where_clause}
-                    GROUP BY DATE(read_date)
+                    GROUP BY day
                 """, params)
-                
-                heatmap = {}
-                for row in cursor.fetchall():
-                    # 将阅读时间从秒转换为分钟
-                    reading_time_minutes = (row["daily_reading_time"] or 0) // 60
-                    heatmap[row["read_date"]] = reading_time_minutes
-                
-                return heatmap
-                
+                return {day: reading_time or 0 for day, reading_time in cursor.fetchall()}
         except sqlite3.Error as e:
-            logger.error(f"获取阅读热图数据失败: {e}")
+            logger.error(f"获取每日阅读时间失败: {e}")
             return {}
     
     def get_reading_trend(self, days: int = 30, user_id: Optional[int] = None) -> List[Tuple[str, int]]:
@@ -406,15 +375,15 @@ class StatisticsDirect:
         """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days - 1)
+        daily = self._daily_reading_time(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"), user_id)
         
+        # 没有阅读记录的日期补 0
         trend = []
         current_date = start_date
         
         while current_date <= end_date:
             date_str = current_date.strftime("%Y-%m-%d")
-            daily_stats = self.get_daily_stats(date_str, user_id=user_id)
-            reading_time_minutes = daily_stats.get("reading_time", 0) // 60
-            trend.append((date_str, reading_time_minutes))
+            trend.append((date_str, daily.get(date_str, 0) // 60))
             current_date += timedelta(days=1)
         
         return trend
@@ -430,7 +399,7 @@ class StatisticsDirect:
             bool: 重置是否成功
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db_manager.connection() as conn:
                 cursor = conn.cursor()
                 
                 # 构建删除条件
@@ -441,6 +410,9 @@ class StatisticsDirect:
                     where_clause = "WHERE user_id = ?"
                     params = [user_id]
                 
+                # 先清空统计汇总，删除阅读历史时触发器无需逐组重算
+                cursor.execute(f"DELETE FROM reading_daily_stats {where_clause}", params)
+                
                 # 删除阅读历史记录
                 cursor.execute(f"DELETE FROM reading_history {where_clause}", params)
                 
@@ -457,8 +429,6 @@ class StatisticsDirect:
                     # 对于所有用户，清空整个表
                     cursor.execute("DELETE FROM book_metadata")
                 
-                conn.commit()
-                
                 logger.info(f"统计数据重置成功 - 用户ID: {user_id}")
                 return True
                 
@@ -13,6 +13,7 @@ import json
 import os
 
 from src.utils.logger import get_logger
+from src.utils.cache_manager import collect_cache_metrics
 
 logger = get_logger(__name__)
 
@@ -58,7 +59,8 @@ class PerformanceMonitor:
         self.running = False
         self.monitor_thread = None
         self.metrics_history: List[PerformanceMetrics] = []
-        self.custom_collectors: List[Callable[[], Dict[str, Any]]] = []
+        # 默认收集各命名空间的缓存命中/淘汰统计
+        self.custom_collectors: List[Callable[[], Dict[str, Any]]] = [collect_cache_metrics]
         self.start_time = time.time()
         
         # 限制历史记录数量
@@ -57,16 +57,25 @@ class SmartTerminalStrategy(TerminalRenderStrategy):
         # 预处理内容：移除多余空行，统一换行符
         processed_content = self._preprocess_content(content)
         
-        # 智能分页
+        # 智能分页：用偏移游标推进，每页只切出 max_chars + 1 个字符的窗口，
+        # 避免每页都复制一次剩余全文（O(n²)）
         pages = []
-        remaining_content = processed_content
+        max_chars = effective_width * effective_height
+        total_length = len(processed_content)
+        pos = 0
         
-        while remaining_content:
+        while pos < total_length:
+            window = processed_content[pos:pos + max_chars + 1]
             page_content = self._get_smart_page(
-                remaining_content, effective_width, effective_height, config
+                window, effective_width, effective_height, config
             )
+            if not page_content:
+                page_content = window[:max_chars]
             pages.append(page_content)
-            remaining_content = remaining_content[len(page_content):].lstrip()
+            pos += len(page_content)
+            # 等价于对剩余内容 lstrip()
+            while pos < total_length and processed_content[pos].isspace():
+                pos += 1
         
         return pages
     
@@ -272,7 +281,8 @@ class TerminalContentRenderer:
         # 状态管理
         self.content: Optional[str] = None
         self.pages: List[str] = []
-        self.rendered_pages: List[str] = []
+        # 按需渲染的页面缓存（页码 -> 渲染结果），只渲染实际访问到的页
+        self.rendered_pages: Dict[int, str] = {}
         self.current_page = 0
         self.total_pages = 0
         self.container_size: Tuple[int, int] = (80, 24)  # 默认终端尺寸
@@ -284,9 +294,9 @@ class TerminalContentRenderer:
         # 计算缓存键
         key = self._make_cache_key(content)
         cached = paginate_cache.get(key)
-        if cached and isinstance(cached, dict) and "pages" in cached and "rendered" in cached:
+        if cached and isinstance(cached, dict) and "pages" in cached:
             self.pages = cached["pages"]
-            self.rendered_pages = cached["rendered"]
+            self.rendered_pages = {}
             self.total_pages = len(self.pages)
         # 更新内容哈希
         try:
@@ -297,10 +307,9 @@ class TerminalContentRenderer:
             self._last_content_hash = "len:" + str(len(self.content or ""))
             return
         self._paginate()
-        self._render_all_pages()
         # 写入缓存
         try:
-            paginate_cache.set(key, {"pages": self.pages, "rendered": self.rendered_pages}, ttl_seconds=1800)
+            paginate_cache.set(key, {"pages": self.pages}, ttl_seconds=1800)
         except Exception:
             pass
     
@@ -313,14 +322,13 @@ class TerminalContentRenderer:
                 cached = paginate_cache.get(key)
                 if cached and isinstance(cached, dict):
                     self.pages = cached.get("pages", [])
-                    self.rendered_pages = cached.get("rendered", [])
+                    self.rendered_pages = {}
                     self.total_pages = len(self.pages)
-                    if self.pages and self.rendered_pages:
+                    if self.pages:
                         return
                 self._paginate()
-                self._render_all_pages()
                 try:
-                    paginate_cache.set(key, {"pages": self.pages, "rendered": self.rendered_pages}, ttl_seconds=1800)
+                    paginate_cache.set(key, {"pages": self.pages}, ttl_seconds=1800)
                 except Exception:
                     pass
     
@@ -330,7 +338,6 @@ class TerminalContentRenderer:
             self.current_strategy = strategy_name
             if self.content:
                 self._paginate()
-                self._render_all_pages()
             return True
         return False
     
@@ -346,17 +353,19 @@ class TerminalContentRenderer:
             self.content, self.container_size, self.config
         )
         self.total_pages = len(self.pages)
+        self.rendered_pages = {}
     
-    def _render_all_pages(self) -> None:
-        """渲染所有页面"""
-        self.rendered_pages = []
-        for i, page_content in enumerate(self.pages):
+    def _render_page(self, page_num: int) -> str:
+        """按需渲染单页（结果缓存，分页变化时清空）"""
+        rendered = self.rendered_pages.get(page_num)
+        if rendered is None:
             render_config = self.config.copy()
-            render_config['current_chapter'] = self._get_chapter_for_page(i)
+            render_config['current_chapter'] = self._get_chapter_for_page(page_num)
             rendered = self.strategies[self.current_strategy].render_page(
-                page_content, render_config
+                self.pages[page_num], render_config
             )
-            self.rendered_pages.append(rendered)
+            self.rendered_pages[page_num] = rendered
+        return rendered
 
     def _get_chapter_for_page(self, page_num: int) -> int:
         """根据页码确定所属章节"""
@@ -402,17 +411,16 @@ class TerminalContentRenderer:
         """
         key = self._make_cache_key(content)
         cached = paginate_cache.get(key)
-        if cached and isinstance(cached, dict) and "pages" in cached and "rendered" in cached:
+        if cached and isinstance(cached, dict) and "pages" in cached:
             self.pages = cached["pages"]
-            self.rendered_pages = cached["rendered"]
+            self.rendered_pages = {}
             self.total_pages = len(self.pages)
             return
 
         def _compute():
             self.content = content
             self._paginate()
-            self._render_all_pages()
-            return {"pages": self.pages, "rendered": self.rendered_pages}
+            return {"pages": self.pages}
 
         try:
             result = await asyncio.to_thread(_compute)
@@ -434,15 +442,13 @@ class TerminalContentRenderer:
     
     def get_current_page(self) -> str:
         """获取当前页渲染内容"""
-        if not self.rendered_pages or self.current_page >= len(self.rendered_pages):
-            return ""
-        return self.rendered_pages[self.current_page]
+        return self.get_page(self.current_page)
     
     def get_page(self, page_num: int) -> str:
         """获取指定页码的渲染内容"""
-        if not self.rendered_pages or page_num < 0 or page_num >= len(self.rendered_pages):
+        if page_num < 0 or page_num >= len(self.pages):
             return ""
-        return self.rendered_pages[page_num]
+        return self._render_page(page_num)
     
     def next_page(self) -> bool:
         """下一页"""
@@ -479,14 +485,13 @@ class TerminalContentRenderer:
             cached = paginate_cache.get(key)
             if cached and isinstance(cached, dict):
                 self.pages = cached.get("pages", [])
-                self.rendered_pages = cached.get("rendered", [])
+                self.rendered_pages = {}
                 self.total_pages = len(self.pages)
-                if self.pages and self.rendered_pages:
+                if self.pages:
                     return
             self._paginate()
-            self._render_all_pages()
             try:
-                paginate_cache.set(key, {"pages": self.pages, "rendered": self.rendered_pages}, ttl_seconds=1800)
+                paginate_cache.set(key, {"pages": self.pages}, ttl_seconds=1800)
             except Exception:
                 pass
 
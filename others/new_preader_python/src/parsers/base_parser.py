@@ -8,10 +8,14 @@ from typing import Dict, Any, Optional, List, Tuple
 import asyncio
 
 from src.utils.logger import get_logger
+from .chapter_segmenter import get_segmenter
 from .progress_callback import ParsingContext, ProgressCallback
 
 logger = get_logger(__name__)
 
+# 流式解析时进度回调的间隔（文本块数）
+PROGRESS_EVERY_BLOCKS = 8
+
 class BaseParser(ABC):
     """基础解析器抽象类，定义解析器接口"""
 
@@ -81,42 +85,55 @@ class BaseParser(ABC):
             content: 文本内容
 
         Returns:
-            List[Dict[str, Any]]: 章节列表，每个章节包含标题和内容
+            List[Dict[str, Any]]: 章节列表，每个章节包含标题和内容（不含标题行）
         """
-        chapters = []
+        return get_segmenter().segment(content)
 
-        # 简单的章节提取逻辑
-        lines = content.split('\n')
-        current_chapter = {"title": "未命名章节", "content": ""}
-        chapter_started = False
-
-        for line in lines:
-            # 检查是否是章节标题
-            if (line.strip().startswith("第") and ("章" in line or "节" in line)) or \
-               (line.strip().startswith("Chapter") or line.strip().startswith("CHAPTER")):
-                # 如果已经有章节内容，保存当前章节
-                if chapter_started and current_chapter["content"]:
-                    chapters.append(current_chapter.copy())
-
-                # 创建新章节
-                current_chapter = {"title": line.strip(), "content": ""}
-                chapter_started = True
-            elif chapter_started:
-                # 添加内容到当前章节
-                current_chapter["content"] += line + "\n"
-            else:
-                # 如果还没有找到章节标题，将内容添加到第一个未命名章节
-                current_chapter["content"] += line + "\n"
-
-        # 添加最后一个章节
-        if current_chapter["content"]:
-            chapters.append(current_chapter)
-
-        # 如果没有找到章节，将整个内容作为一个章节
-        if not chapters:
-            chapters = [{"title": "全文", "content": content}]
-
-        return chapters
+    async def _deliver_chapters(self, finished: List[Dict[str, Any]], chapters: List[Dict[str, Any]],
+                                chunk_callback=None) -> None:
+        """
+        收集流式切分产出的章节并逐个回调
+
+        Args:
+            finished: 刚切分完成的章节
+            chapters: 章节结果列表
+            chunk_callback: 章节回调（可以是协程函数）
+        """
+        for chapter in finished:
+            chapters.append(chapter)
+            if chunk_callback is not None:
+                result = chunk_callback(chapter)
+                if asyncio.iscoroutine(result):
+                    await result
+
+    async def _report_block(self, parsing_context: Optional[ParsingContext], index: int, total: int,
+                            label: str) -> bool:
+        """
+        流式解析每块文本前检查取消/超时并按间隔上报进度
+
+        Args:
+            parsing_context: 解析上下文
+            index: 文本块序号
+            total: 文本块总数
+            label: 格式名称（用于日志）
+
+        Returns:
+            bool: 是否继续解析
+        """
+        if parsing_context is None:
+            return True
+        if parsing_context.cancel_requested or parsing_context.check_timeout():
+            logger.info(f"{label}解析被取消或超时")
+            return False
+        if index % PROGRESS_EVERY_BLOCKS == 0 or index == total - 1:
+            try:
+                if not await parsing_context.update_progress(index + 1, total, f"解析文本 {index+1}/{total}"):
+                    logger.info(f"{label}解析被用户取消")
+                    return False
+            except Exception:
+                # 如果进度回调出错，继续解析
+                pass
+        return True
 
     async def parse_incremental(self, file_path: str,
                                parsing_context: Optional[ParsingContext] = None,
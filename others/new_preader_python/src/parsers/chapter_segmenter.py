@@ -0,0 +1,297 @@
+"""
+章节切分引擎：单次扫描、线性时间
+
+- 所有标题模式（中文数字/阿拉伯数字的“第X章”、卷/部/篇、Chapter N / Part N、序言/楔子/后记等、
+  Markdown 的 # 标题、用户在 advanced.chapter_patterns 中配置的模式）合并为一个编译好的正则，
+  用命名分组区分标题级别，对全文只做一次 finditer
+- 章节正文用切片/列表拼接得到，不做字符串累加
+- 流式模式（ChapterStream）按块输入文本，每遇到下一个标题即产出上一章，内存只保留当前章节；
+  一次性切分也经过同一条代码路径，两种方式结果一致
+- 严格模式用于解析器的章节表；宽松模式额外识别“一、”“1. xxx”“【…】”等行，用于浏览器阅读器的标题排版
+"""
+
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 超过该字符数的行不视为标题（避免把以“第…章”开头的正文句子当作标题）
+MAX_TITLE_CHARS = 60
+# 第一个标题之前有内容时该部分的标题
+PREAMBLE_TITLE = "未命名章节"
+# 全文没有标题时唯一章节的标题
+WHOLE_TEXT_TITLE = "全文"
+# 流式输入中超过该字符数仍未结束的行不可能是标题，直接并入正文（避免没有换行的文件反复拼接）
+_MAX_CARRY_CHARS = 64 * 1024
+
+_NUM = r'[零〇一二三四五六七八九十百千万两\d]+'
+_SP = r'[^\S\n]*'  # 不跨行的空白
+_EN_ONES = r'one|two|three|four|five|six|seven|eight|nine'
+_EN_TENS = r'twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety'
+_EN_NUM = (rf'(?:\d+|[IVXLC]+|(?:{_EN_TENS})(?:-(?:{_EN_ONES}))?|ten|eleven|twelve|thirteen|fourteen|fifteen|'
+           rf'sixteen|seventeen|eighteen|nineteen|hundred|{_EN_ONES})\b')
+
+# (分组名, 级别, 模式)；模式作用于行首空白之后
+_STRICT_PATTERNS: List[Tuple[str, int, str]] = [
+    ("h1", 1, rf'第{_SP}{_NUM}{_SP}[章节回篇部页集卷]|Chapter{_SP}{_EN_NUM}|卷{_SP}{_NUM}'),
+    ("h2", 2, rf'Part{_SP}{_EN_NUM}|篇{_SP}{_NUM}'),
+    ("h3", 3, rf'(?:序{_SP}[言章篇]|前{_SP}言|引{_SP}言|楔{_SP}子|尾{_SP}声|后{_SP}记)(?=[^\S\n]|[：:]|$)'),
+]
+# 宽松模式追加的模式；第二项为 Markdown 中是否使用（=== / --- 在 Markdown 中是分隔线或 Setext 标题）
+_LOOSE_PATTERNS: List[Tuple[str, bool]] = [
+    (r'[零一二三四五六七八九十百千万]+、', True),
+    (r'\d+[\.、 \t　]+\S+', True),
+    (r'【.*】', True),
+    (r'\[.*\]', True),
+    (r'<.*>', True),
+    (rf'=+{_SP}.*{_SP}=+', False),
+    (rf'-+{_SP}.*{_SP}-', False),
+]
+
+
+def get_custom_chapter_patterns() -> List[str]:
+    """
+    读取 advanced 配置中用户自定义的章节标题模式
+
+    Returns:
+        List[str]: 正则表达式列表（作用于行首）
+    """
+    try:
+        from src.config.config_manager import ConfigManager
+        patterns = ConfigManager.get_instance().get_config().get("advanced", {}).get("chapter_patterns", [])
+    except Exception as e:
+        logger.debug(f"读取自定义章节模式失败: {e}")
+        return []
+    return [p for p in patterns or [] if isinstance(p, str) and p.strip()]
+
+
+class ChapterSegmenter:
+    """编译好的标题模式集合（线程安全，可复用）"""
+
+    def __init__(self, markdown: bool = False, loose: bool = False,
+                 custom_patterns: Optional[Sequence[str]] = None):
+        """
+        Args:
+            markdown: 是否识别 Markdown 的 # 标题（级别为井号数量，最多 3）
+            loose: 是否使用宽松模式
+            custom_patterns: 用户自定义的标题模式（级别 1）；无效的模式会被忽略
+        """
+        self.markdown = markdown
+        self.loose = loose
+        branches = []
+        if markdown:
+            branches.append(r'(?P<md>#{1,6})(?=[^\S\n])')
+        branches += [f'(?P<{name}>{pattern})' for name, _, pattern in _STRICT_PATTERNS]
+        self._levels = {name: level for name, level, _ in _STRICT_PATTERNS}
+        if loose:
+            loose_patterns = [p for p, in_markdown in _LOOSE_PATTERNS if in_markdown or not markdown]
+            branches.append('(?P<x>' + '|'.join(loose_patterns) + ')')
+            self._levels["x"] = 3
+        custom = []
+        for pattern in custom_patterns or ():
+            pattern = pattern.lstrip('^')
+            try:
+                re.compile(pattern)
+                custom.append(f'(?:{pattern})')
+            except re.error as e:
+                logger.warning(f"忽略无效的自定义章节模式 {pattern!r}: {e}")
+        base = r'^[^\S\n]*(?:' + '|'.join(branches)
+        try:
+            self.regex = re.compile(base + (f'|(?P<u>{"|".join(custom)})' if custom else '') + r')[^\n]*',
+                                    re.MULTILINE | re.IGNORECASE)
+        except re.error as e:
+            # 自定义模式之间可能有重名分组等冲突
+            logger.warning(f"自定义章节模式无法与内置模式合并，已忽略: {e}")
+            self.regex = re.compile(base + r')[^\n]*', re.MULTILINE | re.IGNORECASE)
+        self._levels["u"] = 1
+
+    def _level(self, match: "re.Match") -> int:
+        name = match.lastgroup
+        if name == "md":
+            return min(len(match.group("md")), 3)
+        return self._levels.get(name, 3)
+
+    def line_level(self, line: str) -> int:
+        """
+        单行的标题级别
+
+        Args:
+            line: 一行文本
+
+        Returns:
+            int: 1-3，不是标题时为 0
+        """
+        match = self.regex.match(line)
+        if match is None or len(match.group(0).strip()) > MAX_TITLE_CHARS:
+            return 0
+        return self._level(match)
+
+    def iter_headings(self, text: str) -> Iterator[Tuple[int, int, str, int]]:
+        """
+        查找文本中的标题行
+
+        Args:
+            text: 文本
+
+        Yields:
+            Tuple[int, int, str, int]: (标题行起点, 标题行终点（含换行符）, 标题, 级别)
+        """
+        length = len(text)
+        for match in self.regex.finditer(text):
+            title = match.group(0).strip()
+            if len(title) > MAX_TITLE_CHARS:
+                continue
+            if match.lastgroup == "md":
+                title = title.lstrip('#').strip()
+            end = match.end()
+            if end < length and text[end] == '\n':
+                end += 1
+            yield match.start(), end, title, self._level(match)
+
+    def stream(self, max_level: int = 3, offset: int = 0) -> "ChapterStream":
+        """
+        创建流式切分器
+
+        Args:
+            max_level: 作为章节边界的最大标题级别（更低级别的标题留在正文中）
+            offset: 输入文本在全文中的起始字符偏移（章节 start 以此为基准）
+
+        Returns:
+            ChapterStream: 流式切分器
+        """
+        return ChapterStream(self, max_level, offset)
+
+    def segment(self, text: str, max_level: int = 3) -> List[Dict[str, Any]]:
+        """
+        一次性切分全文
+
+        Args:
+            text: 全文
+            max_level: 作为章节边界的最大标题级别
+
+        Returns:
+            List[Dict[str, Any]]: 章节列表（格式见 ChapterStream.feed）；没有标题时为一个“全文”章节
+        """
+        stream = self.stream(max_level)
+        chapters = stream.feed(text)
+        chapters += stream.finish()
+        return chapters
+
+
+class ChapterStream:
+    """流式章节切分：按块输入文本，产出已经结束的章节"""
+
+    def __init__(self, segmenter: ChapterSegmenter, max_level: int = 3, offset: int = 0):
+        self.segmenter = segmenter
+        self.max_level = max_level
+        self.count = 0  # 已产出的章节数
+        self._carry = ""  # 上一块末尾不完整的行
+        self._mid_line = False  # 上一块以过长的未结束行结尾
+        self._offset = offset  # 已扫描文本的结束位置（字符偏移）
+        self._title: Optional[str] = None  # 当前章节的标题，None 表示还没有遇到标题
+        self._level = 0
+        self._start = offset
+        self._parts: List[str] = []
+
+    def feed(self, block: str) -> List[Dict[str, Any]]:
+        """
+        输入一块文本
+
+        Args:
+            block: 文本块（可在行中间截断）
+
+        Returns:
+            List[Dict[str, Any]]: 本块中结束的章节，
+                每项为 {"title", "level", "start": 标题在全文中的字符偏移, "content": 不含标题行的正文}
+        """
+        if self._mid_line:
+            newline = block.find('\n')
+            if newline == -1:
+                self._append(block)
+                return []
+            self._append(block[:newline + 1])
+            block = block[newline + 1:]
+            self._mid_line = False
+        buffer = self._carry + block
+        cut = buffer.rfind('\n') + 1
+        self._carry = buffer[cut:]
+        chapters = self._scan(buffer[:cut])
+        if len(self._carry) > _MAX_CARRY_CHARS:
+            self._append(self._carry)
+            self._carry = ""
+            self._mid_line = True
+        return chapters
+
+    def _append(self, text: str) -> None:
+        self._parts.append(text)
+        self._offset += len(text)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        输入结束，产出剩余的章节
+
+        Returns:
+            List[Dict[str, Any]]: 剩余章节；整个输入都没有标题时为一个“全文”章节
+        """
+        chapters = self._scan(self._carry)
+        self._carry = ""
+        chapter = self._close(final=True)
+        if chapter is not None:
+            chapters.append(chapter)
+        return chapters
+
+    def _scan(self, text: str) -> List[Dict[str, Any]]:
+        chapters = []
+        pos = 0
+        for start, end, title, level in self.segmenter.iter_headings(text):
+            if level > self.max_level:
+                continue
+            self._parts.append(text[pos:start])
+            chapter = self._close()
+            if chapter is not None:
+                chapters.append(chapter)
+            self._title, self._level, self._start = title, level, self._offset + start
+            pos = end
+        self._parts.append(text[pos:])
+        self._offset += len(text)
+        return chapters
+
+    def _close(self, final: bool = False) -> Optional[Dict[str, Any]]:
+        """结束当前章节；第一个标题之前只有空白时不产出（空输入仍产出一个“全文”章节）"""
+        content = ''.join(self._parts).strip('\n')
+        self._parts = []
+        if self._title is None:
+            whole_text = final and self.count == 0
+            if not whole_text and not content.strip():
+                return None
+            title = WHOLE_TEXT_TITLE if whole_text else PREAMBLE_TITLE
+        else:
+            title = self._title
+        self.count += 1
+        return {"title": title, "level": self._level, "start": self._start, "content": content}
+
+
+_segmenters: Dict[Tuple[bool, bool, Tuple[str, ...]], ChapterSegmenter] = {}
+_segmenters_lock = threading.Lock()
+
+
+def get_segmenter(markdown: bool = False, loose: bool = False) -> ChapterSegmenter:
+    """
+    获取带有当前自定义模式的共享切分器（按模式组合缓存编译结果）
+
+    Args:
+        markdown: 是否识别 Markdown 的 # 标题
+        loose: 是否使用宽松模式
+
+    Returns:
+        ChapterSegmenter: 切分器
+    """
+    key = (markdown, loose, tuple(get_custom_chapter_patterns()))
+    with _segmenters_lock:
+        segmenter = _segmenters.get(key)
+        if segmenter is None:
+            segmenter = _segmenters[key] = ChapterSegmenter(markdown, loose, key[2])
+    return segmenter
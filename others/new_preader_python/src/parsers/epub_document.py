@@ -0,0 +1,382 @@
+"""
+按需解码的 EPUB 文档
+
+- 打开时只读取 container.xml、OPF 和目录（NCX 或 EPUB3 导航文档），建立章节表，不解码任何正文
+- 章节正文在访问时才从压缩包中读取并转换为纯文本，最近访问的章节保存在 LRU 缓存中，
+  内存占用随阅读过的章节数增长，与书籍大小无关
+- 可在后台线程预取后续章节
+- HTML 转文本使用正则按块级标签切分，不构建 BeautifulSoup 文档树
+- 缓存与预取在 LazyChapterDocument 中实现，Kindle 解包缓存（kindle_container）复用同一接口
+"""
+
+import re
+import html
+import zipfile
+import posixpath
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 缓存的已解码章节数
+DEFAULT_CACHE_CHAPTERS = 16
+# 默认预取的后续章节数
+DEFAULT_PREFETCH_CHAPTERS = 2
+
+_HTML_MEDIA_TYPES = ('application/xhtml+xml', 'text/html', 'application/x-dtbook+xml')
+_HTML_EXTENSIONS = ('.xhtml', '.html', '.htm')
+
+_COMMENT_RE = re.compile(r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<!DOCTYPE[^>]*>', re.S | re.I)
+_SKIP_RE = re.compile(r'<(head|script|style|svg|math|noscript)\b[^>]*>.*?</\1\s*>', re.S | re.I)
+_TITLE_RE = re.compile(r'<title\b[^>]*>(.*?)</title\s*>', re.S | re.I)
+_HEADING_RE = re.compile(r'<(h[1-3])\b[^>]*>(.*?)</\1\s*>', re.S | re.I)
+_BLOCK_TAG_RE = re.compile(
+    r'<(?:br|hr|/?(?:p|div|h[1-6]|li|ul|ol|dl|dt|dd|tr|table|caption|blockquote|pre|section|article|'
+    r'header|footer|aside|nav|figure|figcaption|body|html))\b[^>]*>', re.I)
+_TAG_RE = re.compile(r'<[^>]*>')
+# HTML 中的空白（不含全角空格，中文排版的首行缩进会保留到行首再去除）
+_HTML_SPACE_RE = re.compile(r'[ \t\r\n\f]+')
+_CONTROL_RE = re.compile(r'[\x00-\x08\x0b-\x1f]')
+_ENCODING_RE = re.compile(rb'''<\?xml[^>]*encoding=["']([A-Za-z0-9._-]+)["']|<meta[^>]*charset=["']?([A-Za-z0-9._-]+)''', re.I)
+_NAV_TOC_RE = re.compile(r'<nav\b[^>]*epub:type\s*=\s*["\'][^"\']*\btoc\b[^"\']*["\'][^>]*>(.*?)</nav\s*>', re.S | re.I)
+_NAV_LINK_RE = re.compile(r'<a\b[^>]*href\s*=\s*["\']([^"\']*)["\'][^>]*>(.*?)</a\s*>', re.S | re.I)
+
+
+@dataclass(frozen=True)
+class EpubChapter:
+    """章节表中的一项（对应书脊中的一个 HTML 文档）"""
+    index: int
+    # 压缩包内的路径（Kindle 解包缓存中为相对于缓存目录的路径）
+    href: str
+    # 目录中的标题，目录中没有该文档时为空
+    title: str
+    # 文档解压后的字节数
+    size: int
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _decode_markup(data: bytes) -> str:
+    """按 BOM、XML 声明或 meta charset 解码文档，默认 UTF-8"""
+    if data.startswith(b'\xef\xbb\xbf'):
+        return data[3:].decode('utf-8', errors='replace')
+    if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return data.decode('utf-16', errors='replace')
+    match = _ENCODING_RE.search(data[:1024])
+    if match:
+        encoding = (match.group(1) or match.group(2)).decode('ascii')
+        try:
+            return data.decode(encoding, errors='replace')
+        except LookupError:
+            pass
+    return data.decode('utf-8', errors='replace')
+
+
+def _inline_text(markup: str) -> str:
+    """标签内的文本（单行）"""
+    return ' '.join(html.unescape(_TAG_RE.sub('', markup)).replace('\xa0', ' ').split())
+
+
+def html_to_text(markup: str) -> Tuple[str, str]:
+    """
+    把 (X)HTML 文档转换为纯文本
+
+    块级标签处换行，其余标签去除，每行去除首尾空白，空行丢弃。
+
+    Args:
+        markup: 文档源码
+
+    Returns:
+        Tuple[str, str]: (正文, 第一个 h1-h3 标题或 <title>，都没有时为空字符串)
+    """
+    markup = _COMMENT_RE.sub('', markup)
+    heading = ""
+    match = _HEADING_RE.search(markup) or _TITLE_RE.search(markup)
+    if match:
+        heading = _inline_text(match.group(match.lastindex))
+    markup = _SKIP_RE.sub('', markup)
+    markup = _HTML_SPACE_RE.sub(' ', markup)
+    markup = _BLOCK_TAG_RE.sub('\n', markup)
+    text = _CONTROL_RE.sub('', html.unescape(_TAG_RE.sub('', markup)).replace('\xa0', ' '))
+    lines = [line.strip() for line in text.split('\n')]
+    return '\n'.join(line for line in lines if line), heading
+
+
+class LazyChapterDocument:
+    """按需解码章节的文档基类：LRU 缓存、后台预取和顺序遍历（子类实现 extract）"""
+
+    def __init__(self, file_path: str, cache_chapters: int = DEFAULT_CACHE_CHAPTERS):
+        """
+        Args:
+            file_path: 文件路径
+            cache_chapters: 缓存的已解码章节数
+        """
+        self.file_path = file_path
+        self.cache_chapters = max(cache_chapters, 1)
+        self.metadata: Dict[str, str] = {}
+        self.chapters: List[EpubChapter] = []
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._prefetching: Set[int] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+
+    def __enter__(self) -> "LazyChapterDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.chapters)
+
+    def extract(self, index: int) -> Tuple[str, str]:
+        """
+        解码章节（不经过缓存，适合顺序读取全书）
+
+        Args:
+            index: 章节序号
+
+        Returns:
+            Tuple[str, str]: (正文, 正文中的第一个标题)
+        """
+        raise NotImplementedError
+
+    def get_text(self, index: int) -> str:
+        """
+        章节正文（最近访问的章节从缓存返回）
+
+        Args:
+            index: 章节序号
+
+        Returns:
+            str: 纯文本正文
+        """
+        with self._cache_lock:
+            text = self._cache.get(index)
+            if text is not None:
+                self._cache.move_to_end(index)
+                return text
+        text = self.extract(index)[0]
+        with self._cache_lock:
+            self._cache[index] = text
+            self._cache.move_to_end(index)
+            while len(self._cache) > self.cache_chapters:
+                self._cache.popitem(last=False)
+        return text
+
+    def prefetch(self, start: int, count: int = DEFAULT_PREFETCH_CHAPTERS) -> None:
+        """
+        在后台线程解码 [start, start + count) 中尚未缓存的章节
+
+        Args:
+            start: 第一个预取的章节序号
+            count: 预取的章节数
+        """
+        with self._cache_lock:
+            if self._closed:
+                return
+            indexes = [i for i in range(max(start, 0), min(start + count, len(self.chapters)))
+                       if i not in self._cache and i not in self._prefetching]
+            if not indexes:
+                return
+            self._prefetching.update(indexes)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chapter-prefetch")
+        for index in indexes:
+            self._executor.submit(self._prefetch_one, index)
+
+    def _prefetch_one(self, index: int) -> None:
+        try:
+            if not self._closed:
+                self.get_text(index)
+        except Exception as e:
+            logger.debug(f"预取章节失败: {index}, 错误: {e}")
+        finally:
+            with self._cache_lock:
+                self._prefetching.discard(index)
+
+    def iter_chapters(self) -> Iterator[Tuple[EpubChapter, str, str]]:
+        """
+        按顺序解码全部章节（不写入缓存）
+
+        Yields:
+            Tuple[EpubChapter, str, str]: (章节, 正文, 正文中的第一个标题)
+        """
+        for chapter in self.chapters:
+            text, heading = self.extract(chapter.index)
+            yield chapter, text, heading
+
+    def close(self) -> None:
+        """停止预取并关闭文件"""
+        with self._cache_lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+            self._cache.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._close_source()
+
+    def _close_source(self) -> None:
+        """关闭底层文件（子类实现）"""
+
+
+class EpubDocument(LazyChapterDocument):
+    """按需解码的 EPUB 文档（可在多个线程中读取）"""
+
+    def __init__(self, file_path: str, cache_chapters: int = DEFAULT_CACHE_CHAPTERS):
+        """
+        打开 EPUB 文件并读取章节表
+
+        Args:
+            file_path: EPUB 文件路径
+            cache_chapters: 缓存的已解码章节数
+
+        Raises:
+            ValueError: 文件不是有效的 EPUB（缺少 OPF 或无法解析）
+        """
+        super().__init__(file_path, cache_chapters)
+        self._zip = zipfile.ZipFile(file_path)
+        self._zip_lock = threading.Lock()
+        # 压缩包内路径（小写）到实际路径，兼容大小写不一致的引用
+        self._names = {name.lower(): name for name in self._zip.namelist()}
+        try:
+            self._load_package()
+        except Exception:
+            self._zip.close()
+            raise
+
+    def _read(self, name: str) -> bytes:
+        with self._zip_lock:
+            if self._closed:
+                raise ValueError("EPUB 文档已关闭")
+            return self._zip.read(self._names.get(name.lower(), name))
+
+    def _load_package(self) -> None:
+        """读取 OPF：元数据、清单、书脊和目录"""
+        try:
+            container = ET.fromstring(self._read('META-INF/container.xml'))
+            opf_path = next(el.get('full-path') for el in container.iter()
+                            if _local_name(el.tag) == 'rootfile' and el.get('full-path'))
+        except (KeyError, StopIteration, ET.ParseError):
+            # 没有 container.xml 时使用压缩包中的第一个 OPF
+            opf_path = next((name for name in self._zip.namelist() if name.lower().endswith('.opf')), None)
+            if opf_path is None:
+                raise ValueError(f"不是有效的EPUB文件（缺少OPF）: {self.file_path}")
+        try:
+            package = ET.fromstring(self._read(opf_path))
+        except (KeyError, ET.ParseError) as e:
+            raise ValueError(f"无法读取EPUB的OPF文件 {opf_path}: {e}")
+        base = posixpath.dirname(opf_path)
+
+        manifest: Dict[str, Tuple[str, str, str]] = {}  # id -> (路径, 媒体类型, properties)
+        spine_ids: List[str] = []
+        ncx_id = None
+        for element in package:
+            name = _local_name(element.tag)
+            if name == 'metadata':
+                for item in element:
+                    key = _local_name(item.tag)
+                    if key in ('title', 'creator', 'language', 'publisher', 'date', 'description') \
+                            and item.text and item.text.strip():
+                        self.metadata.setdefault('author' if key == 'creator' else key, item.text.strip())
+            elif name == 'manifest':
+                for item in element:
+                    if item.get('id') and item.get('href'):
+                        href = posixpath.normpath(posixpath.join(base, unquote(item.get('href').split('#')[0])))
+                        manifest[item.get('id')] = (href, (item.get('media-type') or '').lower(),
+                                                    item.get('properties') or '')
+            elif name == 'spine':
+                ncx_id = element.get('toc')
+                spine_ids = [item.get('idref') for item in element if item.get('idref')]
+
+        documents = [manifest[item_id][0] for item_id in spine_ids
+                     if item_id in manifest and self._is_document(*manifest[item_id][:2])]
+        if not documents:
+            # 没有书脊时按清单顺序使用所有 HTML 文档
+            documents = [href for href, media_type, _ in manifest.values() if self._is_document(href, media_type)]
+
+        titles = self._load_toc(manifest, ncx_id)
+        seen: Set[str] = set()
+        for href in documents:
+            if href in seen:
+                continue
+            seen.add(href)
+            try:
+                size = self._zip.getinfo(self._names.get(href.lower(), href)).file_size
+            except KeyError:
+                logger.warning(f"EPUB书脊引用的文档不存在: {href}")
+                continue
+            self.chapters.append(EpubChapter(len(self.chapters), href, titles.get(href, ""), size))
+
+    @staticmethod
+    def _is_document(href: str, media_type: str) -> bool:
+        return media_type in _HTML_MEDIA_TYPES or (not media_type and href.lower().endswith(_HTML_EXTENSIONS))
+
+    def _load_toc(self, manifest: Dict[str, Tuple[str, str, str]], ncx_id: Optional[str]) -> Dict[str, str]:
+        """
+        读取目录，返回 文档路径 -> 标题（同一文档取第一个目录项）
+
+        优先使用 EPUB3 导航文档，其次 NCX；目录损坏时返回空字典（章节标题在解码正文时确定）
+        """
+        titles: Dict[str, str] = {}
+        nav = next((href for href, _, props in manifest.values() if 'nav' in props.split()), None)
+        ncx = manifest.get(ncx_id, (None,))[0] if ncx_id else None
+        if ncx is None:
+            ncx = next((href for href, media_type, _ in manifest.values()
+                        if media_type == 'application/x-dtbncx+xml'), None)
+        try:
+            if nav:
+                markup = _decode_markup(self._read(nav))
+                section = _NAV_TOC_RE.search(markup)
+                base = posixpath.dirname(nav)
+                for href, label in _NAV_LINK_RE.findall(section.group(1) if section else markup):
+                    path = posixpath.normpath(posixpath.join(base, unquote(href.split('#')[0])))
+                    title = _inline_text(label)
+                    if title:
+                        titles.setdefault(path, title)
+            if not titles and ncx:
+                root = ET.fromstring(self._read(ncx))
+                base = posixpath.dirname(ncx)
+                for point in root.iter():
+                    if _local_name(point.tag) != 'navPoint':
+                        continue
+                    label, src = "", None
+                    for child in point:
+                        child_name = _local_name(child.tag)
+                        if child_name == 'navLabel':
+                            label = ' '.join(''.join(child.itertext()).split())
+                        elif child_name == 'content':
+                            src = child.get('src')
+                    if src and label:
+                        path = posixpath.normpath(posixpath.join(base, unquote(src.split('#')[0])))
+                        titles.setdefault(path, label)
+        except (KeyError, ET.ParseError) as e:
+            logger.warning(f"读取EPUB目录失败，章节标题将从正文提取: {e}")
+        return titles
+
+    def extract(self, index: int) -> Tuple[str, str]:
+        """
+        解码章节（不经过缓存，适合顺序读取全书）
+
+        Args:
+            index: 章节序号
+
+        Returns:
+            Tuple[str, str]: (正文, 正文中的第一个标题)
+        """
+        data = self._read(self.chapters[index].href)
+        return html_to_text(_decode_markup(data))
+
+    def _close_source(self) -> None:
+        with self._zip_lock:
+            self._zip.close()
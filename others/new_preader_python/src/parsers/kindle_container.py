@@ -0,0 +1,433 @@
+"""
+Kindle（MOBI/AZW/AZW3）解包缓存
+
+- 每本书只解包一次：解包结果按文件内容的 SHA-1 保存在配置目录下的 kindle_cache 中，
+  再次打开（包括复制、改名后的同一本书）直接使用缓存，不再调用 KindleUnpack
+- 缓存中只保留正文所在的文件：KF8 书籍为 KindleUnpack 生成的 EPUB，旧格式（mobi7）为 book.html；
+  book.html 的章节边界（字节范围和标题）在解包时记录到 manifest.json，
+  来源依次为 NCX 目录的 filepos 锚点、<mbp:pagebreak/> 分页符、h1-h3 标题
+- 打开后返回与 EpubDocument 接口相同的按需解码文档，章节在访问时才转换为纯文本
+- 按总磁盘预算淘汰最久未打开的书籍
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+import time
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.parsers.epub_document import (
+    DEFAULT_CACHE_CHAPTERS, EpubChapter, EpubDocument, LazyChapterDocument,
+    _ENCODING_RE, _HEADING_RE, _TAG_RE, _inline_text, _local_name, html_to_text,
+)
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 缓存格式变化时递增，使旧的解包结果自动失效
+CONTAINER_VERSION = 1
+# 默认磁盘预算（MB）
+DEFAULT_DISK_BUDGET_MB = 512
+# 超过该时间（秒）仍未完成的解包临时目录视为中断残留，清理时删除
+STALE_UNPACK_SECONDS = 3600
+# 计算内容哈希时每次读取的字节数
+_HASH_BLOCK = 1024 * 1024
+# 在章节开头多少字节内查找 h1-h3 作为标题
+_TITLE_SCAN_BYTES = 4096
+_MANIFEST = "manifest.json"
+_UNPACK_PREFIX = ".unpack-"
+
+_PAGEBREAK_RE = re.compile(rb'<mbp:pagebreak\b', re.I)
+_HEADING_START_RE = re.compile(rb'<h[1-3]\b', re.I)
+
+
+def content_digest(file_path: str) -> str:
+    """
+    文件内容的 SHA-1（缓存键）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_opf_metadata(opf_path: str) -> Dict[str, str]:
+    """读取 KindleUnpack 生成的 content.opf 中的元数据"""
+    metadata: Dict[str, str] = {}
+    try:
+        package = ET.parse(opf_path).getroot()
+    except (OSError, ET.ParseError) as e:
+        logger.warning(f"读取Kindle元数据失败: {e}")
+        return metadata
+    for element in package.iter():
+        key = _local_name(element.tag)
+        if key in ('title', 'creator', 'language', 'publisher', 'date', 'description') \
+                and element.text and element.text.strip():
+            metadata.setdefault('author' if key == 'creator' else key, element.text.strip())
+    return metadata
+
+
+def _read_ncx_targets(ncx_path: str) -> List[Tuple[str, str]]:
+    """读取 toc.ncx 中的目录项：[(锚点 id, 标题)]（只保留指向 book.html 内锚点的项）"""
+    targets = []
+    try:
+        root = ET.parse(ncx_path).getroot()
+    except (OSError, ET.ParseError):
+        return targets
+    for point in root.iter():
+        if _local_name(point.tag) != 'navPoint':
+            continue
+        label, src = "", ""
+        for child in point:
+            child_name = _local_name(child.tag)
+            if child_name == 'navLabel':
+                label = ' '.join(''.join(child.itertext()).split())
+            elif child_name == 'content':
+                src = child.get('src') or ""
+        if '#' in src:
+            targets.append((src.split('#', 1)[1], label))
+    return targets
+
+
+def find_html_chapters(data: bytes, encoding: str,
+                       targets: Optional[List[Tuple[str, str]]] = None) -> List[Tuple[int, int, str]]:
+    """
+    在 mobi7 的 book.html 中确定章节边界
+
+    Args:
+        data: book.html 的内容
+        encoding: 文档编码
+        targets: NCX 目录项 [(锚点 id, 标题)]
+
+    Returns:
+        List[Tuple[int, int, str]]: [(起始字节, 结束字节, 标题)]，覆盖整个文档
+    """
+    starts: Dict[int, str] = {}
+    for anchor, label in targets or []:
+        pos = data.find(f'id="{anchor}"'.encode('ascii', errors='ignore'))
+        if pos != -1:
+            starts.setdefault(data.rfind(b'<', 0, pos), label)
+    if not starts:
+        marks = [m.start() for m in _PAGEBREAK_RE.finditer(data)] \
+            or [m.start() for m in _HEADING_START_RE.finditer(data)]
+        starts = {pos: "" for pos in marks}
+    starts.setdefault(0, "")
+
+    chapters = []
+    positions = sorted(starts)
+    for i, start in enumerate(positions):
+        end = positions[i + 1] if i + 1 < len(positions) else len(data)
+        head = data[start:end]
+        # 分页符之间只有标签的片段（如文末的 </body></html>）不作为章节
+        if len(head) < 1024 and not _TAG_RE.sub('', head.decode(encoding, errors='replace')).strip():
+            continue
+        title = starts[start]
+        if not title:
+            match = _HEADING_RE.search(data[start:min(end, start + _TITLE_SCAN_BYTES)].decode(encoding, errors='replace'))
+            title = _inline_text(match.group(2)) if match else ""
+        chapters.append((start, end, title or f"章节 {len(chapters) + 1}"))
+    return chapters
+
+
+class KindleHtmlDocument(LazyChapterDocument):
+    """mobi7 书籍：按解包时记录的字节范围读取 book.html 中的章节"""
+
+    def __init__(self, file_path: str, html_path: str, manifest: Dict[str, Any],
+                 cache_chapters: int = DEFAULT_CACHE_CHAPTERS):
+        """
+        Args:
+            file_path: 原始书籍路径
+            html_path: 缓存中的 book.html
+            manifest: 解包时记录的清单
+            cache_chapters: 缓存的已解码章节数
+        """
+        super().__init__(file_path, cache_chapters)
+        self.metadata = dict(manifest.get("metadata") or {})
+        self._encoding = manifest.get("encoding") or "utf-8"
+        self._ranges = [(start, end) for start, end, _ in manifest["chapters"]]
+        self.chapters = [EpubChapter(index=i, href=os.path.basename(html_path), title=title, size=end - start)
+                         for i, (start, end, title) in enumerate(manifest["chapters"])]
+        self._file = open(html_path, 'rb')
+        self._file_lock = threading.Lock()
+
+    def extract(self, index: int) -> Tuple[str, str]:
+        """解码章节（见 EpubDocument.extract）"""
+        start, end = self._ranges[index]
+        with self._file_lock:
+            if self._closed:
+                raise ValueError("Kindle 文档已关闭")
+            self._file.seek(start)
+            data = self._file.read(end - start)
+        return html_to_text(data.decode(self._encoding, errors='replace'))
+
+    def _close_source(self) -> None:
+        with self._file_lock:
+            self._file.close()
+
+
+class KindleCache:
+    """按内容哈希保存的 Kindle 解包结果"""
+
+    def __init__(self, cache_dir: str, disk_budget_mb: int = DEFAULT_DISK_BUDGET_MB):
+        """
+        Args:
+            cache_dir: 缓存目录
+            disk_budget_mb: 磁盘预算（MB），超出后淘汰最久未打开的书籍
+        """
+        self.cache_dir = cache_dir
+        self.disk_budget = max(1, int(disk_budget_mb)) * 1024 * 1024
+        self._digests: Dict[Tuple[str, int, int], str] = {}  # (路径, 大小, mtime_ns) -> 内容哈希
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _digest(self, file_path: str) -> str:
+        st = os.stat(file_path)
+        key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = content_digest(file_path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    def _load_manifest(self, entry_dir: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(entry_dir, _MANIFEST), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("version") != CONTAINER_VERSION or \
+                not os.path.exists(os.path.join(entry_dir, manifest.get("source", ""))):
+            return None
+        return manifest
+
+    def open(self, file_path: str, cache_chapters: int = DEFAULT_CACHE_CHAPTERS) -> LazyChapterDocument:
+        """
+        打开书籍（缓存中没有时先解包）
+
+        Args:
+            file_path: MOBI/AZW/AZW3 文件路径
+            cache_chapters: 缓存的已解码章节数
+
+        Returns:
+            LazyChapterDocument: 按需解码的文档，使用完毕后需要关闭
+        """
+        entry_dir = os.path.join(self.cache_dir, self._digest(file_path))
+        manifest = self._load_manifest(entry_dir)
+        if manifest is None:
+            manifest = self._unpack(file_path, entry_dir)
+        else:
+            # 记录最近打开时间，淘汰时保留常读的书籍
+            try:
+                os.utime(os.path.join(entry_dir, _MANIFEST))
+            except OSError:
+                pass
+        source = os.path.join(entry_dir, manifest["source"])
+        if manifest["kind"] == "epub":
+            document = EpubDocument(source, cache_chapters)
+            document.file_path = file_path
+            for key, value in (manifest.get("metadata") or {}).items():
+                document.metadata.setdefault(key, value)
+            return document
+        return KindleHtmlDocument(file_path, source, manifest, cache_chapters)
+
+    def _unpack(self, file_path: str, entry_dir: str) -> Dict[str, Any]:
+        """解包到临时目录，只保留正文文件和清单，完成后改名为缓存目录"""
+        started = time.monotonic()
+        work_dir = tempfile.mkdtemp(prefix=_UNPACK_PREFIX, dir=self.cache_dir)
+        try:
+            raw_dir = os.path.join(work_dir, "raw")
+            _unpack_book(file_path, raw_dir)
+            manifest = _build_manifest(raw_dir, work_dir)
+            shutil.rmtree(raw_dir, ignore_errors=True)
+            with open(os.path.join(work_dir, _MANIFEST), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            try:
+                os.rename(work_dir, entry_dir)
+            except OSError:
+                # 其他进程已解包同一本书
+                existing = self._load_manifest(entry_dir)
+                if existing is None:
+                    raise
+                manifest = existing
+        finally:
+            if os.path.exists(work_dir):
+                shutil.rmtree(work_dir, ignore_errors=True)
+        logger.info(f"Kindle书籍已解包到缓存: {file_path}，{len(manifest.get('chapters') or [])} 个章节边界，"
+                    f"耗时 {time.monotonic() - started:.2f}s")
+        self._prune(keep=os.path.basename(entry_dir))
+        return manifest
+
+    def _prune(self, keep: str) -> None:
+        """超出磁盘预算时删除最久未打开的书籍，同时清理中断残留的解包目录"""
+        entries = []
+        total = 0
+        now = time.time()
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.startswith(_UNPACK_PREFIX):
+                    if now - os.path.getmtime(path) > STALE_UNPACK_SECONDS:
+                        shutil.rmtree(path, ignore_errors=True)
+                    continue
+                st = os.stat(os.path.join(path, _MANIFEST))
+                with open(os.path.join(path, _MANIFEST), 'r', encoding='utf-8') as f:
+                    size = int(json.load(f).get("size", 0))
+            except (OSError, ValueError):
+                continue
+            total += size
+            if name != keep:
+                entries.append((st.st_mtime, size, path))
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.disk_budget:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logger.debug(f"Kindle解包缓存超出预算，删除: {path}")
+
+
+def _unpack_book(file_path: str, output_dir: str) -> None:
+    """
+    依次尝试 KindleUnpack（library 目录）、mobi 库自带的 KindleUnpack、calibre 的 ebook-convert 解包
+
+    Raises:
+        ImportError: 没有可用的解包工具
+        ValueError: 所有可用工具都解包失败
+    """
+    errors = []
+    from src.parsers.kindle_unpack_wrapper import kindle_unpack_wrapper
+    if kindle_unpack_wrapper.is_available():
+        try:
+            kindle_unpack_wrapper.unpack_book(file_path, output_dir)
+            return
+        except Exception as e:
+            errors.append(f"KindleUnpack: {e}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    try:
+        from mobi.kindleunpack import unpackBook  # type: ignore
+    except ImportError:
+        unpackBook = None
+    if unpackBook is not None:
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            unpackBook(file_path, output_dir, epubver="A")
+            return
+        except Exception as e:
+            errors.append(f"mobi: {e}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    if shutil.which("ebook-convert"):
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            subprocess.run(["ebook-convert", file_path, os.path.join(output_dir, "book.epub")],
+                           check=True, capture_output=True, text=True)
+            return
+        except (subprocess.SubprocessError, OSError) as e:
+            errors.append(f"ebook-convert: {e}")
+
+    if not errors:
+        raise ImportError("没有可用的Kindle解包工具。请运行: pip install mobi，或安装 calibre")
+    raise ValueError(f"解包Kindle文件失败: {'; '.join(errors)}")
+
+
+def _build_manifest(raw_dir: str, work_dir: str) -> Dict[str, Any]:
+    """在解包结果中找到正文文件，移到 work_dir 并生成清单"""
+    epub_path = None
+    for root, _, files in os.walk(raw_dir):
+        for name in sorted(files):
+            if name.lower().endswith('.epub'):
+                epub_path = os.path.join(root, name)
+                break
+        if epub_path:
+            break
+    if epub_path:
+        # KF8：KindleUnpack 生成的 EPUB 自带书脊和目录，打开时由 EpubDocument 读取章节表
+        source = os.path.join(work_dir, "book.epub")
+        shutil.move(epub_path, source)
+        return {"version": CONTAINER_VERSION, "kind": "epub", "source": "book.epub",
+                "size": os.path.getsize(source), "metadata": {}, "chapters": []}
+
+    html_path = os.path.join(raw_dir, "mobi7", "book.html")
+    if not os.path.exists(html_path):
+        raise ValueError("解包结果中没有可读取的正文（可能是打印版 PDF 或受 DRM 保护）")
+    with open(html_path, 'rb') as f:
+        data = f.read()
+    match = _ENCODING_RE.search(data[:1024])
+    encoding = (match.group(1) or match.group(2)).decode('ascii') if match else "utf-8"
+    try:
+        "".encode(encoding)
+    except LookupError:
+        encoding = "utf-8"
+    mobi7_dir = os.path.dirname(html_path)
+    chapters = find_html_chapters(data, encoding, _read_ncx_targets(os.path.join(mobi7_dir, "toc.ncx")))
+    source = os.path.join(work_dir, "book.html")
+    shutil.move(html_path, source)
+    return {"version": CONTAINER_VERSION, "kind": "html", "source": "book.html", "size": len(data),
+            "encoding": encoding, "metadata": _read_opf_metadata(os.path.join(mobi7_dir, "content.opf")),
+            "chapters": chapters}
+
+
+_cache: Optional[KindleCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_kindle_cache() -> KindleCache:
+    """
+    获取全局 Kindle 解包缓存（位于配置目录下的 kindle_cache）
+
+    Returns:
+        KindleCache: 缓存实例；读取配置失败时使用默认配置目录
+    """
+    global _cache
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None:
+            config_dir = "~/.config/new_preader"
+            advanced: Dict[str, Any] = {}
+            try:
+                from src.config.config_manager import ConfigManager
+                config = ConfigManager.get_instance().get_config()
+                config_dir = config.get("paths", {}).get("config_dir", config_dir)
+                advanced = config.get("advanced", {})
+            except Exception as e:
+                logger.warning(f"读取Kindle解包缓存配置失败，使用默认值: {e}")
+            _cache = KindleCache(
+                os.path.join(os.path.expanduser(config_dir), "kindle_cache"),
+                disk_budget_mb=advanced.get("kindle_cache_disk_mb", DEFAULT_DISK_BUDGET_MB),
+            )
+    return _cache
+
+
+def open_kindle_document(file_path: str, cache_chapters: int = DEFAULT_CACHE_CHAPTERS) -> LazyChapterDocument:
+    """
+    打开 MOBI/AZW/AZW3 书籍（首次打开时解包并写入缓存）
+
+    Args:
+        file_path: 文件路径
+        cache_chapters: 缓存的已解码章节数
+
+    Returns:
+        LazyChapterDocument: 按需解码的文档，使用完毕后需要关闭
+    """
+    return get_kindle_cache().open(file_path, cache_chapters)
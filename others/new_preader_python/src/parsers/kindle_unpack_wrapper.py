@@ -58,22 +58,8 @@ class KindleUnpackWrapper:
         Returns:
             Dict[str, Any]: 解包结果，包含内容和元数据
         """
-        if not self.is_available():
-            raise ImportError("KindleUnpack库不可用")
-        
         try:
-            # 导入KindleUnpack模块
-            from lib.kindleunpack import unpackBook
-            
-            # 创建输出目录
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # 解包AZW文件
-            logger.info(f"开始解包AZW文件: {azw_file_path}")
-            
-            # 调用KindleUnpack的unpackBook函数
-            # 参数: infile, outdir, apnxfile, epubver, use_hd, dodump, dowriteraw, dosplitcombos
-            unpackBook(azw_file_path, output_dir, None, "2", False, False, False, False)
+            self.unpack_book(azw_file_path, output_dir)
             
             # 解析解包后的内容
             result = self._parse_unpacked_content(output_dir)
@@ -85,6 +71,30 @@ class KindleUnpackWrapper:
             logger.error(f"解包AZW文件时出错: {e}")
             raise
     
+    def unpack_book(self, azw_file_path: str, output_dir: str) -> None:
+        """
+        只解包文件（不解析内容），KF8 书籍在 output_dir/mobi8 下生成 EPUB，旧格式生成 mobi7/book.html
+        
+        Args:
+            azw_file_path: AZW/MOBI文件路径
+            output_dir: 输出目录
+        """
+        if not self.is_available():
+            raise ImportError("KindleUnpack库不可用")
+        
+        # 导入KindleUnpack模块
+        from lib.kindleunpack import unpackBook
+        
+        # 创建输出目录
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # 解包AZW文件
+        logger.info(f"开始解包AZW文件: {azw_file_path}")
+        
+        # 调用KindleUnpack的unpackBook函数
+        # 参数: infile, outdir, apnxfile, epubver, use_hd, dodump, dowriteraw, dosplitcombos
+        unpackBook(azw_file_path, output_dir, None, "2", False, False, False, False)
+    
     def _parse_unpacked_content(self, output_dir: str) -> Dict[str, Any]:
         """
         解析解包后的内容
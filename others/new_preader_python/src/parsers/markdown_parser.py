@@ -5,43 +5,86 @@ Markdown文件解析器
 import os
 import re
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from src.parsers.base_parser import BaseParser
+from src.parsers.chapter_segmenter import get_segmenter
+from src.parsers.progress_callback import ParsingContext
+from src.utils.text_source import INDEX_BLOCK_BYTES, MmapTextSource
 
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# YAML 前置元数据
+_YAML_RE = re.compile(r"^---\s*\n(.*?)\n---\s*\n", re.DOTALL)
+# 作为章节边界的最大标题级别（# 与 ##）
+_CHAPTER_LEVEL = 2
+
 class MarkdownParser(BaseParser):
     """Markdown文件解析器"""
     
-    async def parse(self, file_path: str) -> Dict[str, Any]:
+    async def parse(self, file_path: str, parsing_context: Optional[ParsingContext] = None) -> Dict[str, Any]:
         """
         解析Markdown文件
-        
+
         Args:
             file_path: 文件路径
-            
+            parsing_context: 解析上下文，包含进度回调等信息
+
+        Returns:
+            Dict[str, Any]: 解析结果
+        """
+        return await self.parse_incremental(file_path, parsing_context)
+
+    async def parse_incremental(self, file_path: str,
+                                parsing_context: Optional[ParsingContext] = None,
+                                chunk_callback=None) -> Dict[str, Any]:
+        """
+        流式解析Markdown文件：按块切分章节，每切出一章立即回调
+
+        Args:
+            file_path: 文件路径
+            parsing_context: 解析上下文
+            chunk_callback: 章节回调，参数为章节字典（{"title", "level", "start", "content"}）
+
         Returns:
             Dict[str, Any]: 解析结果
         """
         logger.info(f"解析Markdown文件: {file_path}")
-        
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
+            parts: List[str] = []
+            chapters: List[Dict[str, Any]] = []
+            segmenter = get_segmenter(markdown=True)
+            stream = None
+
+            with MmapTextSource(file_path) as source:
+                total_blocks = max((source.byte_size + INDEX_BLOCK_BYTES - 1) // INDEX_BLOCK_BYTES, 1)
+                for i, block in enumerate(source.iter_text()):
+                    if not await self._report_block(parsing_context, i, total_blocks, "Markdown"):
+                        break
+                    parts.append(block)
+                    if stream is None:
+                        # 跳过YAML前置元数据（只出现在文件开头），章节偏移仍相对于完整内容
+                        yaml_match = _YAML_RE.match(block)
+                        skip = yaml_match.end() if yaml_match else 0
+                        stream = segmenter.stream(_CHAPTER_LEVEL, skip)
+                        block = block[skip:]
+                    await self._deliver_chapters(stream.feed(block), chapters, chunk_callback)
+            if stream is None:
+                stream = segmenter.stream(_CHAPTER_LEVEL)
+            await self._deliver_chapters(stream.finish(), chapters, chunk_callback)
+
+            content = ''.join(parts)
+
             # 提取元数据
             metadata = self._extract_markdown_metadata(content)
-            
+
             # 如果没有从内容中提取到标题，使用文件名作为标题
             if "title" not in metadata or not metadata["title"]:
                 metadata["title"] = os.path.splitext(os.path.basename(file_path))[0]
-            
-            # 提取章节
-            chapters = self._extract_markdown_chapters(content)
-            
+
             return {
                 "content": content,
                 "title": metadata.get("title", ""),
@@ -52,7 +95,7 @@ class MarkdownParser(BaseParser):
         except Exception as e:
             logger.error(f"解析Markdown文件时出错: {e}")
             raise
-    
+
     def get_supported_formats(self) -> List[str]:
         """
         获取支持的文件格式
@@ -75,8 +118,7 @@ class MarkdownParser(BaseParser):
         metadata = {}
         
         # 检查是否有YAML前置元数据
-        yaml_pattern = r"^---\s*\n(.*?)\n---\s*\n"
-        yaml_match = re.search(yaml_pattern, content, re.DOTALL)
+        yaml_match = _YAML_RE.search(content)
         
         if yaml_match:
             yaml_content = yaml_match.group(1)
@@ -109,40 +151,10 @@ class MarkdownParser(BaseParser):
         Returns:
             List[Dict[str, Any]]: 章节列表
         """
-        chapters = []
-        
         # 移除YAML前置元数据
-        yaml_pattern = r"^---\s*\n(.*?)\n---\s*\n"
-        content = re.sub(yaml_pattern, "", content, flags=re.DOTALL)
-        
-        # 使用标题作为章节分隔
-        # 查找所有的一级和二级标题
-        headers = re.finditer(r"^(#{1,2})\s+(.+)$", content, re.MULTILINE)
-        
-        last_pos = 0
-        current_chapter = {"title": "未命名章节", "content": ""}
-        
-        for match in headers:
-            header_level = len(match.group(1))
-            header_text = match.group(2).strip()
-            header_pos = match.start()
-            
-            # 如果已经有章节内容，保存当前章节
-            if last_pos > 0:
-                current_chapter["content"] = content[last_pos:header_pos].strip()
-                chapters.append(current_chapter.copy())
-            
-            # 创建新章节
-            current_chapter = {"title": header_text, "content": ""}
-            last_pos = header_pos
-        
-        # 添加最后一个章节
-        if last_pos < len(content):
-            current_chapter["content"] = content[last_pos:].strip()
-            chapters.append(current_chapter)
-        
-        # 如果没有找到章节，将整个内容作为一个章节
-        if not chapters:
-            chapters = [{"title": "全文", "content": content}]
-        
-        return chapters
\ No newline at end of file
+        yaml_match = _YAML_RE.match(content)
+        if yaml_match:
+            content = content[yaml_match.end():]
+
+        # 使用一级和二级标题作为章节分隔
+        return get_segmenter(markdown=True).segment(content, max_level=_CHAPTER_LEVEL)
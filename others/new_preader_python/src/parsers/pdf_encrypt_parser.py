@@ -4,10 +4,12 @@
 
 import os
 import re
+import asyncio
 from typing import Dict, Any, List, Optional
 import PyPDF2
 
 from src.parsers.base_parser import BaseParser
+from src.parsers.pdf_extractor import extract_pdf_pages
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -244,25 +246,11 @@ class PdfEncryptParser(BaseParser):
                 if "title" not in metadata or not metadata["title"]:
                     metadata["title"] = os.path.splitext(os.path.basename(file_path))[0]
                 
-                # 优先使用pdfminer提取内容（质量更好）
-                content = self._extract_pdf_content_pdfminer(file_path, password)
-                if not content or not content.strip():
-                    # 如果pdfminer失败，回退到pypdf
-                    logger.info("pdfminer提取失败，回退到PyPDF2")
-                    # 使用解密后的reader提取内容 - 解密后reader已经可以访问内容
-                    content = self._extract_pdf_content(reader)
-                
-                # 清理提取的文本内容
-                content = self._clean_text_content(content)
-                content = self._clean_pdf_specific_content(content)
-                
-                # 检查内容质量，如果内容质量太差，尝试重新提取
-                if self._needs_pdfminer_fallback(content):
-                    logger.info("内容质量较差，尝试重新提取")
-                    content = self._extract_pdf_content(reader)
-                    content = self._clean_text_content(content)
-                    content = self._clean_pdf_specific_content(content)
-                    
+                # 用样本页选择提取引擎，按页区间提取；带密码的页文本不写入持久化缓存
+                pages, engine = await asyncio.to_thread(extract_pdf_pages, file_path, password)
+                logger.debug(f"加密PDF提取完成: {len(pages)} 页，引擎 {engine}")
+                content = self._join_pages(pages)
+
                 # 最终内容质量检查
                 if not content or not content.strip():
                     logger.warning("无法提取有效文本内容")
@@ -312,67 +300,42 @@ class PdfEncryptParser(BaseParser):
         
         return metadata
     
-    def _extract_pdf_content(self, reader: PyPDF2.PdfReader) -> str:
-        """从PDF文件中提取文本内容"""
-        content = ""
-        
-        for page_num in range(len(reader.pages)):
-            page = reader.pages[page_num]
-            try:
-                text = page.extract_text()
-                if text:
-                    content += text + "\n\n"
-            except Exception as e:
-                logger.warning(f"提取PDF第{page_num+1}页文本时出错: {e}")
-                continue
-        
-        content = self._clean_text_content(content)
-        content = self._clean_pdf_specific_content(content)
-        
-        return content
-    
-    def _needs_pdfminer_fallback(self, content: str) -> bool:
-        """判断内容是否需要回退解析"""
-        if not content or len(content.strip()) < 50:
-            return True
-        text = content.strip()
-        import re as _re
-        valid_chars = _re.findall(r"[A-Za-z0-9\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]", text)
-        ratio = (len(valid_chars) / max(len(text), 1))
-        return ratio < 0.25
+    def _join_pages(self, pages: List[str]) -> str:
+        """
+        逐页清理提取的文本，跳过空白页，页之间空一行
 
-    def _extract_pdf_content_pdfminer(self, file_path: str, password: str) -> str:
-        """使用 pdfminer.six 提取文本"""
-        try:
-            from pdfminer.high_level import extract_text  # type: ignore
-        except Exception:
-            logger.warning("未安装 pdfminer.six，使用PyPDF2")
-            return ""
-        try:
-            text = extract_text(file_path, password=password)
-            return text or ""
-        except Exception as e:
-            logger.warning(f"pdfminer 提取文本失败: {e}")
-            return ""
+        Args:
+            pages: 每页的原始文本
+
+        Returns:
+            str: 文本内容
+        """
+        cleaned = []
+        for page in pages:
+            if not page or not page.strip():
+                continue
+            text = self._clean_pdf_specific_content(self._clean_text_content(page))
+            if text and text != "无法提取有效文本内容":
+                cleaned.append(text)
+        return "\n\n".join(cleaned)
 
     def _extract_pdf_chapters(self, content: str) -> List[Dict[str, Any]]:
         """从PDF内容中提取章节"""
         chapters = []
         
         chapter_patterns = [
-            r"第\s*(\d+)\s*章\s*([^\n]+)",
-            r"Chapter\s*(\d+)\s*[:\.\s]*([^\n]+)",
-            r"CHAPTER\s*(\d+)\s*[:\.\s]*([^\n]+)"
+            r"^[^\S\n]*第[^\S\n]*(\d+)[^\S\n]*章[^\S\n]*([^\n]*)",
+            r"^[^\S\n]*Chapter[^\S\n]*(\d+)[^\S\n:\.]*[:\.]?[^\S\n]*([^\n]*)",
         ]
         
         chapter_positions = []
         
         for pattern in chapter_patterns:
-            for match in re.finditer(pattern, content, re.IGNORECASE):
+            for match in re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE):
                 chapter_num = match.group(1)
                 chapter_title = match.group(2).strip()
                 position = match.start()
-                chapter_positions.append((position, f"第{chapter_num}章 {chapter_title}"))
+                chapter_positions.append((position, f"第{chapter_num}章 {chapter_title}".rstrip()))
         
         chapter_positions.sort()
         
@@ -415,13 +378,14 @@ class PdfEncryptParser(BaseParser):
         
         import html
         content = html.unescape(content)
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
         
-        content = re.sub(r'[\x00-\x1f\x7f-\xa0\u2000-\u200f\u2028-\u202f\u2060-\u206f\ufeff]', '', content)
+        content = re.sub(r'[\x00-\x08\x0b-\x1f\x7f-\xa0\u2000-\u200f\u2028-\u202f\u2060-\u206f\ufeff]', '', content)
         content = re.sub(r'[\u200b-\u200f\u202a-\u202e]', '', content)
         content = content.replace('\ufeff', '')
         content = re.sub(r'[\xad\u00ad\u2011]', '', content)
         
-        content = re.sub(r'\s+', ' ', content)
+        content = re.sub(r'[^\S\n]+', ' ', content)
         content = re.sub(r'\n\s*\n', '\n\n', content)
         
         lines = content.split('\n')
@@ -439,13 +403,14 @@ class PdfEncryptParser(BaseParser):
         """专门清理PDF提取的内容"""
         if not content:
             return ""
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
         
-        content = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', content)
+        content = re.sub(r'[\x00-\x08\x0b-\x1f\x7f-\x9f]', '', content)
         content = re.sub(r'[\u2000-\u200f\u2028-\u202f\u2060-\u206f\ufeff]', '', content)
         content = re.sub(r'[\u200b-\u200f\u202a-\u202e]', '', content)
         content = re.sub(r'[\xad\u00ad]', '', content)
         
-        content = re.sub(r'\s+', ' ', content)
+        content = re.sub(r'[^\S\n]+', ' ', content)
         content = re.sub(r'\n\s*\n', '\n\n', content)
         
         lines = content.split('\n')
@@ -0,0 +1,283 @@
+"""
+PDF 文本提取：样本页探测引擎 + 按页区间并行提取
+
+- 先用一两个样本页试探已安装的引擎（PyMuPDF > pdfminer.six > PyPDF2），整本书只用选中的一个引擎提取，
+  不再在某个引擎对整本书提取失败后换下一个引擎从头再来
+- 页面按固定大小的区间分批；页数较多且有多个 CPU 时在进程池中并行提取
+  （src.utils.process_pool，工作进程以较低优先级运行），否则在当前线程逐批提取
+- 每批完成即回调（可能乱序），调用方可以边提取边显示
+- 每批页文本按文件身份保存在持久化解析缓存中，中断后再次打开只提取缺少的批次；
+  使用密码解密的文件不落盘
+"""
+
+import os
+import re
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+from src.utils.process_pool import run_in_processes
+
+logger = get_logger(__name__)
+
+# 每批提取的页数：越大进程间往返越少，越小首批返回越快
+PAGE_BATCH_SIZE = 16
+# 页数少于该值时不启动进程池（启动工作进程本身需要数百毫秒）
+DEFAULT_PROCESS_MIN_PAGES = 64
+# 引擎优先级（CJK 文本质量由高到低）
+ENGINES = ("pymupdf", "pdfminer", "pypdf2")
+# 样本页有效字符数达到该值且比例达到 MIN_VALID_RATIO 时认为引擎可用
+MIN_VALID_CHARS = 20
+MIN_VALID_RATIO = 0.25
+# 持久化解析缓存中页文本批次的 variant 前缀
+_CACHE_VARIANT_PREFIX = "pages:"
+
+_VALID_CHAR_RE = re.compile(r"[A-Za-z0-9\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]")
+
+BatchCallback = Callable[[int, List[str]], None]  # (起始页, 页文本列表)
+
+
+def available_engines() -> List[str]:
+    """
+    已安装的提取引擎（按优先级）
+
+    Returns:
+        List[str]: 引擎名列表
+    """
+    engines = []
+    for engine, module in zip(ENGINES, ("fitz", "pdfminer.high_level", "PyPDF2")):
+        try:
+            __import__(module)
+            engines.append(engine)
+        except Exception:
+            continue
+    return engines
+
+
+def _open_pymupdf(file_path: str, password: Optional[str]):
+    import fitz  # PyMuPDF
+    doc = fitz.open(file_path)
+    if doc.needs_pass and not doc.authenticate(password or ""):
+        doc.close()
+        raise ValueError("PDF密码不正确")
+    return doc
+
+
+def _open_pypdf2(file_path: str, password: Optional[str]):
+    import PyPDF2
+    reader = PyPDF2.PdfReader(file_path, strict=False)
+    if reader.is_encrypted and reader.decrypt(password or "") == 0:
+        raise ValueError("PDF密码不正确")
+    return reader
+
+
+def count_pages(file_path: str, password: Optional[str] = None) -> int:
+    """
+    PDF 页数
+
+    Args:
+        file_path: 文件路径
+        password: 密码（未加密时忽略）
+
+    Returns:
+        int: 页数
+    """
+    try:
+        doc = _open_pymupdf(file_path, password)
+        try:
+            return doc.page_count
+        finally:
+            doc.close()
+    except ImportError:
+        return len(_open_pypdf2(file_path, password).pages)
+
+
+def extract_page_range(engine: str, file_path: str, password: Optional[str],
+                       start: int, end: int) -> List[str]:
+    """
+    用指定引擎提取 [start, end) 页的文本（模块级函数，可在工作进程中执行）
+
+    单页出错时该页为空字符串，打开文件失败时抛出异常。
+
+    Args:
+        engine: 引擎名（见 ENGINES）
+        file_path: 文件路径
+        password: 密码
+        start: 起始页（从0开始）
+        end: 结束页（不含）
+
+    Returns:
+        List[str]: 每页一项
+    """
+    texts: List[str] = []
+    if engine == "pymupdf":
+        doc = _open_pymupdf(file_path, password)
+        try:
+            for page_num in range(start, end):
+                try:
+                    texts.append(doc.load_page(page_num).get_text("text") or "")
+                except Exception as e:
+                    logger.debug(f"PyMuPDF 提取第{page_num+1}页失败: {e}")
+                    texts.append("")
+        finally:
+            doc.close()
+    elif engine == "pdfminer":
+        from pdfminer.high_level import extract_text  # type: ignore
+        # pdfminer 在每页末尾输出换页符
+        texts = extract_text(file_path, password=password or "", page_numbers=range(start, end)).split("\f")
+        texts = (texts + [""] * (end - start))[:end - start]
+    elif engine == "pypdf2":
+        reader = _open_pypdf2(file_path, password)
+        for page_num in range(start, end):
+            try:
+                texts.append(reader.pages[page_num].extract_text() or "")
+            except Exception as e:
+                logger.debug(f"PyPDF2 提取第{page_num+1}页失败: {e}")
+                texts.append("")
+    else:
+        raise ValueError(f"未知的PDF提取引擎: {engine}")
+    return texts
+
+
+
+def _extract_batch(engine: str, file_path: str, password: Optional[str], page_range: Tuple[int, int]) -> List[str]:
+    """提取一批页面（进程池任务，page_range 为 (起始页, 结束页)）"""
+    return extract_page_range(engine, file_path, password, *page_range)
+
+def _valid_chars(text: str) -> int:
+    return len(_VALID_CHAR_RE.findall(text))
+
+
+def probe_engine(file_path: str, password: Optional[str], page_count: int) -> Optional[str]:
+    """
+    用样本页（中间页和第一页）选择提取引擎
+
+    按优先级返回第一个样本文本合格的引擎；都不合格时返回有效字符最多的引擎
+    （扫描版 PDF 等所有引擎都提取不出文字时返回优先级最高的可用引擎）。
+
+    Args:
+        file_path: 文件路径
+        password: 密码
+        page_count: 页数
+
+    Returns:
+        Optional[str]: 引擎名，没有可用引擎时返回None
+    """
+    samples = sorted({page_count // 2, 0}) if page_count > 0 else []
+    best: Tuple[int, Optional[str]] = (-1, None)
+    for engine in available_engines():
+        try:
+            text = "\n".join(page for start in samples
+                             for page in extract_page_range(engine, file_path, password, start, start + 1))
+        except Exception as e:
+            logger.debug(f"PDF引擎 {engine} 探测失败: {e}")
+            continue
+        valid = _valid_chars(text)
+        if valid >= MIN_VALID_CHARS * len(samples) and valid >= MIN_VALID_RATIO * len(text.strip()):
+            logger.debug(f"PDF提取引擎: {engine}（样本页 {samples}）")
+            return engine
+        if valid > best[0]:
+            best = (valid, engine)
+    if best[1]:
+        logger.info(f"没有引擎能从样本页提取出足够文本，使用 {best[1]}: {file_path}")
+    return best[1]
+
+
+def get_extract_settings() -> Tuple[int, int]:
+    """
+    读取 advanced 配置中的 PDF 提取参数
+
+    Returns:
+        Tuple[int, int]: (工作进程数，0 表示按 CPU 核数, 启用进程池的最少页数)
+    """
+    advanced: Dict[str, Any] = {}
+    try:
+        from src.config.config_manager import ConfigManager
+        advanced = ConfigManager.get_instance().get_config().get("advanced", {})
+    except Exception as e:
+        logger.warning(f"读取PDF提取配置失败，使用默认值: {e}")
+    return (
+        int(advanced.get("pdf_workers", 0) or 0),
+        int(advanced.get("pdf_process_min_pages", DEFAULT_PROCESS_MIN_PAGES)),
+    )
+
+
+def _page_cache():
+    from src.utils.parse_result_store import get_parse_result_store
+    return get_parse_result_store()
+
+
+def extract_pdf_pages(file_path: str, password: Optional[str] = None,
+                      on_batch: Optional[BatchCallback] = None,
+                      is_cancelled: Optional[Callable[[], bool]] = None,
+                      engine: Optional[str] = None,
+                      workers: Optional[int] = None,
+                      min_pages: Optional[int] = None,
+                      use_cache: bool = True) -> Tuple[List[str], Optional[str]]:
+    """
+    提取 PDF 全部页面的文本
+
+    Args:
+        file_path: 文件路径
+        password: 密码（提供密码时页文本不写入持久化缓存）
+        on_batch: 每批完成时调用(起始页, 页文本列表)，缓存命中的批次也会回调；顺序不保证
+        is_cancelled: 返回是否已请求取消，取消后未完成的页为空字符串
+        engine: 指定引擎，默认用样本页探测
+        workers: 工作进程数，默认读取配置（0 表示按 CPU 核数）
+        min_pages: 启用进程池的最少页数，默认读取配置
+        use_cache: 是否读写持久化缓存中的页文本
+
+    Returns:
+        Tuple[List[str], Optional[str]]: (每页文本, 使用的引擎；全部命中缓存时为缓存记录的引擎)
+    """
+    page_count = count_pages(file_path, password)
+    pages: List[str] = [""] * page_count
+    store = _page_cache() if use_cache and not password else None
+    config_workers, config_min_pages = get_extract_settings()
+    workers = workers or config_workers or os.cpu_count() or 1
+    min_pages = config_min_pages if min_pages is None else min_pages
+
+    def cancelled() -> bool:
+        return bool(is_cancelled and is_cancelled())
+
+    def finish_batch(start: int, texts: List[str], batch_engine: Optional[str], cached: bool = False) -> None:
+        pages[start:start + len(texts)] = texts
+        if store is not None and not cached:
+            store.put(file_path, ".pdf", {"engine": batch_engine, "pages": texts},
+                      f"{_CACHE_VARIANT_PREFIX}{start}")
+        if on_batch:
+            on_batch(start, texts)
+
+    pending: Dict[int, Tuple[int, int]] = {}  # 起始页 -> 页区间
+    cached_engine = None
+    for start in range(0, page_count, PAGE_BATCH_SIZE):
+        size = min(PAGE_BATCH_SIZE, page_count - start)
+        cached = store.get(file_path, ".pdf", f"{_CACHE_VARIANT_PREFIX}{start}") if store else None
+        if isinstance(cached, dict) and isinstance(cached.get("pages"), list) and len(cached["pages"]) == size:
+            cached_engine = cached.get("engine")
+            finish_batch(start, cached["pages"], cached_engine, cached=True)
+        else:
+            pending[start] = (start, start + size)
+    if not pending:
+        return pages, cached_engine
+
+    engine = engine or probe_engine(file_path, password, page_count)
+    if engine is None:
+        raise ValueError("没有可用的PDF文本提取引擎")
+
+    workers = min(workers, len(pending))
+    if workers > 1 and page_count >= min_pages:
+        try:
+            run_in_processes(partial(_extract_batch, engine, file_path, password), pending, workers,
+                             lambda start, texts: finish_batch(start, texts, engine), cancelled)
+        except Exception as e:
+            if not cancelled():
+                logger.warning(f"多进程提取PDF失败，剩余 {len(pending)} 批改为在当前线程提取: {e}")
+
+    for start in list(pending):
+        if cancelled():
+            logger.info(f"PDF提取已取消: {file_path}")
+            break
+        finish_batch(start, _extract_batch(engine, file_path, password, pending.pop(start)), engine)
+    return pages, engine
+
@@ -3,12 +3,15 @@ PDF文件解析器
 """
 
 import os
+import asyncio
 
 import re
 from typing import Dict, Any, List, Optional
 import PyPDF2
 
 from src.parsers.base_parser import BaseParser
+from src.parsers.pdf_extractor import extract_pdf_pages
+from src.parsers.progress_callback import ParsingContext
 
 from src.utils.logger import get_logger
 
@@ -137,27 +140,13 @@ class PdfParser(BaseParser):
                 if "title" not in metadata or not metadata["title"]:
                     metadata["title"] = os.path.splitext(os.path.basename(file_path))[0]
                 
-                # 优先使用 PyMuPDF（fitz）提取内容，对 CJK 支持更好
-                content = self._extract_pdf_content_pymupdf(file_path, password_used)
-                if not content or not content.strip():
-                    # 次优：使用 pdfminer.six
-                    content = self._extract_pdf_content_pdfminer(file_path, password_used)
-                    if not content or not content.strip():
-                        # 回退到 PyPDF2
-                        logger.info("PyMuPDF/pdfminer 提取失败，回退到 PyPDF2")
-                        content = self._extract_pdf_content(reader)
-                
-                # 清理提取的文本内容 - 更彻底的清理
-                content = self._clean_text_content(content)
-                content = self._clean_pdf_specific_content(content)
-                
-                # 检查内容质量，如果内容质量太差，尝试重新提取
-                if self._needs_pdfminer_fallback(content):
-                    logger.info("内容质量较差，尝试重新提取")
-                    content = self._extract_pdf_content(reader)
-                    content = self._clean_text_content(content)
-                    content = self._clean_pdf_specific_content(content)
-                    
+                # 用样本页选择提取引擎，按页区间提取（页数多时在进程池中并行），页文本按文件身份缓存
+                pages, engine = await asyncio.to_thread(
+                    extract_pdf_pages, file_path, password_used,
+                    is_cancelled=lambda: parsing_context.cancel_requested or parsing_context.check_timeout())
+                logger.debug(f"PDF提取完成: {len(pages)} 页，引擎 {engine}")
+                content = self._join_pages(pages)
+
                 # 最终内容质量检查
                 if not content or not content.strip():
                     logger.warning("无法提取有效文本内容")
@@ -367,104 +356,24 @@ class PdfParser(BaseParser):
         
         return metadata
     
-    def _extract_pdf_content(self, reader: PyPDF2.PdfReader) -> str:
+    def _join_pages(self, pages: List[str]) -> str:
         """
-        从PDF文件中提取文本内容
-        
+        逐页清理提取的文本，跳过空白页，页之间空一行
+
         Args:
-            reader: PDF读取器对象
-            
+            pages: 每页的原始文本
+
         Returns:
             str: 文本内容
         """
-        content = ""
-        
-        # 首先尝试使用pypdf提取
-        for page_num in range(len(reader.pages)):
-            page = reader.pages[page_num]
-            try:
-                text = page.extract_text()
-                if text:
-                    content += text + "\n\n"
-            except Exception as e:
-                logger.warning(f"提取PDF第{page_num+1}页文本时出错: {e}")
+        cleaned = []
+        for page in pages:
+            if not page or not page.strip():
                 continue
-        
-        # 清理提取的文本内容
-        content = self._clean_text_content(content)
-        
-        # 对PDF内容进行额外清理
-        content = self._clean_pdf_specific_content(content)
-        
-        return content
-
-    def _extract_pdf_content_pymupdf(self, file_path: str, password: Optional[str]) -> str:
-        """
-        使用 PyMuPDF 提取文本（优先用于未加密/CJK）
-        """
-        try:
-            import fitz  # PyMuPDF
-        except Exception:
-            logger.debug("未安装 PyMuPDF，跳过该提取方式")
-            return ""
-        try:
-            # 打开文档（自动识别是否需要密码）
-            if password:
-                doc = fitz.open(file_path, filetype="pdf", password=password)
-            else:
-                doc = fitz.open(file_path)
-            texts: List[str] = []
-            for page in doc:
-                try:
-                    # "text" 保留换行；若密集，改为 "text-with-spaces"
-                    txt = page.get_text("text")
-                    if not txt or len(txt.strip()) == 0:
-                        txt = page.get_text("text-with-spaces")
-                    if txt:
-                        texts.append(txt)
-                except Exception as e:
-                    logger.debug(f"PyMuPDF 提取第{page.number+1}页失败: {e}")
-                    continue
-            try:
-                doc.close()
-            except Exception:
-                pass
-            content = "\n\n".join(texts)
-            # 轻度清理，避免过度压缩中文空格；后续仍会经过 _clean_text_content/_clean_pdf_specific_content
-            return content.strip()
-        except Exception as e:
-            logger.debug(f"PyMuPDF 提取失败: {e}")
-            return ""
-    
-    def _needs_pdfminer_fallback(self, content: str) -> bool:
-        """
-        简单判断内容是否需要回退解析：
-        - 内容过短
-        - 有效字符比例过低（字母、数字、常见中日韩字符比例）
-        """
-        if not content or len(content.strip()) < 50:
-            return True
-        text = content.strip()
-        import re as _re
-        valid_chars = _re.findall(r"[A-Za-z0-9\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]", text)
-        ratio = (len(valid_chars) / max(len(text), 1))
-        return ratio < 0.25
-
-    def _extract_pdf_content_pdfminer(self, file_path: str, password: Optional[str]) -> str:
-        """
-        使用 pdfminer.six 提取文本（优先使用）
-        """
-        try:
-            from pdfminer.high_level import extract_text  # type: ignore
-        except Exception:
-            logger.warning("未安装 pdfminer.six，使用PyPDF2")
-            return ""
-        try:
-            text = extract_text(file_path, password=password or "")
-            return text or ""
-        except Exception as e:
-            logger.warning(f"pdfminer 提取文本失败: {e}")
-            return ""
+            text = self._clean_pdf_specific_content(self._clean_text_content(page))
+            if text and text != "无法提取有效文本内容":
+                cleaned.append(text)
+        return "\n\n".join(cleaned)
 
     def _extract_pdf_chapters(self, content: str) -> List[Dict[str, Any]]:
         """
@@ -483,20 +392,19 @@ class PdfParser(BaseParser):
         # 使用正则表达式查找可能的章节标题
         # 匹配"第X章"、"Chapter X"等常见章节标记
         chapter_patterns = [
-            r"第\s*(\d+)\s*章\s*([^\n]+)",  # 中文章节标题
-            r"Chapter\s*(\d+)\s*[:\.\s]*([^\n]+)",  # 英文章节标题
-            r"CHAPTER\s*(\d+)\s*[:\.\s]*([^\n]+)"   # 大写英文章节标题
+            r"^[^\S\n]*第[^\S\n]*(\d+)[^\S\n]*章[^\S\n]*([^\n]*)",  # 中文章节标题
+            r"^[^\S\n]*Chapter[^\S\n]*(\d+)[^\S\n:\.]*[:\.]?[^\S\n]*([^\n]*)",  # 英文章节标题（不区分大小写）
         ]
         
         # 存储所有匹配到的章节位置
         chapter_positions = []
         
         for pattern in chapter_patterns:
-            for match in re.finditer(pattern, content, re.IGNORECASE):
+            for match in re.finditer(pattern, content, re.IGNORECASE | re.MULTILINE):
                 chapter_num = match.group(1)
                 chapter_title = match.group(2).strip()
                 position = match.start()
-                chapter_positions.append((position, f"第{chapter_num}章 {chapter_title}"))
+                chapter_positions.append((position, f"第{chapter_num}章 {chapter_title}".rstrip()))
         
         # 按位置排序章节
         chapter_positions.sort()
@@ -556,10 +464,11 @@ class PdfParser(BaseParser):
         # 移除HTML实体
         import html
         content = html.unescape(content)
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
         
         # 移除控制字符和非打印字符（保留空格、换行、制表符等）
         # 更彻底地清理控制字符，包括一些特殊的Unicode控制字符
-        content = re.sub(r'[\x00-\x1f\x7f-\xa0\u2000-\u200f\u2028-\u202f\u2060-\u206f\ufeff]', '', content)
+        content = re.sub(r'[\x00-\x08\x0b-\x1f\x7f-\xa0\u2000-\u200f\u2028-\u202f\u2060-\u206f\ufeff]', '', content)
         
         # 移除零宽空格和其他不可见字符
         content = re.sub(r'[\u200b-\u200f\u202a-\u202e]', '', content)
@@ -571,7 +480,7 @@ class PdfParser(BaseParser):
         content = re.sub(r'[\xad\u00ad\u2011]', '', content)  # 软连字符和不可断连字符
         
         # 移除多余的空白字符
-        content = re.sub(r'\s+', ' ', content)
+        content = re.sub(r'[^\S\n]+', ' ', content)
         
         # 规范化换行
         content = re.sub(r'\n\s*\n', '\n\n', content)
@@ -602,10 +511,11 @@ class PdfParser(BaseParser):
         """
         if not content:
             return ""
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
         
         # 移除PDF特有的格式字符和不可见字符
         # 移除所有ASCII控制字符（0-31，127-159）
-        content = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', content)
+        content = re.sub(r'[\x00-\x08\x0b-\x1f\x7f-\x9f]', '', content)
         
         # 移除Unicode控制字符和格式字符
         content = re.sub(r'[\u2000-\u200f\u2028-\u202f\u2060-\u206f\ufeff]', '', content)
@@ -617,7 +527,7 @@ class PdfParser(BaseParser):
         content = re.sub(r'[\xad\u00ad]', '', content)  # 软连字符
         
         # 规范化空白字符
-        content = re.sub(r'\s+', ' ', content)
+        content = re.sub(r'[^\S\n]+', ' ', content)
         
         # 规范化换行
         content = re.sub(r'\n\s*\n', '\n\n', content)
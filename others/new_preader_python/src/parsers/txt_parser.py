@@ -3,60 +3,177 @@ TXT文件解析器
 """
 
 import os
+import re
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from src.parsers.base_parser import BaseParser
+from src.parsers.chapter_segmenter import get_segmenter
+from src.parsers.progress_callback import ParsingContext
+from src.utils.text_source import INDEX_BLOCK_BYTES, MmapTextSource
 
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 预处理规则（按顺序执行）；这些模式只匹配格式标记、空白和控制字符
+_CLEAN_RULES = [
+    # 1. 清理连续的 ** 标记（可能是格式标记）
+    (re.compile(r'\*\*+'), ' '),
+    # 2. 清理其他常见乱码模式：连续的特殊字符组合
+    (re.compile(r'[\*#@$%&_]{2,}'), ' '),
+    # 3. 清理过长的空格序列（不跨行，连续空行不能把下一行的章节标题并入上一段）
+    (re.compile(r'[^\S\n]{5,}'), '    '),
+    # 4. 清理无效的控制字符（保留空格、换行等）
+    (re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]'), ''),
+]
+# 整个文本没有换行符时的保守分段：只在句号后面跟非数字、非标点的字符时添加换行
+_SENTENCE_END_RE = re.compile(r'([。！？])([^\d\s。！？，；：""])')
+_MARK_CHARS = frozenset('*#@$%&_\x7f')
+
+
+def _is_mark_char(ch: str) -> bool:
+    """是否为预处理规则可能匹配的字符"""
+    return ch.isspace() or ch in _MARK_CHARS or ch < ' '
+
+
+class _TextCleaner:
+    """
+    按块执行 TxtParser 的预处理，结果与对全文一次性预处理相同
+
+    每块在最后一个换行符所在的“标记/空白/控制字符”连续段之前切开，剩余部分留给下一块，
+    保证任何一条规则的匹配都不会跨越切点；行首尾空白在拼出完整行之后再清理。
+    """
+
+    def __init__(self):
+        self._raw_carry: List[str] = []  # 尚未清理的原始文本
+        self._line_carry = ""  # 已清理、但还不完整的最后一行
+        self._seen_newline = False  # 清理后的文本中是否出现过换行符
+        self._started = False  # 是否已经输出过非空内容
+
+    def feed(self, block: str) -> str:
+        """
+        输入一块原始文本
+
+        Args:
+            block: 原始文本块
+
+        Returns:
+            str: 本块可以确定的清理结果（可能为空）
+        """
+        self._raw_carry.append(block)
+        if '\n' not in block:
+            return ""
+        buffer = ''.join(self._raw_carry)
+        cut = buffer.rfind('\n')
+        while cut > 0 and _is_mark_char(buffer[cut - 1]):
+            cut -= 1
+        self._raw_carry = [buffer[cut:]]
+        return self._emit(self._clean(buffer[:cut]), final=False)
+
+    def finish(self) -> str:
+        """
+        输入结束
+
+        Returns:
+            str: 剩余的清理结果
+        """
+        text = self._clean(''.join(self._raw_carry))
+        self._raw_carry = []
+        return self._emit(text, final=True)
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        for pattern, replacement in _CLEAN_RULES:
+            text = pattern.sub(replacement, text)
+        return text
+
+    def _emit(self, text: str, final: bool) -> str:
+        text = self._line_carry + text
+        if final:
+            self._line_carry = ""
+            # 整个文本没有换行符时，尝试按句子分割
+            if not self._seen_newline and '\n' not in text and len(text) > 500:
+                text = _SENTENCE_END_RE.sub(r'\1\n\2', text)
+            lines = text.split('\n')
+        else:
+            cut = text.rfind('\n')
+            if cut < 0:
+                self._line_carry = text
+                return ""
+            self._seen_newline = True
+            self._line_carry = text[cut + 1:]
+            lines = text[:cut + 1].split('\n')
+        # 清理行首和行尾的多余空格
+        output = '\n'.join(line.strip() for line in lines)
+        if not self._started:
+            output = output.lstrip()
+            self._started = bool(output)
+        return output
+
+
 class TxtParser(BaseParser):
     """TXT文件解析器"""
     
-    async def parse(self, file_path: str) -> Dict[str, Any]:
+    async def parse(self, file_path: str, parsing_context: Optional[ParsingContext] = None) -> Dict[str, Any]:
         """
         解析TXT文件
-        
+
         Args:
             file_path: 文件路径
-            
+            parsing_context: 解析上下文，包含进度回调等信息
+
+        Returns:
+            Dict[str, Any]: 解析结果
+        """
+        return await self.parse_incremental(file_path, parsing_context)
+
+    async def parse_incremental(self, file_path: str,
+                                parsing_context: Optional[ParsingContext] = None,
+                                chunk_callback=None) -> Dict[str, Any]:
+        """
+        流式解析TXT文件：按块解码、预处理并切分章节，每切出一章立即回调
+
+        Args:
+            file_path: 文件路径
+            parsing_context: 解析上下文
+            chunk_callback: 章节回调，参数为章节字典（{"title", "level", "start", "content"}）
+
         Returns:
             Dict[str, Any]: 解析结果
         """
         logger.info(f"解析TXT文件: {file_path}")
-        
+
         try:
-            # 尝试不同的编码
-            encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1']
-            content = None
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if content is None:
-                logger.error(f"无法解码文件: {file_path}")
-                raise ValueError(f"无法解码文件: {file_path}")
-            
-            # 预处理内容：清理常见格式标记和乱码
-            content = self._preprocess_content(content)
-            
-            # 提取元数据
-            metadata = self.extract_metadata(content)
-            
+            with MmapTextSource(file_path) as source:
+                total_blocks = max((source.byte_size + INDEX_BLOCK_BYTES - 1) // INDEX_BLOCK_BYTES, 1)
+                cleaner = _TextCleaner()
+                stream = get_segmenter().stream()
+                parts: List[str] = []
+                chapters: List[Dict[str, Any]] = []
+
+                for i, block in enumerate(source.iter_text()):
+                    if not await self._report_block(parsing_context, i, total_blocks, "TXT"):
+                        break
+                    text = cleaner.feed(block)
+                    if text:
+                        parts.append(text)
+                        await self._deliver_chapters(stream.feed(text), chapters, chunk_callback)
+                text = cleaner.finish()
+                if text:
+                    parts.append(text)
+                    await self._deliver_chapters(stream.feed(text), chapters, chunk_callback)
+                await self._deliver_chapters(stream.finish(), chapters, chunk_callback)
+
+            content = ''.join(parts).rstrip()
+
+            # 提取元数据（只需要开头几行）
+            metadata = self.extract_metadata('\n'.join(content.split('\n', 10)[:10]))
+
             # 如果没有从内容中提取到标题，使用文件名作为标题
             if "title" not in metadata or not metadata["title"]:
                 metadata["title"] = os.path.splitext(os.path.basename(file_path))[0]
-            
-            # 提取章节
-            chapters = self.extract_chapters(content)
-            
+
             return {
                 "content": content,
                 "title": metadata.get("title", ""),
@@ -67,16 +184,16 @@ class TxtParser(BaseParser):
         except Exception as e:
             logger.error(f"解析TXT文件时出错: {e}")
             raise
-    
+
     def get_supported_formats(self) -> List[str]:
         """
         获取支持的文件格式
-        
+
         Returns:
             List[str]: 支持的文件格式列表
         """
         return [".txt"]
-    
+
     def _preprocess_content(self, content: str) -> str:
         """
         预处理文本内容，清理常见格式标记和乱码
@@ -89,34 +206,5 @@ class TxtParser(BaseParser):
         """
         if not content:
             return content
-        
-        import re
-        
-        # 常见格式标记清理规则
-        # 1. 清理连续的 ** 标记（可能是格式标记）
-        content = re.sub(r'\*\*+', ' ', content)
-        
-        # 2. 清理其他常见乱码模式
-        # 连续的特殊字符组合
-        content = re.sub(r'[\*#@$%&_]{2,}', ' ', content)
-        
-        # 3. 清理过长的空格序列
-        content = re.sub(r'\s{5,}', '    ', content)
-        
-        # 4. 清理无效的控制字符（保留空格、换行等）
-        content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', content)
-        
-        # 5. 确保文本有基本的段落分隔
-        # 如果整个文本没有换行符，尝试按句子分割（更加保守的方式）
-        if '\n' not in content and len(content) > 500:
-            # 非常保守的段落分割：只处理明显的句子结束
-            # 避免在数字、缩写等位置错误分割
-            # 只在句号后面跟非数字、非标点的字符时添加换行
-            content = re.sub(r'([。！？])([^\d\s。！？，；：""])', r'\1\n\2', content)
-        
-        # 6. 清理行首和行尾的多余空格
-        lines = content.split('\n')
-        cleaned_lines = [line.strip() for line in lines]
-        content = '\n'.join(cleaned_lines)
-        
-        return content.strip()
\ No newline at end of file
+        cleaner = _TextCleaner()
+        return (cleaner.feed(content) + cleaner.finish()).rstrip()
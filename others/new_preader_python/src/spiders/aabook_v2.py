@@ -4,7 +4,6 @@ aabook.xyz 小说网站解析器 - 基于配置驱动版本
 """
 
 import re
-import time
 from typing import Dict, Any, List, Optional
 from .base_parser_v2 import BaseParser
 from src.utils.logger import get_logger
@@ -270,6 +269,10 @@ class AabookParser(BaseParser):
         """
         self.chapter_count = 0
         
+        # 章节列表已知，按主机限制并发预取，再按顺序处理
+        pages = self._iter_fetched_pages(chapter_links,
+                                         fetch=lambda c: self._get_chapter_content(c['url'], c['chapter_id']))
+        
         for i, chapter_info in enumerate(chapter_links, 1):
             chapter_url = chapter_info['url']
             chapter_title = chapter_info['title']
@@ -278,7 +281,7 @@ class AabookParser(BaseParser):
             logger.info(f"正在爬取第 {i}/{len(chapter_links)} 章: {chapter_title}")
 
             # 获取章节内容
-            chapter_content = self._get_chapter_content(chapter_url, chapter_id)
+            _, chapter_content = next(pages)
 
             if chapter_content:
                 self.chapter_count += 1
@@ -291,9 +294,6 @@ class AabookParser(BaseParser):
                 logger.info(f"✓ 第 {i}/{len(chapter_links)} 章抓取成功")
             else:
                 logger.warning(f"✗ 第 {i}/{len(chapter_links)} 章内容抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
     
     def _get_chapter_content(self, chapter_url: str, chapter_id: str) -> Optional[str]:
         """
@@ -658,9 +658,6 @@ class AabookParser(BaseParser):
                 logger.info(f"✓ 第 {actual_index} 章抓取成功")
             else:
                 logger.warning(f"✗ 第 {i + 1} 章内容抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
         
         logger.info(f"增量爬取完成，新增 {len(novel_content['chapters'])} 章")
         return novel_content
\ No newline at end of file
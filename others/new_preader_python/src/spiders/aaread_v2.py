@@ -335,10 +335,6 @@ class AareadParser(BaseParser):
                     "order": chapter["order"],
                     "content": ""
                 })
-            
-            # 章节间延迟
-            import time
-            time.sleep(1)
         
         return novel_info
     
@@ -484,9 +480,6 @@ if __name__ == "__main__":
                 logger.info(f"✓ 第 {i+1} 章抓取成功")
             else:
                 logger.warning(f"✗ 第 {i+1} 章内容抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
         
         return novel_content
 
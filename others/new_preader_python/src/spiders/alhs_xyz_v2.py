@@ -482,8 +482,5 @@ class AlhsXyzV2Parser(BaseParser):
                     logger.warning(f"✗ 第 {i+1} 章内容提取失败")
             else:
                 logger.warning(f"✗ 第 {i+1} 章抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
         
         return novel_content
\ No newline at end of file
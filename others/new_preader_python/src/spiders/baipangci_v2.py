@@ -204,8 +204,6 @@ class BaipangciParser(BaseParser):
             novel_content: 小说内容字典
         """
         import re
-        import time
-        
         current_url = start_url
         chapter_count = 0
         
@@ -244,9 +242,6 @@ class BaipangciParser(BaseParser):
             # 获取下一章URL
             next_url = self._get_next_page_url(page_content, current_url)
             current_url = next_url
-            
-            # 章节间延迟
-            time.sleep(1)
     
     def _extract_chapter_links(self, content: str) -> List[Dict[str, str]]:
         """
@@ -350,8 +345,6 @@ class BaipangciParser(BaseParser):
             chapter_links: 章节链接列表
             novel_content: 小说内容字典
         """
-        import time
-        
         # 为了保持章节顺序的连续性，我们使用索引作为章节编号
         # 但实际排序是基于URL中的章节ID
         for i, chapter in enumerate(chapter_links, 1):
@@ -384,9 +377,6 @@ class BaipangciParser(BaseParser):
                     logger.warning(f"✗ 第 {i}/{len(chapter_links)} 章内容提取失败")
             else:
                 logger.warning(f"✗ 第 {i}/{len(chapter_links)} 章页面抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
     
     def _extract_chapter_title(self, content: str) -> str:
         """
@@ -557,50 +547,3 @@ class BaipangciParser(BaseParser):
         self._get_all_chapters_incremental(chapter_links[start_pos:], novel_content, start_index)
         
         return novel_content
-    
-    def _get_all_chapters_incremental(self, chapter_links, novel_content, start_index=0):
-        """
-        增量爬取所有章节内容
-        
-        Args:
-            chapter_links: 章节链接列表
-            novel_content: 小说内容字典
-            start_index: 起始章节索引
-        """
-        import time
-        
-        self.chapter_count = start_index
-        
-        for i, chapter_info in enumerate(chapter_links, 1):
-            chapter_url = chapter_info.get('url', '')
-            chapter_title = chapter_info.get('title', f'第{start_index + i}章')
-            
-            logger.info(f"正在爬取第 {start_index + i} 章: {chapter_title}")
-            
-            # 获取章节内容
-            full_url = f"{self.base_url}{chapter_url}" if chapter_url and not chapter_url.startswith('http') else chapter_url
-            chapter_content = self._get_url_content(full_url)
-            
-            if chapter_content:
-                # 使用配置的正则提取内容
-                extracted_content = self._extract_with_regex(chapter_content, self.content_reg)
-                
-                if extracted_content:
-                    # 执行爬取后处理函数
-                    processed_content = self._execute_after_crawler_funcs(extracted_content)
-                    
-                    self.chapter_count += 1
-                    novel_content['chapters'].append({
-                        'chapter_number': self.chapter_count,
-                        'title': chapter_title,
-                        'content': processed_content,
-                        'url': full_url
-                    })
-                    logger.info(f"✓ 第 {start_index + i} 章抓取成功")
-                else:
-                    logger.warning(f"✗ 第 {start_index + i} 章内容提取失败")
-            else:
-                logger.warning(f"✗ 第 {start_index + i} 章抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
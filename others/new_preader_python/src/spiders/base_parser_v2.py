@@ -8,10 +8,12 @@ import time
 import requests
 import os
 import random
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple
 from urllib.parse import urljoin
 from src.utils.logger import get_logger
+from src.utils.fetch_scheduler import get_fetch_scheduler, mount_fetch_scheduler
 from src.utils.traditional_simplified import convert_traditional_to_simplified
+from src.utils.chapter_writer import ChapterWriter
 
 logger = get_logger(__name__)
 
@@ -56,8 +58,12 @@ class BaseParser:
             novel_site_name: 从数据库获取的网站名称，用于作者信息
         """
         self.session = requests.Session()
+        # 所有会话请求经过全局调度器，按主机限制并发与速率（多本书/多章节并发时共享）
+        mount_fetch_scheduler(self.session)
         self.proxy_config = proxy_config or {'enabled': False, 'proxy_url': ''}
         self.chapter_count = 0
+        # 章节流式写入器：设置后解析出的章节立即写盘，novel_content 中只保留元数据
+        self._chapter_writer = None
         # 保存从数据库获取的网站名称，用于作者信息
         self.novel_site_name = novel_site_name or self.name
         
@@ -1283,13 +1289,43 @@ class BaseParser:
         # 子类必须实现多章节解析逻辑
         raise NotImplementedError("子类必须实现多章节解析逻辑")
     
-    def save_to_file(self, novel_content: Dict[str, Any], storage_folder: str) -> str:
+    def stream_chapters_to(self, writer: Optional[ChapterWriter]) -> None:
+        """
+        设置章节流式写入器（None 表示关闭），之后通过 _append_chapter 添加的章节会立即写入磁盘
+        
+        Args:
+            writer: 章节写入器
+        """
+        self._chapter_writer = writer
+    
+    def _append_chapter(self, novel_content: Dict[str, Any], chapter: Dict[str, Any]) -> None:
+        """
+        向小说内容添加一章；启用流式写入时先写盘，列表中只保留不含正文的元数据
+        （写入器按章节清单判定为重复的章节不会写入，也不会加入列表）
+        
+        Args:
+            novel_content: 小说内容字典
+            chapter: 章节字典
+        """
+        writer = self._chapter_writer
+        if writer is None:
+            novel_content['chapters'].append(chapter)
+            return
+        writer.set_info(title=novel_content.get('title'), author=novel_content.get('author'))
+        meta = writer.write_chapter(chapter)
+        if meta is not None:
+            novel_content['chapters'].append(meta)
+    
+    def save_to_file(self, novel_content: Dict[str, Any], storage_folder: str,
+                     writer: Optional[ChapterWriter] = None) -> str:
         """
         将小说内容保存到文件
         
         Args:
             novel_content: 小说内容字典
             storage_folder: 存储文件夹
+            writer: 爬取时已流式写入章节的写入器；提供时正文已在磁盘上，只需加上标题并移动到最终路径，
+                novel_content 中尚未写入（仍带正文）的章节会先补写
             
         Returns:
             文件路径
@@ -1328,25 +1364,25 @@ class BaseParser:
             self._last_save_collided = False
         
 
+        # 1. 多章节小说（包含chapters字段）：逐章写入临时文件（或使用爬取时的流式写入器），
+        #    完成后加上标题原子地移动到最终路径，不在内存中拼接全文
+        chapters = novel_content.get('chapters', [])
+        if writer is not None or chapters:
+            if writer is None:
+                writer = ChapterWriter(file_path + ".part", sync_each_chapter=False)
+            writer.write_chapters([chapter for chapter in chapters if 'content' in chapter])
+            writer.commit(file_path, header=f"# {title}\n\n")
+            logger.info(f"小说已保存到: {file_path}")
+            return file_path
+        
         # 写入文件
         with open(file_path, 'w', encoding='utf-8') as f:
             # 写入标题
             f.write(f"# {title}\n\n")
             
             # 检查小说类型并写入相应内容
-            # 1. 多章节小说（包含chapters字段）
-            chapters = novel_content.get('chapters', [])
-            if chapters:
-                for chapter in chapters:
-                    chapter_title = chapter.get('title', '未知章节')
-                    chapter_content = chapter.get('content', '')
-                    
-                    f.write(f"## {chapter_title}\n\n")
-                    f.write(chapter_content)
-                    f.write("\n\n")
-            
             # 2. 短篇小说（包含total_content字段）
-            elif 'total_content' in novel_content and novel_content['total_content']:
+            if 'total_content' in novel_content and novel_content['total_content']:
                 total_content = novel_content['total_content']
                 f.write(f"## {title}\n\n")
                 f.write(total_content)
@@ -1466,7 +1502,7 @@ class BaseParser:
                     processed_content = self._execute_after_crawler_funcs(chapter_content)
                     
                     self.chapter_count += 1  # 只在成功添加章节后才增加计数
-                    novel_content['chapters'].append({
+                    self._append_chapter(novel_content, {
                         'chapter_number': self.chapter_count,
                         'title': f"第 {self.chapter_count} 页",
                         'content': processed_content,
@@ -1478,13 +1514,91 @@ class BaseParser:
             else:
                 logger.warning(f"✗ 页抓取失败: {current_url}")
             
-            # 获取下一页URL
+            # 获取下一页URL（请求间隔由抓取调度器按主机限速控制）
             next_url = self._get_next_page_url(page_content, current_url)
             current_url = next_url
-            
-            # 页面间延迟
-            time.sleep(1)
     
+    def _fetch_pages(self, urls: List[Any], fetch: Optional[Callable[[Any], Optional[str]]] = None) -> List[Optional[str]]:
+        """
+        并发获取多个页面内容（适用于章节URL已知的情况），
+        并发度与请求速率受抓取调度器的主机限制约束
+
+        Args:
+            urls: 页面URL列表（指定 fetch 时为传给 fetch 的参数）
+            fetch: 获取单个页面的函数，默认为 _get_url_content
+
+        Returns:
+            与urls顺序一致的页面内容列表，失败的页面为None
+        """
+        fetch_one = fetch or self._get_url_content
+
+        def fetch_safe(url: Any) -> Optional[str]:
+            try:
+                return fetch_one(url)
+            except Exception as e:
+                logger.warning(f"页面抓取异常: {url}, 错误: {e}")
+                return None
+
+        return get_fetch_scheduler().map(fetch_safe, urls)
+
+    def _iter_fetched_pages(self, urls: List[Any], batch_size: int = 32,
+                            fetch: Optional[Callable[[Any], Optional[str]]] = None) -> Iterator[Tuple[Any, Optional[str]]]:
+        """
+        分批并发获取页面并按顺序产出，避免一次性持有全部页面内容
+
+        Args:
+            urls: 页面URL列表（指定 fetch 时为传给 fetch 的参数）
+            batch_size: 每批并发抓取的页面数
+            fetch: 获取单个页面的函数，默认为 _get_url_content
+
+        Yields:
+            (URL, 页面内容或None)
+        """
+        for start in range(0, len(urls), batch_size):
+            batch = urls[start:start + batch_size]
+            yield from zip(batch, self._fetch_pages(batch, fetch))
+
+    def _get_all_chapters_incremental(self, chapter_links: List[Dict[str, str]], novel_content: Dict[str, Any],
+                                      start_index: int = 0) -> None:
+        """
+        增量爬取所有章节内容：章节列表已知，按主机限制并发抓取，再按顺序提取
+        
+        Args:
+            chapter_links: 章节链接列表
+            novel_content: 小说内容字典
+            start_index: 起始章节索引
+        """
+        self.chapter_count = start_index
+        
+        urls = []
+        for chapter_info in chapter_links:
+            chapter_url = chapter_info.get('url', '')
+            urls.append(f"{self.base_url}{chapter_url}" if chapter_url and not chapter_url.startswith('http') else chapter_url)
+        
+        for i, (chapter_info, (full_url, chapter_content)) in enumerate(zip(chapter_links, self._iter_fetched_pages(urls)), 1):
+            chapter_title = chapter_info.get('title', f'第{start_index + i}章')
+            
+            if chapter_content:
+                # 使用配置的正则提取内容
+                extracted_content = self._extract_with_regex(chapter_content, self.content_reg)
+                
+                if extracted_content:
+                    # 执行爬取后处理函数
+                    processed_content = self._execute_after_crawler_funcs(extracted_content)
+                    
+                    self.chapter_count += 1
+                    self._append_chapter(novel_content, {
+                        'chapter_number': self.chapter_count,
+                        'title': chapter_title,
+                        'content': processed_content,
+                        'url': full_url
+                    })
+                    logger.info(f"✓ 第 {start_index + i} 章抓取成功: {chapter_title}")
+                else:
+                    logger.warning(f"✗ 第 {start_index + i} 章内容提取失败")
+            else:
+                logger.warning(f"✗ 第 {start_index + i} 章抓取失败")
+
     def _get_next_page_url(self, content: str, current_url: str) -> Optional[str]:
         """
         获取下一页URL
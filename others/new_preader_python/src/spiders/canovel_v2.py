@@ -4,7 +4,6 @@ canovel.com解析器 - 基于配置驱动版本
 """
 
 import re
-import time
 from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin
 from .base_parser_v2 import BaseParser
@@ -177,9 +176,6 @@ class CanovelParser(BaseParser):
             # 获取下一页URL
             next_url = self._get_next_page_url_direct(page_content, current_url)
             current_url = next_url
-            
-            # 页面间延迟
-            time.sleep(1)
     
     def _get_next_page_url_direct(self, content: str, current_url: str) -> Optional[str]:
         """
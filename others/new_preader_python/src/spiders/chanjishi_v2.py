@@ -221,10 +221,6 @@ class ChanjishiParser(BaseParser):
             else:
                 logger.warning(f"✗ 第 {self.chapter_count} 页抓取失败")
                 break
-            
-            # 页面间延迟
-            import time
-            time.sleep(1)
     
     def _get_next_page_url(self, content: str, current_url: str) -> Optional[str]:
         """
@@ -5,7 +5,6 @@ CMS T5 WordPress小说网站解析器 - 通用WordPress主题解析版本
 """
 
 import re
-import time
 from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin, urlparse
 from .base_parser_v2 import BaseParser
@@ -360,9 +359,6 @@ class CmsT5Parser(BaseParser):
                 logger.info(f"第 {i+1} 页爬取成功，内容长度: {len(processed_content)}")
             else:
                 logger.warning(f"第 {i+1} 页内容提取失败")
-            
-            # 页面间延迟
-            time.sleep(1)
         
         # 合并所有页面内容
         novel_content['total_content'] = '\n\n'.join(total_content)
@@ -697,9 +693,6 @@ class CmsT5Parser(BaseParser):
                 logger.info(f"第 {i+1} 页抓取成功，内容长度: {len(processed_content)}")
             else:
                 logger.warning(f"第 {i+1} 页内容提取失败")
-            
-            # 页面间延迟
-            time.sleep(1)
         
         return novel_content
     
@@ -828,9 +821,6 @@ class CmsT5Parser(BaseParser):
                         logger.warning(f"✗ 第 {i+1} 页内容提取失败")
                 else:
                     logger.warning(f"✗ 第 {i+1} 页抓取失败")
-                
-                # 页面间延迟
-                time.sleep(1)
             
             return novel_content
         else:
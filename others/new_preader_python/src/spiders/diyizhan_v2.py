@@ -723,8 +723,5 @@ class DiyizhanParser(BaseParser):
                     logger.warning(f"✗ 第 {i+1} 章内容处理后为空")
             else:
                 logger.warning(f"✗ 第 {i+1} 章抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
         
         return novel_content
@@ -227,9 +227,6 @@ class HaijBookxParser(BaseParser):
                     "order": chapter["order"],
                     "content": ""
                 })
-            
-            # 章节间延迟
-            time.sleep(1)
         
         return novel_info
     
@@ -829,8 +826,5 @@ if __name__ == "__main__":
                     logger.warning(f"✗ 第 {i+1} 章内容提取失败")
             else:
                 logger.warning(f"✗ 第 {i+1} 章抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
         
         return novel_content
@@ -4,7 +4,6 @@
 """
 
 import re
-import time
 from typing import Dict, Any, List, Optional
 from .base_parser_v2 import BaseParser
 from src.utils.logger import get_logger
@@ -229,6 +228,10 @@ class JisgeParser(BaseParser):
         """
         self.chapter_count = 0
         
+        # 章节列表已知，按主机限制并发预取，再按顺序处理
+        pages = self._iter_fetched_pages([chapter_info['url'] for chapter_info in chapter_links],
+                                         fetch=self._get_chapter_content)
+        
         for i, chapter_info in enumerate(chapter_links, 1):
             chapter_url = chapter_info['url']
             chapter_title = chapter_info['title']
@@ -236,7 +239,7 @@ class JisgeParser(BaseParser):
             logger.info(f"正在爬取第 {i}/{len(chapter_links)} 章: {chapter_title}")
             
             # 获取章节内容
-            chapter_content = self._get_chapter_content(chapter_url)
+            _, chapter_content = next(pages)
             
             if chapter_content:
                 self.chapter_count += 1
@@ -249,9 +252,6 @@ class JisgeParser(BaseParser):
                 logger.info(f"✓ 第 {i}/{len(chapter_links)} 章抓取成功")
             else:
                 logger.warning(f"✗ 第 {i}/{len(chapter_links)} 章内容抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
     
     def _get_chapter_content(self, chapter_url: str) -> Optional[str]:
         """
@@ -422,50 +422,3 @@ class JisgeParser(BaseParser):
         self._get_all_chapters_incremental(chapter_links[start_pos:], novel_content, start_index)
         
         return novel_content
-    
-    def _get_all_chapters_incremental(self, chapter_links, novel_content, start_index=0):
-        """
-        增量爬取所有章节内容
-        
-        Args:
-            chapter_links: 章节链接列表
-            novel_content: 小说内容字典
-            start_index: 起始章节索引
-        """
-        import time
-        
-        self.chapter_count = start_index
-        
-        for i, chapter_info in enumerate(chapter_links, 1):
-            chapter_url = chapter_info.get('url', '')
-            chapter_title = chapter_info.get('title', f'第{start_index + i}章')
-            
-            logger.info(f"正在爬取第 {start_index + i} 章: {chapter_title}")
-            
-            # 获取章节内容
-            full_url = f"{self.base_url}{chapter_url}" if chapter_url and not chapter_url.startswith('http') else chapter_url
-            chapter_content = self._get_url_content(full_url)
-            
-            if chapter_content:
-                # 使用配置的正则提取内容
-                extracted_content = self._extract_with_regex(chapter_content, self.content_reg)
-                
-                if extracted_content:
-                    # 执行爬取后处理函数
-                    processed_content = self._execute_after_crawler_funcs(extracted_content)
-                    
-                    self.chapter_count += 1
-                    novel_content['chapters'].append({
-                        'chapter_number': self.chapter_count,
-                        'title': chapter_title,
-                        'content': processed_content,
-                        'url': full_url
-                    })
-                    logger.info(f"✓ 第 {start_index + i} 章抓取成功")
-                else:
-                    logger.warning(f"✗ 第 {start_index + i} 章内容提取失败")
-            else:
-                logger.warning(f"✗ 第 {start_index + i} 章抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
@@ -137,10 +137,6 @@ class PhotoGramParser(BaseParser):
                     # failed_urls.append(chapter_url)
                     logger.warning(f"章节 {i+1}/{len(chapters_list)}: {chapter_info['title']} - 获取内容失败")
                     
-                # 章节间延迟
-                import time
-                time.sleep(1)
-                    
             except Exception as e:
                 # failed_urls.append(chapter_info['url'])
                 logger.error(f"章节 {i+1}/{len(chapters_list)}: {chapter_info['title']} - 错误: {e}")
@@ -1879,9 +1875,6 @@ class PhotoGramParser(BaseParser):
                     logger.warning(f"✗ 第 {i+1} 章内容处理后为空")
             else:
                 logger.warning(f"✗ 第 {i+1} 章内容提取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
         
         return novel_content
 
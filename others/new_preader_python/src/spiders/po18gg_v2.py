@@ -273,7 +273,7 @@ class Po18ggParser(BaseParser):
                 
                 # 检查处理后的内容是否有效
                 if processed_content and len(processed_content.strip()) > 0:
-                    novel_content['chapters'].append({
+                    self._append_chapter(novel_content, {
                         'chapter_number': chapter_number,
                         'title': chapter_title,
                         'content': processed_content,
@@ -287,7 +287,7 @@ class Po18ggParser(BaseParser):
                     regex_content = self._extract_with_regex(chapter_content, self.content_reg)
                     if regex_content:
                         processed_content = self._execute_after_crawler_funcs(regex_content)
-                        novel_content['chapters'].append({
+                        self._append_chapter(novel_content, {
                             'chapter_number': chapter_number,
                             'title': chapter_title,
                             'content': processed_content,
@@ -306,7 +306,7 @@ class Po18ggParser(BaseParser):
                 regex_content = self._extract_with_regex(chapter_content, self.content_reg)
                 if regex_content:
                     processed_content = self._execute_after_crawler_funcs(regex_content)
-                    novel_content['chapters'].append({
+                    self._append_chapter(novel_content, {
                         'chapter_number': chapter_number,
                         'title': chapter_title,
                         'content': processed_content,
@@ -327,9 +327,6 @@ class Po18ggParser(BaseParser):
             
             current_url = next_url
             chapter_number += 1
-            
-            # 章节间延迟
-            time.sleep(1)
     
     def _extract_chapter_title(self, content: str, chapter_number: int) -> str:
         """
@@ -1105,7 +1102,7 @@ class Po18ggParser(BaseParser):
                 processed_content = self._execute_after_crawler_funcs(extracted_content)
                 
                 if processed_content and len(processed_content.strip()) > 0:
-                    novel_content['chapters'].append({
+                    self._append_chapter(novel_content, {
                         'chapter_number': chapter_number,
                         'title': chapter_title,
                         'content': processed_content,
@@ -1129,9 +1126,6 @@ class Po18ggParser(BaseParser):
             
             current_url = next_url
             chapter_number += 1
-            
-            # 章节间延迟
-            time.sleep(1)
         
         logger.info(f"增量爬取完成，共爬取 {len(novel_content['chapters'])} 个新章节")
         return novel_content
@@ -4,7 +4,6 @@ po18rr.com解析器 - 基于配置驱动版本
 """
 
 import re
-import time
 import requests
 from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin
@@ -406,9 +405,6 @@ class Po18rrParser(BaseParser):
                 logger.info(f"第 {chapter_number} 章抓取成功，内容长度: {len(processed_content)}")
             else:
                 logger.warning(f"第 {chapter_number} 章内容提取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
     
     def _parse_novel_info(self, content: str, novel_url: str) -> Optional[Dict[str, Any]]:
         """
@@ -554,8 +550,5 @@ class Po18rrParser(BaseParser):
                 logger.info(f"第 {chapter_number} 章抓取成功，内容长度: {len(processed_content)}")
             else:
                 logger.warning(f"第 {chapter_number} 章内容提取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
         
         return novel_content
\ No newline at end of file
@@ -965,10 +965,6 @@ class Sis001Parser(BaseParser):
             current_url = self._get_next_page_url(page_content or "", current_url)
             current_page += 1
 
-            # 页面间延迟
-            import time
-            time.sleep(1)
-
         return novel_content
 
     def _extract_novel_id_from_url(self, url: str) -> str:
@@ -1145,9 +1141,6 @@ class Sis001Parser(BaseParser):
             
             current_url = next_url
             chapter_number += 1
-            
-            # 章节间延迟
-            time.sleep(1)
         
         logger.info(f"增量爬取完成，共爬取 {len(novel_content['chapters'])} 个新章节")
         return novel_content
@@ -358,10 +358,6 @@ class ZXCMSParser(BaseParser):
                     break
                 
                 chapter_number += 1
-                
-                # 章节间延迟
-                import time
-                time.sleep(1)
                     
             except Exception as e:
                 print(f"章节 {chapter_number}: 错误 - {e}")
@@ -1098,8 +1094,8 @@ class ZXCMSParser(BaseParser):
         # 尝试使用正则表达式提取章节
         import re
         chapter_patterns = [
-            r'<a[^>]*href=["']([^"']*)["'][^>]*>([^<]+)</a>',
-            r'<li[^>]*><a[^>]*href=["']([^"']*)["'][^>]*>([^<]+)</a></li>',
+            r"""<a[^>]*href=["']([^"']*)["'][^>]*>([^<]+)</a>""",
+            r"""<li[^>]*><a[^>]*href=["']([^"']*)["'][^>]*>([^<]+)</a></li>""",
         ]
         
         for pattern in chapter_patterns:
@@ -1145,23 +1141,23 @@ class ZXCMSParser(BaseParser):
             'chapters': []
         }
         
-        # 从起始位置开始爬取
+        # 章节列表已知，按主机限制并发抓取所有新章节，再按顺序处理
+        pending = []
         for i in range(start_pos, len(chapters)):
-            chapter = chapters[i]
-            chapter_url = chapter.get('url', '')
-            chapter_title = chapter.get('title', f'第{i+1}章')
-            
+            chapter_url = chapters[i].get('url', '')
             if not chapter_url:
                 continue
             
             # 构建完整URL
             if not chapter_url.startswith('http'):
                 chapter_url = f"{self.base_url}{chapter_url}"
-            
-            logger.info(f"正在爬取第 {i+1} 章: {chapter_title}")
-            
-            # 获取章节内容
-            chapter_content = self._get_url_content(chapter_url)
+            pending.append((i, chapter_url))
+        
+        logger.info(f"并发爬取 {len(pending)} 个章节")
+        page_iter = self._iter_fetched_pages([chapter_url for _, chapter_url in pending])
+        
+        for (i, _), (chapter_url, chapter_content) in zip(pending, page_iter):
+            chapter_title = chapters[i].get('title', f'第{i+1}章')
             
             if chapter_content:
                 # 提取章节内容
@@ -1172,7 +1168,7 @@ class ZXCMSParser(BaseParser):
                     processed_content = self._execute_after_crawler_funcs(extracted_content)
                     
                     if processed_content and len(processed_content.strip()) > 0:
-                        novel_content['chapters'].append({
+                        self._append_chapter(novel_content, {
                             'chapter_number': start_index + (i - start_pos) + 1,
                             'title': chapter_title,
                             'content': processed_content,
@@ -1185,8 +1181,5 @@ class ZXCMSParser(BaseParser):
                     logger.warning(f"✗ 第 {i+1} 章内容提取失败")
             else:
                 logger.warning(f"✗ 第 {i+1} 章抓取失败")
-            
-            # 章节间延迟
-            time.sleep(1)
         
         return novel_content
@@ -496,10 +496,12 @@ class NewReaderApp(App[None]):
         # 启动内存监控器：根据配置的缓存大小选择阈值
         try:
             from src.utils.memory_monitor import MemoryMonitor
-            from src.utils.cache_manager import parse_cache, paginate_cache
+            from src.utils.cache_manager import apply_cache_budgets, shrink_caches_to_target
             cfg = self.config_manager.get_config()
             adv = cfg.get("advanced", {})
             cache_mb = int(adv.get("cache_size", 100))
+            # 按命名空间应用内存缓存预算
+            apply_cache_budgets(adv.get("cache_budgets_mb", {}))
             # 高水位线：缓存大小的 1.5 倍；收缩目标为缓存大小
             high_water = max(64, int(cache_mb * 1.5)) * 1024 * 1024
             target = max(32, int(cache_mb)) * 1024 * 1024
@@ -507,8 +509,7 @@ class NewReaderApp(App[None]):
             def on_pressure():
                 # 收缩缓存，并尝试释放渲染结果
                 try:
-                    paginate_cache.shrink_to_target(target // 2)
-                    parse_cache.shrink_to_target(target // 2)
+                    shrink_caches_to_target(target)
                 except Exception:
                     pass
                 try:
@@ -516,7 +517,7 @@ class NewReaderApp(App[None]):
                     if hasattr(self, "screen") and self.screen:
                         rdr = getattr(self.screen, "content_renderer", None)
                         if rdr and hasattr(rdr, "rendered_pages"):
-                            rdr.rendered_pages = []
+                            rdr.rendered_pages.clear()
                 except Exception:
                     pass
 
@@ -1,20 +1,30 @@
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from textual.widgets import Static
 from textual.reactive import reactive
 from textual.widgets import Static
 from rich.text import Text as RichText
 from rich.style import Style
 from src.core.pagination.terminal_paginator import TerminalPaginator, PageMetrics
+from src.core.pagination.incremental_paginator import IncrementalPaginator, PageSequence
 from src.config.settings.setting_observer import SettingObserver, SettingChangeEvent, register_component_observers
 from src.themes.theme_manager import ThemeManager
 
 from src.utils.logger import get_logger
 from collections import OrderedDict
+from functools import partial
 import asyncio
+import time
 
 logger = get_logger(__name__)
 
+# 首屏同步排版时，在目标页之后额外排版的页数
+LAYOUT_PREFETCH_PAGES = 2
+# 后台排版每一步的页数（每步之间释放分页器锁，翻页请求不会被长时间阻塞）
+LAYOUT_STEP_PAGES = 32
+# 后台排版进度通知间隔（秒）
+LAYOUT_NOTIFY_INTERVAL = 0.5
+
 
 class ContentRenderer(Static):
     def force_set_page(self, index_0: int) -> bool:
@@ -25,6 +35,8 @@ class ContentRenderer(Static):
             tp = int(getattr(self, "total_pages", 0) or 0)
             if tp <= 0:
                 return False
+            if index_0 >= tp and self.ensure_page(index_0):
+                tp = self.total_pages
             idx = max(0, min(index_0, tp - 1))
             # 设置当前页
             self.current_page = idx
@@ -52,6 +64,8 @@ class ContentRenderer(Static):
             tp = int(getattr(self, "total_pages", 0) or 0)
             if tp <= 0:
                 return False
+            if index_0 >= tp and self.ensure_page(index_0):
+                tp = self.total_pages
             idx = max(0, min(index_0, tp - 1))
             # 设置当前页
             self.current_page = idx
@@ -110,13 +124,17 @@ class ContentRenderer(Static):
         
         # 分页器 - 使用原有的终端分页器
         self.paginator = TerminalPaginator()
+        # 增量分页器：只排版视口附近的页面，其余在后台 worker 中继续排版
+        self._pager: Optional[IncrementalPaginator] = None
+        # 首次排版时需要覆盖的位置（页码, 字符偏移），用于恢复上次阅读位置
+        self._layout_hint: Tuple[int, int] = (0, 0)
         
         # 内容相关属性 - 使用_original_content避免与Static的content冲突
         self._original_content: str = ""
         self.current_page: int = 0
         self.total_pages: int = 0
         self.current_page_lines: List[str] = []
-        self.all_pages: List[List[str]] = []  # 存储所有分页后的页面
+        self.all_pages: Sequence[List[str]] = []  # 分页后的页面（增量分页时为按需排版的序列视图）
         self._scroll_offset: int = 0
         self.visible_lines: int = container_height
         self.metrics: Optional[PageMetrics] = None
@@ -174,6 +192,7 @@ class ContentRenderer(Static):
         # 确保内容不为空
         if not content:
             self._original_content = ""
+            self._pager = None
             self.current_page_lines = []
             self.all_pages = []
             self.total_pages = 0
@@ -206,9 +225,15 @@ class ContentRenderer(Static):
         self._calculate_metrics()
     
     def _paginate(self) -> None:
-        """对内容进行分页"""
-        # 保存当前页面位置
+        """
+        对内容进行增量分页
+
+        只同步排版到当前阅读位置附近，剩余页面交给后台 worker 继续排版；
+        重新分页（尺寸/配置变化）时按当前页的字符偏移保持阅读位置。
+        """
+        # 保存当前页面位置（增量分页时使用字符偏移，跨尺寸变化更准确）
         original_page = self.current_page
+        original_offset = self.get_page_offset(original_page) if self._pager is not None else None
         
         # 更精确的度量计算 - 充分利用可用空间
         effective_width = self.container_width
@@ -220,7 +245,7 @@ class ContentRenderer(Static):
         line_spacing = int(self.config.get("line_spacing", 0))  # 默认行间距为0
         paragraph_spacing = int(self.config.get("paragraph_spacing", 1))  # 默认段落间距为1
         
-        self.paginator.calculate_metrics(
+        metrics = self.paginator.calculate_metrics(
             container_width=effective_width,
             container_height=effective_height,
             line_spacing=line_spacing,
@@ -233,28 +258,167 @@ class ContentRenderer(Static):
         
         logger.debug(f"分页间距设置: 行间距={line_spacing}, 段落间距={paragraph_spacing}")
         
-        # 使用简单分页策略，确保充分利用容器空间
-        pages = self.paginator.paginate(self._original_content)
+        pager = IncrementalPaginator(self._original_content, metrics, self.paginator.strategies["smart"])
+        self._pager = pager
+        self.all_pages = PageSequence(pager, pager.get_page)
         
-        if pages:
-            logger.debug(f"分页结果: 总页数={len(pages)}, 第一页行数={len(pages[0])}")
-        
-        # 确保至少有一页
-        if not pages:
-            pages = [[""]]
-            
-        self.total_pages = len(pages)
-        self.all_pages = pages
+        # 首屏：只排版到目标页（以及恢复阅读位置所需的页）为止
+        if original_offset is not None:
+            target_page = pager.find_page_by_offset(original_offset)
+        else:
+            target_page = original_page
+        hint_page, hint_offset = self._layout_hint
+        if hint_offset > 0:
+            pager.find_page_by_offset(hint_offset)
+        pager.ensure_page(max(target_page, hint_page) + LAYOUT_PREFETCH_PAGES)
         
-        # 恢复当前页面位置
-        self.current_page = min(original_page, self.total_pages - 1) if self.total_pages > 0 else 0
+        self.total_pages = pager.page_count
+        self.current_page = min(max(0, target_page), self.total_pages - 1)
         
-        # 加载当前页面内容
-        self.current_page_lines = pages[self.current_page] if pages and self.current_page < len(pages) else []
+        # 加载当前页面内容（页面已变化，旧的渲染池失效）
+        self.current_page_lines = self.all_pages[self.current_page]
         self._scroll_offset = 0
+        self._render_pool_clear()
         self._calculate_metrics()
         
-        logger.debug(f"ContentRenderer._paginate: 分页完成，总页数={self.total_pages}, 当前页={self.current_page}, 当前页行数={len(self.current_page_lines)}")
+        logger.debug(f"ContentRenderer._paginate: 首屏分页完成，已排版页数={self.total_pages}, 当前页={self.current_page}, 当前页行数={len(self.current_page_lines)}")
+        
+        self._start_layout_worker(pager)
+    
+    def set_layout_hint(self, page_index: int = 0, offset: int = 0) -> None:
+        """
+        设置首次分页需要覆盖的阅读位置，保证恢复进度时目标页已排版
+        
+        Args:
+            page_index: 页码（0-based）
+            offset: 原文字符偏移
+        """
+        self._layout_hint = (max(0, int(page_index or 0)), max(0, int(offset or 0)))
+    
+    def ensure_page(self, index_0: int) -> bool:
+        """
+        确保指定页已排版（后台排版尚未到达时同步排版到该页）
+        
+        Args:
+            index_0: 页码（0-based）
+            
+        Returns:
+            bool: 该页是否存在
+        """
+        if self._pager is None:
+            return 0 <= index_0 < len(self.all_pages)
+        exists = self._pager.ensure_page(index_0)
+        self.total_pages = self._pager.page_count
+        return exists
+    
+    def is_layout_complete(self) -> bool:
+        """分页是否已全部完成"""
+        return self._pager is None or self._pager.is_complete
+    
+    def get_page_offset(self, index_0: int) -> Optional[int]:
+        """
+        获取指定页在原文中的起始字符偏移（仅增量分页可用）
+        
+        Args:
+            index_0: 页码（0-based）
+            
+        Returns:
+            Optional[int]: 起始偏移，不可用时返回None
+        """
+        if self._pager is None:
+            return None
+        return self._pager.get_page_offset(index_0)
+    
+    def find_page_for_offset(self, offset: int) -> Optional[int]:
+        """
+        根据原文字符偏移查找页码（0-based），只排版到覆盖该偏移为止
+        
+        Args:
+            offset: 原文字符偏移
+            
+        Returns:
+            Optional[int]: 页码，不可用时返回None
+        """
+        if self._pager is None:
+            return None
+        page = self._pager.find_page_by_offset(offset)
+        self.total_pages = self._pager.page_count
+        return page
+    
+    def get_page_index(self) -> Optional[Tuple[Sequence[int], Sequence[List[int]]]]:
+        """
+        获取分页检查点索引：(每页起始偏移, 每页各行起始偏移) 的序列视图
+        
+        Returns:
+            Optional[Tuple[Sequence[int], Sequence[List[int]]]]: 增量分页时返回索引视图，否则返回None
+        """
+        if self._pager is None:
+            return None
+        pager = self._pager
+        return PageSequence(pager, pager.get_page_offset), PageSequence(pager, pager.get_line_offsets)
+    
+    def _start_layout_worker(self, pager: IncrementalPaginator) -> None:
+        """启动后台排版 worker（未挂载到运行中的应用时剩余页面按需排版）"""
+        if pager.is_complete:
+            return
+        try:
+            app = self.app
+            try:
+                app.call_from_thread(self._run_layout_worker, pager)
+            except RuntimeError:
+                # 已在 UI 线程中
+                self._run_layout_worker(pager)
+        except Exception as e:
+            logger.debug(f"后台排版未启动，剩余页面将按需排版: {e}")
+    
+    def _run_layout_worker(self, pager: IncrementalPaginator) -> None:
+        self.run_worker(
+            partial(self._layout_in_background, pager, self.app),
+            name="content-layout",
+            group="content-layout",
+            exclusive=True,
+            thread=True,
+        )
+    
+    def _layout_in_background(self, pager: IncrementalPaginator, app: Any) -> None:
+        """后台线程：分步排版剩余页面，并定期通知 UI 更新总页数"""
+        from textual.worker import get_current_worker
+        worker = get_current_worker()
+        last_notify = time.monotonic()
+        while self._pager is pager and not worker.is_cancelled:
+            more = pager.layout_step(LAYOUT_STEP_PAGES)
+            now = time.monotonic()
+            if more and now - last_notify < LAYOUT_NOTIFY_INTERVAL:
+                continue
+            last_notify = now
+            fallback_pages = None
+            if not more and pager.needs_fallback:
+                # 与 TerminalPaginator.paginate 的完整性检查一致
+                logger.warning("内容丢失超过5%，切换到健壮分页策略")
+                fallback_pages = self.paginator.strategies["robust"].paginate(self._original_content, pager.metrics)
+            app.call_from_thread(self._on_layout_progress, pager, fallback_pages)
+            if not more:
+                break
+    
+    def _on_layout_progress(self, pager: IncrementalPaginator,
+                            fallback_pages: Optional[List[List[str]]] = None) -> None:
+        """UI线程：同步后台排版进度"""
+        if self._pager is not pager:
+            return
+        if fallback_pages is not None:
+            self._pager = None
+            self.all_pages = fallback_pages or [[""]]
+            self.current_page = min(self.current_page, len(self.all_pages) - 1)
+            self.current_page_lines = self.all_pages[self.current_page]
+            self._scroll_offset = 0
+            self._render_pool_clear()
+            self._update_visible_content()
+        self.total_pages = len(self.all_pages)
+        try:
+            from src.ui.messages import PaginationProgressMessage
+            self.post_message(PaginationProgressMessage(self.total_pages, self.is_layout_complete()))
+        except Exception:
+            pass
     
     def _calculate_metrics(self) -> None:
         """计算页面度量信息"""
@@ -488,7 +652,7 @@ class ContentRenderer(Static):
         Returns:
             是否成功翻页
         """
-        if self.current_page >= self.total_pages - 1:
+        if self.current_page >= self.total_pages - 1 and not self.ensure_page(self.current_page + 1):
             logger.debug(f"ContentRenderer.next_page: 无法翻页，当前页={self.current_page}, 总页数={self.total_pages}")
             return False
             
@@ -544,7 +708,9 @@ class ContentRenderer(Static):
         # 调试信息
         logger.debug(f"goto_page: 用户输入页码={page_num}, 转换后页码={target_page}, 总页数={len(self.all_pages)}")
         
-        # 检查页码有效性
+        # 检查页码有效性（目标页尚未排版时先排版到该页）
+        if target_page >= len(self.all_pages):
+            self.ensure_page(target_page)
         if target_page < 0 or target_page >= len(self.all_pages):
             logger.warning(f"goto_page: 页码无效，目标页={target_page}, 有效范围=[0, {len(self.all_pages)-1}]")
             return False
@@ -716,16 +882,9 @@ class ContentRenderer(Static):
                         
                         # 立即重新分页和刷新显示
                         if self.renderer._original_content:
-                            # 保存当前页面位置
-                            current_page = self.renderer.current_page
-                            
-                            # 重新分页
+                            # 重新分页（_paginate 按当前页的字符偏移保持阅读位置）
                             self.renderer._paginate()
-                            
-                            # 恢复页面位置（如果可能）
-                            if current_page < len(self.renderer.all_pages):
-                                self.renderer.current_page = current_page
-                                self.renderer._load_page_content(current_page)
+                            self.renderer._load_page_content(self.renderer.current_page)
                             
                             # 刷新显示
                             self.renderer._update_visible_content()
@@ -17,6 +17,9 @@ from src.core.search import SearchResult
 from src.ui.styles.universal_style_isolation import apply_universal_style_isolation, remove_universal_style_isolation
 from src.config.default_config import SUPPORTED_FORMATS
 
+# 边输入边搜索时最多显示的结果数（结果已按相关度排序）
+SEARCH_RESULT_LIMIT = 200
+
 class SearchDialog(ModalScreen[Optional[SearchResult]]):
 
 
@@ -139,7 +142,7 @@ class SearchDialog(ModalScreen[Optional[SearchResult]]):
             # 如果没有传入书架实例，创建新的实例（可能没有用户权限过滤）
             bookshelf = Bookshelf()
         
-        books = bookshelf.search_books(search_input.value, format=selected_format)
+        books = bookshelf.search_books(search_input.value, format=selected_format, limit=SEARCH_RESULT_LIMIT)
         
         table = self.query_one("#results-table", DataTable)
         table.clear()
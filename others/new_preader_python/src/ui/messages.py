@@ -51,4 +51,11 @@ class UpdateDuplicateGroupsMessage(Message):
         self.batch_groups = batch_groups
         self.batch_index = batch_index
         self.total_batches = total_batches
-        self.processing_remaining = processing_remaining
\ No newline at end of file
+        self.processing_remaining = processing_remaining
+
+class PaginationProgressMessage(Message):
+    """后台增量分页进度消息"""
+    def __init__(self, total_pages: int, complete: bool) -> None:
+        super().__init__()
+        self.total_pages = total_pages
+        self.complete = complete
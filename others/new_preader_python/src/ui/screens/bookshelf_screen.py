@@ -4,7 +4,7 @@
 
 
 import os
-from typing import Dict, Any, Optional, List, ClassVar, Set
+from typing import Dict, Any, Optional, List, ClassVar, Sequence, Set
 from webbrowser import get
 from src.core import book
 from src.core.book import Book
@@ -21,6 +21,7 @@ from textual import on, events
 from src.locales.i18n_manager import get_global_i18n
 from src.themes.theme_manager import ThemeManager
 from src.core.bookshelf import Bookshelf
+from src.core.book_window import BookWindow, DEFAULT_SORT_KEY
 from src.core.book_manager import BookManager
 from src.core.statistics_direct import StatisticsManagerDirect
 
@@ -68,13 +69,9 @@ class BookshelfScreen(Screen[None]):
     def handle_refresh_message(self, message: RefreshBookshelfMessage) -> None:
         """处理刷新书架消息"""
         self.logger.info("接收到书架刷新消息，正在重新加载书籍数据...")
-        # 强制重新加载书架数据，确保数据同步
-        try:
-            # 重新加载书架数据（从数据库重新获取）
-            self.bookshelf._load_books()
-            self.logger.info("书架数据已重新加载")
-        except Exception as e:
-            self.logger.warning(f"重新加载书架数据失败: {e}")
+        # 丢弃书架已加载的书籍数据，并强制重新统计和分页查询，确保数据同步
+        self.bookshelf.invalidate_books()
+        self._last_search_params = "__force_reload__"
 
         # 刷新时保持当前搜索条件
         self._load_books(
@@ -459,12 +456,6 @@ class BookshelfScreen(Screen[None]):
             # 重新添加列定义（因为columns=True会清除列）
             self._add_table_columns(table)
             
-            # 性能优化：避免不必要的数据库重新加载
-            # 只在真正需要刷新数据时重新加载书架
-            force_reload = False
-            if not hasattr(self, '_last_search_params') or self._last_search_params != current_search_params:
-                force_reload = True
-            
             try:
                 # 多用户模式检查：确保用户权限和数据隔离
                 current_user = getattr(self.app, 'current_user', None)
@@ -499,245 +490,23 @@ class BookshelfScreen(Screen[None]):
                         self.bookshelf.set_current_user(None, "superadmin")
                         self.logger.debug("单用户模式：设置为超级管理员")
                 
-                # 性能优化：只在真正需要时重新加载书架数据
-                # 多用户模式下的特殊处理：用户切换时强制重新加载
-                user_changed = False
-                if hasattr(self, '_last_user_id'):
-                    current_user_id = current_user.get('id') if current_user else None
-                    if self._last_user_id != current_user_id:
-                        user_changed = True
-                        self.logger.debug(f"用户已切换：{self._last_user_id} -> {current_user_id}")
-                
-                # 更新用户ID缓存
+                # 更新用户ID缓存（set_current_user 已丢弃书架按旧用户加载的书籍，下面按新用户分页查询）
                 self._last_user_id = current_user.get('id') if current_user else None
-                
-                # 决定是否需要重新加载数据
-                should_reload = force_reload or user_changed
-                
-                if should_reload:
-                    self.bookshelf._load_books()
-                    if user_changed:
-                        self.logger.debug("书架数据已重新加载（用户切换）")
-                    else:
-                        self.logger.debug("书架数据已重新加载（搜索条件改变）")
-                else:
-                    self.logger.debug("使用缓存的书架数据（搜索条件和用户未改变）")
             except Exception as e:
                 self.logger.warning(f"重新加载书架数据失败: {e}")
             
         # 缓存搜索参数
         self._last_search_params = current_search_params
 
-        # 如果只是分页切换但有自定义排序，需要重新应用排序
-        if page_change_only and self._sort_column is not None:
-            # 核心概念：阅读进度 100% 的永远在最后面，无论什么排序方式
-            not_completed_books = []
-            completed_books = []
-
-            for book in self._all_books:
-                reading_info = self.bookshelf._reading_info_cache.get(book.path, {})
-                progress = reading_info.get('reading_progress', 0)
-                if progress >= 1.0:
-                    completed_books.append(book)
-                else:
-                    not_completed_books.append(book)
-
-            self.logger.debug(f"重新排序前 - 未完成: {len(not_completed_books)}, 已完成: {len(completed_books)}")
-
-            # 预先获取阅读信息
-            reading_info_cache = {}
-            for book in not_completed_books + completed_books:
-                reading_info = self.bookshelf.get_book_reading_info(book.path)
-                reading_info_cache[book.path] = reading_info
-
-            def get_sort_key(book):
-                return self._get_sort_key_with_cache(book, self._sort_column, reading_info_cache)
-
-            not_completed_books.sort(key=get_sort_key, reverse=self._sort_reverse)
-            completed_books.sort(key=get_sort_key, reverse=self._sort_reverse)
-
-            self._all_books = not_completed_books + completed_books
-
-            self.logger.debug(f"重新应用排序: {self._sort_column}, 倒序: {self._sort_reverse}")
-            if not_completed_books:
-                self.logger.debug(f"未完成前3本: {[b.title[:15] for b in not_completed_books[:3]]}")
-            if completed_books:
-                self.logger.debug(f"已完成前3本: {[b.title[:15] for b in completed_books[:3]]}")
-            self.logger.debug(f"合并后前3本: {[b.title[:15] for b in self._all_books[:3]]}")
-            if len(self._all_books) > 3:
-                self.logger.debug(f"合并后最后3本: {[b.title[:15] for b in self._all_books[-3:]]}")
-
-        # 性能优化：使用缓存
-        cache_key = self._get_cache_key()
         if not page_change_only:
-            # 尝试从缓存获取数据
-            cached_books = self._load_books_from_cache(cache_key)
-            if cached_books is not None:
-                filtered_books = cached_books
-                self.logger.debug("使用缓存的书架数据")
-                # 更新进度：缓存命中
-                self._show_loading_animation(f"{get_global_i18n().t('book_on_loadding')}", progress=20)
-                # 当使用缓存时，需要重新获取所有书籍用于筛选
-                all_books = list(self.bookshelf.books.values())
-            else:
-                # 获取已经按用户权限过滤后的书籍进行搜索
-                all_books = list(self.bookshelf.books.values())
-                filtered_books = []
-            
-            # 支持多关键词搜索（逗号分隔，支持AND/OR逻辑）
-            # 格式: "关键词1,关键词2" (OR逻辑) 或 "关键词1+关键词2" (AND逻辑)
-            keywords = []
-            search_logic = "or"  # 默认OR逻辑
-            
-            if search_keyword:
-                if "+" in search_keyword:
-                    # AND逻辑: 关键词1+关键词2
-                    keywords = [k.strip() for k in search_keyword.split("+") if k.strip()]
-                    search_logic = "and"
-                else:
-                    # OR逻辑: 关键词1,关键词2
-                    keywords = [k.strip() for k in search_keyword.split(",") if k.strip()]
-                    search_logic = "or"
-            
-            # 处理search_format参数，确保正确处理NoSelection对象
-            actual_search_format = "all"
-            if search_format != "all" and search_format is not None:
-                # 检查是否是空值或NoSelection对象
-                if search_format == "" or (hasattr(search_format, 'value') and getattr(search_format, 'value', '') == ""):
-                    actual_search_format = "all"
-                else:
-                    # 确保search_format是字符串类型
-                    actual_search_format = str(search_format) if search_format else "all"
-            
-            # 处理search_author参数，确保正确处理NoSelection对象
-            actual_search_author = "all"
-            if search_author != "all" and search_author is not None:
-                # 检查是否是空值或NoSelection对象
-                if search_author == "" or (hasattr(search_author, 'value') and getattr(search_author, 'value', '') == ""):
-                    actual_search_author = "all"
-                else:
-                    # 确保search_author是字符串类型
-                    actual_search_author = str(search_author) if search_author else "all"
-            
-            # 性能优化：批量处理书籍筛选
-            if actual_search_format == "all" and actual_search_author == "all" and not keywords:
-                # 没有搜索条件时，直接使用所有书籍
-                filtered_books = all_books
-                # 更新进度：筛选完成
-                self._show_loading_animation(f"{get_global_i18n().t('book_on_loadding')}", progress=40)
-            else:
-                # 有搜索条件时进行筛选
-                total_books = len(all_books)
-                filtered_books = []
-                
-                for i, book in enumerate(all_books):
-                    # 更新筛选进度
-                    if i % 10 == 0:  # 每10本书更新一次进度
-                        progress = 40 + (i / total_books * 20)  # 40% - 60%
-                        self._show_loading_animation(f"{get_global_i18n().t('book_on_loadding')}", progress=progress)
-                    
-                    # 检查文件格式
-                    format_match = True
-                    
-                    if actual_search_format != "all":
-                        # 书籍的format包含点号（如.txt），下拉框值没有点号（如txt）
-                        book_format_without_dot = book.format.lower().lstrip('.')
-                        format_match = book_format_without_dot == actual_search_format.lower()
-                    
-                    # 检查作者匹配
-                    author_match = True
-                    if actual_search_author != "all":
-                        author_match = book.author.lower() == actual_search_author.lower()
-                    
-                    # 检查关键词匹配
-                    keyword_match = False
-                    if format_match and author_match:
-                        if keywords:
-                            if search_logic == "and":
-                                # AND逻辑：所有关键词都必须匹配
-                                keyword_match = True
-                                for keyword in keywords:
-                                    # 模糊搜索：检查标题、作者、拼音、标签
-                                    title_match = keyword.lower() in book.title.lower()
-                                    author_match_keyword = keyword.lower() in book.author.lower()
-                                    pinyin_match = (hasattr(book, 'pinyin') and book.pinyin and 
-                                                   keyword.lower() in book.pinyin.lower())
-                                    tags_match = (book.tags and keyword.lower() in book.tags.lower())
-                                    
-                                    # 如果任意一个字段匹配当前关键词，继续检查下一个
-                                    if not (title_match or author_match_keyword or pinyin_match or tags_match):
-                                        keyword_match = False
-                                        break
-                            else:
-                                # OR逻辑：任意一个关键词匹配即可
-                                for keyword in keywords:
-                                    title_match = keyword.lower() in book.title.lower()
-                                    author_match_keyword = keyword.lower() in book.author.lower()
-                                    pinyin_match = (hasattr(book, 'pinyin') and book.pinyin and 
-                                                   keyword.lower() in book.pinyin.lower())
-                                    tags_match = (book.tags and keyword.lower() in book.tags.lower())
-                                    
-                                    if title_match or author_match_keyword or pinyin_match or tags_match:
-                                        keyword_match = True
-                                        break
-                        else:
-                            # 没有关键词时，只按格式和作者筛选
-                            keyword_match = True
-                    
-                    if keyword_match and author_match and format_match:
-                        filtered_books.append(book)
-            
-            # 更新进度：排序开始
-            self._show_loading_animation(f"{get_global_i18n().t('book_on_loadding')}", progress=60)
-
-            # 对筛选后的书籍进行排序
+            # 按筛选条件和排序创建分页窗口：筛选、排序都在数据库中完成，只读取当前页的书籍
             # 核心概念：阅读进度 100% 的永远在最后面，无论什么排序方式
-            # 先分组：未完成和已完成
-            not_completed_books = []
-            completed_books = []
-
-            for book in filtered_books:
-                reading_info = self.bookshelf._reading_info_cache.get(book.path, {})
-                progress = reading_info.get('reading_progress', 0)
-                # self.logger.debug(f"书籍: {book.title[:20]}, 进度: {progress}")
-                if progress >= 1.0:
-                    completed_books.append(book)
-                else:
-                    not_completed_books.append(book)
-
-            self.logger.debug(f"未完成: {len(not_completed_books)}, 已完成: {len(completed_books)}")
-
-            # 根据选择的排序字段对两组分别排序
-            if self._sort_column is not None:
-                # 用户点击了表头，使用自定义排序
-                # 预先获取阅读信息，避免在排序时重复查询
-                reading_info_cache = {}
-                for book in not_completed_books + completed_books:
-                    reading_info = self.bookshelf.get_book_reading_info(book.path)
-                    reading_info_cache[book.path] = reading_info
-
-                def get_sort_key(book):
-                    return self._get_sort_key_with_cache(book, self._sort_column, reading_info_cache)
-
-                not_completed_books.sort(key=get_sort_key, reverse=self._sort_reverse)
-                completed_books.sort(key=get_sort_key, reverse=self._sort_reverse)
-
-                self.logger.debug(f"排序字段: {self._sort_column}, 倒序: {self._sort_reverse}")
-                if not_completed_books:
-                    self.logger.debug(f"未完成前3本: {[b.title[:15] for b in not_completed_books[:3]]}")
-                if completed_books:
-                    self.logger.debug(f"已完成前3本: {[b.title[:15] for b in completed_books[:3]]}")
-            else:
-                # 默认按最后阅读时间排序
-                not_completed_books.sort(key=lambda book: self.bookshelf._reading_info_cache.get(book.path, {}).get('last_read_date', ""), reverse=True)
-                completed_books.sort(key=lambda book: self.bookshelf._reading_info_cache.get(book.path, {}).get('last_read_date', ""), reverse=True)
-
-            # 合并：未完成在前，已完成在后
-            self._all_books = not_completed_books + completed_books
-
-            self.logger.debug(f"合并后前3本: {[b.title[:15] for b in self._all_books[:3]]}")
-            if len(self._all_books) > 3:
-                self.logger.debug(f"合并后最后3本: {[b.title[:15] for b in self._all_books[-3:]]}")
+            self._all_books = self.bookshelf.open_book_window(
+                search_keyword, search_format, search_author, self._sort_column, self._sort_reverse)
+        else:
+            # 分页切换或表头排序：复用已统计的数量，按当前排序读取
+            self._all_books = self._sorted_books(self._all_books)
+        self._show_loading_animation(f"{get_global_i18n().t('book_on_loadding')}", progress=60)
         
         # 计算总页数
         self._total_pages = max(1, (len(self._all_books) + self._books_per_page - 1) // self._books_per_page)
@@ -752,13 +521,6 @@ class BookshelfScreen(Screen[None]):
         self._book_index_mapping = {}
         self._row_key_mapping = {}
 
-        # 性能优化：直接使用书架缓存的阅读信息，避免重复查询数据库
-        reading_info_cache = {}
-        for book in current_page_books:
-            # 从书架缓存中获取阅读信息，避免重复查询数据库
-            reading_info = self.bookshelf._reading_info_cache.get(book.path, {})
-            reading_info_cache[book.path] = reading_info
-        
         # 清空当前页的数据，但保留列
         if page_change_only:
             # 只清除行数据，保留列定义
@@ -779,11 +541,11 @@ class BookshelfScreen(Screen[None]):
             row_key = f"{book.path}_{global_index}"
             self._row_key_mapping[row_key] = book.path
             
-            # 从缓存中获取阅读信息
-            reading_info = reading_info_cache.get(book.path, {})
+            # 阅读信息随当前页的书籍一起读出
+            reading_info = self._get_reading_info(book)
             last_read = reading_info.get('last_read_date') or ""
             # 数据库中存储的是小数(0-1),需要乘以100转换为百分比显示
-            progress = reading_info.get('reading_progress', 0) * 100
+            progress = (reading_info.get('reading_progress') or 0) * 100
             
             # 格式化标签显示（直接显示逗号分隔的字符串）
             tags_display = book.tags if book.tags else ""
@@ -860,10 +622,6 @@ class BookshelfScreen(Screen[None]):
         # 更新分页信息显示
         self._update_pagination_info()
         
-        # 性能优化：保存数据到缓存
-        if not page_change_only:
-            self._save_books_to_cache(cache_key, self._all_books)
-        
         # 更新分页按钮状态
         self._update_pagination_buttons()
         
@@ -875,11 +633,7 @@ class BookshelfScreen(Screen[None]):
         try:
             # 统计总数和各格式数量
             total_count = len(books)
-            format_counts = {}
-            
-            for book in books:
-                format_name = book.format.upper()
-                format_counts[format_name] = format_counts.get(format_name, 0) + 1
+            format_counts = self._count_formats(books)
             
             # 构建统计信息文本
             stats_text = get_global_i18n().t("bookshelf.total_books", count=total_count)
@@ -911,6 +665,31 @@ class BookshelfScreen(Screen[None]):
         except Exception as e:
             logger.error(get_global_i18n().t('update_stats_failed', error=str(e)))
     
+    def _count_formats(self, books: Sequence[Book]) -> Dict[str, int]:
+        """各格式（大写）的书籍数量，分页窗口直接使用数据库统计结果"""
+        if isinstance(books, BookWindow):
+            return books.format_counts()
+        format_counts: Dict[str, int] = {}
+        for book in books:
+            format_name = book.format.upper()
+            format_counts[format_name] = format_counts.get(format_name, 0) + 1
+        return format_counts
+    
+    def _sorted_books(self, books: Sequence[Book]) -> Sequence[Book]:
+        """按当前排序设置排序的书籍列表（分页窗口改为读取对应排序的窗口）"""
+        if isinstance(books, BookWindow):
+            if (books.sort_key, books.reverse) == (self._sort_column or DEFAULT_SORT_KEY,
+                                                   self._sort_reverse if self._sort_column else True):
+                return books
+            return books.with_sort(self._sort_column, self._sort_reverse)
+        return books
+    
+    def _get_reading_info(self, book: Book) -> Dict[str, Any]:
+        """当前列表中书籍的阅读信息（分页窗口随书籍一起读出，无需逐本查询）"""
+        if isinstance(self._all_books, BookWindow):
+            return self._all_books.reading_info(book.path)
+        return self.bookshelf.get_book_reading_info(book.path)
+    
     def _update_pagination_info(self) -> None:
         """更新分页信息显示"""
         try:
@@ -921,11 +700,7 @@ class BookshelfScreen(Screen[None]):
             # 由于Textual的Label组件没有renderable属性，我们直接构建新的文本
             # 从统计信息重新构建，而不是尝试从Label中读取
             total_count = len(self._all_books)
-            format_counts = {}
-            
-            for book in self._all_books:
-                format_name = book.format.upper()
-                format_counts[format_name] = format_counts.get(format_name, 0) + 1
+            format_counts = self._count_formats(self._all_books)
             
             # 构建统计信息文本
             stats_text = get_global_i18n().t("bookshelf.total_books", count=total_count)
@@ -950,7 +725,8 @@ class BookshelfScreen(Screen[None]):
         self.logger.info("刷新书架内容")
         # 重置到第一页
         self._current_page = 1
-        # 重新加载书籍数据（保持当前搜索条件）
+        # 重新统计和查询书籍数据（保持当前搜索条件）
+        self._invalidate_books_cache()
         self._load_books(self._search_keyword, self._search_format, self._search_author)
         # 显示刷新成功的提示
         self.notify(get_global_i18n().t("bookshelf.refresh_success"))
@@ -1215,41 +991,9 @@ class BookshelfScreen(Screen[None]):
             self._sort_column = actual_sort_key
             self._sort_reverse = reverse
 
-            # 对当前书籍列表进行排序（保持搜索条件）
-            # 核心概念：阅读进度 100% 的永远在最后面，无论什么排序方式
-            not_completed_books = []
-            completed_books = []
-
-            for book in self._all_books:
-                reading_info = self.bookshelf._reading_info_cache.get(book.path, {})
-                progress = reading_info.get('reading_progress', 0)
-                if progress >= 1.0:
-                    completed_books.append(book)
-                else:
-                    not_completed_books.append(book)
-
-            self.logger.debug(f"排序前 - 未完成: {len(not_completed_books)}, 已完成: {len(completed_books)}")
-
-            # 预先获取阅读信息
-            reading_info_cache = {}
-            for book in not_completed_books + completed_books:
-                reading_info = self.bookshelf.get_book_reading_info(book.path)
-                reading_info_cache[book.path] = reading_info
-
-            def get_sort_key(book):
-                return self._get_sort_key_with_cache(book, self._sort_column, reading_info_cache)
-
-            not_completed_books.sort(key=get_sort_key, reverse=self._sort_reverse)
-            completed_books.sort(key=get_sort_key, reverse=self._sort_reverse)
-
-            # 合并：未完成在前，已完成在后
-            self._all_books = not_completed_books + completed_books
-
+            # 对当前书籍列表进行排序（保持搜索条件，排序在数据库中完成）
+            self._all_books = self._sorted_books(self._all_books)
             self.logger.debug(f"排序后 - 总计: {len(self._all_books)}, 排序字段: {self._sort_column}, 倒序: {self._sort_reverse}")
-            if not_completed_books:
-                self.logger.debug(f"未完成前3本: {[b.title[:15] for b in not_completed_books[:3]]}")
-            if completed_books:
-                self.logger.debug(f"已完成前3本: {[b.title[:15] for b in completed_books[:3]]}")
 
             # 重新计算分页信息
             self._total_pages = max(1, (len(self._all_books) + self._books_per_page - 1) // self._books_per_page)
@@ -1296,12 +1040,6 @@ class BookshelfScreen(Screen[None]):
             self._book_index_mapping = {}
             self._row_key_mapping = {}
             
-            # 性能优化：批量处理阅读历史信息
-            reading_info_cache = {}
-            for book in current_page_books:
-                reading_info = self.bookshelf.get_book_reading_info(book.path)
-                reading_info_cache[book.path] = reading_info
-            
             # 清空当前页的数据，但保留列
             if page_change_only:
                 # 只清除行数据，保留列定义
@@ -1322,11 +1060,11 @@ class BookshelfScreen(Screen[None]):
                 row_key = f"{book.path}_{global_index}"
                 self._row_key_mapping[row_key] = book.path
                 
-                # 从缓存中获取阅读信息
-                reading_info = reading_info_cache.get(book.path, {})
+                # 阅读信息随当前页的书籍一起读出
+                reading_info = self._get_reading_info(book)
                 last_read = reading_info.get('last_read_date') or ""
                 # 数据库中存储的是小数(0-1),需要乘以100转换为百分比显示
-                progress = reading_info.get('reading_progress', 0) * 100
+                progress = (reading_info.get('reading_progress') or 0) * 100
                 
                 # 格式化标签显示（直接显示逗号分隔的字符串）
                 tags_display = book.tags if book.tags else ""
@@ -1455,70 +1193,6 @@ class BookshelfScreen(Screen[None]):
         except Exception as e:
             self.logger.error(f"表头点击事件处理失败: {e}")
 
-    def _get_sort_key_with_cache(self, book: Book, column_key: str, reading_info_cache: Dict[str, Dict[str, Any]]) -> Any:
-        """获取书籍的排序键值（使用缓存的阅读信息）
-
-        Args:
-            book: 书籍对象
-            column_key: 排序的列键
-            reading_info_cache: 阅读信息缓存
-
-        Returns:
-            排序键值
-        """
-        if column_key == "id":
-            # ID排序，使用路径作为唯一标识
-            return book.path or ""
-        elif column_key == "title":
-            # 标题排序
-            return book.title or ""
-        elif column_key == "author":
-            # 作者排序
-            return book.author or ""
-        elif column_key == "format":
-            # 格式排序，转换为小写进行比较
-            return book.format.lower() if book.format else ""
-        elif column_key == "size":
-            # 大小排序，使用原始字节数
-            return book.size or 0
-        elif column_key == "file_size":
-            # 文件大小排序，使用原始字节数
-            return getattr(book, 'file_size', 0) or 0
-        elif column_key == "last_read" or column_key == "last_read_date":
-            # 最后阅读时间排序
-            from datetime import datetime
-            try:
-                reading_info = reading_info_cache.get(book.path, {})
-                last_read = reading_info.get('last_read_date') or ""
-                if last_read:
-                    return datetime.fromisoformat(last_read)
-                else:
-                    return datetime.min
-            except:
-                return datetime.min
-        elif column_key == "progress":
-            # 进度排序，从阅读信息中获取
-            try:
-                reading_info = reading_info_cache.get(book.path, {})
-                return reading_info.get('reading_progress', 0) or 0
-            except:
-                return 0.0
-        elif column_key == "tags":
-            # 标签排序
-            return book.tags or ""
-        elif column_key == "add_date":
-            # 添加日期排序
-            from datetime import datetime
-            try:
-                if hasattr(book, 'add_date') and book.add_date:
-                    return datetime.fromisoformat(book.add_date)
-                else:
-                    return datetime.min
-            except:
-                return datetime.min
-        # 默认返回空字符串，避免None导致的比较错误
-        return ""
-
     @on(DataTable.CellSelected, "#books-table")
     def on_data_table_cell_selected(self, event: DataTable.CellSelected) -> None:
         """
@@ -2017,7 +1691,7 @@ class BookshelfScreen(Screen[None]):
                             # 设置一个特殊的搜索参数，强制_load_books认为搜索条件已改变
                             self._last_search_params = "__force_reload__"
                             # 刷新书库内存缓存和书架列表（保持当前搜索条件）
-                            self.bookshelf._load_books()
+                            self.bookshelf.invalidate_books()
                             self._load_books(
                                 search_keyword=self._search_keyword,
                                 search_format=self._search_format,
@@ -2172,113 +1846,14 @@ class BookshelfScreen(Screen[None]):
                 self._sort_column = result["sort_key"]
                 self._sort_reverse = result["reverse"]
 
-                # 对当前书籍列表进行排序（保持搜索条件）
-                # 核心概念：阅读进度 100% 的永远在最后面，无论什么排序方式
-                not_completed_books = []
-                completed_books = []
-
-                for book in self._all_books:
-                    reading_info = self.bookshelf._reading_info_cache.get(book.path, {})
-                    progress = reading_info.get('reading_progress', 0)
-                    if progress >= 1.0:
-                        completed_books.append(book)
-                    else:
-                        not_completed_books.append(book)
-
-                self.logger.debug(f"排序前 - 未完成: {len(not_completed_books)}, 已完成: {len(completed_books)}")
-
-                # 预先获取阅读信息
-                reading_info_cache = {}
-                for book in not_completed_books + completed_books:
-                    reading_info = self.bookshelf.get_book_reading_info(book.path)
-                    reading_info_cache[book.path] = reading_info
-
-                def get_sort_key(book):
-                    return self._get_sort_key_with_cache(book, self._sort_column, reading_info_cache)
-
-                not_completed_books.sort(key=get_sort_key, reverse=self._sort_reverse)
-                completed_books.sort(key=get_sort_key, reverse=self._sort_reverse)
-
-                # 合并：未完成在前，已完成在后
-                sorted_books = not_completed_books + completed_books
-
-                self.logger.debug(f"排序后 - 总计: {len(sorted_books)}, 排序字段: {self._sort_column}, 倒序: {self._sort_reverse}")
-                if not_completed_books:
-                    self.logger.debug(f"未完成前3本: {[b.title[:15] for b in not_completed_books[:3]]}")
-                if completed_books:
-                    self.logger.debug(f"已完成前3本: {[b.title[:15] for b in completed_books[:3]]}")
-
-                # 更新当前书籍列表
-                self._all_books = sorted_books
+                # 对当前书籍列表进行排序（保持搜索条件，排序在数据库中完成）
+                self._all_books = self._sorted_books(self._all_books)
+                self.logger.debug(f"排序后 - 总计: {len(self._all_books)}, 排序字段: {self._sort_column}, 倒序: {self._sort_reverse}")
 
-                # 更新表格显示排序后的书籍
-                table = self.query_one("#books-table", DataTable)
-                table.clear()
-
-                # 更新序号到书籍路径的映射
-                self._book_index_mapping = {}
-                # 创建行键到书籍路径的映射
-                self._row_key_mapping = {}
-
-                for index, book in enumerate(sorted_books, 1):
-                    # 存储序号到路径的映射
-                    self._book_index_mapping[str(index)] = book.path
-                    # 存储行键到路径的映射
-                    row_key = f"{book.path}_{index}"
-                    self._row_key_mapping[row_key] = book.path
-
-                    # 从reading_history表获取阅读信息
-                    reading_info = self.bookshelf.get_book_reading_info(book.path)
-                    last_read = reading_info.get('last_read_date') or ""
-                    # 数据库中存储的是小数(0-1),需要乘以100转换为百分比显示
-                    progress = reading_info.get('reading_progress', 0) * 100
-
-                    # 格式化标签显示（直接显示逗号分隔的字符串）
-                    tags_display = book.tags if book.tags else ""
-
-                    # 添加操作按钮
-                    # 文件不存在时，不显示阅读、查看文件、重命名、预览按钮
-                    if getattr(book, 'file_not_found', False):
-                        read_button = ""
-                        view_file_button = ""
-                        rename_button = ""
-                        preview_button = ""
-                        delete_button = f"[{get_global_i18n().t('bookshelf.delete')}]"
-                    else:
-                        read_button = f"[{get_global_i18n().t('bookshelf.read')}]"
-                        view_file_button = f"[{get_global_i18n().t('bookshelf.view_file')}]"
-                        rename_button = f"[{get_global_i18n().t('bookshelf.rename')}]"
-                        preview_button = f"[{get_global_i18n().t('crawler.preview')}]"
-                        delete_button = f"[{get_global_i18n().t('bookshelf.delete')}]"
-
-                    # 如果文件不存在，在标题前添加标记
-                    display_title = book.title
-                    if getattr(book, 'file_not_found', False):
-                        display_title = f"[书籍文件不存在] {book.title}"
-
-                    # 格式化文件大小显示
-                    from src.utils.file_utils import FileUtils
-                    size_display = FileUtils.format_file_size(book.file_size) if hasattr(book, 'file_size') and book.file_size else ""
-
-                    table.add_row(
-                        str(index),  # 显示数字序号而不是路径
-                        display_title,
-                        book.author,
-                        book.format.upper(),
-                        size_display,  # 文件大小显示
-                        last_read,
-                        f"{progress:.1f}%",
-                        tags_display,
-                        read_button,  # 阅读按钮
-                        view_file_button,  # 查看文件按钮
-                        rename_button,  # 重命名按钮
-                        preview_button,  # 预览按钮
-                        delete_button,  # 删除按钮,
-                        key=f"{book.path}_{index}"  # 使用唯一的key，避免重复（book.path + 索引）
-                    )
+                # 回到第一页，只显示当前页的书籍
                 self._total_pages = max(1, (len(self._all_books) + self._books_per_page - 1) // self._books_per_page)
-                # 回到第一页
                 self._current_page = 1
+                self._load_current_page(page_change_only=True)
 
                 # 更新分页控件状态
                 self._update_pagination_controls()
@@ -2352,6 +1927,7 @@ class BookshelfScreen(Screen[None]):
             """处理批量操作结果"""
             if result and result.get("refresh"):
                 # 重新加载书籍数据（保持当前搜索条件）
+                self._invalidate_books_cache()
                 self._load_books(
                     search_keyword=self._search_keyword,
                     search_format=self._search_format,
@@ -2460,13 +2036,16 @@ class BookshelfScreen(Screen[None]):
 
             # 3) 后台逐本导入（add_book 内部会与数据库对比去重并入库）
             added = 0
+            added_books = []
             failed: List[str] = []
             last_notify = [0]
             last_anim_pct = [-1]
             for i, fp in enumerate(book_files):
                 try:
-                    if self.book_manager.add_book(fp, index_content=False):
+                    book = self.book_manager.add_book(fp, index_content=False)
+                    if book:
                         added += 1
+                        added_books.append(book)
                     else:
                         failed.append(fp)
                 except Exception as e:
@@ -2496,6 +2075,7 @@ class BookshelfScreen(Screen[None]):
                     lambda: self.notify(i18n.t("bookshelf.add_books_failed"), severity="error")
                 )
             self.app.call_from_thread(self._refresh_after_import)
+            self._warn_possible_duplicates(added_books)
 
         threading.Thread(target=worker, daemon=True).start()
 
@@ -2511,13 +2091,16 @@ class BookshelfScreen(Screen[None]):
 
         def worker() -> None:
             added = 0
+            added_books = []
             failed: List[str] = []
             last_notify = [0]
             last_anim_pct = [-1]
             for i, fp in enumerate(file_paths):
                 try:
-                    if self.book_manager.add_book(fp, index_content=False):
+                    book = self.book_manager.add_book(fp, index_content=False)
+                    if book:
                         added += 1
+                        added_books.append(book)
                     else:
                         failed.append(fp)
                 except Exception as e:
@@ -2546,9 +2129,31 @@ class BookshelfScreen(Screen[None]):
                     lambda: self.notify(i18n.t("bookshelf.add_books_failed"), severity="error")
                 )
             self.app.call_from_thread(self._refresh_after_import)
+            self._warn_possible_duplicates(added_books)
 
         threading.Thread(target=worker, daemon=True).start()
 
+    def _warn_possible_duplicates(self, books: List[Any]) -> None:
+        """导入完成后检查新书是否与书库中的书近似重复，有则提示（在后台线程中调用）"""
+        config_manager = getattr(self.app, 'config_manager', None)
+        if config_manager and not config_manager.get_config().get('advanced', {}).get('duplicate_warning_on_import', True):
+            return
+        duplicates = self.bookshelf.find_possible_duplicates(books)
+        if not duplicates:
+            return
+        path, others = next(iter(duplicates.items()))
+        i18n = get_global_i18n()
+        msg = i18n.t(
+            "bookshelf.possible_duplicates",
+            count=len(duplicates),
+            title=os.path.splitext(os.path.basename(path))[0],
+            other=os.path.splitext(os.path.basename(others[0]))[0],
+        )
+        try:
+            self.app.call_from_thread(lambda: self.notify(msg, severity="warning", timeout=10))
+        except Exception:
+            pass  # 应用可能已退出
+
     def _refresh_after_import(self) -> None:
         """导入完成后刷新书架（仅在当前界面仍挂载时执行，避免导航离开后报错）"""
         if not self.is_attached:
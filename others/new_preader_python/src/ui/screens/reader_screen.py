@@ -44,7 +44,7 @@ from src.utils.text_to_speech import TextToSpeech as TTSManager
 from src.core.translation_manager import TranslationManager
 from src.core.vocabulary_manager import VocabularyManager
 from src.config.settings.setting_registry import SettingRegistry
-from src.ui.messages import RefreshBookshelfMessage, RefreshContentMessage
+from src.ui.messages import RefreshBookshelfMessage, RefreshContentMessage, PaginationProgressMessage
 from src.ui.styles.style_manager import ScreenStyleMixin
 from src.ui.styles.comprehensive_style_isolation import apply_comprehensive_style_isolation, remove_comprehensive_style_isolation
 
@@ -171,6 +171,14 @@ class ReaderScreen(ScreenStyleMixin, Screen[None]):
             config=self.render_config,
             theme_manager=self.theme_manager
         )
+        # 首次分页时同步排版到上次阅读位置，其余页面由后台继续排版
+        try:
+            self.renderer.set_layout_hint(
+                page_index=int(getattr(self.book, "current_page", 0) or 0),
+                offset=int(getattr(self.book, "current_position", 0) or 0)
+            )
+        except Exception:
+            pass
         # 尺寸变化防抖与异步分页状态
         self._resize_timer = None
         self._pending_size = None
@@ -467,6 +475,11 @@ class ReaderScreen(ScreenStyleMixin, Screen[None]):
 
     def _build_page_offsets(self) -> None:
         """更稳健的页偏移构建：近邻窗口多级匹配，降低偏移漂移"""
+        # 增量分页直接提供精确的页/行偏移检查点，无需在原文中匹配
+        page_index = self.renderer.get_page_index() if hasattr(self.renderer, "get_page_index") else None
+        if page_index is not None:
+            self._page_offsets, self._line_offsets_per_page = page_index
+            return
         try:
             pages = getattr(self.renderer, "all_pages", None)
             if not pages:
@@ -582,6 +595,10 @@ class ReaderScreen(ScreenStyleMixin, Screen[None]):
     
     def _find_page_for_offset(self, offset: int) -> int:
         """根据字符偏移在当前分页中定位页码（0-based），找不到时返回0"""
+        if hasattr(self.renderer, "find_page_for_offset"):
+            page = self.renderer.find_page_for_offset(offset)
+            if page is not None:
+                return page
         if not self._page_offsets:
             return 0
         import bisect
@@ -3241,6 +3258,13 @@ class ReaderScreen(ScreenStyleMixin, Screen[None]):
         except Exception as e:
             logger.debug(f"统一恢复位置失败: {e}")
 
+    def on_pagination_progress_message(self, message: PaginationProgressMessage) -> None:
+        """后台分页进度：同步总页数并刷新状态栏"""
+        if message.complete:
+            self._build_page_offsets()
+        self.total_pages = self.renderer.total_pages
+        self._update_ui()
+
     def on_refresh_content_message(self, message: RefreshContentMessage) -> None:
         """处理刷新内容消息：异步分页完成后恢复到上次阅读位置并刷新UI"""
         logger.info(get_global_i18n().t('common.refresh_content'))
@@ -721,6 +721,7 @@ class UsersManagementScreen(Screen[None]):
                         cur.execute("DELETE FROM user_permissions WHERE user_id=?", (target_uid,))
                         conn.commit()
                         conn.close()
+                        self.db_manager.invalidate_permission_cache(target_uid)
                         self._reload_users_table()
                     except Exception as e:
                         logger.error(f"删除用户失败: {e}")
@@ -10,6 +10,7 @@ from enum import Enum
 from src.core.book import Book
 from src.utils.file_utils import FileUtils
 from src.utils.string_utils import StringUtils
+from src.utils.fingerprint_store import cached_file_hash
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -157,8 +158,9 @@ class BookDuplicateDetector:
         hash_match = False
         try:
             if os.path.exists(book1.path) and os.path.exists(book2.path):
-                hash1 = FileUtils.calculate_file_sha256(book1.path)
-                hash2 = FileUtils.calculate_file_sha256(book2.path)
+                # 文件哈希持久化保存，两两比较时不再重复读取整个文件
+                hash1 = cached_file_hash(book1.path)
+                hash2 = cached_file_hash(book2.path)
                 hash_match = hash1 == hash2
         except Exception as e:
             logger.error(f"计算文件哈希时出错: {e}")
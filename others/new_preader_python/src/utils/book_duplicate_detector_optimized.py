@@ -9,12 +9,16 @@ from dataclasses import dataclass
 from enum import Enum
 
 from src.core.book import Book
-from src.utils.file_utils import FileUtils
 from src.utils.string_utils import StringUtils
+from src.utils.cache_manager import LRUCache, register_cache
+from src.utils.fingerprint_store import cached_file_hash, get_file_key, get_fingerprint_store
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 内容采样缓存：两两比较时每本书会被多次采样，先查进程内缓存，再查持久化指纹存储
+_sample_cache = register_cache("duplicate_samples", LRUCache(max_items=4096, max_bytes=64 * 1024 * 1024))
+
 class DuplicateType(Enum):
     """重复类型"""
     FILE_NAME = "文件名相同"
@@ -86,7 +90,7 @@ class OptimizedBookDuplicateDetector:
             # 计算文件哈希
             try:
                 if os.path.exists(book.path):
-                    file_hash = FileUtils.calculate_file_sha256(book.path)
+                    file_hash = cached_file_hash(book.path)
                     if file_hash not in hash_to_books:
                         hash_to_books[file_hash] = []
                     hash_to_books[file_hash].append(book)
@@ -403,8 +407,8 @@ class OptimizedBookDuplicateDetector:
         hash_match = False
         try:
             if os.path.exists(book1.path) and os.path.exists(book2.path):
-                hash1 = FileUtils.calculate_file_sha256(book1.path)
-                hash2 = FileUtils.calculate_file_sha256(book2.path)
+                hash1 = cached_file_hash(book1.path)
+                hash2 = cached_file_hash(book2.path)
                 hash_match = hash1 == hash2
         except Exception as e:
             logger.error(f"计算文件哈希时出错: {e}")
@@ -470,7 +474,7 @@ class OptimizedBookDuplicateDetector:
     def _get_book_content_enhanced(book: Book, sample_size: int = 15000) -> Optional[str]:
         """
         获取增强的书籍内容采样（用于更准确的重复检测）
-        从多个位置采样以捕获整本和部分章节的关系
+        从多个位置采样以捕获整本和部分章节的关系；采样结果按文件大小与修改时间持久化
         
         Args:
             book: 书籍对象
@@ -479,6 +483,27 @@ class OptimizedBookDuplicateDetector:
         Returns:
             Optional[str]: 书籍内容采样
         """
+        file_key = get_file_key(book.path)
+        if file_key is None:
+            return None
+        cache_key = (book.path, sample_size, file_key)
+        content = _sample_cache.get(cache_key)
+        if content is None:
+            store = get_fingerprint_store()
+            variant = f"optimized-{sample_size}"
+            record = store.get(book.path, variant) if store else None
+            if record is not None:
+                content = record["content_sample"]
+            else:
+                content = OptimizedBookDuplicateDetector._read_book_content_enhanced(book, sample_size) or ""
+                if store:
+                    store.put_many([{"path": book.path, "content_sample": content}], variant)
+            _sample_cache.set(cache_key, content)
+        return content or None
+    
+    @staticmethod
+    def _read_book_content_enhanced(book: Book, sample_size: int) -> Optional[str]:
+        """从文件多个位置读取内容采样"""
         try:
             if not os.path.exists(book.path):
                 return None
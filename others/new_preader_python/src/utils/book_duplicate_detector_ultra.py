@@ -69,8 +69,10 @@ class DaemonThreadPoolExecutor(ThreadPoolExecutor):
         return future
 
 from src.core.book import Book
-from src.utils.file_utils import FileUtils
 from src.utils.string_utils import StringUtils
+from src.utils.fingerprint_store import cached_file_hash, get_fingerprint_store, minhash_signature
+from src.utils.fingerprint_pool import compute_fingerprints
+from src.utils.near_duplicate_index import SimHashIndex
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -124,6 +126,7 @@ class BookFingerprint:
     title_keywords: Set[str] = field(default_factory=set)
     content_sample: str = ""
     normalized_name: str = ""
+    minhash: Tuple[int, ...] = ()  # MinHash签名（持久化，供近似去重使用）
 
 
 class UltraBookDuplicateDetector:
@@ -159,6 +162,9 @@ class UltraBookDuplicateDetector:
     # 并行参数
     MAX_WORKERS = None  # 自动检测CPU核心数
     
+    # 持久化指纹存储中的记录类型（采样或指纹算法变化时修改）
+    FINGERPRINT_VARIANT = "ultra"
+    
     # 缓存
     _hash_cache: Dict[str, str] = {}
     _content_cache: Dict[str, str] = {}
@@ -356,70 +362,84 @@ class UltraBookDuplicateDetector:
     
     def _compute_all_fingerprints(self, books: List[Book], progress_callback=None) -> List[BookFingerprint]:
         """
-        并行计算所有书籍的指纹信息
+        计算所有书籍的指纹信息（持久化指纹未命中的书籍分批交给进程池计算）
         
         这是性能关键：一次性提取所有需要的特征，后续不再读取文件
         """
-        fingerprints = []
         total = len(books)
-        completed = [0]  # 使用列表以便在闭包中修改
-        lock = threading.Lock()
         
-        def compute_one(book: Book) -> Optional[BookFingerprint]:
+        # 书库未变化的书籍直接使用持久化指纹，不再读取文件
+        store = get_fingerprint_store()
+        stored = store.get_many([book.path for book in books], self.FINGERPRINT_VARIANT) if store else {}
+        if stored:
+            logger.info(f"  ✓ 持久化指纹命中 {len(stored)}/{total} 本")
+        
+        # 计算SimHash、MinHash和内容采样是纯Python的CPU密集循环，使用多进程绕开GIL
+        tasks = [(book.path, book.file_name, getattr(book, 'size', 0) or 0)
+                 for book in books if book.path not in stored]
+        hit_count = len(stored)
+        new_records = compute_fingerprints(
+            _compute_fingerprint_chunk,
+            tasks,
+            workers=self.MAX_WORKERS,
+            progress_callback=(lambda done, _: progress_callback(hit_count + done, total)) if progress_callback else None,
+            is_cancelled=self.is_cancelled,
+            register_executor=self.register_executor,
+            unregister_executor=self.unregister_executor,
+        )
+        if self.is_cancelled():
+            logger.info("  ⛔ 指纹提取被用户取消")
+        
+        # 新增或变化的书籍写入持久化指纹存储，下次检测直接使用
+        if store and new_records:
+            store.put_many(new_records, self.FINGERPRINT_VARIANT)
+        
+        records = dict(stored)
+        records.update((record["path"], record) for record in new_records)
+        fingerprints = []
+        for book in books:
+            record = records.get(book.path)
+            if record is None:
+                continue
             try:
                 fp = BookFingerprint(book=book)
                 fp.normalized_name = book.file_name.lower().strip()
-                
-                # 计算文件哈希（带缓存）
-                fp.file_hash = self._get_cached_hash(book.path)
-                
-                # 计算SimHash和内容采样（带缓存）
-                content = self._get_cached_content(book.path)
-                if content:
-                    fp.simhash = UltraBookDuplicateDetector._compute_simhash(content)
-                    fp.content_sample = content[:5000] if len(content) > 5000 else content
-                    
-                    # 提取统计特征
-                    lines = content.count('\n')
-                    words = len(re.findall(r'[\u4e00-\u9fa5a-zA-Z]+', content))
-                    chars = len(re.sub(r'\s+', '', content))
-                    fp.size_features = (lines, words, chars)
+                fp.file_hash = record["file_hash"]
+                if record.get("content_sample"):
+                    fp.simhash = record["simhash"]
+                    fp.minhash = record["minhash"]
+                    fp.content_sample = record["content_sample"]
+                    fp.size_features = record["size_features"]
                     
                     # 提取标题关键词
                     fp.title_keywords = self._extract_title_keywords(book.title)
-                
-                # 更新进度
-                with lock:
-                    completed[0] += 1
-                    if progress_callback and completed[0] % 50 == 0:
-                        progress_callback(completed[0], total)
-                
-                return fp
+                fingerprints.append(fp)
             except Exception as e:
                 logger.error(f"计算书籍指纹失败: {book.path}, 错误: {e}")
-                return None
-        
-        # 并行计算（使用DaemonThreadPoolExecutor确保线程可被终止）
-        with DaemonThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
-            # 注册到全局列表，以便取消时能强制关闭
-            self.register_executor(executor)
-            
-            futures = [executor.submit(compute_one, book) for book in books]
-            for future in as_completed(futures):
-                # 检查是否已取消
-                if self.is_cancelled():
-                    logger.info("  ⛔ 指纹提取被用户取消")
-                    break
-                    
-                result = future.result()
-                if result:
-                    fingerprints.append(result)
-            
-            # 注销（with块结束会自动关闭）
-            self.unregister_executor(executor)
         
         return fingerprints
     
+    def _compute_fingerprint_record(self, path: str, file_name: str) -> Dict:
+        """读取文件并计算一本书的指纹记录（可持久化的部分）"""
+        # 计算文件哈希（带缓存）
+        record = {"path": path, "file_hash": self._get_cached_hash(path),
+                  "normalized_title": file_name.lower().strip()}
+        
+        # 计算SimHash、MinHash和内容采样
+        content = self._get_cached_content(path)
+        if content:
+            # 提取统计特征
+            lines = content.count('\n')
+            words = len(re.findall(r'[\u4e00-\u9fa5a-zA-Z]+', content))
+            chars = len(re.sub(r'\s+', '', content))
+            record.update(
+                simhash=UltraBookDuplicateDetector._compute_simhash(content),
+                minhash=minhash_signature(re.sub(r'\s+', '', content).lower()),
+                content_sample=content[:5000] if len(content) > 5000 else content,
+                size_features=(lines, words, chars),
+            )
+        return record
+    
     def _get_cached_hash(self, path: str) -> str:
         """获取或计算文件SHA256哈希（带缓存）"""
         if path in self._hash_cache:
@@ -427,7 +447,7 @@ class UltraBookDuplicateDetector:
         
         try:
             if os.path.exists(path):
-                h = FileUtils.calculate_file_sha256(path)
+                h = cached_file_hash(path, persist=False)
                 with self._cache_lock:
                     self._hash_cache[path] = h
                 return h
@@ -654,6 +674,9 @@ class UltraBookDuplicateDetector:
         groups = []
         processed_indices = set()
         
+        # 海明距离候选由向量化索引一次算出，循环内只做内容验证
+        neighbors = self._simhash_neighbors(valid_fps)
+        
         for i in range(len(valid_fps)):
             if i in processed_indices:
                 continue
@@ -663,37 +686,33 @@ class UltraBookDuplicateDetector:
             # 收集候选书籍（基于SimHash）
             candidate_pairs = []  # (fp, content_similarity)
             
-            for j in range(i + 1, len(valid_fps)):
+            for j, dist in neighbors.get(i, ()):
                 if j in processed_indices:
                     continue
                     
                 fp2 = valid_fps[j]
                 
-                # 快速海明距离检查
-                dist = self.hamming_distance(fp1.simhash, fp2.simhash)
+                # 【关键改进】计算实际内容相似度进行验证
+                content_sim = 0.0
+                if fp1.content_sample and fp2.content_sample and len(fp1.content_sample) > 50 and len(fp2.content_sample) > 50:
+                    content_sim = StringUtils.book_content_similarity(
+                        fp1.content_sample, fp2.content_sample, 
+                        sample_size=8000
+                    )
                 
-                if dist <= self.SIMHASH_THRESHOLD:
-                    # 【关键改进】计算实际内容相似度进行验证
-                    content_sim = 0.0
-                    if fp1.content_sample and fp2.content_sample and len(fp1.content_sample) > 50 and len(fp2.content_sample) > 50:
-                        content_sim = StringUtils.book_content_similarity(
-                            fp1.content_sample, fp2.content_sample, 
-                            sample_size=8000
-                        )
-                    
-                    # 只有通过初步验证的才加入候选
-                    # 条件：有内容且相似度>=20%，或没有内容但海明距离极小(<=1)
-                    should_include = False
-                    if content_sim >= 0.20:
-                        should_include = True
-                    elif content_sim == 0 and dist <= 1:  # 没有内容但哈希几乎相同
-                        should_include = True
-                    elif fp1.normalized_name == fp2.normalized_name:  # 文件名相同
-                        should_include = True
-                    
-                    if should_include:
-                        candidate_pairs.append((fp2, content_sim))
-                        processed_indices.add(j)
+                # 只有通过初步验证的才加入候选
+                # 条件：有内容且相似度>=20%，或没有内容但海明距离极小(<=1)
+                should_include = False
+                if content_sim >= 0.20:
+                    should_include = True
+                elif content_sim == 0 and dist <= 1:  # 没有内容但哈希几乎相同
+                    should_include = True
+                elif fp1.normalized_name == fp2.normalized_name:  # 文件名相同
+                    should_include = True
+                
+                if should_include:
+                    candidate_pairs.append((fp2, content_sim))
+                    processed_indices.add(j)
             
             if len(candidate_pairs) >= 1:  # 至少有一个候选（加上自身共2+本）
                 # 计算最大相似度
@@ -737,81 +756,25 @@ class UltraBookDuplicateDetector:
     
     def _simhash_large_scale(self, valid_fps: List[BookFingerprint]) -> List[DuplicateGroup]:
         """
-        大规模SimHash检测（>3000本）- 使用分块索引
+        大规模SimHash检测（>3000本）- 使用向量化SimHash索引
         
         原理：
-        将64位SimHash分成16个4位的块，对每个块建立倒排索引。
-        如果两个SimHash的海明距离≤3，则它们至少在一个块上完全相同。
-        这样只需比较在同一块的候选集，大幅减少比较次数。
+        SimHash存放在连续的uint64数组中，按行块做异或+popcount（NumPy向量化），
+        一次得到全部海明距离≤阈值的书对。结果精确，不再按4位分块建倒排索引后对大桶抽样。
         
-        时间复杂度：从O(n²)降至约O(n * m)，m为平均块大小（通常<<n）
+        时间复杂度：O(n²/2)次位运算，但全部在向量化代码中完成（2万本约数秒）
         """
         from collections import defaultdict
         
         groups = []
-        BLOCK_SIZE = 4  # 每个块4位
-        NUM_BLOCKS = self.SIMHASH_BITS // BLOCK_SIZE  # 16个块
         THRESHOLD = self.SIMHASH_THRESHOLD  # 海明距离阈值
         
-        logger.info(f"  使用分块索引算法处理{len(valid_fps)}本书")
-        
-        # 为每个块建立倒排索引
-        # block_index[block_num][block_value] = list of fingerprint indices
-        block_indexes: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(NUM_BLOCKS)]
-        
-        for idx, fp in enumerate(valid_fps):
-            simhash = fp.simhash
-            for block_num in range(NUM_BLOCKS):
-                # 提取第block_num个块的值（4位）
-                shift = (NUM_BLOCKS - 1 - block_num) * BLOCK_SIZE
-                mask = (1 << BLOCK_SIZE) - 1
-                block_value = (simhash >> shift) & mask
-                block_indexes[block_num][block_value].append(idx)
+        logger.info(f"  使用向量化SimHash索引处理{len(valid_fps)}本书")
         
         # 收集候选对
-        candidate_pairs: Set[Tuple[int, int]] = set()
-        
-        def check_and_add_pair(i: int, j: int):
-            """检查海明距离并添加到候选集"""
-            if i >= j:  # 避免重复和自比较
-                return
-            dist = self.hamming_distance(valid_fps[i].simhash, valid_fps[j].simhash)
-            if dist <= THRESHOLD:
-                candidate_pairs.add((i, j))
-        
-        # 对每个块中的每个桶进行检查
-        total_buckets = sum(len(block_indexes[b]) for b in range(NUM_BLOCKS))
-        checked_buckets = 0
-        
-        for block_num in range(NUM_BLOCKS):
-            for bucket_value, indices_in_bucket in block_indexes[block_num].items():
-                bucket_size = len(indices_in_bucket)
-                
-                if bucket_size < 2:
-                    checked_buckets += 1
-                    continue
-                
-                # 如果桶太小，直接全部两两检查
-                if bucket_size <= 100:
-                    for i_idx in range(bucket_size):
-                        for j_idx in range(i_idx + 1, bucket_size):
-                            check_and_add_pair(indices_in_bucket[i_idx], indices_in_bucket[j_idx])
-                else:
-                    # 大桶采样检查（优化版：增加采样量以减少遗漏）
-                    import random
-                    sample_size = min(5000, bucket_size)  # 从2000增加到5000
-                    sampled_indices = random.sample(indices_in_bucket, sample_size)
-                    
-                    for i_idx in range(len(sampled_indices)):
-                        for j_idx in range(i_idx + 1, len(sampled_indices)):
-                            check_and_add_pair(sampled_indices[i_idx], sampled_indices[j_idx])
-                
-                checked_buckets += 1
-                
-                # 定期输出进度
-                if checked_buckets % 1000 == 0:
-                    progress_pct = checked_buckets / total_buckets * 100
-                    logger.info(f"  分块索引进度: {progress_pct:.1f}% ({checked_buckets}/{total_buckets})")
+        candidate_pairs: Set[Tuple[int, int]] = {
+            (i, j) for i, j, _ in self._build_simhash_index(valid_fps).pairs(THRESHOLD)
+        }
         
         logger.info(f"  候选对数量: {len(candidate_pairs)}")
         
@@ -921,6 +884,18 @@ class UltraBookDuplicateDetector:
         
         return groups
     
+    @staticmethod
+    def _build_simhash_index(valid_fps: List[BookFingerprint]) -> SimHashIndex:
+        """以书籍在列表中的序号为键建立SimHash索引"""
+        index = SimHashIndex()
+        for idx, fp in enumerate(valid_fps):
+            index.add(idx, fp.simhash)
+        return index
+    
+    def _simhash_neighbors(self, valid_fps: List[BookFingerprint]) -> Dict[int, List[Tuple[int, int]]]:
+        """每本书之后、SimHash海明距离不超过阈值的书：序号 -> [(序号, 海明距离)]"""
+        return self._build_simhash_index(valid_fps).neighbors(self.SIMHASH_THRESHOLD)
+    
     def _detect_by_deep_content(self, fingerprints: List[BookFingerprint], 
                                  progress_callback=None) -> List[DuplicateGroup]:
         """
@@ -1674,3 +1649,25 @@ class UltraBookDuplicateDetector:
         
         group.recommended_to_keep = [sorted_books[0]]
         group.recommended_to_delete = sorted_books[1:]
+
+
+def _compute_fingerprint_chunk(tasks: List[Tuple[str, str, int]]) -> List[Dict]:
+    """
+    多进程指纹计算的工作函数：计算一批书籍的指纹记录
+    
+    工作进程中的检测器实例只在本进程内缓存，不与其他进程共享状态
+    
+    Args:
+        tasks: (路径, 文件名, 文件大小) 列表
+        
+    Returns:
+        List[Dict]: 指纹记录
+    """
+    detector = UltraBookDuplicateDetector()
+    records = []
+    for path, file_name, _ in tasks:
+        try:
+            records.append(detector._compute_fingerprint_record(path, file_name))
+        except Exception as e:
+            logger.error(f"计算书籍指纹失败: {path}, 错误: {e}")
+    return records
@@ -32,6 +32,8 @@ from dataclasses import dataclass, field
 from enum import Enum, IntEnum
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from types import SimpleNamespace
 import threading
 
 # 【修复】添加TYPE_CHECKING以支持类型注解的前向引用
@@ -107,6 +109,7 @@ class BookFingerprint:
     # V3新增字段（不影响Ultra兼容性）
     detected_encoding: str = ""
     chapter_markers: List[str] = field(default_factory=list)
+    minhash: Tuple[int, ...] = ()  # MinHash签名（持久化，供近似去重使用）
 
 
 @dataclass
@@ -309,6 +312,14 @@ class SmartDuplicateDetectorV3:
     SAMPLE_SIZE_ULTRA = 15000           # Ultra原始采样量
     SAMPLE_SIZE_V3 = 30000              # V3增强采样量
     
+    # 持久化指纹存储中的记录类型前缀（实际类型附带采样参数，参数变化时旧记录自动失效）
+    FINGERPRINT_VARIANT = "v3"
+    # 影响采样与指纹结果的参数（多进程计算时传给工作进程）
+    SAMPLING_SETTINGS = (
+        "SAMPLE_SIZE_ULTRA", "SAMPLE_SIZE_V3", "LARGE_FILE_THRESHOLD", "LARGE_FILE_SAMPLE_SIZE",
+        "ENABLE_ENHANCED_SAMPLING", "ENABLE_TXT_ONLY_MODE",
+    )
+    
     # 缓存（线程安全）
     _hash_cache: Dict[str, str] = {}
     _content_cache: Dict[str, str] = {}
@@ -396,6 +407,65 @@ class SmartDuplicateDetectorV3:
             logger.warning(f"⚠️ 去重检测被中断: {type(e).__name__} - {e}")
             return []
     
+    @staticmethod
+    def update_fingerprints(books: List['Book']) -> int:
+        """
+        增量更新持久化指纹：只为新增或变化（大小/修改时间不同）的书籍读取文件并计算
+        
+        书架扫描目录或批量导入后调用，使下一次重复检测直接命中持久化指纹
+        
+        Args:
+            books: 书籍列表
+            
+        Returns:
+            int: 新计算的指纹数量
+        """
+        from src.utils.fingerprint_store import get_fingerprint_store
+        from src.utils.fingerprint_pool import compute_fingerprints
+        
+        store = get_fingerprint_store()
+        if not store or not books:
+            return 0
+        detector = SmartDuplicateDetectorV3()
+        variant = detector._fingerprint_variant()
+        stored = store.get_many([book.path for book in books], variant)
+        tasks = [(book.path, book.file_name, getattr(book, 'size', 0) or 0) for book in books if book.path not in stored]
+        records = compute_fingerprints(
+            partial(_compute_fingerprint_chunk, detector._sampling_settings()), tasks,
+            workers=detector.MAX_WORKERS)
+        count = store.put_many(records, variant)
+        if count:
+            logger.info(f"已更新 {count} 本书籍的持久化指纹")
+        return count
+    
+    @staticmethod
+    def find_near_duplicates(books: List['Book'], limit: int = 5) -> Dict[str, List]:
+        """
+        查询每本书在书库中的近似重复书籍（用于导入时的"可能重复"提示）
+        
+        先增量更新这些书的持久化指纹（新指纹同步进近似重复索引），再逐本查询索引，
+        索引加载后单本查询为毫秒级
+        
+        Args:
+            books: 书籍列表
+            limit: 每本书最多返回的近似重复数量
+            
+        Returns:
+            Dict[str, List[NearDuplicate]]: 书籍路径 -> 近似重复（key 为另一本书的路径），不含无近似重复的书
+        """
+        from src.utils.near_duplicate_index import get_near_duplicate_index
+        
+        index = get_near_duplicate_index(SmartDuplicateDetectorV3()._fingerprint_variant())
+        if index is None or not books:
+            return {}
+        SmartDuplicateDetectorV3.update_fingerprints(books)
+        result = {}
+        for book in books:
+            matches = index.find_similar(book.path, limit=limit)
+            if matches:
+                result[book.path] = matches
+        return result
+    
     def _find_duplicates_impl(self, books, progress_callback=None, batch_callback=None):
         """实现重复检测的主流程（严格遵循Ultra的4级流程）"""
         logger = self._get_logger()
@@ -501,105 +571,115 @@ class SmartDuplicateDetectorV3:
     # =========================================================================
     
     def _compute_all_fingerprints(self, books, progress_callback=None):
-        """计算所有书籍指纹（并行化，与Ultra相同）"""
-        fingerprints = []
-        completed = [0]
-        lock = threading.Lock()
+        """计算所有书籍指纹（持久化指纹未命中的书籍分批交给进程池计算）"""
+        from src.utils.fingerprint_store import get_fingerprint_store
+        from src.utils.fingerprint_pool import compute_fingerprints
+        
+        total = len(books)
         
-        def compute_one(book):
+        # 书库未变化的书籍直接使用持久化指纹，不再读取文件
+        variant = self._fingerprint_variant()
+        store = get_fingerprint_store()
+        stored = store.get_many([book.path for book in books], variant) if store else {}
+        if stored:
+            logger.info(f"持久化指纹命中 {len(stored)}/{total} 本")
+        
+        tasks = [(book.path, book.file_name, getattr(book, 'size', 0) or 0) for book in books if book.path not in stored]
+        hit_count = len(stored)
+        new_records = compute_fingerprints(
+            partial(_compute_fingerprint_chunk, self._sampling_settings()),
+            tasks,
+            workers=self.MAX_WORKERS,
+            progress_callback=(lambda done, _: progress_callback(hit_count + done, total)) if progress_callback else None,
+            is_cancelled=self.is_cancelled,
+            register_executor=self.register_executor,
+            unregister_executor=self.unregister_executor,
+        )
+        
+        # 新增或变化的书籍写入持久化指纹存储，下次检测直接使用（取消时也保存已完成的部分）
+        if store and new_records:
+            store.put_many(new_records, variant)
+        
+        records = dict(stored)
+        records.update((record["path"], record) for record in new_records)
+        fingerprints = []
+        for book in books:
+            record = records.get(book.path)
+            if record is None:
+                continue
             try:
-                fp = BookFingerprint(book=book)
-                # 【V5改进】使用智能文件名标准化（去除来源前缀、副标题）
-                fp.normalized_name = SmartDuplicateDetectorV3._normalize_book_name(book.file_name)
-                
-                fp.file_hash = self._get_cached_hash(book.path)
-                
-                # 【V6改进】动态采样策略（适应0.1KB~30MB范围）
-                book_size = book.size if hasattr(book, 'size') and book.size else 0
-                
-                if book_size > self.LARGE_FILE_THRESHOLD:
-                    # 大文件(>5MB)：增加采样量以获得更好代表性
-                    sample_size = self.LARGE_FILE_SAMPLE_SIZE  # 50KB
-                elif book_size < 1024:
-                    # 小文件(<1KB)：读取全部内容
-                    sample_size = min(book_size * 2, 4096) if book_size > 0 else 2048
-                else:
-                    # 普通文件：使用默认采样
-                    sample_size = self.SAMPLE_SIZE_V3 if self.ENABLE_ENHANCED_SAMPLING else self.SAMPLE_SIZE_ULTRA
-                
-                content = self._read_book_content(book.path, sample_size)
-                
-                if content:
-                    # 【V5改进】对内容进行归一化处理后再计算SimHash（解决类型④格式差异）
-                    content_for_simhash = SmartDuplicateDetectorV3._normalize_text_for_comparison(content)
-                    # 【V8修复】深度内容比对用"中段采样"而非开头：
-                    # 不同来源站会在文件开头插入不同的广告头/站点声明，导致开头采样
-                    # 相似度被压低，同书不同源漏检。跳过开头 1/3，取中段正文做比对。
-                    if len(content) > 6000:
-                        _start = len(content) // 3
-                        fp.content_sample = content[_start:_start + 5000]
-                    else:
-                        fp.content_sample = content
-                    fp.simhash = self._compute_simhash(content_for_simhash)
-                    
-                    lines = content.count('\n')
-                    words = len(re.findall(r'[\u4e00-\u9fa5a-zA-Z]+', content))
-                    chars = len(re.sub(r'\s+', '', content))
-                    fp.size_features = (lines, words, chars)
-                    fp.title_keywords = self._extract_title_keywords(book.title or "")
-                
-                with lock:
-                    completed[0] += 1
-                    if progress_callback and completed[0] % 50 == 0:
-                        progress_callback(completed[0], len(books))
-                
-                return fp
+                fingerprints.append(self._build_fingerprint(book, record))
             except Exception as e:
                 logger.error(f"计算指纹失败: {book.path}, {e}")
-                return None
-        
-        # 【V7修复】指纹计算阶段：逐个submit避免shutdown后崩溃
-        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
-            self.register_executor(executor)
-            
-            futures = []
-            for book in books:
-                if self.is_cancelled():
-                    break
-                try:
-                    future = executor.submit(compute_one, book)
-                    futures.append(future)
-                except RuntimeError as re_err:
-                    if "cannot schedule new futures after shutdown" in str(re_err):
-                        logger.debug("指纹计算: Executor已关闭，停止提交")
-                        break
-                    raise
-            
-            if not futures or self.is_cancelled():
-                # 【V7修复关键】取消时必须先drain所有pending future，避免executor shutdown时
-                # 打印 "Exception in thread Thread-X" 错误（Python默认线程异常处理）
-                for f in futures:
-                    try:
-                        f.result(timeout=1)
-                        r = f.result()
-                        if r:
-                            fingerprints.append(r)
-                    except Exception:
-                        pass
-                return fingerprints
-            
-            for future in as_completed(futures):
-                if self.is_cancelled():
-                    break
-                try:
-                    result = future.result(timeout=3)
-                    if result:
-                        fingerprints.append(result)
-                except Exception:
-                    pass
-        
         return fingerprints
     
+    def _build_fingerprint(self, book, record) -> BookFingerprint:
+        """由指纹记录构造检测用的书籍指纹"""
+        fp = BookFingerprint(book=book)
+        # 【V5改进】使用智能文件名标准化（去除来源前缀、副标题）
+        fp.normalized_name = record["normalized_title"]
+        fp.file_hash = record["file_hash"]
+        if record.get("content_sample"):
+            fp.content_sample = record["content_sample"]
+            fp.simhash = record["simhash"]
+            fp.minhash = record["minhash"]
+            fp.size_features = record["size_features"]
+            fp.title_keywords = self._extract_title_keywords(book.title or "")
+        return fp
+    
+    def _sampling_settings(self) -> Dict:
+        """影响采样与指纹结果的参数（传给工作进程，使其与当前检测器设置一致）"""
+        return {name: getattr(self, name) for name in self.SAMPLING_SETTINGS}
+    
+    def _fingerprint_variant(self) -> str:
+        """持久化指纹的记录类型：包含影响采样与指纹结果的参数"""
+        return (f"{self.FINGERPRINT_VARIANT}-{self.SAMPLE_SIZE_ULTRA}-{self.SAMPLE_SIZE_V3}"
+                f"-{self.LARGE_FILE_SAMPLE_SIZE}-{int(self.ENABLE_ENHANCED_SAMPLING)}"
+                f"-{int(self.ENABLE_TXT_ONLY_MODE)}")
+    
+    def _compute_fingerprint_record(self, book, minhash_signature) -> Dict:
+        """读取文件并计算一本书的指纹记录（可持久化的部分）"""
+        record = {
+            "path": book.path,
+            "normalized_title": SmartDuplicateDetectorV3._normalize_book_name(book.file_name),
+            "file_hash": self._get_cached_hash(book.path),
+        }
+        
+        # 【V6改进】动态采样策略（适应0.1KB~30MB范围）
+        book_size = book.size if hasattr(book, 'size') and book.size else 0
+        
+        if book_size > self.LARGE_FILE_THRESHOLD:
+            # 大文件(>5MB)：增加采样量以获得更好代表性
+            sample_size = self.LARGE_FILE_SAMPLE_SIZE  # 50KB
+        elif book_size < 1024:
+            # 小文件(<1KB)：读取全部内容
+            sample_size = min(book_size * 2, 4096) if book_size > 0 else 2048
+        else:
+            # 普通文件：使用默认采样
+            sample_size = self.SAMPLE_SIZE_V3 if self.ENABLE_ENHANCED_SAMPLING else self.SAMPLE_SIZE_ULTRA
+        
+        content = self._read_book_content(book.path, sample_size)
+        
+        if content:
+            # 【V5改进】对内容进行归一化处理后再计算SimHash（解决类型④格式差异）
+            content_for_simhash = SmartDuplicateDetectorV3._normalize_text_for_comparison(content)
+            # 【V8修复】深度内容比对用"中段采样"而非开头：
+            # 不同来源站会在文件开头插入不同的广告头/站点声明，导致开头采样
+            # 相似度被压低，同书不同源漏检。跳过开头 1/3，取中段正文做比对。
+            if len(content) > 6000:
+                _start = len(content) // 3
+                record["content_sample"] = content[_start:_start + 5000]
+            else:
+                record["content_sample"] = content
+            record["simhash"] = self._compute_simhash(content_for_simhash)
+            record["minhash"] = minhash_signature(content_for_simhash)
+            
+            lines = content.count('\n')
+            words = len(re.findall(r'[\u4e00-\u9fa5a-zA-Z]+', content))
+            chars = len(re.sub(r'\s+', '', content))
+            record["size_features"] = (lines, words, chars)
+        return record
+    
     def _read_book_content(self, path: str, sample_size: int = 15000) -> str:
         """读取书籍内容（TXT优化版）"""
         cache_key = path
@@ -705,6 +785,9 @@ class SmartDuplicateDetectorV3:
         groups = []
         processed_indices = set()
         
+        # 海明距离候选由向量化索引一次算出，循环内只做内容验证
+        neighbors = self._simhash_neighbors(valid_fps)
+        
         for i in range(len(valid_fps)):
             if i in processed_indices:
                 continue
@@ -712,42 +795,39 @@ class SmartDuplicateDetectorV3:
             fp1 = valid_fps[i]
             candidate_pairs = []
             
-            for j in range(i + 1, len(valid_fps)):
+            for j, dist in neighbors.get(i, ()):
                 if j in processed_indices:
                     continue
                     
                 fp2 = valid_fps[j]
                 
-                dist = self.hamming_distance(fp1.simhash, fp2.simhash)
-                
-                if dist <= self.SIMHASH_THRESHOLD:
-                    # 【防误报】检查文件大小，小文件需要更高的SimHash匹配度
-                    size1 = fp1.book.size if hasattr(fp1.book, 'size') and fp1.book.size else 0
-                    size2 = fp2.book.size if hasattr(fp2.book, 'size') and fp2.book.size else 0
-                    min_size = min(size1, size2)
+                # 【防误报】检查文件大小，小文件需要更高的SimHash匹配度
+                size1 = fp1.book.size if hasattr(fp1.book, 'size') and fp1.book.size else 0
+                size2 = fp2.book.size if hasattr(fp2.book, 'size') and fp2.book.size else 0
+                min_size = min(size1, size2)
 
-                    # 对于极小文件，只接受完全相同的SimHash（dist=0）或dist=1
-                    if min_size > 0 and min_size < self.SHORT_CONTENT_THRESHOLD:
-                        if dist > 1:  # 小文件且汉明距离>1，跳过
-                            continue
+                # 对于极小文件，只接受完全相同的SimHash（dist=0）或dist=1
+                if min_size > 0 and min_size < self.SHORT_CONTENT_THRESHOLD:
+                    if dist > 1:  # 小文件且汉明距离>1，跳过
+                        continue
 
-                    content_sim = 0.0
-                    if fp1.content_sample and fp2.content_sample and \
-                       len(fp1.content_sample) > 50 and len(fp2.content_sample) > 50:
-                        from src.utils.string_utils import StringUtils
-                        content_sim = StringUtils.book_content_similarity(
-                            fp1.content_sample, fp2.content_sample, sample_size=8000
-                        )
-
-                    should_include = (
-                        content_sim >= 0.70 or  # 【V8】从0.32提高到0.70：隔离同题材误报（真同书sim>=0.85）
-                        (content_sim == 0 and dist <= 1) or  # 完全相同的SimHash（仅hash，需谨慎）
-                        fp1.normalized_name == fp2.normalized_name  # 归一化书名相同（强信号）
+                content_sim = 0.0
+                if fp1.content_sample and fp2.content_sample and \
+                   len(fp1.content_sample) > 50 and len(fp2.content_sample) > 50:
+                    from src.utils.string_utils import StringUtils
+                    content_sim = StringUtils.book_content_similarity(
+                        fp1.content_sample, fp2.content_sample, sample_size=8000
                     )
-                    
-                    if should_include:
-                        candidate_pairs.append((fp2, content_sim))
-                        processed_indices.add(j)
+
+                should_include = (
+                    content_sim >= 0.70 or  # 【V8】从0.32提高到0.70：隔离同题材误报（真同书sim>=0.85）
+                    (content_sim == 0 and dist <= 1) or  # 完全相同的SimHash（仅hash，需谨慎）
+                    fp1.normalized_name == fp2.normalized_name  # 归一化书名相同（强信号）
+                )
+                
+                if should_include:
+                    candidate_pairs.append((fp2, content_sim))
+                    processed_indices.add(j)
             
             if len(candidate_pairs) >= 1:
                 max_sim = max([cs for _, cs in candidate_pairs], default=0.0)
@@ -786,52 +866,13 @@ class SmartDuplicateDetectorV3:
         return groups
     
     def _simhash_large_scale(self, valid_fps) -> List[DuplicateGroup]:
-        """大规模SimHash检测（>3000本）- 使用分块索引"""
+        """大规模SimHash检测（>3000本）- 使用向量化SimHash索引（精确，不再分块抽样）"""
         groups = []
-        BLOCK_SIZE = 4
-        NUM_BLOCKS = self.SIMHASH_BITS // BLOCK_SIZE
         THRESHOLD = self.SIMHASH_THRESHOLD
         
-        block_indexes: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(NUM_BLOCKS)]
-        
-        for idx, fp in enumerate(valid_fps):
-            simhash = fp.simhash
-            for block_num in range(NUM_BLOCKS):
-                shift = (NUM_BLOCKS - 1 - block_num) * BLOCK_SIZE
-                mask = (1 << BLOCK_SIZE) - 1
-                block_value = (simhash >> shift) & mask
-                block_indexes[block_num][block_value].append(idx)
-        
-        candidate_pairs: Set[Tuple[int, int]] = set()
-        
-        def check_and_add_pair(i, j):
-            if i >= j:
-                return
-            dist = self.hamming_distance(valid_fps[i].simhash, valid_fps[j].simhash)
-            if dist <= THRESHOLD:
-                candidate_pairs.add((i, j))
-        
-        total_buckets = sum(len(block_indexes[b]) for b in range(NUM_BLOCKS))
-        
-        for block_num in range(NUM_BLOCKS):
-            for bucket_value, indices_in_bucket in block_indexes[block_num].items():
-                bucket_size = len(indices_in_bucket)
-                
-                if bucket_size < 2:
-                    continue
-                    
-                if bucket_size <= 100:
-                    for i_idx in range(bucket_size):
-                        for j_idx in range(i_idx + 1, bucket_size):
-                            check_and_add_pair(indices_in_bucket[i_idx], indices_in_bucket[j_idx])
-                else:
-                    import random
-                    sample_size = min(5000, bucket_size)
-                    sampled_indices = random.sample(indices_in_bucket, sample_size)
-                    
-                    for i_idx in range(len(sampled_indices)):
-                        for j_idx in range(i_idx + 1, len(sampled_indices)):
-                            check_and_add_pair(sampled_indices[i_idx], sampled_indices[j_idx])
+        candidate_pairs: Set[Tuple[int, int]] = {
+            (i, j) for i, j, _ in self._build_simhash_index(valid_fps).pairs(THRESHOLD)
+        }
         
         # 并查集聚类
         if candidate_pairs:
@@ -920,6 +961,19 @@ class SmartDuplicateDetectorV3:
         
         return groups
     
+    @staticmethod
+    def _build_simhash_index(valid_fps):
+        """以书籍在列表中的序号为键建立SimHash索引"""
+        from src.utils.near_duplicate_index import SimHashIndex
+        index = SimHashIndex()
+        for idx, fp in enumerate(valid_fps):
+            index.add(idx, fp.simhash)
+        return index
+    
+    def _simhash_neighbors(self, valid_fps) -> Dict[int, List[Tuple[int, int]]]:
+        """每本书之后、SimHash海明距离不超过阈值的书：序号 -> [(序号, 海明距离)]"""
+        return self._build_simhash_index(valid_fps).neighbors(self.SIMHASH_THRESHOLD)
+    
     def _detect_simple(self, fingerprints) -> List[DuplicateGroup]:
         """对无法计算SimHash的书籍使用简单方法（【加强版】防误报）"""
         groups = []
@@ -1977,8 +2031,8 @@ class SmartDuplicateDetectorV3:
         
         try:
             if os.path.exists(path):
-                from src.utils.file_utils import FileUtils
-                h = FileUtils.calculate_file_sha256(path)
+                from src.utils.fingerprint_store import cached_file_hash
+                h = cached_file_hash(path, persist=False)
                 with self._cache_lock:
                     self._hash_cache[path] = h
                 return h
@@ -1991,6 +2045,35 @@ class SmartDuplicateDetectorV3:
         return get_logger(__name__)
 
 
+# ============================================================================
+# 多进程指纹计算的工作函数
+# ============================================================================
+
+def _compute_fingerprint_chunk(settings: Dict, tasks: List[Tuple[str, str, int]]) -> List[Dict]:
+    """
+    在工作进程中计算一批书籍的指纹记录（不使用任何共享缓存）
+    
+    Args:
+        settings: 采样参数（SmartDuplicateDetectorV3.SAMPLING_SETTINGS）
+        tasks: (路径, 文件名, 文件大小) 列表
+        
+    Returns:
+        List[Dict]: 指纹记录
+    """
+    from src.utils.fingerprint_store import minhash_signature
+    
+    detector = SmartDuplicateDetectorV3()
+    detector.__dict__.update(settings)
+    records = []
+    for path, file_name, size in tasks:
+        try:
+            book = SimpleNamespace(path=path, file_name=file_name, size=size)
+            records.append(detector._compute_fingerprint_record(book, minhash_signature))
+        except Exception as e:
+            logger.error(f"计算指纹失败: {path}, {e}")
+    return records
+
+
 # ============================================================================
 # DaemonThreadPoolExecutor（与Ultra相同）
 # ============================================================================
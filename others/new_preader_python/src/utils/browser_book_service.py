@@ -0,0 +1,451 @@
+"""
+浏览器阅读器的按需章节服务
+
+- 打开书籍时只注册文件，不读取全文：后台线程通过流式文本源扫描章节标题，
+  逐步建立章节边界（字符偏移）索引
+- 页面先加载轻量外壳，再从本地进度服务器分页拉取目录（JSON），按需获取章节内容并预取相邻章节
+- 章节一旦确定结束位置即可提供，首个章节的可用时间与书籍大小无关；
+  超长章节（或没有章节标题的书籍）按固定字符数切分为续段
+- EPUB 的目录来自 OPF/NCX（打开时即完整），每个书脊文档为一块，请求时才解码并预取后续文档
+- MOBI/AZW/AZW3 从 Kindle 解包缓存按需解码，与 EPUB 相同
+- PDF 在后台按页区间提取（页数多时并行），每个区间为一块，前面的区间全部完成后即可提供
+"""
+
+import os
+import html
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.parsers.chapter_segmenter import ChapterSegmenter, get_segmenter
+from src.parsers.epub_document import EpubDocument, LazyChapterDocument
+from src.parsers.kindle_container import open_kindle_document
+from src.parsers.pdf_extractor import PAGE_BATCH_SIZE, count_pages, extract_pdf_pages
+from src.utils.logger import get_logger
+from src.utils.reader_http import make_etag
+from src.utils.text_source import MmapTextSource
+
+logger = get_logger(__name__)
+
+# 请求路径前缀
+BOOK_PATH_PREFIX = "/book/"
+# 单个章节块的最大字符数，超出时在行边界切分为续段
+MAX_CHUNK_CHARS = 64 * 1024
+# 同时保留的书籍索引数量
+MAX_OPEN_BOOKS = 8
+# 单次目录请求返回的最多章节数
+TOC_PAGE_SIZE = 2000
+SUPPORTED_FORMATS = ('.txt', '.md', '.epub', '.pdf', '.mobi', '.azw', '.azw3')
+
+
+def heading_level(line: str, markdown: bool = False) -> int:
+    """
+    标题级别
+
+    Args:
+        line: 去除首尾空白后的标题行
+        markdown: 是否为 Markdown 文件（# 标题按井号数量定级）
+
+    Returns:
+        int: 1-3（不符合任何标题模式的行按 3 级处理）
+    """
+    return get_segmenter(markdown=markdown, loose=True).line_level(line) or 3
+
+
+def render_chunk_html(text: str, title_level: int = 0, markdown: bool = False) -> str:
+    """
+    把章节块文本渲染为 HTML（段落转义后包在 <p> 中）
+
+    Args:
+        text: 章节块文本（标题行由目录提供，这里跳过）
+        title_level: 章节块是否以标题行开头（0 表示续段/无标题）
+        markdown: 是否为 Markdown 文件
+
+    Returns:
+        str: HTML 片段
+    """
+    parts = []
+    skip_title = title_level > 0
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if skip_title:
+            skip_title = False
+            continue
+        parts.append(f'<p>{html.escape(line, quote=False)}</p>')
+    return ''.join(parts)
+
+
+class ChapterIndex:
+    """单本书的章节边界索引（后台逐步建立）"""
+
+    def __init__(self, file_path: str):
+        """
+        打开文本源并启动后台索引线程
+
+        Args:
+            file_path: 书籍文件路径（TXT/MD）
+        """
+        self.file_path = file_path
+        self.markdown = file_path.lower().endswith('.md')
+        self.source = MmapTextSource(file_path)
+        # 已确定结束位置的章节块：{"index", "title", "level", "start", "length"}
+        self.chunks: List[Dict[str, Any]] = []
+        self.complete = False
+        self.error: Optional[str] = None
+        self._pending: Optional[Tuple[str, int, int]] = None  # 结束位置尚未确定的块 (标题, 级别, 起点)
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._build, name="book-chapter-index", daemon=True)
+        self._thread.start()
+
+    def _begin_chunk(self, title: str, level: int, start: int) -> None:
+        """开始新的章节块，同时确定上一块的结束位置"""
+        with self._condition:
+            if self._pending is not None:
+                prev_title, prev_level, prev_start = self._pending
+                if start > prev_start or prev_title:
+                    self.chunks.append({"index": len(self.chunks), "title": prev_title,
+                                        "level": prev_level, "start": prev_start,
+                                        "length": start - prev_start})
+                    self._condition.notify_all()
+            self._pending = (title, level, start)
+
+    def _build(self) -> None:
+        """扫描全文：逐块匹配标题行，过长的章节在行边界切分"""
+        segmenter = get_segmenter(markdown=self.markdown, loose=True)
+        base = 0  # buffer 在全文中的起始字符偏移
+        carry = ""
+        self._begin_chunk("", 0, 0)
+
+        def split_until(buffer: str, limit: int) -> None:
+            # 当前块超过上限时，在上限之后的第一个换行处开始续段
+            while self._pending is not None and limit - self._pending[2] > MAX_CHUNK_CHARS:
+                local = max(self._pending[2] + MAX_CHUNK_CHARS - base, 0)
+                newline = buffer.find('\n', local)
+                if newline == -1 or base + newline + 1 >= limit:
+                    return
+                self._begin_chunk("", 0, base + newline + 1)
+
+        try:
+            for block in self.source.iter_text():
+                if self._closed:
+                    return
+                buffer = carry + block
+                # 只处理完整的行，最后一个不完整的行留到下一块
+                cut = buffer.rfind('\n') + 1
+                carry = buffer[cut:]
+                buffer = buffer[:cut]
+                self._scan(buffer, base, segmenter, split_until)
+                base += len(buffer)
+            if carry:
+                self._scan(carry, base, segmenter, split_until)
+                base += len(carry)
+            self._begin_chunk("", 0, base)
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"建立章节索引失败: {self.file_path}, 错误: {e}")
+        finally:
+            with self._condition:
+                self._pending = None
+                self.complete = True
+                self._condition.notify_all()
+        logger.debug(f"章节索引完成: {self.file_path}，共 {len(self.chunks)} 块")
+
+    def _scan(self, buffer: str, base: int, segmenter: ChapterSegmenter, split_until) -> None:
+        for start, _, title, level in segmenter.iter_headings(buffer):
+            split_until(buffer, base + start)
+            self._begin_chunk(title, level, base + start)
+        split_until(buffer, base + len(buffer))
+
+    def toc(self, since: int = 0, limit: int = TOC_PAGE_SIZE) -> Dict[str, Any]:
+        """
+        已确定的章节块（目录分页）
+
+        Args:
+            since: 从第几个块开始
+            limit: 最多返回的块数
+
+        Returns:
+            Dict[str, Any]: {"chapters": [...], "complete": 是否已扫描完全文}
+        """
+        with self._condition:
+            chapters = self.chunks[since:since + limit]
+            complete = self.complete and since + len(chapters) >= len(self.chunks)
+        return {"chapters": chapters, "complete": complete, "error": self.error}
+
+    def wait_for(self, index: int, timeout: float) -> bool:
+        """等待第 index 个块确定（已确定或扫描结束时立即返回）"""
+        with self._condition:
+            return self._condition.wait_for(lambda: index < len(self.chunks) or self.complete, timeout)
+
+    def chunk_html(self, index: int) -> Optional[str]:
+        """
+        章节块内容
+
+        Args:
+            index: 块序号
+
+        Returns:
+            Optional[str]: HTML 片段，块不存在时返回None
+        """
+        with self._condition:
+            if not 0 <= index < len(self.chunks):
+                return None
+            chunk = self.chunks[index]
+        text = self.source.read(chunk["start"], chunk["length"])
+        return render_chunk_html(text, chunk["level"], self.markdown)
+
+    def close(self) -> None:
+        """停止索引并关闭文本源"""
+        self._closed = True
+        self._thread.join(timeout=1)
+        self.source.close()
+
+
+class EpubChapterIndex:
+    """EPUB 的章节索引：目录在打开时确定，章节正文按需解码（接口与 ChapterIndex 相同）"""
+
+    def __init__(self, file_path: str):
+        """
+        读取 EPUB 的章节表
+
+        Args:
+            file_path: 书籍文件路径（EPUB）
+        """
+        self.file_path = file_path
+        self.document = self.open_document(file_path)
+        # 估算长度：XHTML 的字节数约为正文字符数的 3 倍（中文 UTF-8 加标签）
+        self.chunks: List[Dict[str, Any]] = [
+            {"index": chapter.index, "title": chapter.title,
+             "level": heading_level(chapter.title) if chapter.title else 0,
+             "length": chapter.size // 3}
+            for chapter in self.document.chapters
+        ]
+        self.complete = True
+        self.error: Optional[str] = None
+
+    def open_document(self, file_path: str) -> LazyChapterDocument:
+        return EpubDocument(file_path)
+
+    def toc(self, since: int = 0, limit: int = TOC_PAGE_SIZE) -> Dict[str, Any]:
+        """目录分页（见 ChapterIndex.toc）"""
+        chapters = self.chunks[since:since + limit]
+        return {"chapters": chapters, "complete": since + len(chapters) >= len(self.chunks), "error": None}
+
+    def wait_for(self, index: int, timeout: float) -> bool:
+        """目录在打开时已完整，无需等待"""
+        return True
+
+    def chunk_html(self, index: int) -> Optional[str]:
+        """
+        章节内容（解码后预取后续章节）
+
+        Args:
+            index: 章节序号
+
+        Returns:
+            Optional[str]: HTML 片段，章节不存在时返回None
+        """
+        if not 0 <= index < len(self.chunks):
+            return None
+        text = self.document.get_text(index)
+        self.document.prefetch(index + 1)
+        # 正文第一行与目录标题相同时由目录提供，不重复显示
+        title = self.chunks[index]["title"]
+        first_line = text.split('\n', 1)[0]
+        return render_chunk_html(text, 1 if title and first_line == title else 0)
+
+    def close(self) -> None:
+        """关闭文档"""
+        self.document.close()
+
+
+class KindleChapterIndex(EpubChapterIndex):
+    """MOBI/AZW/AZW3 的章节索引：章节表来自 Kindle 解包缓存（首次打开时解包）"""
+
+    def open_document(self, file_path: str) -> LazyChapterDocument:
+        return open_kindle_document(file_path)
+
+
+class PdfChapterIndex:
+    """PDF 的章节索引：后台按页区间提取，每个区间为一块（接口与 ChapterIndex 相同）"""
+
+    def __init__(self, file_path: str):
+        """
+        读取页数并启动后台提取线程（加密文件抛出异常，由调用方改为内嵌全文）
+
+        Args:
+            file_path: 书籍文件路径（PDF）
+        """
+        self.file_path = file_path
+        self.page_count = count_pages(file_path)
+        # 已可提供的块（按页序连续）：{"index", "title", "level", "length"}
+        self.chunks: List[Dict[str, Any]] = []
+        self.complete = False
+        self.error: Optional[str] = None
+        self._texts: List[str] = []
+        self._finished: Dict[int, str] = {}  # 已提取但前面还有未完成区间的块：起始页 -> 文本
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._build, name="book-pdf-extract", daemon=True)
+        self._thread.start()
+
+    def _on_batch(self, start: int, texts: List[str]) -> None:
+        """区间完成（可能乱序）：暂存，并按页序发布已连续的块"""
+        with self._condition:
+            self._finished[start] = "\n\n".join(text.strip() for text in texts if text.strip())
+            while len(self.chunks) * PAGE_BATCH_SIZE in self._finished:
+                first = len(self.chunks) * PAGE_BATCH_SIZE
+                text = self._finished.pop(first)
+                last = min(first + PAGE_BATCH_SIZE, self.page_count)
+                self.chunks.append({"index": len(self.chunks), "title": f"第 {first + 1}-{last} 页",
+                                    "level": 0, "length": len(text)})
+                self._texts.append(text)
+            self._condition.notify_all()
+
+    def _build(self) -> None:
+        try:
+            extract_pdf_pages(self.file_path, on_batch=self._on_batch, is_cancelled=lambda: self._closed)
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"提取PDF文本失败: {self.file_path}, 错误: {e}")
+        finally:
+            with self._condition:
+                self.complete = True
+                self._condition.notify_all()
+        logger.debug(f"PDF提取完成: {self.file_path}，共 {len(self.chunks)} 块")
+
+    def toc(self, since: int = 0, limit: int = TOC_PAGE_SIZE) -> Dict[str, Any]:
+        """目录分页（见 ChapterIndex.toc）"""
+        with self._condition:
+            chapters = self.chunks[since:since + limit]
+            complete = self.complete and since + len(chapters) >= len(self.chunks)
+        return {"chapters": chapters, "complete": complete, "error": self.error}
+
+    def wait_for(self, index: int, timeout: float) -> bool:
+        """等待第 index 个块提取完成（已完成或提取结束时立即返回）"""
+        with self._condition:
+            return self._condition.wait_for(lambda: index < len(self.chunks) or self.complete, timeout)
+
+    def chunk_html(self, index: int) -> Optional[str]:
+        """
+        块内容
+
+        Args:
+            index: 块序号
+
+        Returns:
+            Optional[str]: HTML 片段，块不存在时返回None
+        """
+        with self._condition:
+            if not 0 <= index < len(self._texts):
+                return None
+            text = self._texts[index]
+        return render_chunk_html(text)
+
+    def close(self) -> None:
+        """停止提取"""
+        self._closed = True
+        self._thread.join(timeout=1)
+
+
+_INDEX_CLASSES = {'.epub': EpubChapterIndex, '.pdf': PdfChapterIndex,
+                  '.mobi': KindleChapterIndex, '.azw': KindleChapterIndex, '.azw3': KindleChapterIndex}
+_books: "OrderedDict[str, Any]" = OrderedDict()
+_books_lock = threading.Lock()
+
+
+def supports_chunked_reading(file_path: str) -> bool:
+    """是否可以按章节按需提供该文件"""
+    return file_path.lower().endswith(SUPPORTED_FORMATS)
+
+
+def register_book(file_path: str) -> str:
+    """
+    注册书籍（文件变化后会重新建立索引）
+
+    Args:
+        file_path: 书籍文件路径
+
+    Returns:
+        str: 书籍令牌，用于章节请求
+    """
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    token = hashlib.sha1(f"{abs_path}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:16]
+    with _books_lock:
+        if token in _books:
+            _books.move_to_end(token)
+            return token
+    # 在锁外建立索引，避免阻塞其他书籍的章节请求
+    ext = os.path.splitext(abs_path)[1].lower()
+    index = _INDEX_CLASSES.get(ext, ChapterIndex)(abs_path)
+    evicted = []
+    with _books_lock:
+        if token in _books:
+            # 其他线程已注册同一本书，使用已有的索引
+            _books.move_to_end(token)
+            evicted.append(index)
+        else:
+            _books[token] = index
+            while len(_books) > MAX_OPEN_BOOKS:
+                evicted.append(_books.popitem(last=False)[1])
+    for stale in evicted:
+        stale.close()
+    return token
+
+
+def get_book(token: str) -> Optional[Any]:
+    """按令牌获取已注册的书籍索引"""
+    with _books_lock:
+        return _books.get(token)
+
+
+def handle_book_request(handler) -> bool:
+    """
+    处理 /book/ 开头的 GET 请求（供进度服务器的请求处理器调用）
+
+    - /book/toc?book=<令牌>&since=<n>：目录分页
+    - /book/chapter?book=<令牌>&index=<i>：章节块 HTML
+
+    Args:
+        handler: ReaderRequestHandler 实例
+
+    Returns:
+        bool: 是否已处理该请求
+    """
+    parsed = urlparse(handler.path)
+    if not parsed.path.startswith(BOOK_PATH_PREFIX):
+        return False
+    query = parse_qs(parsed.query)
+    token = query.get("book", [""])[0]
+    book = get_book(token)
+    status, payload, etag = 404, {"error": "book not found"}, None
+    try:
+        if book is not None and parsed.path == BOOK_PATH_PREFIX + "toc":
+            since = int(query.get("since", ["0"])[0])
+            status, payload = 200, book.toc(since)
+            if payload["complete"]:
+                # 扫描完成后目录不再变化
+                etag = make_etag(token, "toc", since)
+        elif book is not None and parsed.path == BOOK_PATH_PREFIX + "chapter":
+            index = int(query.get("index", ["0"])[0])
+            book.wait_for(index, timeout=5)
+            # 令牌包含文件大小和修改时间，同一块的内容不会变化，命中时无需读取和渲染
+            etag = make_etag(token, "chapter", index)
+            if index < len(book.chunks) and handler.is_not_modified(etag):
+                handler.send_not_modified(etag)
+                return True
+            chunk_html = book.chunk_html(index)
+            if chunk_html is not None:
+                status, payload = 200, {"index": index, "html": chunk_html}
+            else:
+                status, payload, etag = 404, {"error": "chapter not found"}, None
+    except ValueError as e:
+        status, payload, etag = 400, {"error": str(e)}, None
+    handler.send_json(status, payload, etag=etag, cache_control="no-cache" if etag else None)
+    return True
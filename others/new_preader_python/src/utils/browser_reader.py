@@ -14,17 +14,125 @@ import time
 import uuid
 from typing import Dict, Any, Optional, Callable
 from pathlib import Path
-from http.server import HTTPServer, BaseHTTPRequestHandler
 from threading import Thread
 from urllib.parse import parse_qs, urlparse
 
+from src.parsers.chapter_segmenter import get_segmenter
+from src.utils.browser_book_service import (
+    BOOK_PATH_PREFIX, handle_book_request, register_book, supports_chunked_reading
+)
 from src.utils.logger import get_logger
+from src.utils.reader_http import (
+    ProgressWriteCoalescer, ReaderHTTPServer, ReaderRequestHandler, get_progress_flush_interval
+)
+from src.utils.text_source import MmapTextSource
 
 logger = get_logger(__name__)
 
 # 全局字典，保存服务器对象以防止被垃圾回收
 _active_servers: Dict[str, Dict[str, Any]] = {}
 
+# 按需加载章节的脚本：先拉取目录生成章节占位（含标题，目录/跳转照常工作），
+# 章节进入视口附近时再获取内容并预取相邻章节
+_CHUNKED_BOOK_SCRIPT = """
+<script>
+(function() {
+    const source = __CHAPTER_SOURCE__;
+    const content = document.getElementById('content');
+    const sections = [];
+    const loaded = new Set();
+    const loading = new Set();
+    let received = 0;
+
+    function estimateHeight(length) {
+        const style = getComputedStyle(content);
+        const fontSize = parseFloat(style.fontSize) || 16;
+        const lineHeight = parseFloat(style.lineHeight) || fontSize * 1.8;
+        const charsPerLine = Math.max(10, Math.floor((content.clientWidth || 800) / fontSize));
+        return Math.ceil(length / charsPerLine) * lineHeight;
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (!entry.isIntersecting) return;
+            const index = parseInt(entry.target.dataset.index);
+            loadChunk(index);
+            loadChunk(index + 1);
+            loadChunk(index - 1);
+        });
+    }, { rootMargin: '100% 0px' });
+
+    async function loadChunk(index) {
+        if (index < 0 || !sections[index] || loaded.has(index) || loading.has(index)) return;
+        loading.add(index);
+        try {
+            const response = await fetch(source.url + '/chapter?book=' + source.book + '&index=' + index);
+            const data = await response.json();
+            const body = sections[index].querySelector('.book-chunk-body');
+            body.innerHTML = data.html || '';
+            body.style.minHeight = '';
+            loaded.add(index);
+            observer.unobserve(sections[index]);
+        } catch (e) {
+            console.error('加载章节失败:', index, e);
+        } finally {
+            loading.delete(index);
+        }
+    }
+
+    function addSections(chapters) {
+        const fragment = document.createDocumentFragment();
+        chapters.forEach(chapter => {
+            const section = document.createElement('section');
+            section.className = 'book-chunk';
+            section.dataset.index = chapter.index;
+            if (chapter.title) {
+                const header = document.createElement('h' + chapter.level);
+                header.textContent = chapter.title;
+                section.appendChild(header);
+            }
+            const body = document.createElement('div');
+            body.className = 'book-chunk-body';
+            body.style.minHeight = estimateHeight(chapter.length) + 'px';
+            section.appendChild(body);
+            fragment.appendChild(section);
+            sections[chapter.index] = section;
+        });
+        content.appendChild(fragment);
+        chapters.forEach(chapter => observer.observe(sections[chapter.index]));
+    }
+
+    async function loadToc() {
+        try {
+            const response = await fetch(source.url + '/toc?book=' + source.book + '&since=' + received);
+            const data = await response.json();
+            addSections(data.chapters || []);
+            received += (data.chapters || []).length;
+            if (!data.complete) {
+                setTimeout(loadToc, (data.chapters || []).length ? 0 : 200);
+                return;
+            }
+            window.chunkedBookComplete = true;
+            if (typeof generateTOC === 'function') generateTOC();
+            // 目录完整后文档高度才确定，页面加载流程已经恢复过进度时按完整高度重新恢复
+            if (document.readyState === 'complete' && typeof loadProgress === 'function') loadProgress();
+        } catch (e) {
+            console.error('加载目录失败:', e);
+            setTimeout(loadToc, 1000);
+        }
+    }
+
+    window.chunkedBookComplete = false;
+    // 加载全部章节（分页、全文搜索等需要完整内容的功能可先调用）
+    window.loadAllBookChunks = async function() {
+        while (!window.chunkedBookComplete) await new Promise(resolve => setTimeout(resolve, 100));
+        for (let i = 0; i < sections.length; i++) await loadChunk(i);
+    };
+    loadToc();
+})();
+</script>
+"""
+
 
 def _load_terminal_reader_themes() -> Dict[str, Dict[str, str]]:
     """从终端阅读器的 .theme 文件加载主题，使浏览器阅读器与终端样式同步
@@ -515,7 +623,8 @@ class BrowserReader:
                         book_id: Optional[str] = None,
                         initial_progress: Optional[float] = None,
                         browser_server_host: str = "localhost",
-                        browser_server_port: int = 54321) -> str:
+                        browser_server_port: int = 54321,
+                        chapter_source: Optional[Dict[str, str]] = None) -> str:
         """
         创建浏览器阅读器HTML
         
@@ -526,6 +635,8 @@ class BrowserReader:
             custom_settings: 自定义设置，可覆盖主题设置
             save_progress_url: 保存进度的API端点
             load_progress_url: 加载进度的API端点
+            chapter_source: 按需加载章节的来源 {"url": 章节服务地址, "book": 书籍令牌}，
+                提供时页面不内嵌正文（content 应为空），由脚本拉取目录和章节
             
         Returns:
             HTML字符串
@@ -10242,8 +10353,13 @@ class BrowserReader:
         </script>
         """
 
+        # 按需加载章节
+        chunked_script = ""
+        if chapter_source:
+            chunked_script = _CHUNKED_BOOK_SCRIPT.replace("__CHAPTER_SOURCE__", json.dumps(chapter_source))
+
         # 在</body>前插入脚本
-        html = html.replace('</body>', placeholder_script + title_change_script + '</body>')
+        html = html.replace('</body>', placeholder_script + title_change_script + chunked_script + '</body>')
         
 
         # Python端翻译处理 - 替换所有{t('browser_reader.xxx')}占位符
@@ -10274,218 +10390,55 @@ class BrowserReader:
             文件内容
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-                # 根据文件扩展名处理内容
-                ext = Path(file_path).suffix.lower()
-                
-                if ext == '.txt':
-                    # TXT文件：智能识别章节标题并转换为HTML
-                    paragraphs = content.split('\n')
-                    html_content = ''
-
-                    # 常见的章节标题模式
-                    chapter_patterns = [
-                        r'^第[零一二三四五六七八九十百千万\d]+\\s*[章节回篇部页]',  # 添加了 \\s* 以匹配可能存在的空格
-                        r'^Chapter\\s*\\d+',
-                        r'^Part\\s*\\d+',
-                        r'^第\\d+\\s*[章节回篇部页]',  # 添加了 \\s* 以匹配可能存在的空格
-                        r'^[零一二三四五六七八九十百千万]+、',
-                        r'^[一二三四五六七八九十]+、',
-                        r'^\\d+[\\.、\\s]+[^\\s]+',
-                        r'^卷[一二三四五六七八九十百千万\\d]+',
-                        r'^篇[一二三四五六七八九十百千万\\d]+',
-                        r'^序\\s*[言章篇页]',
-                        r'^前\\s*言',
-                        r'^引\\s*言',
-                        r'^楔\\s*子',
-                        r'^尾声',
-                        r'^后记',
-                        r'^【.*】',
-                        r'^\\[.*\\]',
-                        r'^<.*>',
-                        r'^=+\\s*.*\\s*=+',  # Markdown风格的h1
-                        r'^-+\\s*.*\\s*-',   # Markdown风格的h2
-                    ]
-
-                    import re
-
-                    for para in paragraphs:
-                        para = para.strip()
-                        if not para:
-                            continue
-
-                        # 检查是否是章节标题
-                        is_chapter = False
-                        for pattern in chapter_patterns:
-                            if re.match(pattern, para, re.IGNORECASE):
-                                # 判断标题级别
-                                if re.match(r'^第[零一二三四五六七八九十百千万\d]+\\s*[章节回篇部页]', para) or re.match(r'^Chapter\\s*\\d+', para, re.IGNORECASE) or re.match(r'^卷[一二三四五六七八九十百千万\\d]+', para):
-                                    html_content += f'<h1>{para}</h1>'
-                                elif re.match(r'^第\\d+\\s*[章节回篇部页]', para) or re.match(r'^Part\\s*\\d+', para, re.IGNORECASE) or re.match(r'^篇[一二三四五六七八九十百千万\\d]+', para):
-                                    html_content += f'<h2>{para}</h2>'
-                                elif re.match(r'^[零一二三四五六七八九十]+、', para) or re.match(r'^[一二三四五六七八九十]+、', para):
-                                    html_content += f'<h3>{para}</h3>'
-                                else:
-                                    html_content += f'<h3>{para}</h3>'
-                                is_chapter = True
-                                break
-
-                        if not is_chapter:
-                            html_content += f'<p>{para}</p>'
-
-                    # 如果没有识别到任何章节标题，尝试自动分段
-                    if '<h1>' not in html_content and '<h2>' not in html_content and '<h3>' not in html_content:
-                        # 统计段落数量
-                        paragraph_count = html_content.count('<p>')
-                        logger.info(f'未识别到章节标题，共有 {paragraph_count} 个段落')
-
-                        # 如果段落数量大于20，尝试按照固定间隔添加章节标记
-                        if paragraph_count > 20:
-                            logger.info('段落数量较多，尝试自动分段')
-                            paragraphs_with_chapters = html_content.split('<p>')
-                            html_content_new = ''
-
-                            # 每10个段落添加一个章节标题
-                            chapter_num = 1
-                            for i, para in enumerate(paragraphs_with_chapters):
-                                if i == 0:
-                                    continue  # 跳过第一个空段落
-
-                                # 每10个段落添加章节标记
-                                if (i - 1) % 10 == 0 and i > 1:
-                                    html_content_new += f'<h3>章节 {chapter_num}</h3>'
-                                    chapter_num += 1
-
-                                if para:
-                                    html_content_new += f'<p>{para}'
-
-                            html_content = html_content_new
-
-                    return html_content
-                    
-                elif ext == '.md':
-                    # Markdown文件：智能识别章节标题并转换为HTML
-                    paragraphs = content.split('\n')
-                    html_content = ''
-
-                    # 常见的章节标题模式
-                    chapter_patterns = [
-                        r'^第[零一二三四五六七八九十百千万\d]+[章节回篇部页]',
-                        r'^Chapter\\s*\\d+',
-                        r'^Part\\s*\\d+',
-                        r'^第\\d+[章节回篇部页]',
-                        r'^[零一二三四五六七八九十]+、',
-                        r'^[一二三四五六七八九十]+、',
-                        r'^\\d+[\\.、\\s]+[^\\s]+',
-                        r'^卷[一二三四五六七八九十百千万\\d]+',
-                        r'^篇[一二三四五六七八九十百千万\\d]+',
-                        r'^序\\s*[言章篇页]',
-                        r'^前\\s*言',
-                        r'^引\\s*言',
-                        r'^楔\\s*子',
-                        r'^尾声',
-                        r'^后记',
-                        r'^【.*】',
-                        r'^\\[.*\\]',
-                        r'^<.*>',
-                    ]
-
-                    import re
-
-                    for line in paragraphs:
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        # 检查是否是Markdown标准标题
-                        if line.startswith('###'):
-                            # 三级标题
-                            title = line.lstrip('#').strip()
-                            html_content += f'<h3>{title}</h3>'
-                        elif line.startswith('##'):
-                            # 二级标题
-                            title = line.lstrip('#').strip()
-                            html_content += f'<h2>{title}</h2>'
-                        elif line.startswith('#'):
-                            # 一级标题
-                            title = line.lstrip('#').strip()
-                            html_content += f'<h1>{title}</h1>'
-                        else:
-                            # 检查是否是章节标题
-                            is_chapter = False
-                            for pattern in chapter_patterns:
-                                if re.match(pattern, line, re.IGNORECASE):
-                                    # 判断标题级别
-                                    if re.match(r'^第[零一二三四五六七八九十百千万\d]+[章节回篇部页]', line) or re.match(r'^Chapter\\s*\\d+', line, re.IGNORECASE) or re.match(r'^卷[一二三四五六七八九十百千万\\d]+', line):
-                                        html_content += f'<h1>{line}</h1>'
-                                    elif re.match(r'^第\\d+[章节回篇部页]', line) or re.match(r'^Part\\s*\\d+', line, re.IGNORECASE) or re.match(r'^篇[一二三四五六七八九十百千万\\d]+', line):
-                                        html_content += f'<h2>{line}</h2>'
-                                    elif re.match(r'^[零一二三四五六七八九十]+、', line) or re.match(r'^[一二三四五六七八九十]+、', line):
-                                        html_content += f'<h3>{line}</h3>'
-                                    else:
-                                        html_content += f'<h3>{line}</h3>'
-                                    is_chapter = True
-                                    break
-
-                            if not is_chapter:
-                                html_content += f'<p>{line}</p>'
-
-                    # 如果没有识别到任何章节标题，尝试自动分段
-                    if '<h1>' not in html_content and '<h2>' not in html_content and '<h3>' not in html_content:
-                        # 统计段落数量
-                        paragraph_count = html_content.count('<p>')
-                        logger.info(f'未识别到章节标题，共有 {paragraph_count} 个段落')
-
-                        # 如果段落数量大于20，尝试按照固定间隔添加章节标记
-                        if paragraph_count > 20:
-                            logger.info('段落数量较多，尝试自动分段')
-                            paragraphs_with_chapters = html_content.split('<p>')
-                            html_content_new = ''
-
-                            # 每10个段落添加一个章节标题
-                            chapter_num = 1
-                            for i, para in enumerate(paragraphs_with_chapters):
-                                if i == 0:
-                                    continue  # 跳过第一个空段落
-
-                                # 每10个段落添加章节标记
-                                if (i - 1) % 10 == 0 and i > 1:
-                                    html_content_new += f'<h3>章节 {chapter_num}</h3>'
-                                    chapter_num += 1
-
-                                if para:
-                                    html_content_new += f'<p>{para}'
-
-                            html_content = html_content_new
-
-                    return html_content
-                    
+            with MmapTextSource(file_path) as source:
+                content = source.read_all()
+
+            # 根据文件扩展名处理内容
+            ext = Path(file_path).suffix.lower()
+            parts = []
+
+            if ext not in ('.txt', '.md'):
+                # 其他格式：直接返回，将换行转换为段落
+                for line in content.split('\n'):
+                    line = line.strip()
+                    if line:
+                        parts.append(f'<p>{line}</p>')
+                return ''.join(parts)
+
+            # TXT/Markdown文件：智能识别章节标题并转换为HTML（宽松模式，Markdown额外识别#标题）
+            markdown = ext == '.md'
+            segmenter = get_segmenter(markdown=markdown, loose=True)
+            has_heading = False
+            for line in content.split('\n'):
+                line = line.strip()
+                if not line:
+                    continue
+                level = segmenter.line_level(line)
+                if level:
+                    if markdown and line.startswith('#'):
+                        line = line.lstrip('#').strip()
+                    parts.append(f'<h{level}>{line}</h{level}>')
+                    has_heading = True
                 else:
-                    # 其他格式：直接返回，将换行转换为段落
-                    lines = content.split('\n')
-                    html_content = ''
-                    for line in lines:
-                        line = line.strip()
-                        if line:
-                            html_content += f'<p>{line}</p>'
-                    return html_content
-                    
-        except UnicodeDecodeError:
-            # 尝试其他编码
-            try:
-                with open(file_path, 'r', encoding='gbk') as f:
-                    content = f.read()
-                    paragraphs = content.split('\n')
-                    html_content = ''
-                    for para in paragraphs:
-                        para = para.strip()
-                        if para:
-                            html_content += f'<p>{para}</p>'
-                    return html_content
-            except Exception:
-                return f'<p>无法读取文件：{file_path}</p>'
+                    parts.append(f'<p>{line}</p>')
+
+            # 如果没有识别到任何章节标题，尝试自动分段
+            if not has_heading:
+                logger.info(f'未识别到章节标题，共有 {len(parts)} 个段落')
+
+                # 如果段落数量大于20，每10个段落添加一个章节标题
+                if len(parts) > 20:
+                    logger.info('段落数量较多，尝试自动分段')
+                    sectioned = []
+                    for i, para in enumerate(parts):
+                        if i and i % 10 == 0:
+                            sectioned.append(f'<h3>章节 {i // 10}</h3>')
+                        sectioned.append(para)
+                    parts = sectioned
+
+            return ''.join(parts)
+        except OSError:
+            return f'<p>无法读取文件：{file_path}</p>'
         except Exception as e:
             return f'<p>读取文件时出错：{str(e)}</p>'
     
@@ -10518,9 +10471,6 @@ class BrowserReader:
             # 获取书籍标题
             title = Path(file_path).stem
             
-            # 读取文件内容
-            content = BrowserReader.read_file_content(file_path)
-            
             # 获取browser_server配置
             browser_server_host = "localhost"
             browser_server_port = 54321
@@ -10540,6 +10490,8 @@ class BrowserReader:
             server = None
             server_thread = None
             server_id = None
+            # 进度服务器是否由本进程启动（只有这样才能按需提供本进程注册的书籍章节）
+            owns_server = False
             
             try:
                 from src.utils.browser_reader_server_manager import get_browser_reader_server_manager
@@ -10572,6 +10524,7 @@ class BrowserReader:
                         book_id = Path(file_path).stem
                         server_manager.register_callbacks(book_id, on_progress_save, on_progress_load)
                     
+                    owns_server = server_manager.is_server_running()
                     logger.info(f"使用全局浏览器阅读器服务器: {save_url}")
                 else:
                     logger.warning("无法获取服务器URL，尝试启动独立服务器")
@@ -10580,6 +10533,7 @@ class BrowserReader:
                         file_path, on_progress_save, on_progress_load
                     )
                     if save_url and load_url:
+                        owns_server = True
                         # 保存服务器对象到全局字典，防止被垃圾回收
                         server_id = str(uuid.uuid4())
                         _active_servers[server_id] = {
@@ -10598,6 +10552,7 @@ class BrowserReader:
                         file_path, on_progress_save, on_progress_load
                     )
                     if save_url and load_url:
+                        owns_server = True
                         server_id = str(uuid.uuid4())
                         _active_servers[server_id] = {
                             'server': server,
@@ -10634,10 +10589,23 @@ class BrowserReader:
                 except Exception as e:
                     logger.warning(f"获取初始进度失败: {e}")
             
+            # 文本书籍由本进程的服务器按需提供章节，页面不内嵌全文；否则读取全文嵌入页面
+            chapter_source = None
+            if owns_server and save_url and supports_chunked_reading(file_path):
+                try:
+                    chapter_source = {
+                        "url": save_url.rsplit('/', 1)[0] + BOOK_PATH_PREFIX.rstrip('/'),
+                        "book": register_book(file_path),
+                    }
+                except Exception as e:
+                    logger.warning(f"注册按需章节失败，改为内嵌全文: {e}")
+            content = "" if chapter_source else BrowserReader.read_file_content(file_path)
+            
             # 创建HTML
             html = BrowserReader.create_reader_html(
                 content, title, theme, custom_settings, save_url, load_url,
-                book_id, initial_progress, browser_server_host, browser_server_port
+                book_id, initial_progress, browser_server_host, browser_server_port,
+                chapter_source
             )
             
             # 创建临时HTML文件
@@ -10740,136 +10708,74 @@ class BrowserReader:
                 logger.error(f"经过 {max_retry} 次重试仍找不到可用端口")
                 return None, None, None, None
         
-        # 存储进度数据
-        progress_data = {}
+        # 进度回调（写数据库）合并到每个刷新间隔最多一次
+        progress_writer = ProgressWriteCoalescer(get_progress_flush_interval())
         
         # 创建请求处理器
-        class ProgressHandler(BaseHTTPRequestHandler):
-            def log_message(self, format, *args):
-                pass  # 禁用日志输出
-            
+        class ProgressHandler(ReaderRequestHandler):
             def do_GET(self):
-                if self.path == '/load_progress':
-                    # 加载进度
+                if handle_book_request(self):
+                    # 按需章节（/book/toc、/book/chapter）
+                    return
+                path = urlparse(self.path).path
+                if path == '/load_progress':
+                    # 加载进度（先写入尚未落盘的进度）
+                    data = None
                     if on_progress_load:
+                        progress_writer.flush()
                         data = on_progress_load()
-                        logger.info(f"从数据库加载进度数据: {data}")
-                        if data:
-                            self.send_response(200)
-                            self.send_header('Content-type', 'application/json')
-                            self.send_header('Access-Control-Allow-Origin', '*')
-                            self.end_headers()
-                            self.wfile.write(json.dumps(data).encode())
-                        else:
-                            self.send_response(404)
-                            self.end_headers()
-                elif self.path == '/health_check':
+                        logger.debug(f"从数据库加载进度数据: {data}")
+                    if data:
+                        self.send_json(200, data)
+                    else:
+                        self.send_empty(404)
+                elif path == '/health_check':
                     # 健康检查
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({"status": "ok"}).encode())
-                elif self.path.startswith('/src/locales/'):
+                    self.send_json(200, {"status": "ok"})
+                elif path.startswith('/src/locales/'):
                     # 提供静态文件访问（翻译文件）
-                    self.serve_static_file(self.path[1:])  # 移除开头的 /
+                    self.serve_static_file(path[1:])  # 移除开头的 /
                 else:
-                    self.send_response(404)
-                    self.end_headers()
-            
-            def serve_static_file(self, relative_path):
-                """提供静态文件访问"""
-                try:
-                    # 构建绝对路径
-                    base_path = Path(__file__).parent.parent
-                    file_path = base_path / relative_path
-                    
-                    if file_path.exists() and file_path.is_file():
-                        # 读取文件内容
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # 设置正确的Content-Type
-                        if file_path.suffix == '.json':
-                            content_type = 'application/json; charset=utf-8'
-                        else:
-                            content_type = 'text/plain; charset=utf-8'
-                        
-                        self.send_response(200)
-                        self.send_header('Content-Type', content_type)
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(content.encode('utf-8'))
-                    else:
-                        self.send_response(404)
-                        self.end_headers()
-                except Exception as e:
-                    logger.error(f"静态文件访问错误: {e}")
-                    self.send_response(500)
-                    self.end_headers()
+                    self.send_empty(404)
             
             def do_POST(self):
                 if self.path == '/save_progress':
                     # 保存进度
-                    content_length = int(self.headers['Content-Length'])
-                    post_data = self.rfile.read(content_length)
+                    post_data = self.read_body()
 
                     try:
-                        raw_json = post_data.decode('utf-8')
-                        data = json.loads(raw_json)
+                        data = json.loads(post_data.decode('utf-8'))
 
-                        progress_raw = data.get('progress', 0)
+                        progress = float(data.get('progress', 0))
                         scroll_top = int(data.get('scrollTop', 0))
                         scroll_height = int(data.get('scrollHeight', 0))
 
-                        logger.info(f"接收到保存进度请求:")
-                        logger.info(f"  - 原始JSON字符串: {raw_json}")
-                        logger.info(f"  - 解析后的data: {data}")
-                        logger.info(f"  - progress原始值: {progress_raw}, 类型: {type(progress_raw)}")
-
-                        # 转换为float
-                        progress = float(progress_raw)
-                        logger.info(f"  - progress转换后: {progress}, 类型: {type(progress)}")
-                        logger.info(f"  - scrollTop: {scroll_top}px")
-                        logger.info(f"  - scrollHeight: {scroll_height}px")
-
                         # 获取额外信息
                         current_page = int(data.get('current_page', 0))
                         total_pages = int(data.get('total_pages', 0))
                         word_count = int(data.get('word_count', 0))
 
-                        logger.info(f"  - current_page: {current_page}, total_pages: {total_pages}, word_count: {word_count}")
+                        logger.debug(f"接收到保存进度请求: progress={progress}, scrollTop={scroll_top}px, "
+                                     f"scrollHeight={scroll_height}px, current_page={current_page}, "
+                                     f"total_pages={total_pages}, word_count={word_count}")
 
                         if on_progress_save:
-                            on_progress_save(progress, scroll_top, scroll_height,
-                                              current_page, total_pages, word_count)
-
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(json.dumps({"status": "success"}).encode())
+                            progress_writer.submit(file_path, on_progress_save, progress, scroll_top, scroll_height,
+                                                   current_page, total_pages, word_count)
+
+                        self.send_json(200, {"status": "success"})
                     except Exception as e:
                         logger.error(f"保存进度出错: {e}")
-                        self.send_response(500)
-                        self.end_headers()
+                        self.send_empty(500)
                 else:
-                    self.send_response(404)
-                    self.end_headers()
-            
-            def do_OPTIONS(self):
-                # CORS预检请求
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-                self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-                self.end_headers()
+                    self.send_empty(404)
         
         # 启动服务器
         def try_start_server(port_to_try, server_host):
             """尝试在指定端口启动服务器"""
             try:
-                server = HTTPServer((server_host, port_to_try), ProgressHandler)
+                server = ReaderHTTPServer((server_host, port_to_try), ProgressHandler)
+                server.progress_writer = progress_writer
                 server_thread = Thread(target=server.serve_forever, daemon=True)
                 server_thread.start()
                 
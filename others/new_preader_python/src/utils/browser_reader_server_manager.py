@@ -8,6 +8,10 @@ import time
 from typing import Optional, Dict, Any, Callable
 from src.utils.logger import get_logger
 from src.utils.browser_reader import BrowserReader
+from src.utils.browser_book_service import handle_book_request
+from src.utils.reader_http import (
+    ProgressWriteCoalescer, ReaderHTTPServer, ReaderRequestHandler, get_progress_flush_interval
+)
 
 logger = get_logger(__name__)
 
@@ -39,6 +43,8 @@ class BrowserReaderServerManager:
         self._load_url: Optional[str] = None
         self._callbacks: Dict[str, Dict[str, Any]] = {}
         self._book_progress_data: Dict[str, Dict] = {}
+        # 进度回调（写数据库）按书合并，浏览器频繁保存时不会每次都写入
+        self._progress_writer = ProgressWriteCoalescer(get_progress_flush_interval())
         
         logger.info("浏览器阅读器服务器管理器已初始化")
     
@@ -151,19 +157,20 @@ class BrowserReaderServerManager:
     
     def _start_custom_server(self, port: int, host: str = "localhost") -> tuple:
         """启动自定义服务器"""
-        from http.server import BaseHTTPRequestHandler
         import json
         import threading
         from urllib.parse import parse_qs, urlparse
         
-        class CustomProgressHandler(BaseHTTPRequestHandler):
-            def log_message(self, format, *args):
-                pass  # 禁用日志输出
+        class CustomProgressHandler(ReaderRequestHandler):
+            cors_headers = "Content-Type, X-Book-ID"
             
             def do_GET(self):
-                if self.path == '/load_progress':
+                if handle_book_request(self):
+                    # 按需章节（/book/toc、/book/chapter）
+                    return
+                parsed = urlparse(self.path)
+                if parsed.path == '/load_progress':
                     # 从查询参数获取书籍ID
-                    parsed = urlparse(self.path)
                     query = parse_qs(parsed.query)
                     book_id = query.get('book_id', [''])[0]
                     
@@ -172,24 +179,17 @@ class BrowserReaderServerManager:
                     data = manager.load_progress(book_id)
                     
                     if data:
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(json.dumps(data).encode())
+                        self.send_json(200, data)
                     else:
-                        self.send_response(404)
-                        self.end_headers()
-                elif self.path == '/health_check':
+                        self.send_empty(404)
+                elif parsed.path == '/health_check':
                     # 健康检查
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({"status": "ok"}).encode())
+                    self.send_json(200, {"status": "ok"})
+                elif parsed.path.startswith('/src/locales/'):
+                    # 提供静态文件访问（翻译文件）
+                    self.serve_static_file(parsed.path[1:])
                 else:
-                    self.send_response(404)
-                    self.end_headers()
+                    self.send_empty(404)
             
             def do_POST(self):
                 if self.path == '/save_progress':
@@ -200,8 +200,7 @@ class BrowserReaderServerManager:
                     book_id = unquote(book_id_header)
                     
                     # 读取请求数据
-                    content_length = int(self.headers['Content-Length'])
-                    post_data = self.rfile.read(content_length)
+                    post_data = self.read_body()
                     
                     try:
                         data = json.loads(post_data.decode('utf-8'))
@@ -224,33 +223,19 @@ class BrowserReaderServerManager:
                         )
                         
                         if success:
-                            self.send_response(200)
-                            self.send_header('Content-type', 'application/json')
-                            self.send_header('Access-Control-Allow-Origin', '*')
-                            self.end_headers()
-                            self.wfile.write(json.dumps({"status": "success"}).encode())
+                            self.send_json(200, {"status": "success"})
                         else:
-                            self.send_response(500)
-                            self.send_header('Access-Control-Allow-Origin', '*')
-                            self.end_headers()
+                            self.send_empty(500)
                     except Exception as e:
                         import traceback
-                        error_msg = f"保存进度出错: {e}"
-                        logger.error(error_msg, exc_info=True)
-                        logger.error(f"接收到的数据: {post_data}")
-                        logger.error(f"错误堆栈:\n{traceback.format_exc()}")
-                        self.send_response(500)
-                        self.send_header('Content-type', 'application/json')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(json.dumps({"error": str(e), "traceback": traceback.format_exc()}).encode())
+                        logger.error(f"保存进度出错: {e}, 接收到的数据: {post_data[:200]}", exc_info=True)
+                        self.send_json(500, {"error": str(e), "traceback": traceback.format_exc()})
                 elif self.path == '/scan_directory':
                     # 扫描目录并导入书籍
                     import os
                     from src.config.default_config import SUPPORTED_FORMATS
                     
-                    content_length = int(self.headers['Content-Length'])
-                    post_data = self.rfile.read(content_length)
+                    post_data = self.read_body()
                     
                     try:
                         data = json.loads(post_data.decode('utf-8'))
@@ -258,11 +243,7 @@ class BrowserReaderServerManager:
                         recursive = data.get('recursive', True)
                         
                         if not directory or not os.path.isdir(directory):
-                            self.send_response(400)
-                            self.send_header('Content-type', 'application/json')
-                            self.send_header('Access-Control-Allow-Origin', '*')
-                            self.end_headers()
-                            self.wfile.write(json.dumps({"success": False, "error": "无效的目录路径"}).encode())
+                            self.send_json(400, {"success": False, "error": "无效的目录路径"})
                             return
                         
                         # 支持的书籍文件扩展名
@@ -299,43 +280,26 @@ class BrowserReaderServerManager:
                         
                         logger.info(f"扫描目录 {directory} 完成，找到 {scan_count} 本书籍")
                         
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(json.dumps({
+                        self.send_json(200, {
                             "success": True,
                             "books": books,
                             "count": scan_count
-                        }).encode())
+                        })
                         
                     except Exception as e:
                         import traceback
                         logger.error(f"扫描目录出错: {e}", exc_info=True)
-                        self.send_response(500)
-                        self.send_header('Content-type', 'application/json')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(json.dumps({
+                        self.send_json(500, {
                             "success": False,
                             "error": str(e),
                             "traceback": traceback.format_exc()
-                        }).encode())
+                        })
                 else:
-                    self.send_response(404)
-                    self.end_headers()
-            
-            def do_OPTIONS(self):
-                # CORS预检请求
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-                self.send_header('Access-Control-Allow-Headers', 'Content-Type, X-Book-ID')
-                self.end_headers()
+                    self.send_empty(404)
         
         try:
-            from http.server import HTTPServer
-            server = HTTPServer((host, port), CustomProgressHandler)
+            # 多线程服务器：章节请求和进度保存互不阻塞
+            server = ReaderHTTPServer((host, port), CustomProgressHandler)
             # 使用守护线程，这样Python退出时不会等待
             server_thread = threading.Thread(target=server.serve_forever, daemon=True)
             server_thread.start()
@@ -351,8 +315,10 @@ class BrowserReaderServerManager:
     def stop_server(self):
         """停止浏览器阅读器服务器"""
         try:
+            self._progress_writer.stop()
             if self._server:
                 self._server.shutdown()
+                self._server.server_close()
                 self._server = None
             if self._server_thread and self._server_thread.is_alive():
                 # 设置超时，避免阻塞
@@ -434,11 +400,12 @@ class BrowserReaderServerManager:
                 'timestamp': time.time()
             }
             
-            # 如果有注册的回调，也调用它
+            # 如果有注册的回调，合并后写入（同一本书在刷新间隔内只写最新进度）
             if book_id in self._callbacks and 'save' in self._callbacks[book_id]:
                 callback = self._callbacks[book_id]['save']
                 if callback:
-                    callback(progress, scroll_top, scroll_height, current_page, total_pages, word_count)
+                    self._progress_writer.submit(book_id, callback, progress, scroll_top, scroll_height,
+                                                 current_page, total_pages, word_count)
             
             logger.debug(f"已保存书籍 {book_id} 的进度: {progress:.4f}")
             return True
@@ -1,11 +1,19 @@
 """
 通用缓存管理器：支持 LRU + LFU + TTL + 近似容量控制（以字节估算）
 用于解析结果与分页渲染缓存，集中清理入口
+
+- 淘汰均为 O(1)：LRU 使用 OrderedDict 维护访问顺序，LFU 使用频次分桶
+- 总字节数在写入/删除时增量维护，收缩时无需重新累加
+- 过期项通过到期时间小顶堆清理，不再每次写入都扫描全部缓存项
+- 每个缓存实例属于一个命名空间，可按命名空间设置容量预算，并统计命中/未命中/淘汰次数
 """
 
 import time
+import heapq
+import itertools
 import threading
-from typing import Any, Optional, Tuple, Dict, Union
+from collections import OrderedDict
+from typing import Any, Optional, Tuple, Dict, List, Union
 
 class CacheItem:
     __slots__ = ("value", "expires_at", "size", "access_count", "last_access_time")
@@ -19,21 +27,88 @@ class CacheItem:
     def is_expired(self) -> bool:
         return self.expires_at is not None and time.time() > self.expires_at
 
+class _FrequencyIndex:
+    """
+    LFU 频次分桶索引：访问次数 -> 按进入该桶先后排序的键集合
+    同一频次内最早进入的键即最久未访问的键，淘汰与更新均为 O(1)
+    """
+    def __init__(self) -> None:
+        self._buckets: Dict[int, "OrderedDict[Any, None]"] = {}
+        self._min_count = 0
+        self.access_sum = 0
+
+    def add(self, key: Any, count: int) -> None:
+        self._buckets.setdefault(count, OrderedDict())[key] = None
+        if self._min_count == 0 or count < self._min_count:
+            self._min_count = count
+        self.access_sum += count
+
+    def remove(self, key: Any, count: int) -> None:
+        bucket = self._buckets.get(count)
+        if bucket is None or key not in bucket:
+            return
+        del bucket[key]
+        self.access_sum -= count
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                # 频次种类很少，取最小值的代价可以忽略
+                self._min_count = min(self._buckets) if self._buckets else 0
+
+    def bump(self, key: Any, old_count: int) -> None:
+        bucket = self._buckets.get(old_count)
+        if bucket is not None and key in bucket:
+            del bucket[key]
+            if not bucket:
+                del self._buckets[old_count]
+                if self._min_count == old_count:
+                    self._min_count = old_count + 1
+        self._buckets.setdefault(old_count + 1, OrderedDict())[key] = None
+        if self._min_count == 0:
+            self._min_count = old_count + 1
+        self.access_sum += 1
+
+    def victim(self) -> Any:
+        bucket = self._buckets.get(self._min_count)
+        if not bucket:
+            return None
+        return next(iter(bucket))
+
+    def max_count(self) -> int:
+        return max(self._buckets) if self._buckets else 0
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._min_count = 0
+        self.access_sum = 0
+
 class BaseCache:
     """
     基础缓存类，提供通用功能
     """
-    def __init__(self, max_items: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+    def __init__(self, max_items: int = 1024, max_bytes: int = 64 * 1024 * 1024, name: str = ""):
         self._lock = threading.RLock()
-        self._store: Dict[Any, CacheItem] = {}
+        # 按最近访问顺序排列：最久未使用的在最前
+        self._store: "OrderedDict[Any, CacheItem]" = OrderedDict()
         self._max_items = max_items
         self._max_bytes = max_bytes
+        self.name = name
+        # 增量维护的总字节数
+        self._total_bytes = 0
+        # 到期时间小顶堆：(到期时间, 序号, 键)，键被覆盖后旧记录在出堆时忽略
+        self._expiry_heap: List[Tuple[float, int, Any]] = []
+        self._expiry_seq = itertools.count()
+        # 统计计数
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
 
     def _estimate_size(self, value: Any) -> int:
         # 近似估算：字符串按长度，列表按累加，字典按键值长度；其余给一个常数
         try:
             if isinstance(value, str):
-                return len(value.encode("utf-8", errors="ignore"))
+                return len(value) if value.isascii() else len(value.encode("utf-8", errors="ignore"))
             if isinstance(value, (bytes, bytearray)):
                 return len(value)
             if isinstance(value, list):
@@ -44,42 +119,146 @@ class BaseCache:
             pass
         return 1024  # 默认
 
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            item = self._store.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+            if item.is_expired():
+                self._pop(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._hits += 1
+            # 更新访问时间和访问次数
+            item.last_access_time = time.time()
+            self._touch(key, item)
+            return item.value
+
+    def set(self, key: Any, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        with self._lock:
+            size = self._estimate_size(value)
+            item = self._store.get(key)
+            # 如果键已存在，更新值并视为一次访问
+            if item is not None:
+                self._total_bytes += size - item.size
+                item.value = value
+                item.expires_at = (time.time() + ttl_seconds) if ttl_seconds else None
+                item.size = size
+                item.last_access_time = time.time()
+                self._touch(key, item)
+            else:
+                item = CacheItem(value, ttl_seconds, size)
+                self._store[key] = item
+                self._total_bytes += size
+                self._on_insert(key, item)
+            if item.expires_at is not None:
+                heapq.heappush(self._expiry_heap, (item.expires_at, next(self._expiry_seq), key))
+            self._shrink_if_needed()
+
+    def delete(self, key: Any) -> None:
+        """删除指定键"""
+        with self._lock:
+            self._pop(key)
+
+    def _touch(self, key: Any, item: CacheItem) -> None:
+        """记录一次访问：更新访问次数并移到最近使用端"""
+        item.access_count += 1
+        self._store.move_to_end(key)
+
+    def _on_insert(self, key: Any, item: CacheItem) -> None:
+        """新键写入后的索引维护（子类扩展）"""
+
+    def _on_remove(self, key: Any, item: CacheItem) -> None:
+        """键删除后的索引维护（子类扩展）"""
+
+    def _select_victim(self) -> Any:
+        """选择淘汰对象：默认最久未使用"""
+        return next(iter(self._store), None)
+
+    def _evict_item(self) -> None:
+        if not self._store:
+            return
+        victim = self._select_victim()
+        if victim is None:
+            victim = next(iter(self._store))
+        self._pop(victim)
+        self._evictions += 1
+
+    def _purge_expired(self) -> None:
+        """从到期堆顶清理已过期的项"""
+        heap = self._expiry_heap
+        now = time.time()
+        while heap and heap[0][0] < now:
+            expires_at, _, key = heapq.heappop(heap)
+            item = self._store.get(key)
+            if item is not None and item.expires_at == expires_at:
+                self._pop(key)
+                self._expirations += 1
+        # 键反复覆盖会留下失效记录，堆明显大于缓存项时重建
+        if len(heap) > 2 * len(self._store) + 64:
+            self._expiry_heap = [(it.expires_at, next(self._expiry_seq), k)
+                                 for k, it in self._store.items() if it.expires_at is not None]
+            heapq.heapify(self._expiry_heap)
+
     def _shrink_if_needed(self) -> None:
         # 清掉过期
-        expired_keys = [k for k, it in self._store.items() if it.is_expired()]
-        for k in expired_keys:
-            self._pop(k)
+        self._purge_expired()
         # 数量限制
         while len(self._store) > self._max_items:
             self._evict_item()
         # 容量限制
-        while self.total_bytes() > self._max_bytes and len(self._store) > 0:
+        while self._total_bytes > self._max_bytes and len(self._store) > 0:
             self._evict_item()
 
     def _pop(self, key: Any) -> None:
-        self._store.pop(key, None)
+        item = self._store.pop(key, None)
+        if item is not None:
+            self._total_bytes -= item.size
+            self._on_remove(key, item)
 
     def clear(self) -> None:
         with self._lock:
             self._store.clear()
+            self._expiry_heap.clear()
+            self._total_bytes = 0
 
     def total_bytes(self) -> int:
-        return sum(it.size for it in self._store.values())
+        return self._total_bytes
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """调整容量上限，超出部分立即淘汰"""
+        with self._lock:
+            self._max_bytes = max(0, int(max_bytes))
+            self._shrink_if_needed()
 
     def shrink_to_target(self, target_bytes: int) -> None:
         with self._lock:
             # 逐出直到容量低于目标
-            while self.total_bytes() > target_bytes and len(self._store) > 0:
+            self._purge_expired()
+            while self._total_bytes > target_bytes and len(self._store) > 0:
                 self._evict_item()
 
     def get_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         with self._lock:
+            lookups = self._hits + self._misses
             return {
+                "name": self.name,
                 "item_count": len(self._store),
-                "total_bytes": self.total_bytes(),
+                "total_bytes": self._total_bytes,
                 "max_items": self._max_items,
-                "max_bytes": self._max_bytes
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": (self._hits / lookups) if lookups else 0.0
             }
 
 class LRUCache(BaseCache):
@@ -88,92 +267,47 @@ class LRUCache(BaseCache):
     - max_items: 项数量上限（保底）
     - max_bytes: 近似容量上限（字节），用于触发收缩
     """
-    def get(self, key: Any) -> Optional[Any]:
-        with self._lock:
-            item = self._store.get(key)
-            if not item:
-                return None
-            if item.is_expired():
-                self._pop(key)
-                return None
-            # 更新访问时间和访问次数
-            item.last_access_time = time.time()
-            item.access_count += 1
-            return item.value
-
-    def set(self, key: Any, value: Any, ttl_seconds: Optional[int] = None) -> None:
-        with self._lock:
-            size = self._estimate_size(value)
-            # 如果键已存在，更新访问次数
-            if key in self._store:
-                existing_item = self._store[key]
-                existing_item.value = value
-                existing_item.expires_at = (time.time() + ttl_seconds) if ttl_seconds else None
-                existing_item.size = size
-                existing_item.access_count += 1
-            else:
-                self._store[key] = CacheItem(value, ttl_seconds, size)
-            self._shrink_if_needed()
-
-    def _evict_item(self) -> None:
-        if not self._store:
-            return
-        # 取最久未使用
-        oldest_key = min(self._store.items(), key=lambda kv: kv[1].last_access_time)[0]
-        self._pop(oldest_key)
 
 class LFUCache(BaseCache):
     """
     线程安全 LFU + TTL 缓存。
     - max_items: 项数量上限（保底）
     - max_bytes: 近似容量上限（字节），用于触发收缩
+    访问次数相同时淘汰最久未使用的项
     """
-    def get(self, key: Any) -> Optional[Any]:
-        with self._lock:
-            item = self._store.get(key)
-            if not item:
-                return None
-            if item.is_expired():
-                self._pop(key)
-                return None
-            # 更新访问时间和访问次数
-            item.last_access_time = time.time()
-            item.access_count += 1
-            return item.value
+    def __init__(self, max_items: int = 1024, max_bytes: int = 64 * 1024 * 1024, name: str = ""):
+        super().__init__(max_items, max_bytes, name)
+        self._frequency = _FrequencyIndex()
 
-    def set(self, key: Any, value: Any, ttl_seconds: Optional[int] = None) -> None:
+    def _touch(self, key: Any, item: CacheItem) -> None:
+        self._frequency.bump(key, item.access_count)
+        super()._touch(key, item)
+
+    def _on_insert(self, key: Any, item: CacheItem) -> None:
+        self._frequency.add(key, item.access_count)
+
+    def _on_remove(self, key: Any, item: CacheItem) -> None:
+        self._frequency.remove(key, item.access_count)
+
+    def _select_victim(self) -> Any:
+        return self._frequency.victim()
+
+    def clear(self) -> None:
         with self._lock:
-            size = self._estimate_size(value)
-            # 如果键已存在，更新访问次数
-            if key in self._store:
-                existing_item = self._store[key]
-                existing_item.value = value
-                existing_item.expires_at = (time.time() + ttl_seconds) if ttl_seconds else None
-                existing_item.size = size
-                existing_item.access_count += 1
-            else:
-                self._store[key] = CacheItem(value, ttl_seconds, size)
-            self._shrink_if_needed()
+            super().clear()
+            self._frequency.clear()
 
-    def _evict_item(self) -> None:
-        if not self._store:
-            return
-        # 取访问次数最少的，如果访问次数相同则取最久未使用的
-        least_frequent_key = min(
-            self._store.items(),
-            key=lambda kv: (kv[1].access_count, kv[1].last_access_time)
-        )[0]
-        self._pop(least_frequent_key)
-
-class AdaptiveCache(BaseCache):
+class AdaptiveCache(LFUCache):
     """
     自适应缓存：根据访问模式动态调整LRU/LFU策略
     - max_items: 项数量上限（保底）
     - max_bytes: 近似容量上限（字节），用于触发收缩
     - adaptation_window: 适应窗口大小（访问次数）
+    同时维护访问顺序与频次分桶，两种策略的淘汰都是 O(1)
     """
-    def __init__(self, max_items: int = 1024, max_bytes: int = 64 * 1024 * 1024, adaptation_window: int = 1000):
-        super().__init__(max_items, max_bytes)
+    def __init__(self, max_items: int = 1024, max_bytes: int = 64 * 1024 * 1024, adaptation_window: int = 1000,
+                 name: str = ""):
+        super().__init__(max_items, max_bytes, name)
         self._access_count = 0
         self._adaptation_window = adaptation_window
         self._strategy = "lru"  # 默认使用LRU策略
@@ -181,48 +315,23 @@ class AdaptiveCache(BaseCache):
 
     def get(self, key: Any) -> Optional[Any]:
         with self._lock:
-            item = self._store.get(key)
-            if not item:
-                return None
-            if item.is_expired():
-                self._pop(key)
-                return None
-            # 更新访问时间和访问次数
-            item.last_access_time = time.time()
-            item.access_count += 1
-            self._access_count += 1
-            return item.value
+            value = super().get(key)
+            if value is not None:
+                self._access_count += 1
+            return value
 
     def set(self, key: Any, value: Any, ttl_seconds: Optional[int] = None) -> None:
         with self._lock:
-            size = self._estimate_size(value)
-            # 如果键已存在，更新访问次数
-            if key in self._store:
-                existing_item = self._store[key]
-                existing_item.value = value
-                existing_item.expires_at = (time.time() + ttl_seconds) if ttl_seconds else None
-                existing_item.size = size
-                existing_item.access_count += 1
-            else:
-                self._store[key] = CacheItem(value, ttl_seconds, size)
             self._access_count += 1
-            self._shrink_if_needed()
+            super().set(key, value, ttl_seconds)
 
-    def _evict_item(self) -> None:
-        if not self._store:
-            return
+    def _select_victim(self) -> Any:
         # 根据当前策略选择淘汰算法
         if self._strategy == "lru":
             # LRU: 取最久未使用的
-            oldest_key = min(self._store.items(), key=lambda kv: kv[1].last_access_time)[0]
-            self._pop(oldest_key)
-        else:  # LFU
-            # LFU: 取访问次数最少的，如果访问次数相同则取最久未使用的
-            least_frequent_key = min(
-                self._store.items(),
-                key=lambda kv: (kv[1].access_count, kv[1].last_access_time)
-            )[0]
-            self._pop(least_frequent_key)
+            return next(iter(self._store), None)
+        # LFU: 取访问次数最少的，如果访问次数相同则取最久未使用的
+        return self._frequency.victim()
 
     def _should_adapt_strategy(self) -> bool:
         """判断是否需要调整策略"""
@@ -243,13 +352,9 @@ class AdaptiveCache(BaseCache):
             if len(self._store) < 10:  # 缓存项太少，使用默认策略
                 return self._strategy
 
-            # 计算访问频率分布
-            access_counts = [item.access_count for item in self._store.values()]
-            if not access_counts:
-                return self._strategy
-
-            avg_access = sum(access_counts) / len(access_counts)
-            max_access = max(access_counts)
+            # 计算访问频率分布（由频次分桶增量维护）
+            avg_access = self._frequency.access_sum / len(self._store)
+            max_access = self._frequency.max_count()
 
             # 如果访问频率差异很大，更适合LFU
             if max_access > avg_access * 2:
@@ -259,12 +364,79 @@ class AdaptiveCache(BaseCache):
 
             return self._strategy
 
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats["strategy"] = self._strategy
+        return stats
+
+# 命名空间 -> 缓存实例
+_cache_registry: Dict[str, BaseCache] = {}
+
+def register_cache(name: str, cache: BaseCache) -> BaseCache:
+    """
+    按命名空间注册缓存实例，纳入统一的预算、收缩与统计
+
+    Args:
+        name: 命名空间
+        cache: 缓存实例
+
+    Returns:
+        BaseCache: 注册的缓存实例
+    """
+    cache.name = name
+    _cache_registry[name] = cache
+    return cache
+
+# 各命名空间默认容量预算（MB）
+DEFAULT_CACHE_BUDGETS_MB: Dict[str, int] = {
+    "parse": 128,
+    "paginate": 256,
+    "parsing_result": 64,
+}
+
 # 全局缓存实例：解析缓存与分页缓存分离
-parse_cache = AdaptiveCache(max_items=256, max_bytes=128 * 1024 * 1024)
-paginate_cache = AdaptiveCache(max_items=512, max_bytes=256 * 1024 * 1024)
+parse_cache = register_cache("parse", AdaptiveCache(max_items=256, max_bytes=DEFAULT_CACHE_BUDGETS_MB["parse"] * 1024 * 1024))
+paginate_cache = register_cache("paginate", AdaptiveCache(max_items=512, max_bytes=DEFAULT_CACHE_BUDGETS_MB["paginate"] * 1024 * 1024))
 
 # 解析结果缓存专用实例，支持更细粒度的缓存控制
-parsing_result_cache = AdaptiveCache(max_items=128, max_bytes=64 * 1024 * 1024)
+parsing_result_cache = register_cache("parsing_result", AdaptiveCache(max_items=128, max_bytes=DEFAULT_CACHE_BUDGETS_MB["parsing_result"] * 1024 * 1024))
+
+def apply_cache_budgets(budgets_mb: Dict[str, Union[int, float]]) -> None:
+    """
+    按命名空间设置缓存容量预算
+
+    Args:
+        budgets_mb: 命名空间 -> 预算（MB），未知的命名空间忽略
+    """
+    for name, budget in (budgets_mb or {}).items():
+        cache = _cache_registry.get(name)
+        if cache is None:
+            continue
+        try:
+            cache.set_max_bytes(int(float(budget) * 1024 * 1024))
+        except (TypeError, ValueError):
+            continue
+
+def shrink_caches_to_target(target_bytes: int) -> None:
+    """
+    内存压力下按各命名空间预算的比例收缩全部缓存，使总占用不超过目标
+
+    Args:
+        target_bytes: 全部缓存合计的目标字节数
+    """
+    caches = list(_cache_registry.values())
+    total_budget = sum(cache.max_bytes for cache in caches)
+    for cache in caches:
+        share = cache.max_bytes / total_budget if total_budget > 0 else 1 / len(caches)
+        cache.shrink_to_target(int(target_bytes * share))
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有命名空间的缓存统计"""
+    return {name: cache.get_stats() for name, cache in _cache_registry.items()}
+
+def collect_cache_metrics() -> Dict[str, Any]:
+    """性能监控自定义指标收集器：各命名空间的命中/未命中/淘汰计数与容量"""
+    return {"caches": get_cache_stats()}
 
 def make_key(*parts: Any) -> Tuple[Any, ...]:
     # 将复杂对象转为可哈希的元组键
@@ -279,4 +451,4 @@ def make_key(*parts: Any) -> Tuple[Any, ...]:
                 normalized.append(p)
         except Exception:
             normalized.append(str(p))
-    return tuple(normalized)
\ No newline at end of file
+    return tuple(normalized)
@@ -0,0 +1,314 @@
+"""
+章节清单：与小说文件放在一起的 <文件>.manifest（JSON Lines），记录每一章的
+规范化标题哈希、内容指纹、来源URL和在文件中的结束偏移
+
+- 增量爬取时用集合查找判断重复章节，不再与已保存章节逐一比较
+- 维护由章节指纹串联得到的摘要，代替每次对整个文件重新计算哈希
+- 清单缺失或与文件大小不符（如被外部修改）时，按章节标题行扫描文件重建
+"""
+
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_SUFFIX = ".manifest"
+MANIFEST_VERSION = 1
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TITLE_NOISE_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+_APPENDED_TITLE_BAR = "#" * 30
+
+
+def title_key(title: str) -> str:
+    """
+    规范化标题哈希：NFKC 归一化、忽略大小写、空白和标点
+
+    Args:
+        title: 章节标题
+
+    Returns:
+        str: 标题哈希
+    """
+    normalized = _TITLE_NOISE_RE.sub("", unicodedata.normalize("NFKC", title or "")).lower()
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def content_fingerprint(content: str) -> str:
+    """
+    内容指纹：忽略空白差异（不同保存格式的换行/缩进不影响结果）
+
+    Args:
+        content: 章节正文
+
+    Returns:
+        str: 内容指纹，正文为空时返回空字符串
+    """
+    normalized = _WHITESPACE_RE.sub("", content or "")
+    if not normalized:
+        return ""
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()
+
+
+class ChapterManifest:
+    """单本小说的章节清单"""
+
+    def __init__(self, novel_path: Optional[str] = None):
+        """
+        创建空清单
+
+        Args:
+            novel_path: 小说文件路径（首次爬取时可稍后在 save 中指定）
+        """
+        self.novel_path = novel_path
+        self.entries: List[Dict[str, Any]] = []
+        self.digest = ""
+        self._titles: Set[str] = set()
+        self._fingerprints: Set[str] = set()
+        self._urls: Set[str] = set()
+        self._numbers: Set[int] = set()
+        self._saved_count = 0
+        self._needs_rewrite = True
+
+    @property
+    def manifest_path(self) -> str:
+        return self.novel_path + MANIFEST_SUFFIX
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, novel_path: str, expected_size: Optional[int] = None) -> "ChapterManifest":
+        """
+        读取小说的章节清单，缺失或失效时扫描文件重建
+
+        Args:
+            novel_path: 小说文件路径
+            expected_size: 清单应对应的文件大小，默认为文件当前大小
+
+        Returns:
+            ChapterManifest: 章节清单
+        """
+        manifest = cls(novel_path)
+        if expected_size is None:
+            expected_size = os.path.getsize(novel_path) if os.path.exists(novel_path) else 0
+        if manifest._read(expected_size):
+            return manifest
+        manifest = cls(novel_path)
+        if os.path.exists(novel_path):
+            manifest._rebuild(expected_size)
+        return manifest
+
+    def _read(self, expected_size: int) -> bool:
+        if not os.path.exists(self.manifest_path):
+            return False
+        state: Optional[Dict[str, Any]] = None
+        entries: List[Dict[str, Any]] = []
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if "state" in record:
+                        state = record["state"]
+                        state["entries"] = len(entries)
+                    else:
+                        entries.append(record)
+        except OSError as e:
+            logger.warning(f"读取章节清单失败: {self.manifest_path}, 错误: {e}")
+            return False
+        if (not state or state.get("version") != MANIFEST_VERSION
+                or state.get("size") != expected_size):
+            logger.info(f"章节清单与文件不一致，将重建: {self.manifest_path}")
+            return False
+        # 最后一条状态之后的记录属于未完成的保存，丢弃
+        for entry in entries[:state["entries"]]:
+            self._index(entry)
+        self.digest = state.get("digest", "")
+        self._saved_count = len(self.entries)
+        self._needs_rewrite = len(entries) != self._saved_count
+        return True
+
+    def _rebuild(self, size: int) -> None:
+        """按章节标题行（"## 标题" 或 30个#包围的 "# 标题"）扫描文件重建清单"""
+        title: Optional[str] = None
+        body: List[str] = []
+        offset = 0
+        # 最后一个非空行（不含换行符）的结束位置：追加格式的章节结束于正文末尾，
+        # 其后的空行属于下一章的标题块
+        content_end = 0
+        pending_bar = False
+        appended = False
+
+        def flush(end_offset: int) -> None:
+            if title is not None:
+                self.register({"title": title, "content": "".join(body), "offset": end_offset})
+
+        with open(self.novel_path, "r", encoding="utf-8", errors="replace", newline="") as f:
+            for line in f:
+                stripped = line.rstrip("\r\n")
+                line_end = offset + len(line.encode("utf-8"))
+                if stripped.startswith("## "):
+                    flush(content_end if appended else offset)
+                    title, body, appended = stripped[3:], [], False
+                elif stripped == _APPENDED_TITLE_BAR:
+                    if pending_bar:
+                        pending_bar = False
+                    else:
+                        pending_bar = True
+                        # "## 标题" 格式的章节以两个换行结束，之后的空行属于追加的标题块
+                        flush(content_end if appended else min(content_end + 2, offset))
+                        title, body = None, []
+                elif pending_bar and stripped.startswith("# "):
+                    title, body, appended = stripped[2:], [], True
+                elif title is not None:
+                    body.append(line)
+                if stripped.strip():
+                    content_end = line_end - (len(line) - len(stripped))
+                offset = line_end
+                if offset >= size:
+                    break
+        flush(min(content_end if appended else offset, size))
+        self._needs_rewrite = True
+        logger.info(f"已从文件重建章节清单，共 {len(self.entries)} 章: {self.novel_path}")
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        self.entries.append(entry)
+        self._titles.add(entry["t"])
+        if entry.get("c"):
+            self._fingerprints.add(entry["c"])
+        if entry.get("u"):
+            self._urls.add(entry["u"])
+        if isinstance(entry.get("n"), int):
+            self._numbers.add(entry["n"])
+
+    def is_duplicate(self, chapter: Dict[str, Any]) -> bool:
+        """
+        判断章节是否已存在：来源URL相同或内容指纹相同
+
+        只有标题相同不视为重复（如 "第 1 页" 这类按页命名的标题在每次增量爬取中都会出现）
+
+        Args:
+            chapter: 章节字典（含 content，或已含 fingerprint 的元数据）
+
+        Returns:
+            bool: 是否重复
+        """
+        url = chapter.get("url")
+        if url and url in self._urls:
+            return True
+        fingerprint = chapter.get("fingerprint")
+        if fingerprint is None:
+            fingerprint = content_fingerprint(chapter.get("content", ""))
+        return bool(fingerprint) and fingerprint in self._fingerprints
+
+    def has_title(self, title: str) -> bool:
+        """是否存在规范化后相同的标题"""
+        return title_key(title) in self._titles
+
+    def register(self, chapter: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        登记一章（内存中），save 时写入清单文件
+
+        Args:
+            chapter: 章节字典或写入器返回的元数据（title、url、chapter_number、offset、fingerprint/content）
+
+        Returns:
+            Dict[str, Any]: 清单记录
+        """
+        fingerprint = chapter.get("fingerprint")
+        if fingerprint is None:
+            fingerprint = content_fingerprint(chapter.get("content", ""))
+        entry = {
+            "n": chapter.get("chapter_number"),
+            "t": title_key(chapter.get("title", "")),
+            "c": fingerprint,
+            "u": chapter.get("url", ""),
+            "o": chapter.get("offset", 0),
+        }
+        self._index(entry)
+        self.digest = hashlib.md5((self.digest + fingerprint).encode("utf-8")).hexdigest()
+        return entry
+
+    def filter_new(self, chapters: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        过滤掉已存在的章节（同一批次内的重复也会被过滤）
+
+        Args:
+            chapters: 新章节列表
+
+        Returns:
+            (新章节列表, 重复数量)
+        """
+        unique = []
+        duplicate_count = 0
+        seen_urls: Set[str] = set()
+        seen_fingerprints: Set[str] = set()
+        for chapter in chapters:
+            url = chapter.get("url")
+            fingerprint = chapter.get("fingerprint")
+            if fingerprint is None:
+                fingerprint = content_fingerprint(chapter.get("content", ""))
+            if (self.is_duplicate(dict(chapter, fingerprint=fingerprint))
+                    or (url and url in seen_urls)
+                    or (fingerprint and fingerprint in seen_fingerprints)):
+                duplicate_count += 1
+                continue
+            if url:
+                seen_urls.add(url)
+            if fingerprint:
+                seen_fingerprints.add(fingerprint)
+            unique.append(chapter)
+        return unique, duplicate_count
+
+    def find_gaps(self) -> List[int]:
+        """
+        查找章节编号中的缺口
+
+        Returns:
+            List[int]: 缺失的章节编号（按升序）
+        """
+        numbers = sorted(n for n in self._numbers if n > 0)
+        if not numbers:
+            return []
+        return sorted(set(range(numbers[0], numbers[-1] + 1)) - self._numbers)
+
+    def save(self, novel_path: Optional[str] = None, offset_shift: int = 0) -> None:
+        """
+        保存清单：只追加新登记的记录和一条状态记录；重建过的清单整体重写
+
+        Args:
+            novel_path: 小说文件路径（首次爬取时在这里指定最终路径）
+            offset_shift: 新记录偏移的修正量（如首次保存时在正文前加入的标题字节数）
+        """
+        if novel_path:
+            self.novel_path = novel_path
+        for entry in self.entries[self._saved_count:]:
+            entry["o"] += offset_shift
+        state = {"state": {"version": MANIFEST_VERSION, "size": os.path.getsize(self.novel_path),
+                           "digest": self.digest, "count": len(self.entries)}}
+        try:
+            if self._needs_rewrite:
+                tmp_path = self.manifest_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for entry in self.entries:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    f.write(json.dumps(state) + "\n")
+                os.replace(tmp_path, self.manifest_path)
+                self._needs_rewrite = False
+            else:
+                with open(self.manifest_path, "a", encoding="utf-8") as f:
+                    for entry in self.entries[self._saved_count:]:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    f.write(json.dumps(state) + "\n")
+            self._saved_count = len(self.entries)
+        except OSError as e:
+            logger.warning(f"保存章节清单失败: {self.manifest_path}, 错误: {e}")
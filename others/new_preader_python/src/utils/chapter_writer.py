@@ -0,0 +1,279 @@
+"""
+章节流式写入：爬取时每解析完一章就写入磁盘，内存中只保留章节元数据
+
+- 每写完一章，先刷新正文数据，再向日志文件（<文件>.journal）追加一行记录（章节信息 + 写入后的文件偏移）
+- 崩溃后重新打开时按日志把文件截断到最后一个完整章节，已记录的章节可以直接续爬
+- 追加模式直接在已有小说末尾写入，不读取、不重写原有内容；放弃时截断回原始大小
+- 可关联章节清单（ChapterManifest），写入前按清单跳过重复章节，写入后登记到清单
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.chapter_manifest import ChapterManifest, content_fingerprint
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+
+
+def format_chapter_block(chapter: Dict[str, Any]) -> str:
+    """
+    新建小说文件的章节格式（与 BaseParser.save_to_file 一致）
+
+    Args:
+        chapter: 章节字典，包含 title 和 content
+
+    Returns:
+        str: 章节文本
+    """
+    return f"## {chapter.get('title', '未知章节')}\n\n{chapter.get('content', '')}\n\n"
+
+
+def format_appended_chapter(chapter: Dict[str, Any]) -> str:
+    """
+    增量追加的章节格式（与 append_chapters_to_file 一致）
+
+    Args:
+        chapter: 章节字典，包含 title 和 content
+
+    Returns:
+        str: 章节文本
+    """
+    parts = []
+    chapter_title = chapter.get('title', '')
+    chapter_content = chapter.get('content', '')
+    if chapter_title:
+        parts.append(f"\n\n{'#'*30}")
+        parts.append(f"# {chapter_title}")
+        parts.append(f"{'#'*30}")
+    if chapter_content:
+        parts.append(chapter_content)
+    return ''.join(f"\n{part}" for part in parts)
+
+
+class ChapterWriter:
+    """带日志的章节追加写入器"""
+
+    def __init__(self, path: str, append: bool = False,
+                 formatter: Callable[[Dict[str, Any]], str] = format_chapter_block,
+                 sync_each_chapter: bool = True):
+        """
+        打开写入器；若存在日志文件则先恢复到最后一个完整章节
+
+        Args:
+            path: 写入的文件路径
+            append: 是否追加到已有文件（否则新建/清空）
+            formatter: 章节文本格式化函数
+            sync_each_chapter: 每章写入后是否 fsync（爬取时开启，崩溃后最多丢失正在写的一章）
+        """
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.formatter = formatter
+        self.sync_each_chapter = sync_each_chapter
+        self.append = append
+        self.info: Dict[str, Any] = {}
+        self.chapters: List[Dict[str, Any]] = []
+        self.recovered_count = 0
+        self.duplicate_count = 0
+        self.header_bytes = 0
+        self.manifest: Optional[ChapterManifest] = None
+        self._dedupe = False
+        self._base_size = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.journal_path):
+            self._recover()
+        else:
+            self._start()
+        self._file = open(self.path, 'ab')
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _start(self) -> None:
+        if self.append and os.path.exists(self.path):
+            self._base_size = os.path.getsize(self.path)
+        else:
+            self.append = False
+            open(self.path, 'wb').close()
+        self._write_journal([{"base_size": self._base_size, "append": self.append}])
+
+    def _write_journal(self, entries: List[Dict[str, Any]]) -> None:
+        """原子地重写日志文件"""
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _recover(self) -> None:
+        """按日志恢复：丢弃最后一条完整记录之后写入的数据"""
+        header: Optional[Dict[str, Any]] = None
+        entries: List[Dict[str, Any]] = []
+        with open(self.journal_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 崩溃时写了一半的记录
+                    break
+                if header is None:
+                    header = entry
+                elif "info" in entry:
+                    self.info.update(entry["info"])
+                else:
+                    entries.append(entry)
+        if header is None or not os.path.exists(self.path):
+            logger.warning(f"章节日志无效，重新开始写入: {self.journal_path}")
+            self._start()
+            return
+
+        self._base_size = int(header.get("base_size", 0))
+        self.append = bool(header.get("append", False))
+        committed = entries[-1]["offset"] if entries else self._base_size
+        if os.path.getsize(self.path) > committed:
+            with open(self.path, 'r+b') as f:
+                f.truncate(committed)
+        self.chapters = entries
+        self.recovered_count = len(self.chapters)
+        journal = [header] + ([{"info": self.info}] if self.info else []) + entries
+        self._write_journal(journal)
+        logger.info(f"从章节日志恢复 {self.recovered_count} 个已写入章节: {self.path}")
+
+    @property
+    def base_size(self) -> int:
+        """追加模式下文件原有的字节数"""
+        return self._base_size
+
+    def attach_manifest(self, manifest: ChapterManifest, dedupe: bool = False) -> None:
+        """
+        关联章节清单：已写入（含从日志恢复）的章节登记到清单
+
+        Args:
+            manifest: 章节清单
+            dedupe: 是否在写入前跳过清单中已存在的章节
+        """
+        self.manifest = manifest
+        self._dedupe = dedupe
+        for meta in self.chapters:
+            manifest.register(meta)
+
+    def set_info(self, **info: Any) -> None:
+        """
+        记录小说信息（如标题、作者），恢复时可取回
+
+        Args:
+            **info: 信息键值
+        """
+        changed = {k: v for k, v in info.items() if v is not None and self.info.get(k) != v}
+        if not changed:
+            return
+        self.info.update(changed)
+        self._journal.write(json.dumps({"info": changed}, ensure_ascii=False) + "\n")
+        self._journal.flush()
+
+    def write_chapter(self, chapter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        写入一章并记录日志
+
+        Args:
+            chapter: 章节字典（title、content、url、chapter_number 等）
+
+        Returns:
+            Optional[Dict[str, Any]]: 不含正文的章节元数据；按清单判定为重复而跳过时返回None
+        """
+        content = chapter.get('content', '') or ''
+        fingerprint = content_fingerprint(content)
+        if self._dedupe and self.manifest.is_duplicate(dict(chapter, fingerprint=fingerprint)):
+            self.duplicate_count += 1
+            logger.debug(f"章节已存在，跳过: {chapter.get('title', '')}")
+            return None
+        self._file.write(self.formatter(chapter).encode('utf-8'))
+        self._file.flush()
+        if self.sync_each_chapter:
+            os.fsync(self._file.fileno())
+        meta = {key: value for key, value in chapter.items() if key != 'content'}
+        meta.setdefault('hash', hashlib.md5(content.encode('utf-8')).hexdigest())
+        meta['length'] = len(content)
+        meta['fingerprint'] = fingerprint
+        meta['offset'] = self._file.tell()
+        self._journal.write(json.dumps(meta, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        if self.sync_each_chapter:
+            os.fsync(self._journal.fileno())
+        self.chapters.append(meta)
+        if self.manifest is not None:
+            self.manifest.register(meta)
+        return meta
+
+    def write_chapters(self, chapters: List[Dict[str, Any]], release: bool = False) -> None:
+        """
+        依次写入多章
+
+        Args:
+            chapters: 章节列表
+            release: 写入后是否从章节字典中移除正文以尽早释放内存
+        """
+        for chapter in chapters:
+            self.write_chapter(chapter)
+            if release:
+                chapter.pop('content', None)
+
+    def _close_files(self) -> None:
+        for handle in (self._file, self._journal):
+            if not handle.closed:
+                handle.flush()
+                os.fsync(handle.fileno())
+                handle.close()
+
+    def close(self) -> None:
+        """关闭但保留日志（下次打开时可续写）"""
+        self._close_files()
+
+    def commit(self, final_path: Optional[str] = None, header: str = "") -> str:
+        """
+        完成写入：可选地在开头加上标题并移动到最终路径，然后删除日志
+
+        Args:
+            final_path: 最终文件路径，默认为当前路径
+            header: 写在正文前的文本（如 "# 标题\\n\\n"），仅对新建文件有效
+
+        Returns:
+            str: 最终文件路径
+        """
+        self._close_files()
+        target = final_path or self.path
+        if header and not self.append:
+            self.header_bytes = len(header.encode('utf-8'))
+            # 正文已在磁盘上，按流复制拼接标题，内存占用与文件大小无关
+            tmp_path = target + ".tmp"
+            with open(tmp_path, 'wb') as out, open(self.path, 'rb') as body:
+                out.write(header.encode('utf-8'))
+                shutil.copyfileobj(body, out, 1024 * 1024)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, target)
+            if os.path.abspath(target) != os.path.abspath(self.path):
+                os.remove(self.path)
+        elif os.path.abspath(target) != os.path.abspath(self.path):
+            os.replace(self.path, target)
+        os.remove(self.journal_path)
+        return target
+
+    def discard(self) -> None:
+        """放弃本次写入：新建文件直接删除，追加模式截断回原始大小"""
+        self._close_files()
+        if self.append:
+            with open(self.path, 'r+b') as f:
+                f.truncate(self._base_size)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
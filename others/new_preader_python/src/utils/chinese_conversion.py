@@ -0,0 +1,266 @@
+"""
+中文字形转换引擎：一次遍历完成繁简转换
+
+- 单字映射预编译为 str.translate 转换表；安装了 numpy 时另建 BMP 码位查找表，
+  整段文本按 UTF-16 码元一次向量化查表（CJK 文本上 str.translate 逐字查字典，并不比 Python 循环快）
+- 多字词组建成前缀树，再编译为无回溯分支的正则，按"最左最长"一次扫描匹配；
+  文本中不含任何词组首字时跳过词组扫描
+- 支持按块流式转换：块尾保留不足一个最长词组的字符与下一块拼接，
+  跨块的词组与整体转换结果一致；文件转换为常量内存
+"""
+
+import os
+import re
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import numpy as np
+    _NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    _NUMPY_AVAILABLE = False
+
+# 流式转换时每块的字符数
+STREAM_CHUNK_CHARS = 256 * 1024
+# 短于该长度的文本直接用 str.translate（查找表的固定开销约为数微秒）
+_VECTOR_MIN_CHARS = 32
+_BMP_SIZE = 0x10000
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """
+    把前缀树编译为正则：同一前缀只出现一次，更长的分支优先（贪婪可选组）
+
+    Args:
+        node: 前缀树节点，键为字符，"" 键表示词组在此结束
+
+    Returns:
+        str: 正则片段
+    """
+    terminal = "" in node
+    branches = []
+    singles = []
+    for char in sorted(k for k in node if k):
+        child = node[char]
+        if len(child) == 1 and "" in child:
+            singles.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + _trie_pattern(child))
+    if singles:
+        branches.append(singles[0] if len(singles) == 1 else "[" + "".join(singles) + "]")
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 and not terminal else "(?:" + "|".join(branches) + ")"
+    if terminal:
+        body = (body if body.startswith("(?:") else "(?:" + body + ")") + "?"
+    return body
+
+
+def _char_class(chars: Iterable[str]) -> Optional[re.Pattern]:
+    """编译匹配任一字符的正则（在 C 层扫描文本，比逐字查集合快得多），字符为空时返回None"""
+    chars = sorted(set(chars))
+    if not chars:
+        return None
+    return re.compile("[" + "".join(re.escape(char) for char in chars) + "]")
+
+
+class ConversionEngine:
+    """基于转换表和词组前缀树的单遍转换器"""
+
+    def __init__(self, char_map: Dict[str, str], phrase_map: Optional[Dict[str, str]] = None):
+        """
+        编译转换表和词组正则
+
+        Args:
+            char_map: 单字映射（值可以是多个字符）
+            phrase_map: 多字词组映射，词组替换结果还会再经过单字转换
+        """
+        chars = {k: v for k, v in char_map.items() if len(k) == 1 and k != v}
+        self._table = {ord(k): (ord(v) if len(v) == 1 else v) for k, v in chars.items()}
+        self._lookup = None
+        # 映射到多个字符的单字无法查表（查找表中映射为自身），查表后再逐个展开
+        self._expansions = {k: v for k, v in chars.items() if len(v) != 1}
+        self._expanding = _char_class(self._expansions)
+        single = {ord(k): ord(v) for k, v in chars.items() if len(v) == 1}
+        # 查表结果中出现的展开字必须来自原文，否则无法区分，只能改用 str.translate
+        self._expand_after_lookup = not any(chr(v) in self._expansions for v in single.values())
+        if _NUMPY_AVAILABLE and single and max(max(single), max(single.values())) < _BMP_SIZE:
+            self._lookup = np.arange(_BMP_SIZE, dtype=np.uint16)
+            self._lookup[list(single)] = list(single.values())
+        self._phrases = {k: v for k, v in (phrase_map or {}).items() if len(k) > 1 and k != v}
+        self._phrase_pattern: Optional[re.Pattern] = None
+        self._phrase_starts: Optional[re.Pattern] = None
+        self.max_phrase_length = 1
+        if self._phrases:
+            trie: Dict[str, dict] = {}
+            for phrase in self._phrases:
+                node = trie
+                for char in phrase:
+                    node = node.setdefault(char, {})
+                node[""] = {}
+            self._phrase_pattern = re.compile(
+                "|".join(re.escape(char) + _trie_pattern(trie[char]) for char in sorted(trie)))
+            self._phrase_starts = _char_class(trie)
+            self.max_phrase_length = max(len(k) for k in self._phrases)
+
+    @property
+    def phrase_count(self) -> int:
+        """实际参与匹配的词组数量"""
+        return len(self._phrases)
+
+    def _replace_phrase(self, match: "re.Match") -> str:
+        return self._phrases[match.group()]
+
+    def _has_phrase_start(self, text: str) -> bool:
+        return self._phrase_starts.search(text) is not None
+
+    def convert(self, text: str) -> str:
+        """
+        转换一段文本
+
+        Args:
+            text: 原文
+
+        Returns:
+            str: 转换后的文本
+        """
+        if not text:
+            return text
+        if self._phrase_pattern is not None and self._has_phrase_start(text):
+            text = self._phrase_pattern.sub(self._replace_phrase, text)
+        return self._translate(text)
+
+    def _expand(self, match: "re.Match") -> str:
+        return self._expansions[match.group()]
+
+    def _translate(self, text: str) -> str:
+        """单字转换"""
+        if self._lookup is None or len(text) < _VECTOR_MIN_CHARS:
+            return text.translate(self._table)
+        expanding = self._expanding is not None and self._expanding.search(text) is not None
+        if expanding and not self._expand_after_lookup:
+            return text.translate(self._table)
+        # 映射两端都在 BMP 内，代理对的两个码元在表中映射为自身，非 BMP 字符原样保留
+        units = np.frombuffer(text.encode("utf-16-le", "surrogatepass"), dtype=np.uint16)
+        result = self._lookup[units].tobytes().decode("utf-16-le", "surrogatepass")
+        return self._expanding.sub(self._expand, result) if expanding else result
+
+    def _convert_pieces(self, chunks: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """
+        流式转换
+
+        Yields:
+            Tuple[str, str]: (原文片段, 转换后片段)，原文片段依次拼接即为完整输入
+        """
+        if self._phrase_pattern is None:
+            for chunk in chunks:
+                if chunk:
+                    yield chunk, self._translate(chunk)
+            return
+
+        holdback = self.max_phrase_length - 1
+        carry = ""
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer = carry + chunk
+            # 从 safe 开始的词组可能延伸到下一块，留到下一块再匹配；
+            # safe 之前开始的词组最长也只到缓冲区末尾，可以完整判断
+            safe = len(buffer) - holdback
+            if safe <= 0:
+                carry = buffer
+                continue
+            cut = safe
+            if self._has_phrase_start(buffer):
+                for match in self._phrase_pattern.finditer(buffer):
+                    if match.start() >= safe:
+                        break
+                    cut = max(cut, match.end())
+            piece = buffer[:cut]
+            carry = buffer[cut:]
+            yield piece, self.convert(piece)
+        if carry:
+            yield carry, self.convert(carry)
+
+    def convert_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        按块流式转换，结果拼接后与整体调用 convert 相同
+
+        Args:
+            chunks: 依次给出的文本块
+
+        Returns:
+            Iterator[str]: 转换后的文本块
+        """
+        for _, converted in self._convert_pieces(chunks):
+            yield converted
+
+    def convert_file(self, source_path: str, target_path: Optional[str] = None,
+                     encoding: Optional[str] = None) -> bool:
+        """
+        流式转换文本文件（常量内存），结果以 UTF-8 写入；原文无变化时不写入
+
+        读取时自动检测编码，换行符统一为 \\n。写入先落到临时文件再原子替换，
+        因此 target_path 可以与 source_path 相同。
+
+        Args:
+            source_path: 源文件路径
+            target_path: 目标文件路径，默认覆盖源文件
+            encoding: 源文件编码，为None时自动检测
+
+        Returns:
+            bool: 内容是否发生变化（已写入目标文件）
+        """
+        from src.utils.text_source import MmapTextSource
+
+        target_path = target_path or source_path
+        tmp_path = target_path + ".converting"
+        changed = False
+        try:
+            with MmapTextSource(source_path, encoding) as source, \
+                    open(tmp_path, "w", encoding="utf-8", newline="") as out:
+                chunks = _rechunk(source.iter_text(), STREAM_CHUNK_CHARS)
+                for original, converted in self._convert_pieces(chunks):
+                    changed = changed or original != converted
+                    out.write(converted)
+            if changed or target_path != source_path:
+                os.replace(tmp_path, target_path)
+                return changed
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _rechunk(chunks: Iterable[str], size: int) -> Iterator[str]:
+    """把文本块切分为不超过 size 个字符的块"""
+    for chunk in chunks:
+        for start in range(0, len(chunk), size):
+            yield chunk[start:start + size]
+
+
+def compose_sequential_map(mapping: Dict[str, str]) -> Dict[str, str]:
+    """
+    把"按字典顺序对整段文本依次 str.replace"的单字映射合成为等价的一次性映射
+
+    依次替换时，某个字替换后的结果还会被排在后面的映射继续替换；
+    这里对每个映射值应用其后的全部单字映射，得到可直接用于 str.translate 的结果。
+
+    Args:
+        mapping: 按替换顺序排列的单字映射
+
+    Returns:
+        Dict[str, str]: 合成后的单字映射
+    """
+    items = [(k, v) for k, v in mapping.items() if len(k) == 1]
+    composed: Dict[str, str] = {}
+    # 从后往前合成：later 为排在当前映射之后的全部映射合成的结果
+    later: Dict[str, str] = {}
+    for key, value in reversed(items):
+        composed[key] = "".join(later.get(char, char) for char in value)
+        later[key] = composed[key]
+    return composed
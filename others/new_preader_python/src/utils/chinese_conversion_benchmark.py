@@ -0,0 +1,279 @@
+"""
+繁简转换基准：比较重构前的逐字循环/依次 str.replace 与单遍转换引擎，并校验结果一致
+
+用法：python -m src.utils.chinese_conversion_benchmark [--chars 2000000] [--samples 3000] [--file-chars 10000000]
+
+- 旧实现原样保留在本模块中：TraditionalSimplifiedConverter 逐字查字典拼接；
+  _ChineseConverter 先按长度降序对词组依次 str.replace，再对单字依次 str.replace
+- 等价性校验（不一致时抛出 AssertionError）：
+  - TraditionalSimplifiedConverter.convert 与逐字循环（随机长度，覆盖 str.translate 与 numpy 查表两条路径）
+  - _ChineseConverter 内置表两个方向与依次替换
+  - convert_stream 随机切块后拼接、convert_file 跨块写入，与整体 convert 相同
+- 词组之间互相重叠时（如"經過去"），旧实现的结果取决于替换顺序，新实现为最左最长匹配，
+  属于有意的差异：等价性样本中词组两侧用空格隔开，重叠情况单独统计数量，不计为失败
+- _ChineseConverter 直接使用内置表编译的引擎，不经过 opencc（即使已安装）
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.chinese_conversion import ConversionEngine
+from src.utils.string_utils import _ChineseConverter
+from src.utils.traditional_simplified import TraditionalSimplifiedConverter
+
+# 不在任何映射表中的常用字与标点
+_PLAIN_CHARS = "的一是了我不人在他有这上们来到时大地为子中你说生年着就那和要她出也得里后自以会家可下而过天去能对小多然于心学，。！？ \n"
+# 标题基准的标题数量与长度
+_TITLE_COUNT = 10000
+_TITLE_CHARS = 40
+
+
+def _legacy_char_loop(mapping: Dict[str, str], text: str) -> str:
+    """旧 TraditionalSimplifiedConverter.convert：逐字查字典"""
+    converted_text = []
+    for char in text:
+        if char in mapping:
+            converted_text.append(mapping[char])
+        else:
+            converted_text.append(char)
+    return ''.join(converted_text)
+
+
+def _legacy_sequential(mapping: Dict[str, str], text: str) -> str:
+    """旧 _ChineseConverter.to_simplified / to_traditional：词组按长度降序依次替换，再依次替换单字"""
+    result = text
+    multi_char_keys = [k for k in mapping.keys() if len(k) > 1]
+    multi_char_keys.sort(key=len, reverse=True)
+    for phrase in multi_char_keys:
+        result = result.replace(phrase, mapping[phrase])
+    for key, value in mapping.items():
+        if len(key) == 1:
+            result = result.replace(key, value)
+    return result
+
+
+def _builtin_maps() -> Dict[str, Dict[str, str]]:
+    """_ChineseConverter 的内置映射表：方向 -> 映射"""
+    _ChineseConverter._init_converter()
+    return {"t2s": _ChineseConverter._t2s, "s2t": _ChineseConverter._s2t}
+
+
+def _random_text(rnd: random.Random, chars: Sequence[str], length: int) -> str:
+    return ''.join(rnd.choice(chars) for _ in range(length))
+
+
+def _separated_sample(rnd: random.Random, mapping: Dict[str, str], length: int) -> str:
+    """
+    生成词组互不重叠的样本：词组与词组首字两侧加空格，其余位置只使用不是词组首字的字符
+
+    Args:
+        rnd: 随机数生成器
+        mapping: 含词组的映射表
+        length: 大约的字符数
+
+    Returns:
+        str: 样本文本
+    """
+    phrases = [k for k in mapping if len(k) > 1]
+    starts = {phrase[0] for phrase in phrases}
+    free_chars = [k for k in mapping if len(k) == 1 and k not in starts] + [c for c in _PLAIN_CHARS if c not in starts]
+    parts: List[str] = []
+    size = 0
+    while size < length:
+        roll = rnd.random()
+        if roll < 0.15:
+            piece = f" {rnd.choice(phrases)} "
+        elif roll < 0.2:
+            piece = f" {rnd.choice(sorted(starts))} "
+        else:
+            piece = _random_text(rnd, free_chars, rnd.randint(1, 20))
+        parts.append(piece)
+        size += len(piece)
+    return ''.join(parts)
+
+
+def _dense_sample(rnd: random.Random, mapping: Dict[str, str], length: int) -> str:
+    """词组与单字紧密相连的样本（可能出现互相重叠的词组）"""
+    keys = list(mapping)
+    return ''.join(rnd.choice(keys) for _ in range(length))
+
+
+def _random_chunks(rnd: random.Random, text: str) -> List[str]:
+    """把文本随机切成长短不一的块（含空块）"""
+    chunks = []
+    pos = 0
+    while pos < len(text):
+        size = rnd.choice((0, 1, 2, 3, 7, 50, 500))
+        chunks.append(text[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def _assert_equal(name: str, sample: str, expected: str, actual: str) -> None:
+    if expected != actual:
+        index = next((i for i, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+        raise AssertionError(f"{name}: 结果与旧实现不一致（位置 {index}，原文 {sample[max(0, index - 5):index + 5]!r}）")
+
+
+def check_equivalence(samples: int = 3000, seed: int = 1) -> Dict[str, int]:
+    """
+    校验转换引擎与旧实现结果一致
+
+    Args:
+        samples: 每项校验的随机样本数
+        seed: 随机种子
+
+    Returns:
+        Dict[str, int]: 各方向在紧密样本中因词组重叠产生的已知差异数量（"overlap_t2s"/"overlap_s2t"）
+
+    Raises:
+        AssertionError: 存在不一致的样本
+    """
+    rnd = random.Random(seed)
+
+    converter = TraditionalSimplifiedConverter()
+    mapping = converter.TRADITIONAL_TO_SIMPLIFIED
+    alphabet = list(mapping) + list(_PLAIN_CHARS)
+    for _ in range(samples):
+        sample = _random_text(rnd, alphabet, rnd.choice((0, 1, 5, 31, 32, 33, 200, 2000)))
+        _assert_equal("TraditionalSimplifiedConverter.convert", sample,
+                      _legacy_char_loop(mapping, sample), converter.convert(sample))
+
+    overlaps: Dict[str, int] = {}
+    for direction, builtin in _builtin_maps().items():
+        engine = _ChineseConverter._get_engine(builtin)
+        for _ in range(samples):
+            sample = _separated_sample(rnd, builtin, rnd.choice((5, 40, 400)))
+            expected = _legacy_sequential(builtin, sample)
+            _assert_equal(f"_ChineseConverter {direction}", sample, expected, engine.convert(sample))
+            _assert_equal(f"_ChineseConverter {direction} 流式", sample, expected,
+                          ''.join(engine.convert_stream(_random_chunks(rnd, sample))))
+        overlaps[f"overlap_{direction}"] = 0
+        for _ in range(samples):
+            sample = _dense_sample(rnd, builtin, rnd.choice((5, 40)))
+            converted = engine.convert(sample)
+            _assert_equal(f"_ChineseConverter {direction} 流式（紧密样本）", sample, converted,
+                          ''.join(engine.convert_stream(_random_chunks(rnd, sample))))
+            if converted != _legacy_sequential(builtin, sample):
+                overlaps[f"overlap_{direction}"] += 1
+    return overlaps
+
+
+def generate_traditional_text(chars: int, seed: int = 2) -> str:
+    """
+    生成繁体文本：内置表与 TraditionalSimplifiedConverter 表中的繁体字、词组和常用字混排
+
+    Args:
+        chars: 大约的字符数
+        seed: 随机种子
+
+    Returns:
+        str: 文本
+    """
+    rnd = random.Random(seed)
+    t2s = _builtin_maps()["t2s"]
+    phrases = [k for k in t2s if len(k) > 1]
+    singles = [k for k in t2s if len(k) == 1] + list(TraditionalSimplifiedConverter().TRADITIONAL_TO_SIMPLIFIED)
+    parts: List[str] = []
+    size = 0
+    while size < chars:
+        roll = rnd.random()
+        if roll < 0.05:
+            piece = rnd.choice(phrases)
+        elif roll < 0.45:
+            piece = rnd.choice(singles)
+        else:
+            piece = rnd.choice(_PLAIN_CHARS)
+        parts.append(piece)
+        size += len(piece)
+    return ''.join(parts)
+
+
+def _timed(func: Callable[[], object]) -> Tuple[object, float]:
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run_benchmark(chars: int = 2_000_000, file_chars: int = 10_000_000) -> Dict[str, Tuple[float, float]]:
+    """
+    在同一文本上比较旧实现与转换引擎的耗时（同时校验结果一致）
+
+    Args:
+        chars: 文本字符数
+        file_chars: 文件转换基准的字符数（0 表示跳过）
+
+    Returns:
+        Dict[str, Tuple[float, float]]: 项目 -> (旧实现毫秒, 新实现毫秒)；文件转换只有新实现，旧值为 0
+
+    Raises:
+        AssertionError: 结果不一致
+    """
+    text = generate_traditional_text(chars)
+    maps = _builtin_maps()
+    converter = TraditionalSimplifiedConverter()
+    engines = {direction: _ChineseConverter._get_engine(mapping) for direction, mapping in maps.items()}
+    simplified = engines["t2s"].convert(text)
+    rnd = random.Random(3)
+    titles = [text[start:start + _TITLE_CHARS]
+              for start in (rnd.randrange(0, len(text) - _TITLE_CHARS) for _ in range(_TITLE_COUNT))]
+
+    cases: List[Tuple[str, Callable[[], object], Callable[[], object]]] = [
+        ("TraditionalSimplifiedConverter.convert",
+         lambda: _legacy_char_loop(converter.TRADITIONAL_TO_SIMPLIFIED, text), lambda: converter.convert(text)),
+        ("_ChineseConverter.to_simplified",
+         lambda: _legacy_sequential(maps["t2s"], text), lambda: engines["t2s"].convert(text)),
+        ("_ChineseConverter.to_traditional",
+         lambda: _legacy_sequential(maps["s2t"], simplified), lambda: engines["s2t"].convert(simplified)),
+        (f"to_simplified，{_TITLE_COUNT} 个 {_TITLE_CHARS} 字标题",
+         lambda: [_legacy_sequential(maps["t2s"], title) for title in titles],
+         lambda: [engines["t2s"].convert(title) for title in titles]),
+    ]
+    results: Dict[str, Tuple[float, float]] = {}
+    for name, legacy, current in cases:
+        old, legacy_ms = _timed(legacy)
+        new, current_ms = _timed(current)
+        # 内置表的结果由 check_equivalence 校验：这里的文本中词组可能互相重叠（见模块说明）
+        if name.startswith("TraditionalSimplifiedConverter"):
+            _assert_equal(name, text, old, new)
+        results[name] = (legacy_ms, current_ms)
+
+    if file_chars:
+        with tempfile.TemporaryDirectory(prefix="convert_bench_") as tmp:
+            source = os.path.join(tmp, "book.txt")
+            target = os.path.join(tmp, "book_s.txt")
+            body = generate_traditional_text(file_chars, seed=4)
+            with open(source, "w", encoding="utf-8", newline="") as f:
+                f.write(body)
+            _, file_ms = _timed(lambda: engines["t2s"].convert_file(source, target))
+            with open(target, "r", encoding="utf-8", newline="") as f:
+                _assert_equal("convert_file", body, engines["t2s"].convert(body), f.read())
+            results[f"convert_file，{file_chars / 1e6:.0f}M 字"] = (0.0, file_ms)
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """命令行入口：先校验等价性，再输出各项旧实现与新实现的耗时"""
+    parser = argparse.ArgumentParser(description="比较旧的繁简转换实现与单遍转换引擎，并校验结果一致")
+    parser.add_argument("--chars", type=int, default=2_000_000, help="基准文本字符数")
+    parser.add_argument("--samples", type=int, default=3000, help="每项等价性校验的随机样本数")
+    parser.add_argument("--file-chars", type=int, default=10_000_000, help="文件转换基准的字符数，0 表示跳过")
+    args = parser.parse_args(argv)
+
+    overlaps = check_equivalence(args.samples)
+    print(f"等价性校验通过（每项 {args.samples} 个样本）；"
+          f"紧密样本中词组重叠导致的已知差异: 繁→简 {overlaps['overlap_t2s']}，简→繁 {overlaps['overlap_s2t']}")
+    print(f"\n文本: {args.chars / 1e6:.1f}M 字")
+    for name, (legacy_ms, current_ms) in run_benchmark(args.chars, args.file_chars).items():
+        if legacy_ms:
+            print(f"  {name}: {legacy_ms:.0f} -> {current_ms:.0f} ms")
+        else:
+            print(f"  {name}: {current_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+抓取吞吐基准：在本地桩服务器上比较旧的逐章抓取（每章后固定 sleep(1)）与经过抓取调度器的并发抓取
+
+用法：python -m src.utils.fetch_benchmark [--chapters 20] [--latency 0.1] [--server-rate 5] [--legacy-delay 1]
+
+- 桩服务器：每个请求先等待 latency 秒（模拟网络与服务端耗时），
+  超过 server-rate 次/秒时返回 429 并带 Retry-After，模拟站点限流
+- 旧方式：单个会话逐章请求，每章后 sleep(legacy-delay)，与此前各解析器的章节循环一致
+- 新方式：BaseParser._get_all_chapters_incremental，章节经 _iter_fetched_pages 按主机限制并发获取；
+  并发数与速率来自全局调度器（advanced 配置中的 crawler_host_* 项）
+- 两种方式都检查章节是否全部按顺序取回；server-rate 低于调度器速率时可观察 429 退避
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+
+from src.spiders.base_parser_v2 import BaseParser
+from src.utils.fetch_scheduler import get_fetch_scheduler
+
+
+def _chapter_text(index: int) -> str:
+    return f"第{index}章正文内容"
+
+
+class _StubServer:
+    """带延迟与限流的本地桩服务器，/chapter/<n> 返回第 n 章页面"""
+
+    def __init__(self, latency: float, rate: float):
+        """
+        初始化桩服务器
+
+        Args:
+            latency: 每个请求的响应延迟（秒）
+            rate: 每秒允许的请求数，超出时返回 429
+        """
+        self.latency = latency
+        self.rate = rate
+        self.served = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _admit(self) -> bool:
+        """按一秒的固定窗口计数，判断请求是否在限流内"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.rate:
+                self.throttled += 1
+                return False
+            self.served += 1
+            return True
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(stub.latency)
+                if not stub._admit():
+                    self.send_response(429)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                index = self.path.rsplit("/", 1)[-1]
+                body = (f'<html><body><h1>第{index}章</h1><div id="content">'
+                        f'{_chapter_text(int(index))}</div></body></html>').encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def reset(self) -> None:
+        """清零计数"""
+        with self._lock:
+            self.served = 0
+            self.throttled = 0
+            self._window_start = time.monotonic()
+            self._window_count = 0
+
+    def __enter__(self) -> "_StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _StubParser(BaseParser):
+    """指向桩服务器的最小解析器"""
+
+    name = "抓取基准桩站点"
+    description = "抓取吞吐基准使用的本地桩站点"
+    content_reg = [r'<div id="content">(.*?)</div>']
+
+
+def run_legacy(base_url: str, chapters: int, delay: float) -> List[Optional[str]]:
+    """
+    旧方式：逐章请求，每章后固定等待
+
+    Args:
+        base_url: 桩服务器地址
+        chapters: 章节数
+        delay: 每章后的等待时间（秒）
+
+    Returns:
+        List[Optional[str]]: 各章正文，失败为None
+    """
+    session = requests.Session()
+    extractor = _StubParser()
+    results = []
+    for i in range(1, chapters + 1):
+        response = session.get(f"{base_url}/chapter/{i}", timeout=(15, 30))
+        content = None
+        if response.status_code == 200:
+            content = extractor._extract_with_regex(response.text, extractor.content_reg)
+        results.append(content)
+        time.sleep(delay)
+    return results
+
+
+def run_scheduled(base_url: str, chapters: int) -> List[Optional[str]]:
+    """
+    新方式：BaseParser 的增量章节抓取（调度器并发）
+
+    Args:
+        base_url: 桩服务器地址
+        chapters: 章节数
+
+    Returns:
+        List[Optional[str]]: 按返回顺序排列的各章正文
+    """
+    parser = _StubParser()
+    parser.base_url = base_url
+    chapter_links = [{"url": f"/chapter/{i}", "title": f"第{i}章"} for i in range(1, chapters + 1)]
+    novel_content: Dict[str, Any] = {"title": "抓取基准", "author": "", "chapters": []}
+    parser._get_all_chapters_incremental(chapter_links, novel_content)
+    return [chapter["content"] for chapter in novel_content["chapters"]]
+
+
+def run_benchmark(chapters: int = 20, latency: float = 0.1, server_rate: float = 5.0,
+                  legacy_delay: float = 1.0) -> Dict[str, Dict[str, Any]]:
+    """
+    在桩服务器上分别运行两种抓取方式
+
+    Args:
+        chapters: 章节数
+        latency: 桩服务器响应延迟（秒）
+        server_rate: 桩服务器限流阈值（次/秒）
+        legacy_delay: 旧方式每章后的等待时间（秒）
+
+    Returns:
+        Dict[str, Dict[str, Any]]: {"legacy"/"scheduled": {"seconds", "pages_per_s", "complete", "served", "throttled"}}
+    """
+    expected = [_chapter_text(i) for i in range(1, chapters + 1)]
+    results: Dict[str, Dict[str, Any]] = {}
+    with _StubServer(latency, server_rate) as server:
+        for name, run in (("legacy", lambda: run_legacy(server.base_url, chapters, legacy_delay)),
+                          ("scheduled", lambda: run_scheduled(server.base_url, chapters))):
+            server.reset()
+            start = time.perf_counter()
+            contents = run()
+            seconds = time.perf_counter() - start
+            results[name] = {
+                "seconds": seconds,
+                "pages_per_s": chapters / seconds,
+                "complete": contents == expected,
+                "served": server.served,
+                "throttled": server.throttled,
+            }
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """命令行入口：输出两种方式的耗时、吞吐、是否完整取回以及桩服务器返回的 429 次数"""
+    parser = argparse.ArgumentParser(description="在本地桩服务器上比较逐章抓取与调度器并发抓取的吞吐")
+    parser.add_argument("--chapters", type=int, default=20, help="章节数")
+    parser.add_argument("--latency", type=float, default=0.1, help="桩服务器响应延迟（秒）")
+    parser.add_argument("--server-rate", type=float, default=5.0, help="桩服务器限流阈值（次/秒）")
+    parser.add_argument("--legacy-delay", type=float, default=1.0, help="旧方式每章后的等待时间（秒）")
+    args = parser.parse_args(argv)
+
+    scheduler = get_fetch_scheduler()
+    print(f"章节: {args.chapters}，延迟 {args.latency * 1000:.0f} ms，桩服务器限流 {args.server_rate:g} 次/秒")
+    print(f"调度器: 每主机并发 {scheduler.host_concurrency}，速率 {scheduler.host_rate:g} 次/秒，突发 {scheduler.host_burst:g}")
+    results = run_benchmark(args.chapters, args.latency, args.server_rate, args.legacy_delay)
+    for name, label in (("legacy", f"逐章 + sleep({args.legacy_delay:g})"), ("scheduled", "调度器并发")):
+        result = results[name]
+        print(f"{label}: {result['seconds']:.2f}s，{result['pages_per_s']:.2f} 页/秒，"
+              f"完整取回 {'是' if result['complete'] else '否'}，成功请求 {result['served']}，429 {result['throttled']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+并发抓取调度器：按主机限制并发数与请求速率
+
+- 每个主机一个令牌桶（速率 + 突发容量）和一个并发信号量，不同站点之间互不影响
+- 遇到 429/5xx 或连接错误时自适应退避：暂停该主机一段时间（优先遵循 Retry-After）并将速率减半，
+  之后每次成功请求逐步（加性）恢复到配置速率
+- 通过挂载到 requests.Session 的适配器生效，解析器内所有 session 请求都会经过调度
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 默认每个主机的并发请求数
+DEFAULT_HOST_CONCURRENCY = 4
+# 默认每个主机的请求速率（次/秒）
+DEFAULT_HOST_RATE = 2.0
+# 默认令牌桶突发容量
+DEFAULT_HOST_BURST = 4
+# 退避初始时长与上限（秒）
+BACKOFF_BASE = 1.0
+MAX_BACKOFF = 60.0
+# 自适应降速后的最低速率（次/秒）
+MIN_HOST_RATE = 0.1
+# 每次成功请求后恢复的速率占目标速率的比例（加性恢复，约20次成功恢复到目标速率）
+RATE_RECOVERY_STEP = 0.05
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发请求数）
+        """
+        self.rate = max(float(rate), MIN_HOST_RATE)
+        self.capacity = max(float(capacity), 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float) -> None:
+        """调整补充速率（先按旧速率结算已累积的令牌）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(float(rate), MIN_HOST_RATE)
+
+    def acquire(self) -> None:
+        """取得一个令牌，不足时阻塞等待"""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostLimiter:
+    """单个主机的并发、速率与退避控制"""
+
+    def __init__(self, host: str, concurrency: int, rate: float, burst: float):
+        """
+        初始化主机限制器
+
+        Args:
+            host: 主机名
+            concurrency: 最大并发请求数
+            rate: 目标请求速率（次/秒）
+            burst: 突发容量
+        """
+        self.host = host
+        self.rate = max(float(rate), MIN_HOST_RATE)
+        self._semaphore = threading.BoundedSemaphore(max(1, int(concurrency)))
+        self._bucket = TokenBucket(self.rate, burst)
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._penalty = 0.0
+        self.requests = 0
+        self.throttled = 0
+
+    def acquire(self) -> None:
+        """占用一个并发槽位，并等待退避结束与令牌可用"""
+        self._semaphore.acquire()
+        try:
+            while True:
+                with self._lock:
+                    delay = self._blocked_until - time.monotonic()
+                if delay <= 0:
+                    break
+                time.sleep(delay)
+            self._bucket.acquire()
+            with self._lock:
+                self.requests += 1
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def release(self) -> None:
+        """释放并发槽位"""
+        self._semaphore.release()
+
+    def record(self, status: Optional[int], retry_after: Optional[float] = None) -> None:
+        """
+        根据响应结果调整退避与速率
+
+        Args:
+            status: HTTP 状态码，连接错误/超时时为None
+            retry_after: 服务端给出的 Retry-After 秒数
+        """
+        with self._lock:
+            if status is None or status == 429 or status >= 500:
+                self.throttled += 1
+                now = time.monotonic()
+                retry_wait = min(retry_after or 0.0, MAX_BACKOFF)
+                if now < self._blocked_until:
+                    # 同一退避窗口内并发请求的失败只延长等待，不重复加倍和降速
+                    self._blocked_until = max(self._blocked_until, now + retry_wait)
+                    return
+                self._penalty = min(max(self._penalty * 2, BACKOFF_BASE), MAX_BACKOFF)
+                wait = max(self._penalty, retry_wait)
+                self._blocked_until = now + wait
+                new_rate = max(MIN_HOST_RATE, self._bucket.rate / 2)
+                logger.warning(f"主机 {self.host} 返回 {status or '连接错误'}，退避 {wait:.1f} 秒，速率降至 {new_rate:.2f}/秒")
+            else:
+                self._penalty = 0.0
+                if self._bucket.rate >= self.rate:
+                    return
+                new_rate = min(self.rate, self._bucket.rate + self.rate * RATE_RECOVERY_STEP)
+        self._bucket.set_rate(new_rate)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取主机统计信息"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "rate": self._bucket.rate,
+                "target_rate": self.rate,
+                "backoff_remaining": max(0.0, self._blocked_until - time.monotonic()),
+            }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 头（秒数或 HTTP 日期）
+
+    Args:
+        value: 头部值
+
+    Returns:
+        Optional[float]: 需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class FetchScheduler:
+    """按主机调度的抓取器，可被多个解析器、多个线程共享"""
+
+    def __init__(self, host_concurrency: int = DEFAULT_HOST_CONCURRENCY,
+                 host_rate: float = DEFAULT_HOST_RATE, host_burst: float = DEFAULT_HOST_BURST,
+                 host_overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        初始化调度器
+
+        Args:
+            host_concurrency: 每个主机的默认并发请求数
+            host_rate: 每个主机的默认请求速率（次/秒）
+            host_burst: 每个主机的默认突发容量
+            host_overrides: 按主机覆盖的配置，如 {"www.example.com": {"concurrency": 2, "rate": 0.5, "burst": 1}}
+        """
+        self.host_concurrency = host_concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.host_overrides = host_overrides or {}
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _get_limiter(self, url: str) -> HostLimiter:
+        host = (urlsplit(url).hostname or "").lower()
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            with self._lock:
+                limiter = self._hosts.get(host)
+                if limiter is None:
+                    override = self.host_overrides.get(host, {})
+                    limiter = HostLimiter(
+                        host,
+                        override.get("concurrency", self.host_concurrency),
+                        override.get("rate", self.host_rate),
+                        override.get("burst", self.host_burst),
+                    )
+                    self._hosts[host] = limiter
+        return limiter
+
+    @contextmanager
+    def host_slot(self, url: str) -> Iterator[HostLimiter]:
+        """
+        在主机的并发与速率限制内执行一次请求
+
+        Args:
+            url: 请求URL
+
+        Yields:
+            HostLimiter: 该主机的限制器
+        """
+        limiter = self._get_limiter(url)
+        limiter.acquire()
+        try:
+            yield limiter
+        finally:
+            limiter.release()
+
+    def record_response(self, url: str, status: Optional[int], retry_after: Optional[str] = None) -> None:
+        """
+        记录请求结果，用于自适应退避
+
+        Args:
+            url: 请求URL
+            status: HTTP 状态码，连接错误时为None
+            retry_after: Retry-After 头部值
+        """
+        self._get_limiter(url).record(status, parse_retry_after(retry_after))
+
+    def map(self, func: Callable[[T], R], items: Iterable[T], max_workers: Optional[int] = None) -> List[R]:
+        """
+        并发执行 func，按输入顺序返回结果；请求本身仍受各主机限制约束
+
+        Args:
+            func: 处理函数（通常是抓取一个URL）
+            items: 输入列表
+            max_workers: 最大线程数，默认为主机并发数
+
+        Returns:
+            List[R]: 与输入顺序一致的结果
+        """
+        items = list(items)
+        if not items:
+            return []
+        workers = max(1, min(len(items), max_workers or self.host_concurrency))
+        if workers == 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as executor:
+            return list(executor.map(func, items))
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各主机统计信息"""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: limiter.get_stats() for host, limiter in hosts.items()}
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """经过 FetchScheduler 调度的 requests 适配器"""
+
+    def __init__(self, scheduler: "FetchScheduler", **kwargs):
+        self._scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        with self._scheduler.host_slot(request.url):
+            try:
+                response = super().send(request, **kwargs)
+                if not kwargs.get("stream"):
+                    # 在槽位内读完响应体，使并发数反映真实占用的连接
+                    response.content
+            except requests.exceptions.RequestException:
+                self._scheduler.record_response(request.url, None)
+                raise
+        self._scheduler.record_response(request.url, response.status_code, response.headers.get("Retry-After"))
+        return response
+
+
+def mount_fetch_scheduler(session: requests.Session, scheduler: Optional[FetchScheduler] = None) -> requests.Session:
+    """
+    为会话挂载按主机限流的适配器
+
+    Args:
+        session: requests 会话
+        scheduler: 调度器，默认使用全局调度器
+
+    Returns:
+        requests.Session: 同一会话
+    """
+    scheduler = scheduler or get_fetch_scheduler()
+    adapter = RateLimitedAdapter(scheduler, pool_maxsize=max(10, scheduler.host_concurrency))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_scheduler: Optional[FetchScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_fetch_scheduler() -> FetchScheduler:
+    """
+    获取全局抓取调度器（限制参数来自 advanced 配置）
+
+    Returns:
+        FetchScheduler: 调度器实例
+    """
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            advanced: Dict[str, Any] = {}
+            try:
+                from src.config.config_manager import ConfigManager
+                advanced = ConfigManager.get_instance().get_config().get("advanced", {})
+            except Exception as e:
+                logger.warning(f"读取抓取限流配置失败，使用默认值: {e}")
+            _scheduler = FetchScheduler(
+                host_concurrency=advanced.get("crawler_host_concurrency", DEFAULT_HOST_CONCURRENCY),
+                host_rate=advanced.get("crawler_host_rate", DEFAULT_HOST_RATE),
+                host_burst=advanced.get("crawler_host_burst", DEFAULT_HOST_BURST),
+                host_overrides=advanced.get("crawler_host_limits", {}),
+            )
+    return _scheduler
@@ -211,6 +211,33 @@ def append_chapters_to_file(old_content: str, new_chapters: List[Dict[str, Any]]
         logger.error(f"追加章节失败: {e}")
         return old_content
 
+def append_chapters_to_path(file_path: str, new_chapters: List[Dict[str, Any]]) -> bool:
+    """
+    将新章节直接追加到已有文件末尾（不读取、不重写已有内容），格式与 append_chapters_to_file 一致
+
+    已有文件不是 UTF-8 编码时回退为读取-合并-重写，统一转换为 UTF-8
+
+    Args:
+        file_path: 已有小说文件路径
+        new_chapters: 新章节列表，每个章节包含 title 和 content
+
+    Returns:
+        是否成功
+    """
+    from src.utils.chapter_writer import ChapterWriter, format_appended_chapter
+    from src.utils.text_source import detect_text_encoding
+
+    try:
+        if os.path.exists(file_path) and detect_text_encoding(file_path)[0] not in ('utf-8', 'ascii'):
+            return write_text_file(file_path, append_chapters_to_file(read_text_file(file_path), new_chapters))
+        writer = ChapterWriter(file_path, append=True, formatter=format_appended_chapter, sync_each_chapter=False)
+        writer.write_chapters(new_chapters)
+        writer.commit()
+        return True
+    except Exception as e:
+        logger.error(f"追加章节到文件失败: {file_path}, 错误: {e}")
+        return False
+
 def detect_chapter_duplicates(
     new_chapters: List[Dict[str, Any]], 
     saved_chapters: Dict[int, Dict[str, Any]]
@@ -228,25 +255,23 @@ def detect_chapter_duplicates(
     try:
         unique_chapters = []
         duplicate_count = 0
+        # 已保存章节的标题与哈希建成集合，每个新章节只需常数时间查找
+        saved_titles = {saved_chapter['title'] for saved_chapter in saved_chapters.values()}
+        saved_hashes = {saved_chapter['hash'] for saved_chapter in saved_chapters.values()}
         
         for chapter in new_chapters:
             chapter_title = chapter.get('title', '')
             chapter_content = chapter.get('content', '')
             chapter_hash = calculate_content_hash(chapter_content)
             
-            is_duplicate = False
-            for saved_idx, saved_chapter in saved_chapters.items():
-                # 检查标题或内容哈希是否匹配
-                if (saved_chapter['title'] == chapter_title or 
-                    saved_chapter['hash'] == chapter_hash):
-                    is_duplicate = True
-                    duplicate_count += 1
-                    logger.debug(f"章节已存在，跳过: {chapter_title}")
-                    break
+            # 检查标题或内容哈希是否匹配
+            if chapter_title in saved_titles or chapter_hash in saved_hashes:
+                duplicate_count += 1
+                logger.debug(f"章节已存在，跳过: {chapter_title}")
+                continue
             
-            if not is_duplicate:
-                chapter['hash'] = chapter_hash
-                unique_chapters.append(chapter)
+            chapter['hash'] = chapter_hash
+            unique_chapters.append(chapter)
         
         return unique_chapters, duplicate_count
     except Exception as e:
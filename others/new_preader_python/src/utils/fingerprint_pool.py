@@ -0,0 +1,120 @@
+"""
+多进程指纹计算：把需要读取文件并计算 SimHash/MinHash 的书籍分批交给进程池
+
+- 指纹计算是纯 Python 的 CPU 密集循环（每个词一次 md5），线程池受 GIL 限制，几乎用不上多核
+- 工作进程之间不共享状态：每批只传入 (路径, 文件名, 大小) 和采样参数，返回可持久化的指纹记录，
+  由主进程统一写入指纹存储（工作进程不打开数据库）
+- 每完成一批回调一次进度；取消时丢弃尚未开始的批次，正在计算的批次完成后工作进程退出
+- 待计算书籍较少、只有一个 CPU 或无法创建进程时，在当前线程内逐批计算（结果与进度行为相同）
+"""
+
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.logger import get_logger
+from src.utils.process_pool import init_worker, run_in_processes
+
+logger = get_logger(__name__)
+
+# 每批书籍数量：批次越小取消越及时，越大进程间传输开销越小
+DEFAULT_CHUNK_SIZE = 32
+# 待计算书籍少于该数量时不启动进程池（启动工作进程本身需要数百毫秒）
+DEFAULT_PROCESS_MIN_BOOKS = 200
+
+FingerprintTask = Tuple[str, str, int]  # (路径, 文件名, 文件大小)
+ChunkWorker = Callable[[List[FingerprintTask]], List[Dict[str, Any]]]
+
+
+def _init_worker() -> None:
+    """工作进程初始化：忽略 Ctrl+C（由主进程负责取消），停用指纹存储"""
+    init_worker(nice=0)
+    from src.utils.fingerprint_store import disable_fingerprint_store
+    disable_fingerprint_store()
+
+
+def get_pool_settings() -> Tuple[int, int, int]:
+    """
+    读取 advanced 配置中的进程池参数
+
+    Returns:
+        Tuple[int, int, int]: (工作进程数，0 表示按 CPU 核数, 每批书籍数, 启用进程池的最少书籍数)
+    """
+    advanced: Dict[str, Any] = {}
+    try:
+        from src.config.config_manager import ConfigManager
+        advanced = ConfigManager.get_instance().get_config().get("advanced", {})
+    except Exception as e:
+        logger.warning(f"读取指纹计算配置失败，使用默认值: {e}")
+    return (
+        int(advanced.get("fingerprint_workers", 0) or 0),
+        int(advanced.get("fingerprint_chunk_size", DEFAULT_CHUNK_SIZE) or DEFAULT_CHUNK_SIZE),
+        int(advanced.get("fingerprint_process_min_books", DEFAULT_PROCESS_MIN_BOOKS)),
+    )
+
+
+def compute_fingerprints(worker: ChunkWorker, tasks: Sequence[FingerprintTask],
+                         workers: Optional[int] = None,
+                         chunk_size: Optional[int] = None,
+                         min_books: Optional[int] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         is_cancelled: Optional[Callable[[], bool]] = None,
+                         register_executor: Optional[Callable[[Any], None]] = None,
+                         unregister_executor: Optional[Callable[[Any], None]] = None) -> List[Dict[str, Any]]:
+    """
+    分批计算指纹记录
+
+    Args:
+        worker: 计算一批书籍的模块级函数（可被 pickle，可用 functools.partial 绑定采样参数）
+        tasks: 待计算的书籍
+        workers: 工作进程数，默认读取配置（0 表示按 CPU 核数）
+        chunk_size: 每批书籍数，默认读取配置
+        min_books: 启用进程池的最少书籍数，默认读取配置
+        progress_callback: 进度回调(已完成数量, 总数)，每完成一批调用一次
+        is_cancelled: 返回是否已请求取消
+        register_executor: 进程池创建后调用（检测器取消时可直接关闭进程池）
+        unregister_executor: 进程池结束时调用
+
+    Returns:
+        List[Dict[str, Any]]: 指纹记录（顺序不保证与输入一致；取消时只含已完成的批次）
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return []
+    config_workers, config_chunk_size, config_min_books = get_pool_settings()
+    workers = workers or config_workers or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size or config_chunk_size)
+    min_books = config_min_books if min_books is None else min_books
+
+    pending: Dict[int, List[FingerprintTask]] = {
+        index: tasks[start:start + chunk_size]
+        for index, start in enumerate(range(0, len(tasks), chunk_size))
+    }
+    results: List[Dict[str, Any]] = []
+    completed = [0]
+
+    def finish_chunk(index: int, records: List[Dict[str, Any]]) -> None:
+        results.extend(records)
+        completed[0] += len(pending[index])
+        if progress_callback:
+            progress_callback(completed[0], len(tasks))
+
+    def cancelled() -> bool:
+        return bool(is_cancelled and is_cancelled())
+
+    workers = min(workers, len(pending))
+    if workers > 1 and len(tasks) >= min_books:
+        try:
+            run_in_processes(worker, pending, workers, finish_chunk, cancelled, _init_worker,
+                             register_executor, unregister_executor)
+        except Exception as e:
+            if not cancelled():
+                logger.warning(f"多进程指纹计算失败，剩余 {len(pending)} 批改为在当前进程计算: {e}")
+
+    for index in list(pending):
+        if cancelled():
+            logger.info(f"指纹计算已取消，完成 {completed[0]}/{len(tasks)} 本")
+            break
+        finish_chunk(index, worker(pending[index]))
+        del pending[index]
+    return results
+
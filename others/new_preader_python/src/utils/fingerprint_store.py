@@ -0,0 +1,423 @@
+"""
+持久化书籍指纹存储：各重复检测器计算的文件哈希、SimHash、MinHash 签名、规范化书名、
+统计特征与内容采样保存在 SQLite 中，以 (路径, 大小, mtime_ns) 识别文件是否变化。
+书库未变化时再次检测无需重新读取文件；书架扫描/导入时增量更新新增或变化的文件。
+"""
+
+import os
+import json
+import time
+import zlib
+import array
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from src.core.db_connection_pool import SQLiteConnectionPool
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 指纹算法或记录格式变化时递增，使旧记录自动失效
+FINGERPRINT_VERSION = 1
+# MinHash 签名长度
+MINHASH_PERMUTATIONS = 64
+# MinHash 使用的字符 shingle 长度（中文按字切分，4 字较能区分不同文本）
+MINHASH_SHINGLE_SIZE = 4
+
+FileKey = Tuple[int, int]  # (size, mtime_ns)
+
+_MAX_HASH = 0xFFFFFFFF
+
+
+def get_file_key(path: str) -> Optional[FileKey]:
+    """
+    获取文件的变化识别键（只做一次 stat）
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Optional[FileKey]: (大小, mtime_ns)，文件不存在时返回None
+    """
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+
+def minhash_signature(text: str, num_perm: int = MINHASH_PERMUTATIONS,
+                      shingle_size: int = MINHASH_SHINGLE_SIZE) -> Tuple[int, ...]:
+    """
+    计算文本的 MinHash 签名（单次哈希分桶的 one-permutation MinHash）
+
+    每个字符 shingle 只计算一次 32 位 CRC，按低位分到 num_perm 个桶中各取最小值，
+    空桶向后借用相邻非空桶的值（rotation 致密化）。两个签名相同位置相等的比例
+    近似于 shingle 集合的 Jaccard 相似度。
+
+    Args:
+        text: 已归一化的文本
+        num_perm: 签名长度（桶数）
+        shingle_size: shingle 字符数
+
+    Returns:
+        Tuple[int, ...]: 签名，文本过短时返回空元组
+    """
+    if not text or len(text) < shingle_size:
+        return ()
+    crc32 = zlib.crc32
+    data = text.encode("utf-16-le")
+    step = 2
+    width = shingle_size * step
+    bins = [_MAX_HASH + 1] * num_perm
+    seen = set()
+    for start in range(0, len(data) - width + 1, step):
+        value = crc32(data[start:start + width])
+        if value in seen:
+            continue
+        seen.add(value)
+        index = value % num_perm
+        rest = value // num_perm
+        if rest < bins[index]:
+            bins[index] = rest
+    if all(value > _MAX_HASH for value in bins):
+        return ()
+    # 空桶按顺序借用下一个非空桶的值（加上偏移，避免不同空桶恰好相等）
+    result = list(bins)
+    for index in range(num_perm):
+        if result[index] > _MAX_HASH:
+            offset = 1
+            while bins[(index + offset) % num_perm] > _MAX_HASH:
+                offset += 1
+            result[index] = (bins[(index + offset) % num_perm] + offset * 0x9E3779B1) & _MAX_HASH
+    return tuple(result)
+
+
+def minhash_similarity(sig1: Sequence[int], sig2: Sequence[int]) -> float:
+    """
+    由两个 MinHash 签名估计 Jaccard 相似度
+
+    Args:
+        sig1: 签名1
+        sig2: 签名2
+
+    Returns:
+        float: 0-1 之间的相似度估计，任一签名为空时返回0
+    """
+    if not sig1 or not sig2 or len(sig1) != len(sig2):
+        return 0.0
+    return sum(1 for a, b in zip(sig1, sig2) if a == b) / len(sig1)
+
+
+class FingerprintStore:
+    """基于SQLite的书籍指纹存储"""
+
+    def __init__(self, db_path: str):
+        """
+        初始化指纹存储
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        self._pool = SQLiteConnectionPool.get_pool(db_path)
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with self._pool.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS book_fingerprints (
+                    path TEXT NOT NULL,
+                    variant TEXT NOT NULL DEFAULT '',
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    version INTEGER NOT NULL,
+                    file_hash TEXT DEFAULT '',
+                    simhash TEXT DEFAULT '',
+                    minhash BLOB,
+                    normalized_title TEXT DEFAULT '',
+                    features TEXT DEFAULT '',
+                    sample BLOB,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (path, variant)
+                )
+            """)
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        (path, _variant, _size, _mtime_ns, _version, file_hash, simhash,
+         minhash, normalized_title, features, sample, _updated) = row
+        return {
+            "path": path,
+            "file_hash": file_hash or "",
+            "simhash": int(simhash, 16) if simhash else 0,
+            "minhash": tuple(array.array("I", minhash)) if minhash else (),
+            "normalized_title": normalized_title or "",
+            "size_features": tuple(json.loads(features)) if features else (0, 0, 0),
+            "content_sample": zlib.decompress(sample).decode("utf-8") if sample else "",
+        }
+
+    @staticmethod
+    def _encode(record: Dict[str, Any], variant: str, key: FileKey) -> Tuple[Any, ...]:
+        minhash = record.get("minhash") or ()
+        sample = record.get("content_sample") or ""
+        features = record.get("size_features")
+        return (
+            record["path"], variant, key[0], key[1], FINGERPRINT_VERSION,
+            record.get("file_hash", ""),
+            format(record["simhash"], "x") if record.get("simhash") else "",
+            array.array("I", minhash).tobytes() if minhash else None,
+            record.get("normalized_title", ""),
+            json.dumps(list(features)) if features else "",
+            zlib.compress(sample.encode("utf-8"), 6) if sample else None,
+            time.time(),
+        )
+
+    def get_many(self, paths: Iterable[str], variant: str = "") -> Dict[str, Dict[str, Any]]:
+        """
+        批量读取仍然有效（文件大小与修改时间未变）的指纹记录
+
+        Args:
+            paths: 文件路径列表
+            variant: 指纹类型（不同检测器的采样与归一化方式不同）
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 路径 -> 指纹记录（file_hash、simhash、minhash、
+                normalized_title、size_features、content_sample），不含失效或缺失的文件
+        """
+        keys = {}
+        for path in paths:
+            key = get_file_key(path)
+            if key is not None:
+                keys[path] = key
+        if not keys:
+            return {}
+        result: Dict[str, Dict[str, Any]] = {}
+        try:
+            with self._pool.transaction() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM book_fingerprints WHERE variant = ? AND version = ?",
+                    (variant, FINGERPRINT_VERSION))
+                for row in rows:
+                    key = keys.get(row[0])
+                    if key is not None and (row[2], row[3]) == key:
+                        result[row[0]] = self._decode(row)
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning(f"读取书籍指纹失败: {e}")
+            return {}
+        return result
+
+    def get_signatures(self, variant: str = "") -> Dict[str, Tuple[int, Tuple[int, ...]]]:
+        """
+        读取某类型全部仍然有效的 SimHash 与 MinHash 签名（不解压内容采样，用于建立近似重复索引）
+
+        Args:
+            variant: 指纹类型
+
+        Returns:
+            Dict[str, Tuple[int, Tuple[int, ...]]]: 路径 -> (SimHash, MinHash签名)，不含无内容指纹的文件
+        """
+        result: Dict[str, Tuple[int, Tuple[int, ...]]] = {}
+        try:
+            with self._pool.transaction() as conn:
+                rows = conn.execute("""
+                    SELECT path, size, mtime_ns, simhash, minhash FROM book_fingerprints
+                    WHERE variant = ? AND version = ? AND simhash != ''
+                """, (variant, FINGERPRINT_VERSION)).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"读取书籍指纹签名失败: {e}")
+            return result
+        for path, size, mtime_ns, simhash, minhash in rows:
+            if get_file_key(path) == (size, mtime_ns):
+                result[path] = (int(simhash, 16), tuple(array.array("I", minhash)) if minhash else ())
+        return result
+
+    def get(self, path: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        """
+        读取单个文件仍然有效的指纹记录
+
+        Args:
+            path: 文件路径
+            variant: 指纹类型
+
+        Returns:
+            Optional[Dict[str, Any]]: 指纹记录，失效或缺失时返回None
+        """
+        key = get_file_key(path)
+        if key is None:
+            return None
+        try:
+            with self._pool.transaction() as conn:
+                row = conn.execute("""
+                    SELECT * FROM book_fingerprints
+                    WHERE path = ? AND variant = ? AND version = ? AND size = ? AND mtime_ns = ?
+                """, (path, variant, FINGERPRINT_VERSION, key[0], key[1])).fetchone()
+            return self._decode(row) if row else None
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning(f"读取书籍指纹失败: {e}")
+            return None
+
+    def put_many(self, records: Iterable[Dict[str, Any]], variant: str = "") -> int:
+        """
+        批量写入指纹记录（按写入时的文件状态记录识别键）
+
+        Args:
+            records: 指纹记录列表，每条必须包含 path
+            variant: 指纹类型
+
+        Returns:
+            int: 写入的记录数
+        """
+        rows = []
+        written = []
+        for record in records:
+            key = get_file_key(record["path"])
+            if key is not None:
+                rows.append(self._encode(record, variant, key))
+                written.append(record)
+        if not rows:
+            return 0
+        try:
+            with self._pool.transaction() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO book_fingerprints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"写入书籍指纹失败: {e}")
+            return 0
+        # 同步到已加载的近似重复索引
+        from src.utils.near_duplicate_index import index_fingerprint_records
+        index_fingerprint_records(written, variant)
+        return len(rows)
+
+    def get_file_hash(self, path: str, key: Optional[FileKey] = None) -> str:
+        """
+        读取任一类型记录中仍然有效的文件哈希
+
+        Args:
+            path: 文件路径
+            key: 已获取的文件识别键，默认重新 stat
+
+        Returns:
+            str: 文件哈希，无有效记录时返回空字符串
+        """
+        key = key or get_file_key(path)
+        if key is None:
+            return ""
+        try:
+            with self._pool.transaction() as conn:
+                row = conn.execute("""
+                    SELECT file_hash FROM book_fingerprints
+                    WHERE path = ? AND size = ? AND mtime_ns = ? AND file_hash != '' LIMIT 1
+                """, (path, key[0], key[1])).fetchone()
+            return row[0] if row else ""
+        except sqlite3.Error as e:
+            logger.warning(f"读取文件哈希失败: {e}")
+            return ""
+
+    def invalidate(self, path: str) -> None:
+        """删除指定文件的全部指纹记录"""
+        try:
+            with self._pool.transaction() as conn:
+                conn.execute("DELETE FROM book_fingerprints WHERE path = ?", (path,))
+        except sqlite3.Error as e:
+            logger.warning(f"删除书籍指纹失败: {e}")
+
+    def clear(self) -> None:
+        """清空全部指纹记录"""
+        with self._pool.transaction() as conn:
+            conn.execute("DELETE FROM book_fingerprints")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计信息"""
+        with self._pool.transaction() as conn:
+            rows = conn.execute(
+                "SELECT variant, COUNT(*) FROM book_fingerprints GROUP BY variant").fetchall()
+        return {"variants": {variant: count for variant, count in rows}}
+
+
+_store: Optional[FingerprintStore] = None
+_store_lock = threading.Lock()
+_store_disabled = False
+# 进程内文件哈希缓存：路径 -> (识别键, 哈希)，避免两两比较时反复查询数据库
+_hash_memo: Dict[str, Tuple[FileKey, str]] = {}
+
+
+def get_fingerprint_store() -> Optional[FingerprintStore]:
+    """
+    获取全局书籍指纹存储（位于配置目录下的 fingerprints.sqlite）
+
+    Returns:
+        Optional[FingerprintStore]: 存储实例，初始化失败时返回None
+    """
+    global _store
+    if _store is not None or _store_disabled:
+        return _store
+    with _store_lock:
+        if _store is None:
+            try:
+                from src.config.config_manager import ConfigManager
+                config = ConfigManager.get_instance().get_config()
+                config_dir = os.path.expanduser(config.get("paths", {}).get("config_dir", "~/.config/new_preader"))
+                os.makedirs(config_dir, exist_ok=True)
+                _store = FingerprintStore(os.path.join(config_dir, "fingerprints.sqlite"))
+            except Exception as e:
+                logger.warning(f"初始化书籍指纹存储失败: {e}")
+                return None
+    return _store
+
+
+def disable_fingerprint_store() -> None:
+    """
+    在当前进程中停用指纹存储（指纹计算工作进程调用：不打开数据库，哈希直接计算，
+    结果由主进程统一写入）
+    """
+    global _store_disabled
+    _store_disabled = True
+
+
+def cached_file_hash(path: str, persist: bool = True) -> str:
+    """
+    获取文件 SHA256（依次查进程内缓存、指纹存储，都未命中时计算并写回）
+
+    Args:
+        path: 文件路径
+        persist: 新计算的哈希是否单独写入存储（调用方会把哈希随完整指纹记录一起批量写入时传 False）
+
+    Returns:
+        str: 文件哈希，文件不存在或读取失败时返回空字符串
+    """
+    key = get_file_key(path)
+    if key is None:
+        return ""
+    memo = _hash_memo.get(path)
+    if memo is not None and memo[0] == key:
+        return memo[1]
+    store = get_fingerprint_store()
+    file_hash = store.get_file_hash(path, key) if store else ""
+    if not file_hash:
+        from src.utils.file_utils import FileUtils
+        file_hash = FileUtils.calculate_file_sha256(path)
+        if file_hash and store and persist:
+            store.put_many([{"path": path, "file_hash": file_hash}])
+    if file_hash:
+        _hash_memo[path] = (key, file_hash)
+    return file_hash
+
+
+def invalidate_fingerprints(paths: Iterable[str]) -> None:
+    """
+    删除指定文件的指纹记录（书籍从书架移除时调用）
+
+    Args:
+        paths: 文件路径列表
+    """
+    from src.utils.near_duplicate_index import remove_from_indexes
+
+    paths = list(paths)
+    store = get_fingerprint_store()
+    for path in paths:
+        _hash_memo.pop(path, None)
+        if store:
+            store.invalidate(path)
+    remove_from_indexes(paths)
@@ -0,0 +1,430 @@
+"""
+近似重复索引：SimHash 海明距离查询 + MinHash-LSH 候选查询，支持增量插入与删除
+
+- SimHash 存放在连续的 uint64 数组中，查询时对整个数组做异或 + popcount（NumPy 向量化），
+  两万本书的单次查询为毫秒级；全量候选对按行块计算，结果精确，不再依赖按位分桶后抽样
+- MinHash 签名按 band 分段放入哈希桶（LSH），至少一个 band 完全相同的书才成为候选，
+  再用签名估计的 Jaccard 相似度过滤
+- 全局索引从持久化指纹存储加载，指纹写入/失效时增量更新，用于导入书籍时的"可能重复"提示
+- 未安装 NumPy 时使用纯 Python 实现（结果相同，速度较慢）
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from src.utils.fingerprint_store import MINHASH_PERMUTATIONS, get_fingerprint_store, minhash_similarity
+from src.utils.logger import get_logger
+
+try:
+    import numpy as np
+    _NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    _NUMPY_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+# 默认海明距离阈值（与重复检测器的 SIMHASH_THRESHOLD 一致）
+DEFAULT_MAX_HAMMING = 3
+# 默认 MinHash 估计 Jaccard 相似度阈值
+DEFAULT_MIN_JACCARD = 0.5
+# LSH 分段数：64 个排列分成 16 段、每段 4 个，Jaccard 0.5 时约 64%、0.7 时约 99% 的概率成为候选
+DEFAULT_LSH_BANDS = 16
+# 计算全量候选对时每块的元素上限（行数 × 列数），控制临时数组内存
+_PAIR_BLOCK_ELEMENTS = 4_000_000
+
+_popcount = getattr(int, "bit_count", None) or (lambda value: bin(value).count("1"))
+
+if _NUMPY_AVAILABLE:
+    if hasattr(np, "bitwise_count"):
+        _np_popcount = np.bitwise_count
+    else:
+        _POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+        def _np_popcount(values):
+            bytes_view = np.ascontiguousarray(values).view(np.uint8)
+            return _POPCOUNT8[bytes_view].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+class SimHashIndex:
+    """SimHash 海明距离索引（键可为路径或序号等任意可哈希对象）"""
+
+    def __init__(self):
+        self._keys: List[Optional[Hashable]] = []
+        self._slots: Dict[Hashable, int] = {}
+        if _NUMPY_AVAILABLE:
+            self._hashes = np.zeros(64, dtype=np.uint64)
+            self._alive = np.zeros(64, dtype=bool)
+        else:
+            self._hashes = []
+            self._alive = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def add(self, key: Hashable, simhash: int) -> None:
+        """
+        加入或更新一个 SimHash
+
+        Args:
+            key: 键
+            simhash: 64 位 SimHash
+        """
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._keys)
+            self._keys.append(key)
+            self._slots[key] = slot
+            if _NUMPY_AVAILABLE:
+                if slot >= len(self._hashes):
+                    self._hashes = np.concatenate([self._hashes, np.zeros_like(self._hashes)])
+                    self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+            else:
+                self._hashes.append(0)
+                self._alive.append(False)
+        self._hashes[slot] = simhash
+        self._alive[slot] = True
+
+    def remove(self, key: Hashable) -> None:
+        """删除一个键（槽位标记为失效，不移动其他数据）"""
+        slot = self._slots.pop(key, None)
+        if slot is not None:
+            self._keys[slot] = None
+            self._alive[slot] = False
+
+    def get(self, key: Hashable) -> Optional[int]:
+        """读取键对应的 SimHash"""
+        slot = self._slots.get(key)
+        return None if slot is None else int(self._hashes[slot])
+
+    def query(self, simhash: int, max_distance: int = DEFAULT_MAX_HAMMING) -> List[Tuple[Hashable, int]]:
+        """
+        查找海明距离不超过阈值的全部键
+
+        Args:
+            simhash: 查询的 SimHash
+            max_distance: 海明距离阈值
+
+        Returns:
+            List[Tuple[Hashable, int]]: (键, 海明距离)，按距离升序
+        """
+        count = len(self._keys)
+        if _NUMPY_AVAILABLE:
+            distances = _np_popcount(self._hashes[:count] ^ np.uint64(simhash))
+            slots = np.nonzero((distances <= max_distance) & self._alive[:count])[0]
+            matches = [(self._keys[slot], int(distances[slot])) for slot in slots]
+        else:
+            matches = []
+            for slot in range(count):
+                if self._alive[slot]:
+                    distance = _popcount(self._hashes[slot] ^ simhash)
+                    if distance <= max_distance:
+                        matches.append((self._keys[slot], distance))
+        matches.sort(key=lambda item: item[1])
+        return matches
+
+    def pairs(self, max_distance: int = DEFAULT_MAX_HAMMING) -> List[Tuple[Hashable, Hashable, int]]:
+        """
+        找出全部海明距离不超过阈值的键对（精确结果）
+
+        Args:
+            max_distance: 海明距离阈值
+
+        Returns:
+            List[Tuple[Hashable, Hashable, int]]: (先加入的键, 后加入的键, 海明距离)，按加入顺序排列
+        """
+        count = len(self._keys)
+        result: List[Tuple[Hashable, Hashable, int]] = []
+        if _NUMPY_AVAILABLE:
+            hashes = self._hashes[:count]
+            alive = self._alive[:count]
+            block = max(1, _PAIR_BLOCK_ELEMENTS // max(count, 1))
+            for start in range(0, count, block):
+                end = min(start + block, count)
+                # 只与自身及之后的槽位比较（上三角）
+                distances = _np_popcount(hashes[start:end, None] ^ hashes[None, start:])
+                mask = (distances <= max_distance) & alive[start:end, None] & alive[None, start:]
+                rows, cols = np.nonzero(mask)
+                for row, col in zip(rows.tolist(), cols.tolist()):
+                    i, j = start + row, start + col
+                    if j > i:
+                        result.append((self._keys[i], self._keys[j], int(distances[row, col])))
+        else:
+            slots = [slot for slot in range(count) if self._alive[slot]]
+            for a, i in enumerate(slots):
+                for j in slots[a + 1:]:
+                    distance = _popcount(self._hashes[i] ^ self._hashes[j])
+                    if distance <= max_distance:
+                        result.append((self._keys[i], self._keys[j], distance))
+        return result
+
+    def neighbors(self, max_distance: int = DEFAULT_MAX_HAMMING) -> Dict[Hashable, List[Tuple[Hashable, int]]]:
+        """
+        每个键之后加入的、海明距离不超过阈值的键
+
+        Args:
+            max_distance: 海明距离阈值
+
+        Returns:
+            Dict[Hashable, List[Tuple[Hashable, int]]]: 键 -> [(后加入的键, 海明距离)]，按加入顺序排列
+        """
+        result: Dict[Hashable, List[Tuple[Hashable, int]]] = {}
+        for first, second, distance in self.pairs(max_distance):
+            result.setdefault(first, []).append((second, distance))
+        return result
+
+
+class MinHashLSH:
+    """MinHash 签名的局部敏感哈希（LSH）索引"""
+
+    def __init__(self, num_perm: int = MINHASH_PERMUTATIONS, bands: int = DEFAULT_LSH_BANDS):
+        """
+        初始化索引
+
+        Args:
+            num_perm: 签名长度
+            bands: 分段数（必须整除签名长度）
+        """
+        if num_perm % bands:
+            raise ValueError(f"分段数 {bands} 不能整除签名长度 {num_perm}")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Tuple[int, ...], Set[Hashable]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[Hashable, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Sequence[int]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def add(self, key: Hashable, signature: Sequence[int]) -> None:
+        """
+        加入或更新一个签名（长度不符的签名忽略）
+
+        Args:
+            key: 键
+            signature: MinHash 签名
+        """
+        if len(signature) != self.num_perm:
+            return
+        self.remove(key)
+        signature = tuple(signature)
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        """删除一个键"""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in self._band_keys(signature):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def get(self, key: Hashable) -> Tuple[int, ...]:
+        """读取键对应的签名，不存在时返回空元组"""
+        return self._signatures.get(key, ())
+
+    def candidates(self, signature: Sequence[int]) -> Set[Hashable]:
+        """至少一个分段完全相同的键"""
+        result: Set[Hashable] = set()
+        if len(signature) != self.num_perm:
+            return result
+        for band, band_key in self._band_keys(signature):
+            result.update(self._buckets[band].get(band_key, ()))
+        return result
+
+    def query(self, signature: Sequence[int], min_similarity: float = DEFAULT_MIN_JACCARD) -> List[Tuple[Hashable, float]]:
+        """
+        查找估计 Jaccard 相似度不低于阈值的键
+
+        Args:
+            signature: 查询的 MinHash 签名
+            min_similarity: 相似度阈值
+
+        Returns:
+            List[Tuple[Hashable, float]]: (键, 估计相似度)，按相似度降序
+        """
+        matches = []
+        for key in self.candidates(signature):
+            similarity = minhash_similarity(signature, self._signatures[key])
+            if similarity >= min_similarity:
+                matches.append((key, similarity))
+        matches.sort(key=lambda item: -item[1])
+        return matches
+
+
+@dataclass
+class NearDuplicate:
+    """近似重复查询结果"""
+    key: Hashable
+    hamming: int        # SimHash 海明距离
+    similarity: float   # MinHash 估计的 Jaccard 相似度（无签名时为0）
+
+
+class NearDuplicateIndex:
+    """组合 SimHash 与 MinHash-LSH 的近似重复索引（线程安全）"""
+
+    def __init__(self, max_hamming: int = DEFAULT_MAX_HAMMING, min_similarity: float = DEFAULT_MIN_JACCARD,
+                 num_perm: int = MINHASH_PERMUTATIONS, bands: int = DEFAULT_LSH_BANDS):
+        """
+        初始化索引
+
+        Args:
+            max_hamming: SimHash 海明距离阈值
+            min_similarity: MinHash 估计相似度阈值
+            num_perm: MinHash 签名长度
+            bands: LSH 分段数
+        """
+        self.max_hamming = max_hamming
+        self.min_similarity = min_similarity
+        self._simhashes = SimHashIndex()
+        self._lsh = MinHashLSH(num_perm, bands)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._simhashes)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._simhashes
+
+    def add(self, key: Hashable, simhash: int, minhash: Sequence[int] = ()) -> None:
+        """
+        加入或更新一本书的签名
+
+        Args:
+            key: 键（通常为文件路径）
+            simhash: SimHash
+            minhash: MinHash 签名
+        """
+        with self._lock:
+            self._simhashes.add(key, simhash)
+            if minhash:
+                self._lsh.add(key, minhash)
+            else:
+                self._lsh.remove(key)
+
+    def add_records(self, records: Iterable[Dict]) -> int:
+        """
+        批量加入指纹记录（无内容指纹的记录跳过）
+
+        Args:
+            records: 指纹存储格式的记录（path、simhash、minhash）
+
+        Returns:
+            int: 加入的数量
+        """
+        count = 0
+        with self._lock:
+            for record in records:
+                if record.get("simhash"):
+                    self.add(record["path"], record["simhash"], record.get("minhash") or ())
+                    count += 1
+        return count
+
+    def remove(self, key: Hashable) -> None:
+        """删除一本书"""
+        with self._lock:
+            self._simhashes.remove(key)
+            self._lsh.remove(key)
+
+    def find_similar(self, key: Optional[Hashable] = None, simhash: int = 0, minhash: Sequence[int] = (),
+                     limit: Optional[int] = None) -> List[NearDuplicate]:
+        """
+        查找与一本书近似重复的书：SimHash 海明距离不超过阈值，或 MinHash 估计相似度不低于阈值
+
+        Args:
+            key: 已在索引中的书（使用其签名查询并排除自身）
+            simhash: 不在索引中时直接给出 SimHash
+            minhash: 不在索引中时直接给出 MinHash 签名
+            limit: 最多返回的数量
+
+        Returns:
+            List[NearDuplicate]: 按相似度降序、海明距离升序排列
+        """
+        with self._lock:
+            if key is not None and key in self._simhashes:
+                simhash = self._simhashes.get(key)
+                minhash = self._lsh.get(key)
+            matches: Dict[Hashable, NearDuplicate] = {}
+            if simhash:
+                for other, distance in self._simhashes.query(simhash, self.max_hamming):
+                    other_minhash = self._lsh.get(other)
+                    similarity = minhash_similarity(minhash, other_minhash) if minhash and other_minhash else 0.0
+                    matches[other] = NearDuplicate(other, distance, similarity)
+            if minhash:
+                for other, similarity in self._lsh.query(minhash, self.min_similarity):
+                    if other not in matches:
+                        other_simhash = self._simhashes.get(other) or 0
+                        matches[other] = NearDuplicate(other, _popcount(simhash ^ other_simhash), similarity)
+        matches.pop(key, None)
+        result = sorted(matches.values(), key=lambda match: (-match.similarity, match.hamming))
+        return result[:limit] if limit else result
+
+
+_indexes: Dict[str, NearDuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_near_duplicate_index(variant: str) -> Optional[NearDuplicateIndex]:
+    """
+    获取某种指纹类型的全局近似重复索引（首次调用时从持久化指纹存储加载）
+
+    Args:
+        variant: 指纹类型（与重复检测器写入指纹存储时一致）
+
+    Returns:
+        Optional[NearDuplicateIndex]: 索引，指纹存储不可用时返回None
+    """
+    index = _indexes.get(variant)
+    if index is not None:
+        return index
+    with _indexes_lock:
+        index = _indexes.get(variant)
+        if index is None:
+            store = get_fingerprint_store()
+            if store is None:
+                return None
+            index = NearDuplicateIndex()
+            for path, (simhash, minhash) in store.get_signatures(variant).items():
+                index.add(path, simhash, minhash)
+            logger.info(f"近似重复索引已加载 {len(index)} 本书籍（{variant}）")
+            _indexes[variant] = index
+    return index
+
+
+def index_fingerprint_records(records: Iterable[Dict], variant: str) -> None:
+    """
+    新写入指纹存储的记录同步到已加载的全局索引（未加载时由首次加载读取）
+
+    Args:
+        records: 指纹记录
+        variant: 指纹类型
+    """
+    index = _indexes.get(variant)
+    if index is not None:
+        index.add_records(records)
+
+
+def remove_from_indexes(paths: Iterable[str]) -> None:
+    """
+    从所有已加载的全局索引中删除书籍（书籍从书架移除时调用）
+
+    Args:
+        paths: 文件路径列表
+    """
+    paths = list(paths)
+    for index in list(_indexes.values()):
+        for path in paths:
+            index.remove(path)
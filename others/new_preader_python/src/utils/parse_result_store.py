@@ -0,0 +1,232 @@
+"""
+持久化解析结果存储：将 EPUB/PDF/MOBI/AZW 的解析结果（正文 + 章节）压缩后保存在磁盘上，
+以 (路径, 大小, mtime_ns, inode, 解析器版本) 识别文件是否变化，应用重启后无需重新解析。
+按总磁盘预算淘汰最久未访问的记录。
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.db_connection_pool import SQLiteConnectionPool
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 解析器输出格式变化时递增，使旧缓存自动失效
+PARSER_VERSION = 2
+# 默认磁盘预算（MB）
+DEFAULT_DISK_BUDGET_MB = 512
+
+FileIdentity = Tuple[int, int, int]  # (size, mtime_ns, inode)
+
+
+def get_file_identity(path: str) -> Optional[FileIdentity]:
+    """
+    获取文件身份信息（只做一次 stat，不读取文件内容）
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Optional[FileIdentity]: (大小, mtime_ns, inode)，文件不存在时返回None
+    """
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns, st.st_ino
+    except OSError:
+        return None
+
+
+class ParseResultStore:
+    """基于SQLite的压缩解析结果存储"""
+
+    def __init__(self, db_path: str, disk_budget_mb: int = DEFAULT_DISK_BUDGET_MB,
+                 hash_content: bool = False):
+        """
+        初始化解析结果存储
+
+        Args:
+            db_path: 缓存数据库文件路径
+            disk_budget_mb: 磁盘预算（MB），超出后淘汰最久未访问的记录
+            hash_content: 是否在写入时记录内容哈希；开启后文件仅被 touch/复制
+                （mtime/inode 变化但内容不变）时可通过哈希比对继续命中
+        """
+        self.db_path = db_path
+        self.disk_budget = max(1, int(disk_budget_mb)) * 1024 * 1024
+        self.hash_content = hash_content
+        self._pool = SQLiteConnectionPool.get_pool(db_path)
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with self._pool.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS parse_results (
+                    path TEXT NOT NULL,
+                    format TEXT NOT NULL,
+                    variant TEXT NOT NULL DEFAULT '',
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    parser_version INTEGER NOT NULL,
+                    content_hash TEXT DEFAULT '',
+                    payload BLOB NOT NULL,
+                    byte_size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (path, format, variant)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_results_access ON parse_results(last_access)")
+
+    def get(self, path: str, fmt: str, variant: str = "") -> Optional[Dict[str, Any]]:
+        """
+        读取解析结果
+
+        Args:
+            path: 书籍文件路径
+            fmt: 文件格式（如 .epub）
+            variant: 区分同一文件不同解析方式的附加键（如是否使用密码）
+
+        Returns:
+            Optional[Dict[str, Any]]: {"content": str, "chapters": list}，未命中返回None
+        """
+        identity = get_file_identity(path)
+        if identity is None:
+            return None
+        try:
+            with self._pool.transaction() as conn:
+                row = conn.execute("""
+                    SELECT size, mtime_ns, inode, parser_version, content_hash, payload
+                    FROM parse_results WHERE path = ? AND format = ? AND variant = ?
+                """, (path, fmt, variant)).fetchone()
+                if not row:
+                    return None
+                size, mtime_ns, inode, version, content_hash, payload = row
+                if version != PARSER_VERSION or size != identity[0]:
+                    return None
+                if (mtime_ns, inode) != identity[1:]:
+                    # 身份变化但大小相同：有内容哈希时按需比对，避免 touch/复制后重新解析
+                    if not content_hash or self._hash_file(path) != content_hash:
+                        return None
+                    conn.execute("""
+                        UPDATE parse_results SET mtime_ns = ?, inode = ?
+                        WHERE path = ? AND format = ? AND variant = ?
+                    """, (identity[1], identity[2], path, fmt, variant))
+                conn.execute("""
+                    UPDATE parse_results SET last_access = ?
+                    WHERE path = ? AND format = ? AND variant = ?
+                """, (time.time(), path, fmt, variant))
+            return json.loads(zlib.decompress(payload).decode("utf-8"))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.warning(f"读取持久化解析缓存失败: {e}")
+            return None
+
+    def put(self, path: str, fmt: str, result: Dict[str, Any], variant: str = "") -> bool:
+        """
+        写入解析结果并按磁盘预算淘汰旧记录
+
+        Args:
+            path: 书籍文件路径
+            fmt: 文件格式
+            result: {"content": str, "chapters": list}
+            variant: 附加键
+
+        Returns:
+            bool: 是否写入成功
+        """
+        identity = get_file_identity(path)
+        if identity is None:
+            return False
+        try:
+            payload = zlib.compress(json.dumps(result, ensure_ascii=False).encode("utf-8"), 6)
+            content_hash = self._hash_file(path) if self.hash_content else ""
+            with self._pool.transaction() as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO parse_results
+                    (path, format, variant, size, mtime_ns, inode, parser_version,
+                     content_hash, payload, byte_size, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (path, fmt, variant, identity[0], identity[1], identity[2], PARSER_VERSION,
+                      content_hash, payload, len(payload), time.time()))
+                self._evict_over_budget(conn)
+            return True
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"写入持久化解析缓存失败: {e}")
+            return False
+
+    def _evict_over_budget(self, conn: sqlite3.Connection) -> None:
+        """按最久未访问顺序淘汰记录，直到总大小不超过磁盘预算"""
+        total = conn.execute("SELECT COALESCE(SUM(byte_size), 0) FROM parse_results").fetchone()[0]
+        if total <= self.disk_budget:
+            return
+        victims = []
+        for rowid, byte_size in conn.execute(
+                "SELECT rowid, byte_size FROM parse_results ORDER BY last_access ASC"):
+            if total <= self.disk_budget:
+                break
+            victims.append((rowid,))
+            total -= byte_size
+        conn.executemany("DELETE FROM parse_results WHERE rowid = ?", victims)
+        logger.info(f"持久化解析缓存超出预算，已淘汰 {len(victims)} 条记录")
+
+    def invalidate(self, path: str) -> None:
+        """删除指定文件的全部解析结果"""
+        try:
+            with self._pool.transaction() as conn:
+                conn.execute("DELETE FROM parse_results WHERE path = ?", (path,))
+        except sqlite3.Error as e:
+            logger.warning(f"删除持久化解析缓存失败: {e}")
+
+    def clear(self) -> None:
+        """清空全部解析结果"""
+        with self._pool.transaction() as conn:
+            conn.execute("DELETE FROM parse_results")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计信息"""
+        with self._pool.transaction() as conn:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(byte_size), 0) FROM parse_results").fetchone()
+        return {"item_count": count, "total_bytes": total, "max_bytes": self.disk_budget}
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        from src.utils.file_utils import FileUtils
+        return FileUtils.calculate_file_sha256(path)
+
+
+_store: Optional[ParseResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_parse_result_store() -> Optional[ParseResultStore]:
+    """
+    获取全局持久化解析结果存储（位于配置目录下的 parse_cache.sqlite）
+
+    Returns:
+        Optional[ParseResultStore]: 存储实例，初始化失败时返回None
+    """
+    global _store
+    if _store is not None:
+        return _store
+    with _store_lock:
+        if _store is None:
+            try:
+                from src.config.config_manager import ConfigManager
+                config = ConfigManager.get_instance().get_config()
+                config_dir = os.path.expanduser(config.get("paths", {}).get("config_dir", "~/.config/new_preader"))
+                advanced = config.get("advanced", {})
+                os.makedirs(config_dir, exist_ok=True)
+                _store = ParseResultStore(
+                    os.path.join(config_dir, "parse_cache.sqlite"),
+                    disk_budget_mb=advanced.get("parse_cache_disk_mb", DEFAULT_DISK_BUDGET_MB),
+                    hash_content=advanced.get("parse_cache_hash_content", False),
+                )
+            except Exception as e:
+                logger.warning(f"初始化持久化解析缓存失败: {e}")
+                return None
+    return _store
@@ -0,0 +1,96 @@
+"""
+后台进程池：指纹计算、全文索引、PDF 提取共用的任务调度
+
+- 使用 spawn 启动工作进程：界面和连接池在运行多个线程，fork 可能复制到被占用的锁
+- 工作进程忽略 Ctrl+C（由主进程负责取消），默认降低优先级，不与界面争抢 CPU
+- 每个工作进程同时排队少量任务，完成一个补充一个；完成的任务按完成顺序回调
+- 取消时丢弃尚未开始的任务，正在执行的任务完成后工作进程退出；未完成的任务留在 pending 中，
+  调用方可以在当前线程继续处理（或直接放弃）
+"""
+
+import os
+import signal
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 工作进程的 nice 值增量
+WORKER_NICE = 10
+# 每个工作进程同时排队的任务数
+_QUEUED_TASKS_PER_WORKER = 2
+_START_METHOD = "spawn"
+# 等待任务完成时检查取消的间隔（秒）
+_CANCEL_POLL_INTERVAL = 0.5
+
+
+def init_worker(nice: int = WORKER_NICE) -> None:
+    """
+    工作进程初始化：忽略 Ctrl+C，降低优先级
+
+    Args:
+        nice: nice 值增量，0 表示不调整优先级
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if nice and hasattr(os, "nice"):
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+
+
+def run_in_processes(worker: Callable[[Any], Any], pending: Dict[Hashable, Any], workers: int,
+                     on_done: Callable[[Hashable, Any], None],
+                     cancelled: Callable[[], bool],
+                     initializer: Callable[[], None] = init_worker,
+                     register_executor: Optional[Callable[[Any], None]] = None,
+                     unregister_executor: Optional[Callable[[Any], None]] = None) -> None:
+    """
+    在进程池中执行 pending 中的任务
+
+    Args:
+        worker: 执行单个任务的模块级函数（可被 pickle，可用 functools.partial 绑定固定参数），参数为任务值
+        pending: 任务键 -> 任务值；完成的任务交给 on_done 后从中移除
+        workers: 工作进程数
+        on_done: 任务完成回调(任务键, worker 返回值)，在调用线程中执行
+        cancelled: 返回是否已请求取消
+        initializer: 工作进程初始化函数（模块级函数）
+        register_executor: 进程池创建后调用（调用方取消时可直接关闭进程池）
+        unregister_executor: 进程池结束时调用
+
+    Raises:
+        Exception: 无法创建进程或任务执行出错时抛出，剩余任务仍在 pending 中
+    """
+    executor = ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context(_START_METHOD),
+                                   initializer=initializer)
+    if register_executor:
+        register_executor(executor)
+    queue = iter(list(pending))
+    running: Dict[Future, Hashable] = {}
+
+    def submit_next() -> None:
+        key = next(queue, None)
+        if key is not None:
+            running[executor.submit(worker, pending[key])] = key
+
+    try:
+        for _ in range(workers * _QUEUED_TASKS_PER_WORKER):
+            submit_next()
+        while running and not cancelled():
+            done, _ = wait(running, timeout=_CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                if future.cancelled():
+                    continue
+                on_done(key, future.result())
+                del pending[key]
+                if not cancelled():
+                    submit_next()
+    finally:
+        if unregister_executor:
+            unregister_executor(executor)
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,313 @@
+"""
+浏览器阅读器本地 HTTP 服务的公共层
+
+- ReaderHTTPServer：每个连接一个守护线程，长轮询/慢请求不会阻塞进度保存
+- ReaderRequestHandler：HTTP/1.1 长连接（所有响应都带 Content-Length），
+  按 Accept-Encoding 压缩（安装了 brotli 时优先 br，否则 gzip），
+  支持 ETag / If-None-Match 返回 304
+- ProgressWriteCoalescer：进度保存请求只更新内存中的最新值，
+  同一本书的多次保存合并为每个刷新间隔最多一次回调（写数据库），停止服务时立即写入
+"""
+
+import gzip
+import json
+import time
+import atexit
+import weakref
+import hashlib
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import brotli
+    _BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    _BROTLI_AVAILABLE = False
+
+# 小于该字节数的响应不压缩
+MIN_COMPRESS_BYTES = 1024
+# 进度回调的默认合并间隔（秒）
+DEFAULT_PROGRESS_FLUSH_INTERVAL = 2.0
+# 静态文件根目录（src）
+_STATIC_ROOT = Path(__file__).resolve().parent.parent
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def make_etag(*parts: Any) -> str:
+    """根据内容标识生成强 ETag"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+class ReaderHTTPServer(ThreadingHTTPServer):
+    """多线程的阅读器服务器"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+    # 监听队列（默认 5），页面同时发起多个请求时避免连接被拒绝后等待 SYN 重传
+    request_queue_size = 64
+    # 该服务器使用的进度合并器，关闭服务器时写入待写进度
+    progress_writer: Optional["ProgressWriteCoalescer"] = None
+
+    def server_close(self):
+        if self.progress_writer is not None:
+            self.progress_writer.stop()
+        super().server_close()
+
+
+class ReaderRequestHandler(BaseHTTPRequestHandler):
+    """阅读器请求处理基类：长连接、压缩、条件请求和 CORS"""
+
+    protocol_version = "HTTP/1.1"
+    # 长连接上响应头和响应体分两次写出，不关闭 Nagle 时会与客户端的延迟确认叠加出约 40ms 延迟
+    disable_nagle_algorithm = True
+    # 空闲长连接的超时（秒），避免浏览器保留的连接长期占用线程
+    timeout = 30
+    # 允许的跨域请求头
+    cors_headers = "Content-Type"
+
+    def log_message(self, format, *args):
+        pass  # 禁用日志输出
+
+    def _negotiate_encoding(self) -> Optional[str]:
+        accepted = {
+            token.split(";")[0].strip().lower()
+            for token in (self.headers.get("Accept-Encoding") or "").split(",")
+        }
+        if _BROTLI_AVAILABLE and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def is_not_modified(self, etag: Optional[str]) -> bool:
+        """请求的 If-None-Match 是否与 etag 匹配"""
+        if not etag:
+            return False
+        candidates = [tag.strip() for tag in (self.headers.get("If-None-Match") or "").split(",")]
+        return etag in candidates or "*" in candidates
+
+    def send_not_modified(self, etag: str) -> None:
+        """返回 304"""
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_payload(self, status: int, body: bytes = b"",
+                     content_type: str = "application/json; charset=utf-8",
+                     etag: Optional[str] = None, cache_control: Optional[str] = None) -> None:
+        """
+        发送完整响应（带 Content-Length，必要时压缩）
+
+        Args:
+            status: 状态码
+            body: 响应体
+            content_type: 内容类型
+            etag: ETag，提供时与 If-None-Match 匹配则返回 304
+            cache_control: Cache-Control 头
+        """
+        if status == 200 and self.is_not_modified(etag):
+            self.send_not_modified(etag)
+            return
+        encoding = None
+        if len(body) >= MIN_COMPRESS_BYTES and content_type.startswith(_COMPRESSIBLE_TYPES):
+            encoding = self._negotiate_encoding()
+            if encoding == "br":
+                body = brotli.compress(body, quality=5)
+            elif encoding == "gzip":
+                body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Access-Control-Expose-Headers", "ETag")
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def send_json(self, status: int, data: Any, etag: Optional[str] = None,
+                  cache_control: Optional[str] = None) -> None:
+        """发送 JSON 响应"""
+        self.send_payload(status, json.dumps(data, ensure_ascii=False).encode("utf-8"),
+                          etag=etag, cache_control=cache_control)
+
+    def send_empty(self, status: int) -> None:
+        """发送没有内容的响应（如 404）"""
+        self.send_payload(status)
+
+    def read_body(self) -> bytes:
+        """读取请求体"""
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length > 0 else b""
+
+    def serve_static_file(self, relative_path: str) -> None:
+        """
+        提供 src 目录下的静态文件（翻译文件等），带 ETag，内容按修改时间缓存
+
+        Args:
+            relative_path: 相对项目根目录的路径（如 src/locales/zh_CN/translation.json）
+        """
+        try:
+            body, content_type, etag = _load_static_file(relative_path)
+        except FileNotFoundError:
+            self.send_empty(404)
+            return
+        except Exception as e:
+            logger.error(f"静态文件访问错误: {e}")
+            self.send_empty(500)
+            return
+        self.send_payload(200, body, content_type, etag=etag, cache_control="no-cache")
+
+    def do_OPTIONS(self):
+        # CORS预检请求
+        self.send_response(200)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", self.cors_headers)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+_static_cache: Dict[Path, Tuple[int, bytes, str, str]] = {}
+_static_lock = threading.Lock()
+
+
+def _load_static_file(relative_path: str) -> Tuple[bytes, str, str]:
+    """读取静态文件：(内容, 类型, ETag)，只允许访问 src 目录内的文件"""
+    path = (_STATIC_ROOT.parent / relative_path.split("?")[0]).resolve()
+    if _STATIC_ROOT not in path.parents or not path.is_file():
+        raise FileNotFoundError(relative_path)
+    mtime_ns = path.stat().st_mtime_ns
+    with _static_lock:
+        cached = _static_cache.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1], cached[2], cached[3]
+    body = path.read_bytes()
+    content_type = "application/json; charset=utf-8" if path.suffix == ".json" else "text/plain; charset=utf-8"
+    etag = make_etag(path, mtime_ns, len(body))
+    with _static_lock:
+        _static_cache[path] = (mtime_ns, body, content_type, etag)
+    return body, content_type, etag
+
+
+class ProgressWriteCoalescer:
+    """合并进度写入：每本书在一个刷新间隔内最多回调一次，使用最新的进度"""
+
+    def __init__(self, flush_interval: float = DEFAULT_PROGRESS_FLUSH_INTERVAL):
+        """
+        Args:
+            flush_interval: 合并间隔（秒），0 表示每次保存都立即回调
+        """
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, Tuple[Callable[..., Any], tuple]] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        _coalescers.add(self)
+
+    def submit(self, key: str, callback: Callable[..., Any], *args: Any) -> None:
+        """
+        提交一次写入（覆盖同一 key 尚未写入的旧值）
+
+        Args:
+            key: 书籍标识
+            callback: 写入回调
+            *args: 回调参数
+        """
+        if self.flush_interval <= 0:
+            with self._write_lock:
+                self._invoke(key, callback, args)
+            return
+        with self._lock:
+            self._pending[key] = (callback, args)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="progress-coalescer", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def _invoke(self, key: str, callback: Callable[..., Any], args: tuple) -> None:
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"保存进度回调失败: {key}, 错误: {e}")
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._pending and not self._stopped:
+                    self._wakeup.wait()
+                if not self._pending:
+                    return
+                now = time.monotonic()
+                next_due = min(self._last_flush.get(key, 0.0) + self.flush_interval for key in self._pending)
+                if next_due > now and not self._stopped:
+                    self._wakeup.wait(next_due - now)
+                    continue
+            self._write_due(force=False)
+
+    def _write_due(self, force: bool) -> None:
+        """写入到期（force 时为全部）的进度；写入串行进行，保证同一本书按提交顺序落盘"""
+        with self._write_lock:
+            with self._lock:
+                now = time.monotonic()
+                due = {
+                    key: self._pending.pop(key) for key in list(self._pending)
+                    if force or self._stopped
+                    or self._last_flush.get(key, 0.0) + self.flush_interval <= now
+                }
+                for key in due:
+                    self._last_flush[key] = now
+            for key, (callback, args) in due.items():
+                self._invoke(key, callback, args)
+
+    def flush(self) -> None:
+        """立即写入全部待写进度"""
+        self._write_due(force=True)
+
+    def stop(self) -> None:
+        """写入待写进度并停止后台线程"""
+        self.flush()
+        with self._lock:
+            self._stopped = True
+            self._wakeup.notify_all()
+
+
+# 进程退出时写入所有合并器中尚未写入的进度（后台线程为守护线程）
+_coalescers: "weakref.WeakSet[ProgressWriteCoalescer]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all_coalescers() -> None:
+    for coalescer in list(_coalescers):
+        coalescer.flush()
+
+
+def get_progress_flush_interval() -> float:
+    """读取 browser_server.progress_flush_interval 配置"""
+    try:
+        from src.config.config_manager import ConfigManager
+        config = ConfigManager.get_instance().get_config().get("browser_server", {})
+        return float(config.get("progress_flush_interval", DEFAULT_PROGRESS_FLUSH_INTERVAL))
+    except Exception as e:
+        logger.warning(f"读取进度合并间隔失败，使用默认值: {e}")
+        return DEFAULT_PROGRESS_FLUSH_INTERVAL
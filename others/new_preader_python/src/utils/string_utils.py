@@ -4,10 +4,12 @@
 
 import os
 import re
+import threading
 import unicodedata
 from difflib import SequenceMatcher
 from typing import List, Dict, Any, Optional, Tuple
 
+from src.utils.chinese_conversion import ConversionEngine, compose_sequential_map
 from src.utils.logger import get_logger
 from src.core.book import Book
 
@@ -936,7 +938,7 @@ class _ChineseConverter:
     设计原则：
     1. 覆盖小说/书籍中最常见的繁简差异字符（约2000+对）
     2. 支持简→繁 和 繁→简 双向转换
-    3. 使用字典查找，性能优异（O(n)复杂度）
+    3. 编译为转换表 + 词组前缀树，单遍完成转换（O(n)复杂度）
     4. 可选使用 opencc 库作为后端（如果已安装）
     """
 
@@ -945,6 +947,9 @@ class _ChineseConverter:
     _t2s: Dict[str, str] = {}  # 繁体 → 简体
     _use_opencc = False
     _opencc_converter = None
+    _t2s_engine: Optional[ConversionEngine] = None
+    _s2t_engine: Optional[ConversionEngine] = None
+    _engine_lock = threading.Lock()
 
     @classmethod
     def _init_converter(cls):
@@ -1223,40 +1228,26 @@ class _ChineseConverter:
         logger.info(f"初始化内置繁简转换表: {len(cls._s2t)} 个映射")
 
     @classmethod
-    def to_simplified(cls, text: str) -> str:
-        """将繁体中文转换为简体中文"""
-        if not text:
-            return text
-
-        cls._init_converter()
-
-        # 如果有 opencc，优先使用
-        if cls._use_opencc and cls._opencc_converter:
-            try:
-                return cls._opencc_converter.convert(text)
-            except Exception:
-                pass
-
-        # 使用内置映射表（逐字替换 + 短语优先匹配）
-        result = text
-
-        # 先处理多字词（按长度降序排列，避免子串问题）
-        multi_char_keys = [k for k in cls._t2s.keys() if len(k) > 1]
-        multi_char_keys.sort(key=len, reverse=True)
-
-        for phrase in multi_char_keys:
-            result = result.replace(phrase, cls._t2s[phrase])
+    def _get_engine(cls, mapping: Dict[str, str]) -> ConversionEngine:
+        """
+        把映射表编译为单遍转换引擎（结果与先按长度降序替换词组、再逐个替换单字一致）
 
-        # 再处理单字
-        for t_char, s_char in cls._t2s.items():
-            if len(t_char) == 1:
-                result = result.replace(t_char, s_char)
+        Args:
+            mapping: _t2s 或 _s2t
 
-        return result
+        Returns:
+            ConversionEngine: 转换引擎
+        """
+        char_map = compose_sequential_map(mapping)
+        table = str.maketrans(char_map)
+        # 词组替换后还会经过单字转换，与直接单字转换结果相同的词组无需匹配
+        phrase_map = {k: v for k, v in mapping.items()
+                      if len(k) > 1 and k.translate(table) != v.translate(table)}
+        return ConversionEngine(char_map, phrase_map)
 
     @classmethod
-    def to_traditional(cls, text: str) -> str:
-        """将简体中文转换为繁体中文"""
+    def _convert(cls, text: str, to_traditional: bool) -> str:
+        """按方向转换文本（优先使用 opencc）"""
         if not text:
             return text
 
@@ -1269,22 +1260,26 @@ class _ChineseConverter:
             except Exception:
                 pass
 
-        # 使用内置映射表
-        result = text
-
-        # 先处理多字词
-        multi_char_keys = [k for k in cls._s2t.keys() if len(k) > 1]
-        multi_char_keys.sort(key=len, reverse=True)
-
-        for phrase in multi_char_keys:
-            result = result.replace(phrase, cls._s2t[phrase])
+        # 使用内置映射表（词组最长匹配 + 单字转换表，一次遍历）
+        with cls._engine_lock:
+            engine = cls._s2t_engine if to_traditional else cls._t2s_engine
+            if engine is None:
+                engine = cls._get_engine(cls._s2t if to_traditional else cls._t2s)
+                if to_traditional:
+                    cls._s2t_engine = engine
+                else:
+                    cls._t2s_engine = engine
+        return engine.convert(text)
 
-        # 再处理单字
-        for s_char, t_char in cls._s2t.items():
-            if len(s_char) == 1:
-                result = result.replace(s_char, t_char)
+    @classmethod
+    def to_simplified(cls, text: str) -> str:
+        """将繁体中文转换为简体中文"""
+        return cls._convert(text, to_traditional=False)
 
-        return result
+    @classmethod
+    def to_traditional(cls, text: str) -> str:
+        """将简体中文转换为繁体中文"""
+        return cls._convert(text, to_traditional=True)
 
 
 # ============================================================
@@ -0,0 +1,230 @@
+"""
+流式文本源：基于 mmap 的大文本文件读取
+
+- 只根据文件开头的有限样本检测一次编码
+- 通过内存映射访问文件，按需解码
+- 维护稀疏的 字节偏移 <-> 字符偏移 检查点索引，可按字符区间读取任意片段，无需把整个文件解码成字符串
+- 换行符统一为 \\n（与文本模式 open() 的通用换行行为一致）
+"""
+
+import os
+import mmap
+import codecs
+import bisect
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 编码检测样本大小
+SAMPLE_SIZE = 256 * 1024
+# 建立检查点时每次解码的字节数（检查点间距）
+INDEX_BLOCK_BYTES = 256 * 1024
+# 依次尝试的候选编码（gb18030 兼容 gbk/gb2312）
+CANDIDATE_ENCODINGS = ['utf-8', 'gb18030', 'big5']
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+
+def detect_text_encoding(path: str, sample_size: int = SAMPLE_SIZE) -> Tuple[str, int]:
+    """
+    根据文件开头的样本检测编码
+
+    Args:
+        path: 文件路径
+        sample_size: 样本字节数
+
+    Returns:
+        Tuple[str, int]: (编码名, BOM字节数)
+    """
+    with open(path, 'rb') as f:
+        sample = f.read(sample_size)
+        at_eof = not f.read(1)
+
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            # 样本可能在多字节字符中间截断，非文件结尾时不强制 final
+            decoder.decode(sample, final=at_eof)
+            return encoding, 0
+        except (UnicodeDecodeError, LookupError):
+            continue
+
+    try:
+        import chardet
+        detected = chardet.detect(sample).get('encoding')
+        if detected:
+            codecs.lookup(detected)
+            return detected.lower(), 0
+    except ImportError:
+        logger.warning("chardet 库未安装，无法进行编码检测")
+    except LookupError:
+        pass
+
+    logger.warning(f"无法识别文件编码，使用 UTF-8 并替换无法解码的字符: {path}")
+    return 'utf-8', 0
+
+
+class MmapTextSource:
+    """
+    基于 mmap 的只读文本源，按字符区间提供内容
+
+    检查点索引在读取时按需向后扩展，打开文件的开销与文件大小无关；
+    只有需要总字符数时才会扫描整个文件（仍为常量内存）。
+    """
+
+    def __init__(self, path: str, encoding: Optional[str] = None):
+        """
+        打开文本源
+
+        Args:
+            path: 文件路径
+            encoding: 指定编码，为None时自动检测
+        """
+        self.path = path
+        if encoding is None:
+            self.encoding, bom_length = detect_text_encoding(path)
+        else:
+            self.encoding, bom_length = encoding, 0
+        self._file = open(path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._mmap: Optional[mmap.mmap] = None
+        if self._size > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._cr_bytes = len('\r'.encode(self.encoding))
+        self._lock = threading.Lock()
+        # 检查点：字节偏移均位于完整字符边界上
+        self._byte_checkpoints: List[int] = [bom_length]
+        self._char_checkpoints: List[int] = [0]
+        self._index_complete = self._size <= bom_length
+
+    @property
+    def byte_size(self) -> int:
+        """文件字节数"""
+        return self._size
+
+    def close(self) -> None:
+        """关闭映射和文件句柄"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "MmapTextSource":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _decode_blocks(self, byte_start: int) -> Iterator[Tuple[int, str]]:
+        """
+        从字符边界 byte_start 开始按块解码
+
+        Yields:
+            Tuple[int, str]: (本块结束后的字节偏移（字符边界）, 规范化换行后的文本)
+        """
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        pos = byte_start
+        while pos < self._size:
+            end = min(pos + INDEX_BLOCK_BYTES, self._size)
+            final = end >= self._size
+            text = decoder.decode(self._mmap[pos:end], final=final)
+            boundary = end - len(decoder.getstate()[0])
+            # 块末尾的 \r 可能与下一块开头的 \n 组成 \r\n，留到下一块处理
+            if not final and text.endswith('\r'):
+                text = text[:-1]
+                boundary -= self._cr_bytes
+                decoder.reset()
+                end = boundary
+            elif not final and decoder.getstate()[0]:
+                decoder.reset()
+                end = boundary
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            yield boundary, text
+            pos = end
+
+    def _extend_index(self, char_target: Optional[int]) -> None:
+        """向后扩展检查点索引，直到覆盖 char_target（None 表示扫描到文件末尾）"""
+        if self._index_complete:
+            return
+        chars = self._char_checkpoints[-1]
+        for boundary, text in self._decode_blocks(self._byte_checkpoints[-1]):
+            chars += len(text)
+            self._byte_checkpoints.append(boundary)
+            self._char_checkpoints.append(chars)
+            if char_target is not None and chars > char_target:
+                break
+        else:
+            self._index_complete = True
+
+    def char_length(self) -> int:
+        """总字符数（首次调用时会扫描整个文件）"""
+        with self._lock:
+            self._extend_index(None)
+            return self._char_checkpoints[-1]
+
+    def read(self, start: int, length: int) -> str:
+        """
+        读取字符区间 [start, start + length)
+
+        Args:
+            start: 起始字符偏移
+            length: 字符数
+
+        Returns:
+            str: 区间内容，超出文件末尾时截断
+        """
+        if self._mmap is None or length <= 0 or start < 0:
+            return ""
+        end = start + length
+        with self._lock:
+            self._extend_index(end)
+            i = bisect.bisect_right(self._char_checkpoints, start) - 1
+            byte_pos = self._byte_checkpoints[i]
+            char_pos = self._char_checkpoints[i]
+        parts = []
+        for _, text in self._decode_blocks(byte_pos):
+            block_end = char_pos + len(text)
+            if block_end > start:
+                parts.append(text[max(0, start - char_pos):end - char_pos])
+            char_pos = block_end
+            if char_pos >= end:
+                break
+        return ''.join(parts)
+
+    def iter_text(self, max_bytes: Optional[int] = None) -> Iterator[str]:
+        """
+        按块顺序迭代全文（常量内存）
+
+        Args:
+            max_bytes: 最多解码的字节数（按块取整），为None时迭代到文件末尾
+        """
+        if self._mmap is None:
+            return
+        byte_start = self._byte_checkpoints[0]
+        for boundary, text in self._decode_blocks(byte_start):
+            yield text
+            if max_bytes is not None and boundary - byte_start >= max_bytes:
+                break
+
+    def read_all(self, max_bytes: Optional[int] = None) -> str:
+        """
+        读取全文
+
+        Args:
+            max_bytes: 最多解码的字节数（按块取整），为None时读取整个文件
+        """
+        return ''.join(self.iter_text(max_bytes))
@@ -4,7 +4,8 @@
 """
 
 import re
-from typing import Dict
+from typing import Dict, Iterable, Iterator, Optional
+from src.utils.chinese_conversion import ConversionEngine
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -27,6 +28,8 @@ class TraditionalSimplifiedConverter:
         
         # 创建映射字典
         self.TRADITIONAL_TO_SIMPLIFIED = dict(zip(traditional, simplified))
+        # 预编译为转换表，整段文本一次完成替换
+        self._engine = ConversionEngine(self.TRADITIONAL_TO_SIMPLIFIED)
     
     def convert(self, text: str) -> str:
         """
@@ -39,18 +42,36 @@ class TraditionalSimplifiedConverter:
             转换为简体中文的文本
         """
         try:
-            # 使用映射表进行字符替换
-            converted_text = []
-            for char in text:
-                if char in self.TRADITIONAL_TO_SIMPLIFIED:
-                    converted_text.append(self.TRADITIONAL_TO_SIMPLIFIED[char])
-                else:
-                    converted_text.append(char)
-            return ''.join(converted_text)
+            return self._engine.convert(text)
         except Exception as e:
             logger.warning(f"繁体转简体失败: {e}")
             return text
 
+    def convert_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        按块流式转换大文本
+        
+        Args:
+            chunks: 依次给出的文本块
+            
+        Returns:
+            转换后的文本块
+        """
+        return self._engine.convert_stream(chunks)
+
+    def convert_file(self, source_path: str, target_path: Optional[str] = None) -> bool:
+        """
+        流式转换文本文件（常量内存），结果以 UTF-8 写入
+        
+        Args:
+            source_path: 源文件路径
+            target_path: 目标文件路径，默认覆盖源文件
+            
+        Returns:
+            内容是否发生变化
+        """
+        return self._engine.convert_file(source_path, target_path)
+
 # 创建全局转换器实例
 traditional_simplified_converter = TraditionalSimplifiedConverter()
 
@@ -64,4 +85,17 @@ def convert_traditional_to_simplified(text: str) -> str:
     Returns:
         转换为简体中文的文本
     """
-    return traditional_simplified_converter.convert(text)
\ No newline at end of file
+    return traditional_simplified_converter.convert(text)
+
+def convert_file_traditional_to_simplified(source_path: str, target_path: Optional[str] = None) -> bool:
+    """
+    全局函数：流式将文本文件中的繁体中文转换为简体中文
+    
+    Args:
+        source_path: 源文件路径
+        target_path: 目标文件路径，默认覆盖源文件
+        
+    Returns:
+        内容是否发生变化
+    """
+    return traditional_simplified_converter.convert_file(source_path, target_path)